@@ -3,7 +3,7 @@ API v1 router - Combines all v1 endpoints.
 """
 from fastapi import APIRouter
 
-from app.api.v1 import health, projects, files, knowledge_base, config
+from app.api.v1 import health, projects, files, knowledge_base, config, generation
 
 api_router = APIRouter()
 
@@ -13,3 +13,4 @@ api_router.include_router(projects.router, prefix="/api/v1")
 api_router.include_router(files.router, prefix="/api/v1")
 api_router.include_router(knowledge_base.router, prefix="/api/v1")
 api_router.include_router(config.router, prefix="/api/v1")
+api_router.include_router(generation.router, prefix="/api/v1")
@@ -1,26 +1,66 @@
 """
 Configuration API endpoints - Manage LLM and generation configurations.
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from uuid import UUID
+import json
+import time
 
+from app.core.config import settings
 from app.core.database import get_db
 from app.schemas.configuration import (
     ConfigurationCreate,
     ConfigurationUpdate,
     ConfigurationResponse,
     ConnectionTestRequest,
-    ConnectionTestResponse
+    ConnectionTestResponse,
+    ConnectionTestBatchRequest,
+    ConnectionTestBatchResult
 )
 from app.services.configuration_service import configuration_service
-from app.services.llm_connection_tester import llm_tester
+from app.services.connection_monitor import connection_monitor
+from app.services.llm_connection_tester import PROVIDER_DISPLAY_NAMES, TEST_MODES
+from app.services.llm.ollama_models import ollama_models
+from app.services.model_catalog import ModelCatalogError, model_catalog
+from app.services.llm.response_cache import llm_response_cache
+from app.services.llm.semantic_cache import semantic_response_cache
+from app.services.llm.scheduler import llm_scheduler
+from app.services.llm.context_guard import context_guard
+from app.services.llm.routing import ROUTING_POLICIES, llm_router
+from app.services.llm.stats import llm_stats
+from app.services.tokens import context_windows, token_estimator
 
 
 router = APIRouter(prefix="/config", tags=["Configuration"])
 
 
+# Fields whose change calls for loading the (new) Ollama model
+OLLAMA_WARMUP_FIELDS = {"provider", "model", "base_url", "ollama_keep_alive", "ollama_warmup"}
+
+
+def connection_test_error(provider: str, api_key: Optional[str], mode: str) -> Optional[str]:
+    """Why a connection test request is invalid, or None if it is valid."""
+    if provider not in PROVIDER_DISPLAY_NAMES:
+        return f"Unsupported provider: {provider}"
+    if provider != "ollama" and not api_key:
+        return f"API key is required for {PROVIDER_DISPLAY_NAMES[provider]}"
+    if mode not in TEST_MODES:
+        return f"Unsupported test mode: {mode} (expected one of: {', '.join(TEST_MODES)})"
+    return None
+
+
+def schedule_ollama_warmup(db_config, background_tasks: BackgroundTasks) -> None:
+    """Warm up a configuration's Ollama model after the response is sent."""
+    if db_config.provider == "ollama" and db_config.ollama_warmup:
+        background_tasks.add_task(
+            ollama_models.warm_up, db_config.base_url, db_config.model, db_config.ollama_keep_alive
+        )
+
+
 @router.post(
     "",
     response_model=ConfigurationResponse,
@@ -30,6 +70,7 @@ router = APIRouter(prefix="/config", tags=["Configuration"])
 )
 def create_configuration(
     config_data: ConfigurationCreate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """
@@ -45,9 +86,12 @@ def create_configuration(
     - **kb_enabled**: Enable Knowledge Base context
     - **kb_threshold**: KB similarity threshold
     - **kb_max_docs**: Maximum KB documents to include
+    - **ollama_keep_alive**: How long Ollama keeps the model loaded (e.g. 30m, -1)
+    - **ollama_warmup**: Load the Ollama model now and at startup
     """
     try:
         db_config = configuration_service.create_configuration(db, config_data)
+        schedule_ollama_warmup(db_config, background_tasks)
         
         # Mask API key in response
         response = ConfigurationResponse.model_validate(db_config)
@@ -70,6 +114,134 @@ def create_configuration(
         )
 
 
+@router.get(
+    "/llm-cache",
+    summary="LLM Response Cache Stats",
+    description="Entry count, size and hit rate of the on-disk LLM response cache and of the semantic cache."
+)
+def get_llm_cache_stats():
+    """Get LLM response cache statistics."""
+    return {
+        **llm_response_cache.stats(),
+        "semantic": {"enabled": settings.LLM_SEMANTIC_CACHE_ENABLED, **semantic_response_cache.stats()},
+    }
+
+
+@router.delete(
+    "/llm-cache",
+    summary="Clear LLM Response Cache",
+    description="Delete all cached LLM responses."
+)
+def clear_llm_cache():
+    """Clear the LLM response cache."""
+    removed = llm_response_cache.clear()
+    semantic_response_cache.clear()
+    return {"message": "LLM response cache cleared", "entries_removed": removed}
+
+
+@router.get(
+    "/llm-scheduler",
+    summary="LLM Scheduler Stats",
+    description="Per-provider concurrency, rate limits, queue depth and retry counters."
+)
+def get_llm_scheduler_stats():
+    """Get LLM scheduler statistics."""
+    return llm_scheduler.stats()
+
+
+@router.get(
+    "/llm-stats",
+    summary="LLM Call Stats",
+    description="Rolling latency (p50/p90/p99), time to first token, token and error stats per provider and model."
+)
+def get_llm_stats(
+    provider: Optional[str] = Query(None, description="Only this provider"),
+    model: Optional[str] = Query(None, description="Only this model")
+):
+    """Get rolling LLM call statistics."""
+    return {
+        **llm_stats.stats(),
+        "routing_policy": settings.LLM_ROUTING_POLICY,
+        "models": llm_stats.summaries(provider, model),
+    }
+
+
+@router.get(
+    "/context-window",
+    summary="Model Context Window",
+    description="Context window the guard applies to a model, plus the tokenizer in use and guard counters."
+)
+def get_context_window(
+    provider: str = Query(..., description="LLM provider"),
+    model: str = Query(..., description="Model name")
+):
+    """Get the context window and token-counting setup for a model."""
+    return {
+        "provider": provider,
+        "model": model,
+        "context_window": context_windows.get(provider, model),
+        "tokenizer": token_estimator.backend,
+        "chars_per_token": token_estimator.chars_per_token(model),
+        "guard": context_guard.stats(),
+    }
+
+
+@router.get(
+    "/models",
+    summary="List Provider Models",
+    description="Models offered by a provider, served from a TTL cache. Supports If-None-Match for conditional requests."
+)
+async def list_provider_models(
+    request: Request,
+    provider: str = Query(..., description="LLM provider: ollama, openrouter, deepseek, gemini"),
+    base_url: Optional[str] = Query(None, description="Custom base URL (for Ollama)"),
+    refresh: bool = Query(False, description="Fetch from the provider even if the cached list is fresh"),
+    x_provider_api_key: Optional[str] = Header(None, description="API key; defaults to the key in server settings")
+):
+    """
+    List the models a provider offers.
+    
+    - **provider**: LLM provider
+    - **base_url**: Custom base URL (for Ollama)
+    - **refresh**: Bypass the cache
+    - **X-Provider-Api-Key** header: API key for cloud providers
+    
+    Returns 304 when the client's If-None-Match matches the catalog's ETag.
+    """
+    provider = provider.lower()
+    if provider not in PROVIDER_DISPLAY_NAMES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported provider: {provider}"
+        )
+    
+    try:
+        catalog = await model_catalog.list_models(provider, base_url, x_provider_api_key, refresh=refresh)
+    except ModelCatalogError as e:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Failed to list {PROVIDER_DISPLAY_NAMES[provider]} models: {e}"
+        )
+    
+    etag = f'"{catalog["etag"]}"'
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={int(catalog['expires_in'])}"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return JSONResponse(jsonable_encoder(catalog), headers=headers)
+
+
+@router.get(
+    "/ollama/models",
+    summary="Ollama Model Status",
+    description="Models currently loaded in Ollama (/api/ps) and recent warm-up results."
+)
+async def get_ollama_model_status(
+    base_url: Optional[str] = Query(None, description="Ollama base URL (defaults to OLLAMA_BASE_URL)")
+):
+    """Get loaded Ollama models and warm-up results."""
+    return await ollama_models.status(base_url)
+
+
 @router.get(
     "/{config_id}",
     response_model=ConfigurationResponse,
@@ -106,10 +278,16 @@ def get_configuration(
 )
 def get_project_configuration(
     project_id: UUID,
+    policy: Optional[str] = Query(None, description="Routing policy: configured or fastest (defaults to LLM_ROUTING_POLICY)"),
     db: Session = Depends(get_db)
 ):
     """Get active configuration for a project."""
-    db_config = configuration_service.get_project_configuration(db, project_id)
+    if policy is not None and policy not in ROUTING_POLICIES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid routing policy: {policy}. Use one of: {', '.join(ROUTING_POLICIES)}"
+        )
+    db_config = configuration_service.get_project_configuration(db, project_id, policy)
     
     if not db_config:
         raise HTTPException(
@@ -126,6 +304,44 @@ def get_project_configuration(
     return response
 
 
+@router.get(
+    "/project/{project_id}/route",
+    summary="Project Model Routing",
+    description="The project's active configurations ranked by measured latency and health, as the fastest policy sees them."
+)
+def get_project_route(
+    project_id: UUID,
+    db: Session = Depends(get_db)
+):
+    """Rank a project's configurations for fastest-model routing."""
+    ranking = configuration_service.rank_project_configurations(db, project_id)
+    
+    if not ranking:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No active configuration found for project {project_id}"
+        )
+    
+    return {
+        "project_id": project_id,
+        "policy": settings.LLM_ROUTING_POLICY,
+        "metric": llm_router.metric,
+        "selected_config_id": ranking[0]["candidate"].id,
+        "candidates": [
+            {
+                "config_id": entry["candidate"].id,
+                "provider": entry["provider"],
+                "model": entry["model"],
+                "healthy": entry["healthy"],
+                "reason": entry["reason"],
+                "p50_ms": entry["score_ms"],
+                "samples": entry["samples"],
+            }
+            for entry in ranking
+        ],
+    }
+
+
 @router.patch(
     "/{config_id}",
     response_model=ConfigurationResponse,
@@ -135,6 +351,7 @@ def get_project_configuration(
 def update_configuration(
     config_id: UUID,
     config_data: ConfigurationUpdate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """
@@ -143,6 +360,7 @@ def update_configuration(
     - All fields are optional
     - API key will be re-encrypted if provided
     - Returns updated configuration with masked API key
+    - Changing the Ollama model, URL or keep-alive warms the model up
     """
     db_config = configuration_service.update_configuration(db, config_id, config_data)
     
@@ -152,6 +370,9 @@ def update_configuration(
             detail=f"Configuration with ID {config_id} not found"
         )
     
+    if config_data.model_fields_set & OLLAMA_WARMUP_FIELDS:
+        schedule_ollama_warmup(db_config, background_tasks)
+    
     # Mask API key in response
     response = ConfigurationResponse.model_validate(db_config)
     if db_config.api_key_encrypted:
@@ -161,6 +382,32 @@ def update_configuration(
     return response
 
 
+@router.post(
+    "/{config_id}/warm-up",
+    summary="Warm Up Ollama Model",
+    description="Load a configuration's Ollama model now and apply its keep-alive."
+)
+async def warm_up_configuration(
+    config_id: UUID,
+    db: Session = Depends(get_db)
+):
+    """Warm up the Ollama model of a configuration."""
+    db_config = configuration_service.get_configuration(db, config_id)
+    
+    if not db_config:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Configuration with ID {config_id} not found"
+        )
+    if db_config.provider != "ollama":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Warm-up is only available for Ollama configurations"
+        )
+    
+    return await ollama_models.warm_up(db_config.base_url, db_config.model, db_config.ollama_keep_alive)
+
+
 @router.delete(
     "/{config_id}",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -224,7 +471,7 @@ def list_configurations(
     "/test-connection",
     response_model=ConnectionTestResponse,
     summary="Test LLM Connection",
-    description="Test connection to an LLM provider without saving configuration."
+    description="Test connection to an LLM provider without saving configuration. Probe mode (default) checks reachability and model availability without generating; recent results are served from cache."
 )
 async def test_connection(
     test_request: ConnectionTestRequest
@@ -236,58 +483,151 @@ async def test_connection(
     - **model**: Model name to test
     - **base_url**: Custom base URL (for Ollama)
     - **api_key**: API key (for cloud providers)
+    - **mode**: probe (no generation) or full (short generation)
+    - **refresh**: Ignore a cached result and test now
     
     Returns connection status, latency, and any error messages.
     """
     provider = test_request.provider.lower()
     
-    # Test based on provider
-    if provider == "ollama":
-        result = await llm_tester.test_ollama_connection(
-            test_request.base_url,
-            test_request.model
-        )
-    elif provider == "openrouter":
-        if not test_request.api_key:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="API key is required for OpenRouter"
-            )
-        result = await llm_tester.test_openrouter_connection(
-            test_request.api_key,
-            test_request.model
-        )
-    elif provider == "deepseek":
-        if not test_request.api_key:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="API key is required for Deepseek"
-            )
-        result = await llm_tester.test_deepseek_connection(
-            test_request.api_key,
-            test_request.model
-        )
-    elif provider == "gemini":
-        if not test_request.api_key:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="API key is required for Google Gemini"
-            )
-        result = await llm_tester.test_gemini_connection(
-            test_request.api_key,
-            test_request.model
-        )
-    else:
+    error = connection_test_error(provider, test_request.api_key, test_request.mode)
+    if error:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Unsupported provider: {provider}"
+            detail=error
         )
     
+    # Served from cache when a recent result exists
+    result = await connection_monitor.check(
+        provider,
+        test_request.model,
+        base_url=test_request.base_url,
+        api_key=test_request.api_key,
+        mode=test_request.mode,
+        refresh=test_request.refresh
+    )
+    
     return ConnectionTestResponse(
         success=result["success"],
         message=result["message"],
         provider=provider,
         model=test_request.model,
         latency_ms=result.get("latency_ms"),
-        error=result.get("error")
+        error=result.get("error"),
+        mode=result["mode"],
+        cached=result["cached"],
+        checked_at=result["checked_at"]
     )
+
+
+@router.post(
+    "/test-connections",
+    summary="Test LLM Connections",
+    description="Test several LLM connections concurrently under a global deadline, streaming results as NDJSON as they complete."
+)
+async def test_connections(
+    batch_request: ConnectionTestBatchRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Test many LLM connections at once.
+    
+    - **targets**: Connections to test; when omitted, all active configurations are tested
+    - **project_id**: Only test configurations of this project
+    - **mode**: Test mode for configured connections (probe or full)
+    - **refresh**: Ignore cached results and test now
+    - **deadline_seconds**: Time budget for the whole batch
+    
+    Streams one JSON line per connection in completion order, then a summary
+    line. Connections still running at the deadline are reported as timed out.
+    """
+    targets = []  # (configuration_id, ConnectionTestRequest)
+    if batch_request.targets is not None:
+        targets = [(None, target) for target in batch_request.targets]
+    else:
+        db_configs = configuration_service.list_configurations(db, project_id=batch_request.project_id)
+        seen = set()
+        for db_config in db_configs:
+            api_key = configuration_service.decrypt_api_key(db_config.api_key_encrypted) if db_config.api_key_encrypted else None
+            key = connection_monitor.target_key(db_config.provider, db_config.model, db_config.base_url, api_key, batch_request.mode)
+            if key in seen:
+                continue
+            seen.add(key)
+            targets.append((db_config.id, ConnectionTestRequest(
+                provider=db_config.provider,
+                model=db_config.model,
+                base_url=db_config.base_url,
+                api_key=api_key,
+                mode=batch_request.mode,
+                refresh=batch_request.refresh
+            )))
+    
+    deadline = batch_request.deadline_seconds or settings.LLM_CONNECTION_TEST_DEADLINE
+    
+    def batch_result(index: int, **fields) -> str:
+        configuration_id, target = targets[index]
+        return ConnectionTestBatchResult(
+            index=index,
+            provider=target.provider.lower(),
+            model=target.model,
+            base_url=target.base_url,
+            configuration_id=configuration_id,
+            **fields
+        ).model_dump_json() + "\n"
+    
+    async def stream_results():
+        started = time.perf_counter()
+        counts = {"succeeded": 0, "failed": 0, "timed_out": 0}
+        
+        # Invalid targets fail right away; the rest are tested concurrently
+        runnable, checks = [], []
+        for index, (_, target) in enumerate(targets):
+            provider = target.provider.lower()
+            error = connection_test_error(provider, target.api_key, target.mode)
+            if error:
+                counts["failed"] += 1
+                yield batch_result(index, success=False, message="Invalid connection test", error=error, mode=target.mode)
+                continue
+            runnable.append(index)
+            checks.append({
+                "provider": provider,
+                "model": target.model,
+                "base_url": target.base_url,
+                "api_key": target.api_key,
+                "mode": target.mode,
+                "refresh": target.refresh or batch_request.refresh,
+            })
+        
+        async for position, result in connection_monitor.check_many(checks, deadline):
+            index = runnable[position]
+            if result is None:
+                counts["timed_out"] += 1
+                yield batch_result(
+                    index,
+                    success=False,
+                    message="Connection test did not finish before the deadline",
+                    error=f"Timed out after {deadline:g}s",
+                    mode=checks[position]["mode"],
+                    timed_out=True
+                )
+                continue
+            counts["succeeded" if result["success"] else "failed"] += 1
+            yield batch_result(
+                index,
+                success=result["success"],
+                message=result["message"],
+                latency_ms=result.get("latency_ms"),
+                error=result.get("error"),
+                mode=result["mode"],
+                cached=result["cached"],
+                checked_at=result["checked_at"]
+            )
+        
+        yield json.dumps({
+            "type": "summary",
+            "total": len(targets),
+            **counts,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+        }) + "\n"
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
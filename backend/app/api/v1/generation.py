@@ -0,0 +1,188 @@
+"""
+Generation endpoints - Start and monitor test case generation runs.
+"""
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import Any, Dict, Optional
+from uuid import UUID
+import asyncio
+import json
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.models import Project
+from app.schemas.generation import GenerationRunResponse
+from app.services.generation import (
+    CheckpointError,
+    GenerationInputError,
+    GenerationInputs,
+    GenerationRun,
+    generation_jobs,
+    load_generation_inputs,
+)
+
+router = APIRouter(prefix="/generate", tags=["Generation"])
+
+# Progress streams must reach the client unbuffered
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def project_generation_inputs(project_id: UUID, db: Session) -> GenerationInputs:
+    """Load a project's generation inputs, with HTTP errors for missing ones."""
+    project = db.query(Project).filter(Project.id == project_id, Project.is_active == True).first()
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Project with id {project_id} not found"
+        )
+
+    try:
+        return load_generation_inputs(db, project_id)
+    except GenerationInputError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+async def start_project_generation(project_id: UUID, db: Session) -> GenerationRun:
+    """Start (or join) a project's generation run, with HTTP errors for missing inputs."""
+    # Loading runs DB queries and may embed the KB query; keep it off the event loop
+    inputs = await asyncio.to_thread(project_generation_inputs, project_id, db)
+    return await generation_jobs.start(inputs)
+
+
+def sse_message(event: Optional[Dict[str, Any]]) -> str:
+    """One Server-Sent Events message (a comment for keep-alives)."""
+    if event is None:
+        return ": keep-alive\n\n"
+    return f"id: {event['id']}\ndata: {json.dumps(jsonable_encoder(event))}\n\n"
+
+
+@router.post(
+    "/{project_id}",
+    response_model=GenerationRunResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Start Generation",
+    description="Start generating test cases for a project from its extracted requirement files."
+)
+async def start_generation(
+    project_id: UUID,
+    db: Session = Depends(get_db)
+):
+    """
+    Start a background generation run for a project.
+
+    The Planner's scenarios are generated concurrently and each test case is
+    validated and saved as soon as it is written. If a run is already in
+    progress for the project it is returned instead of starting another.
+    Poll GET on the same path, or follow GET /stream, for progress.
+    """
+    run = await start_project_generation(project_id, db)
+    return run.to_dict()
+
+
+@router.post(
+    "/{project_id}/resume",
+    response_model=GenerationRunResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Resume Generation",
+    description="Resume a failed or interrupted generation run from its checkpoints, skipping completed work."
+)
+async def resume_generation(
+    project_id: UUID,
+    run_id: Optional[str] = Query(None, description="Run to resume (default: the project's latest checkpointed run)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Resume a project's generation run from its checkpoints.
+
+    Stored Planner scenarios, completed scenarios' Generator output and
+    persisted test cases are reused, so only the unfinished work calls the
+    LLM again; new test cases are numbered after the existing ones. Follow
+    GET /stream for progress (it replays restored test cases too).
+
+    Fails with 409 if the run has no checkpoints or the project's
+    requirements, KB context or model changed since it ran.
+    """
+    inputs = await asyncio.to_thread(project_generation_inputs, project_id, db)
+    try:
+        run = await generation_jobs.resume(inputs, run_id)
+    except CheckpointError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return run.to_dict()
+
+
+@router.get(
+    "/{project_id}/stream",
+    summary="Stream Generation Progress",
+    description="Server-Sent Events feed of a generation run: stage steps, progress with ETA and token throughput, each saved test case, then complete or error."
+)
+async def stream_generation(
+    project_id: UUID,
+    start: bool = Query(True, description="Start a new run if none is in progress"),
+    last_event_id: Optional[int] = Header(None, description="Resume after this message id (sent by EventSource on reconnect)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Follow a project's generation run over Server-Sent Events.
+
+    - **start**: Start a run when none is in progress (otherwise the latest run is replayed)
+    - **Last-Event-ID** header: Reconnecting clients resume the same run after this message
+
+    Each message is a JSON object with a `type` of progress, step, kb_message,
+    test_case, complete or error. Messages sent before the client connected
+    are replayed first, so late subscribers see the whole run.
+    """
+    run = generation_jobs.get(project_id)
+    if last_event_id is None and start and (run is None or run.finished):
+        run = await start_project_generation(project_id, db)
+    if run is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No generation run found for project {project_id}"
+        )
+
+    async def messages():
+        async for event in run.events.follow(last_event_id or 0, heartbeat=settings.GENERATION_SSE_HEARTBEAT_SECONDS):
+            yield sse_message(event)
+
+    return StreamingResponse(messages(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@router.websocket("/{project_id}/ws")
+async def generation_websocket(
+    websocket: WebSocket,
+    project_id: UUID,
+    after: int = 0
+):
+    """Follow a project's latest generation run over a WebSocket (same messages as the SSE feed)."""
+    await websocket.accept()
+    run = generation_jobs.get(project_id)
+    if run is None:
+        await websocket.send_json({"type": "error", "error": f"No generation run found for project {project_id}"})
+        await websocket.close()
+        return
+    try:
+        async for event in run.events.follow(after, heartbeat=settings.GENERATION_SSE_HEARTBEAT_SECONDS):
+            if event is not None:
+                await websocket.send_json(jsonable_encoder(event))
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+
+@router.get(
+    "/{project_id}",
+    response_model=GenerationRunResponse,
+    summary="Generation Status",
+    description="Progress of the project's latest generation run."
+)
+def get_generation(project_id: UUID):
+    """Get the latest generation run of a project."""
+    run = generation_jobs.get(project_id)
+    if run is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No generation run found for project {project_id}"
+        )
+    return run.to_dict()
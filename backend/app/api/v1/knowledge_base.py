@@ -4,17 +4,33 @@ Knowledge Base document upload and management endpoints.
 from pathlib import Path
 from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query, BackgroundTasks
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
 from app.core.config import settings
 from app.models.knowledge_base_document import KnowledgeBaseDocument
+from app.models.project import Project
 from app.schemas.knowledge_base import (
     KnowledgeBaseDocumentResponse,
-    KnowledgeBaseDocumentListResponse
+    KnowledgeBaseDocumentListResponse,
+    KBSearchResult,
+    KBSearchResponse,
+    KBContextResponse,
+    KBNearDuplicate,
+    KBEmbeddingJobResponse
 )
+from app.services.configuration_service import configuration_service
 from app.services.parsers import PDFParser, TextParser
+from app.services.kb import (
+    kb_index_manager,
+    kb_context_builder,
+    kb_context_cache,
+    kb_duplicate_detector,
+    kb_embedding_jobs,
+    kb_retriever,
+    estimate_similarity
+)
 
 router = APIRouter()
 
@@ -34,23 +50,169 @@ def get_kb_parser(file_extension: str):
         return None
 
 
+def resolve_project_id(db: Session, project_id: Optional[UUID]) -> UUID:
+    """Use the given project or fall back to the KB's default project."""
+    if project_id is not None:
+        return project_id
+    default_project = db.query(Project).first()
+    if not default_project:
+        raise HTTPException(status_code=404, detail="No project found")
+    return default_project.id
+
+
+def reindex_kb_document(project_id: UUID, doc_id: UUID, text: str, filename: str):
+    """Index a KB document's chunks, then invalidate the project's cached KB contexts."""
+    kb_index_manager.index_document(project_id, doc_id, text, filename)
+    kb_context_cache.bump_version(project_id)
+
+
+def index_kb_document(kb_document: KnowledgeBaseDocument, background_tasks: BackgroundTasks):
+    """Invalidate cached KB contexts and schedule (re-)indexing after the response is sent."""
+    kb_context_cache.bump_version(kb_document.project_id)
+    kb_duplicate_detector.add(kb_document.project_id, kb_document.id, kb_document.minhash_signature)
+    background_tasks.add_task(
+        reindex_kb_document,
+        kb_document.project_id,
+        kb_document.id,
+        kb_document.extracted_text,
+        kb_document.filename
+    )
+    if kb_embedding_jobs.enabled:
+        # Remote embeddings are computed by a batched background job
+        background_tasks.add_task(
+            kb_embedding_jobs.start,
+            kb_document.project_id,
+            kb_document.id,
+            kb_document.extracted_text,
+            kb_document.filename
+        )
+
+
+def unindex_kb_document(project_id: UUID, doc_id: UUID):
+    """Remove a KB document from search and invalidate cached KB contexts."""
+    kb_index_manager.remove_document(project_id, doc_id)
+    kb_duplicate_detector.remove(project_id, doc_id)
+    kb_context_cache.bump_version(project_id)
+
+
+def activate_kb_document(
+    db: Session,
+    kb_document: KnowledgeBaseDocument,
+    supersede_near_duplicates: bool,
+    background_tasks: BackgroundTasks
+) -> List[KBNearDuplicate]:
+    """
+    Make a new or reactivated KB document current, then commit and index it.
+    
+    Active near-duplicates are reported; with `supersede_near_duplicates`
+    they are deactivated and point to this document. A document superseded
+    by a still-active version is only reactivated with
+    `supersede_near_duplicates` (which then supersedes that version), so the
+    same content is never active twice.
+    
+    Args:
+        db: Database session
+        kb_document: Document to activate (may still be pending insertion)
+        supersede_near_duplicates: Deactivate near-duplicates in favour of this document
+        background_tasks: Used to index the document for KB search
+        
+    Returns:
+        The near-duplicates found
+        
+    Raises:
+        HTTPException: 409 when a still-active version superseded the document
+    """
+    # Keep a pending new document out of the queries below
+    with db.no_autoflush:
+        superseding_doc = None
+        if kb_document.superseded_by:
+            superseding_doc = db.query(KnowledgeBaseDocument).filter(
+                KnowledgeBaseDocument.id == kb_document.superseded_by,
+                KnowledgeBaseDocument.is_active == True
+            ).first()
+        if superseding_doc and not supersede_near_duplicates:
+            raise HTTPException(
+                status_code=409,
+                detail=(
+                    f"Document was superseded by {superseding_doc.filename}; "
+                    "pass supersede_near_duplicates=true to make it current again"
+                )
+            )
+        
+        if not kb_document.minhash_signature:
+            kb_document.minhash_signature = kb_duplicate_detector.signature(kb_document.extracted_text)
+        near_matches = kb_duplicate_detector.find_near_duplicates(
+            db, kb_document.project_id, kb_document.minhash_signature,
+            exclude_id=kb_document.id
+        )
+        if superseding_doc and str(superseding_doc.id) not in {match_id for match_id, _ in near_matches}:
+            near_matches.append((str(superseding_doc.id), estimate_similarity(
+                kb_document.minhash_signature,
+                superseding_doc.minhash_signature or kb_duplicate_detector.signature(superseding_doc.extracted_text)
+            )))
+    
+    kb_document.is_active = True
+    kb_document.superseded_by = None
+    db.commit()
+    db.refresh(kb_document)
+    
+    near_duplicates = []
+    for match_id, similarity in near_matches:
+        match_doc = db.query(KnowledgeBaseDocument).filter(
+            KnowledgeBaseDocument.id == UUID(match_id)
+        ).first()
+        if not match_doc:
+            continue
+        if supersede_near_duplicates:
+            match_doc.is_active = False
+            match_doc.superseded_by = kb_document.id
+        near_duplicates.append(KBNearDuplicate(
+            doc_id=match_doc.id,
+            filename=match_doc.filename,
+            similarity=round(similarity, 4),
+            superseded=supersede_near_duplicates
+        ))
+    if supersede_near_duplicates and near_duplicates:
+        db.commit()
+        db.refresh(kb_document)
+        for duplicate in near_duplicates:
+            unindex_kb_document(kb_document.project_id, duplicate.doc_id)
+    
+    index_kb_document(kb_document, background_tasks)
+    return near_duplicates
+
+
 @router.post("/knowledge-base", response_model=KnowledgeBaseDocumentResponse)
 async def upload_kb_document(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     category: Optional[str] = Query(None, description="Document category (e.g., system_guide, process, user_manual)"),
+    supersede_near_duplicates: Optional[bool] = Query(None, description="Deactivate existing near-duplicate documents (defaults to KB_AUTO_SUPERSEDE_DUPLICATES)"),
     db: Session = Depends(get_db)
 ):
     """
     Upload a Knowledge Base document.
     
+    Exact duplicates (same SHA-256) are rejected. Near-duplicates (e.g. a
+    re-exported or lightly edited guide) are detected with MinHash/LSH and
+    returned in `near_duplicates`; with `supersede_near_duplicates` they are
+    deactivated and point to the new document via `superseded_by`.
+    Re-uploading an inactive document reactivates it like
+    `PATCH is_active=true` does (see `activate_kb_document`).
+    
     Args:
+        background_tasks: Used to index the document for KB search
         file: Uploaded KB document (PDF or text)
         category: Optional document category
+        supersede_near_duplicates: Optional override for auto-superseding
         db: Database session
         
     Returns:
         Created KB document record
     """
+    if supersede_near_duplicates is None:
+        supersede_near_duplicates = settings.KB_AUTO_SUPERSEDE_DUPLICATES
+
     # Validate file extension
     file_extension = Path(file.filename).suffix
     kb_allowed_extensions = settings.KB_ALLOWED_EXTENSIONS.split(',')
@@ -117,51 +279,57 @@ async def upload_kb_document(
             KnowledgeBaseDocument.file_hash == file_hash
         ).first()
         
-        if existing_doc:
+        if existing_doc and existing_doc.is_active:
             temp_file_path.unlink()
-            if existing_doc.is_active:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Duplicate document already exists: {existing_doc.filename}"
-                )
-            else:
-                # Reactivate existing document
-                existing_doc.is_active = True
-                db.commit()
-                db.refresh(existing_doc)
-                return existing_doc
-        
-        # Get or create default project (for now, use project_id from first project or create one)
-        # TODO: Accept project_id as parameter in Phase 2
-        from app.models.project import Project
-        default_project = db.query(Project).first()
-        if not default_project:
-            default_project = Project(name="Default Project", description="Auto-created for KB documents")
-            db.add(default_project)
-            db.commit()
-            db.refresh(default_project)
+            raise HTTPException(
+                status_code=400,
+                detail=f"Duplicate document already exists: {existing_doc.filename}"
+            )
         
-        # Create KB document record
-        kb_document = KnowledgeBaseDocument(
-            project_id=default_project.id,
-            filename=file.filename,
-            file_type=file_extension,
-            doc_type=category or "general",
-            file_size=len(file_content),
-            file_hash=file_hash,
-            extracted_text=extracted_text,
-            extraction_status="completed",
-            is_active=True
-        )
+        if existing_doc:
+            project_id = existing_doc.project_id
+        else:
+            # Get or create default project (for now, use project_id from first project or create one)
+            # TODO: Accept project_id as parameter in Phase 2
+            default_project = db.query(Project).first()
+            if not default_project:
+                default_project = Project(name="Default Project", description="Auto-created for KB documents")
+                db.add(default_project)
+                db.commit()
+                db.refresh(default_project)
+            project_id = default_project.id
         
-        db.add(kb_document)
-        db.commit()
-        db.refresh(kb_document)
+        minhash_signature = kb_duplicate_detector.signature(extracted_text)
+        if existing_doc:
+            # Reactivate the earlier upload of this exact file
+            kb_document = existing_doc
+            kb_document.minhash_signature = minhash_signature
+        else:
+            # Create KB document record
+            kb_document = KnowledgeBaseDocument(
+                project_id=project_id,
+                filename=file.filename,
+                file_type=file_extension,
+                doc_type=category or "general",
+                file_size=len(file_content),
+                file_hash=file_hash,
+                extracted_text=extracted_text,
+                extraction_status="completed",
+                extraction_stats=parse_result["metadata"].get("normalization"),
+                minhash_signature=minhash_signature,
+                is_active=True
+            )
+            db.add(kb_document)
         
         # Clean up temp file
         temp_file_path.unlink()
         
-        return kb_document
+        # Check for near-duplicates (by MinHash signature)
+        near_duplicates = activate_kb_document(db, kb_document, supersede_near_duplicates, background_tasks)
+        
+        response = KnowledgeBaseDocumentResponse.model_validate(kb_document)
+        response.near_duplicates = near_duplicates
+        return response
         
     except HTTPException:
         raise
@@ -212,6 +380,116 @@ def list_kb_documents(
     )
 
 
+@router.get("/knowledge-base/search", response_model=KBSearchResponse)
+async def search_kb_documents(
+    q: str = Query(..., min_length=1, description="Search query"),
+    top_k: int = Query(5, ge=1, le=50, description="Number of chunks to return"),
+    mode: str = Query("hybrid", pattern="^(vector|lexical|hybrid)$", description="vector, lexical (BM25) or hybrid (rank-fused)"),
+    ef_search: Optional[int] = Query(None, ge=1, le=2000, description="HNSW beam width (higher = better recall, slower)"),
+    project_id: Optional[UUID] = Query(None, description="Project to search (defaults to the KB's default project)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Search active Knowledge Base documents.
+    
+    Hybrid mode runs keyword and vector search concurrently and merges them
+    with reciprocal rank fusion; scores are then fused RRF scores.
+    
+    Args:
+        q: Search query
+        top_k: Number of chunks to return
+        mode: Retrieval mode
+        ef_search: Optional HNSW recall/latency knob
+        project_id: Optional project ID
+        db: Database session
+        
+    Returns:
+        Ranked KB chunks with scores and per-stage latency
+    """
+    project_id = resolve_project_id(db, project_id)
+    
+    retrieval = await kb_retriever.search(
+        db, project_id, q, top_k=top_k, mode=mode, ef_search=ef_search
+    )
+    
+    return KBSearchResponse(
+        query=q,
+        mode=retrieval.mode,
+        results=[
+            KBSearchResult(
+                doc_id=hit.chunk.doc_id,
+                filename=hit.chunk.filename,
+                chunk_index=hit.chunk.chunk_index,
+                page=hit.chunk.page,
+                text=hit.chunk.text,
+                score=round(hit.score, 4)
+            )
+            for hit in retrieval.hits
+        ],
+        index_type=kb_index_manager.index_type,
+        latency_ms=retrieval.timings_ms["total"],
+        timings_ms=retrieval.timings_ms
+    )
+
+
+@router.get("/knowledge-base/context", response_model=KBContextResponse)
+def preview_kb_context(
+    q: str = Query(..., min_length=1, description="Requirement or scenario text to retrieve context for"),
+    max_tokens: Optional[int] = Query(None, ge=1, le=100000, description="Token budget (defaults to the configuration's budget)"),
+    config_id: Optional[UUID] = Query(None, description="Configuration whose model budget and kb_max_docs apply"),
+    project_id: Optional[UUID] = Query(None, description="Project to search (defaults to the KB's default project)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Preview the packed KB context an agent prompt would receive.
+    
+    Args:
+        q: Query text
+        max_tokens: Optional explicit token budget
+        config_id: Optional configuration ID
+        project_id: Optional project ID
+        db: Database session
+        
+    Returns:
+        Packed context with citations and token accounting
+    """
+    config = None
+    if config_id is not None:
+        config = configuration_service.get_configuration(db, config_id)
+        if not config:
+            raise HTTPException(status_code=404, detail="Configuration not found")
+        project_id = project_id or config.project_id
+    project_id = resolve_project_id(db, project_id)
+    
+    packed = kb_context_builder.build_kb_context(
+        db, project_id, q, config=config, token_budget=max_tokens
+    )
+    
+    return KBContextResponse(
+        query=q,
+        context=packed.text,
+        citations=packed.citations,
+        tokens_used=packed.tokens_used,
+        token_budget=packed.token_budget,
+        chunks_considered=packed.chunks_considered,
+        chunks_packed=packed.chunks_packed,
+        duplicates_skipped=packed.duplicates_skipped,
+        kb_version=packed.kb_version,
+        cached=packed.cached
+    )
+
+
+@router.get("/knowledge-base/context/cache")
+def get_kb_context_cache_stats():
+    """
+    Get KB context cache statistics.
+    
+    Returns:
+        Entry count, hits, misses and hit rate
+    """
+    return kb_context_cache.stats()
+
+
 @router.get("/knowledge-base/{doc_id}", response_model=KnowledgeBaseDocumentResponse)
 def get_kb_document(
     doc_id: UUID,
@@ -237,6 +515,66 @@ def get_kb_document(
     return kb_document
 
 
+@router.post("/knowledge-base/{doc_id}/embeddings", response_model=KBEmbeddingJobResponse, status_code=202)
+async def start_kb_embedding_job(
+    doc_id: UUID,
+    db: Session = Depends(get_db)
+):
+    """
+    Start or resume the background embedding job for a KB document.
+    
+    Chunks are embedded in batches with bounded concurrency and a
+    token-bucket rate limit; batches stored by an earlier, interrupted run
+    are skipped. Poll GET on the same path for progress and throughput.
+    
+    Args:
+        doc_id: UUID of the KB document
+        db: Database session
+        
+    Returns:
+        Embedding job status
+    """
+    if not kb_embedding_jobs.enabled:
+        raise HTTPException(
+            status_code=400,
+            detail=f"KB embedding provider '{settings.KB_EMBEDDING_PROVIDER}' embeds inline; no job needed"
+        )
+    
+    kb_document = db.query(KnowledgeBaseDocument).filter(
+        KnowledgeBaseDocument.id == doc_id
+    ).first()
+    
+    if not kb_document:
+        raise HTTPException(status_code=404, detail="KB document not found")
+    if not kb_document.is_active:
+        raise HTTPException(status_code=400, detail="KB document is not active")
+    
+    job = await kb_embedding_jobs.start(
+        kb_document.project_id,
+        kb_document.id,
+        kb_document.extracted_text,
+        kb_document.filename
+    )
+    return job.to_dict()
+
+
+@router.get("/knowledge-base/{doc_id}/embeddings", response_model=KBEmbeddingJobResponse)
+def get_kb_embedding_job(doc_id: UUID):
+    """
+    Get the embedding job status for a KB document.
+    
+    Args:
+        doc_id: UUID of the KB document
+        
+    Returns:
+        Embedding job progress and throughput
+    """
+    job = kb_embedding_jobs.get(doc_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="No embedding job for this KB document")
+    return job.to_dict()
+
+
 @router.delete("/knowledge-base/{doc_id}")
 def delete_kb_document(
     doc_id: UUID,
@@ -261,39 +599,54 @@ def delete_kb_document(
     if not kb_document:
         raise HTTPException(status_code=404, detail="KB document not found")
     
+    project_id = kb_document.project_id
+    
     if hard_delete:
         # Permanently delete
         db.delete(kb_document)
         db.commit()
+        unindex_kb_document(project_id, doc_id)
+        kb_embedding_jobs.discard(doc_id)
         return {"message": "KB document permanently deleted", "doc_id": str(doc_id)}
     else:
         # Soft delete (deactivate)
         kb_document.is_active = False
         db.commit()
+        unindex_kb_document(project_id, doc_id)
         return {"message": "KB document deactivated", "doc_id": str(doc_id)}
 
 
 @router.patch("/knowledge-base/{doc_id}", response_model=KnowledgeBaseDocumentResponse)
 def update_kb_document(
     doc_id: UUID,
+    background_tasks: BackgroundTasks,
     filename: Optional[str] = Query(None, description="New document filename"),
     doc_type: Optional[str] = Query(None, description="New document type/category"),
     is_active: Optional[bool] = Query(None, description="Active status"),
+    supersede_near_duplicates: Optional[bool] = Query(None, description="On reactivation, deactivate near-duplicate documents (defaults to KB_AUTO_SUPERSEDE_DUPLICATES)"),
     db: Session = Depends(get_db)
 ):
     """
     Update a Knowledge Base document.
     
+    Reactivating a document runs the upload's near-duplicate check (see
+    `activate_kb_document`).
+    
     Args:
         doc_id: UUID of the KB document
         filename: Optional new document filename
         doc_type: Optional new document type/category
         is_active: Optional active status
+        supersede_near_duplicates: Optional override for auto-superseding on reactivation
+        background_tasks: Used to re-index a reactivated document
         db: Database session
         
     Returns:
         Updated KB document record
     """
+    if supersede_near_duplicates is None:
+        supersede_near_duplicates = settings.KB_AUTO_SUPERSEDE_DUPLICATES
+
     kb_document = db.query(KnowledgeBaseDocument).filter(
         KnowledgeBaseDocument.id == doc_id
     ).first()
@@ -306,10 +659,25 @@ def update_kb_document(
         kb_document.filename = filename
     if doc_type is not None:
         kb_document.doc_type = doc_type
-    if is_active is not None:
-        kb_document.is_active = is_active
+    
+    if is_active is True:
+        near_duplicates = activate_kb_document(db, kb_document, supersede_near_duplicates, background_tasks)
+        response = KnowledgeBaseDocumentResponse.model_validate(kb_document)
+        response.near_duplicates = near_duplicates
+        return response
+    
+    if is_active is False:
+        kb_document.is_active = False
     
     db.commit()
     db.refresh(kb_document)
     
+    # Keep the search index and cached KB contexts in sync
+    if is_active is False:
+        unindex_kb_document(kb_document.project_id, doc_id)
+    else:
+        if filename is not None:
+            kb_index_manager.rename_document(kb_document.project_id, doc_id, filename)
+        kb_context_cache.bump_version(kb_document.project_id)
+    
     return kb_document
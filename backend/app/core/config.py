@@ -3,7 +3,7 @@ Application configuration settings using Pydantic Settings.
 Loads environment variables from .env file.
 """
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 from pathlib import Path
 
 # Get the backend directory path
@@ -39,9 +39,84 @@ class Settings(BaseSettings):
     
     # LLM Providers
     OLLAMA_BASE_URL: str = "http://127.0.0.1:11434"
+    OLLAMA_KEEP_ALIVE: str = "30m"  # How long Ollama keeps a model loaded after a call ("-1" = forever)
+    OLLAMA_WARMUP_ON_STARTUP: bool = True  # Load configured Ollama models when the app starts
+    OLLAMA_WARMUP_TIMEOUT: float = 300.0  # Seconds; loading a large model can take minutes
     OPENROUTER_API_KEY: str = ""
     DEEPSEEK_API_KEY: str = ""
     GOOGLE_GEMINI_API_KEY: str = ""
+    OPENROUTER_BASE_URL: str = "https://openrouter.ai/api/v1"
+    DEEPSEEK_BASE_URL: str = "https://api.deepseek.com/v1"
+    GEMINI_BASE_URL: str = "https://generativelanguage.googleapis.com/v1beta"
+    LLM_DEFAULT_CONTEXT_WINDOW: int = 8192  # Tokens; used when the model's window is unknown
+    LLM_CONTEXT_WINDOWS: Dict[str, int] = {}  # Per-model overrides, e.g. {"llama3": 8192}
+    LLM_CONTEXT_OVERFLOW: str = "reject"  # Oversized prompts: "reject" before sending, or "trim" to fit
+    LLM_MIN_COMPLETION_TOKENS: int = 256  # Trimming never leaves less room than this for the answer
+    LLM_TOKENIZER: str = "approx"  # "approx" (calibrated estimate) or "tiktoken" (BPE, if installed and cached)
+    LLM_TOKENIZER_ENCODING: str = "o200k_base"
+    LLM_REQUEST_TIMEOUT: float = 120.0  # Seconds; read timeout between streamed chunks
+    
+    # LLM Scheduling (per provider; 0 disables a limit)
+    LLM_PROVIDER_LIMITS: Dict[str, Dict[str, float]] = {
+        "ollama": {"max_concurrency": 2, "requests_per_minute": 0, "tokens_per_minute": 0},
+        "openrouter": {"max_concurrency": 8, "requests_per_minute": 200, "tokens_per_minute": 0},
+        "deepseek": {"max_concurrency": 8, "requests_per_minute": 300, "tokens_per_minute": 0},
+        "gemini": {"max_concurrency": 4, "requests_per_minute": 15, "tokens_per_minute": 1000000},
+    }
+    LLM_MAX_RETRIES: int = 3  # Retries for rate limits, 5xx and network errors
+    LLM_RETRY_BASE_DELAY: float = 1.0  # Seconds; doubled per attempt, with jitter
+    LLM_RETRY_MAX_DELAY: float = 30.0
+    
+    # LLM Circuit Breaker (rolling per-provider error and latency stats)
+    LLM_CIRCUIT_WINDOW_SECONDS: float = 120.0
+    LLM_CIRCUIT_MIN_CALLS: int = 5  # Calls in the window before the breaker can trip
+    LLM_CIRCUIT_FAILURE_RATE: float = 0.5  # Share of failed or slow calls that opens the circuit
+    LLM_CIRCUIT_SLOW_CALL_MS: float = 15000.0  # Time to first token above this counts as a failure
+    LLM_CIRCUIT_COOLDOWN_SECONDS: float = 30.0  # Open time before a half-open probe call
+    
+    # LLM Hedged Requests (fire an alternate provider when the primary runs late)
+    LLM_HEDGE_ENABLED: bool = True  # When off, alternates are only used as failover
+    LLM_HEDGE_PERCENTILE: float = 95.0  # Hedge once time to first token exceeds this percentile
+    LLM_HEDGE_MIN_DELAY_MS: float = 500.0
+    LLM_HEDGE_DEFAULT_DELAY_MS: float = 10000.0  # Until a provider has enough latency samples
+    
+    # LLM Connection Status (cached connection tests, kept fresh by a background prober)
+    LLM_CONNECTION_CACHE_TTL_SECONDS: float = 60.0
+    LLM_PROBE_INTERVAL_SECONDS: float = 30.0  # Background re-probe interval; 0 disables the prober
+    LLM_PROBE_IDLE_SECONDS: float = 900.0  # Stop probing targets nobody has asked about for this long
+    LLM_PROBE_TIMEOUT: float = 3.0
+    LLM_CONNECTION_TEST_DEADLINE: float = 15.0  # Seconds; budget for testing all providers at once
+    LLM_MODEL_CATALOG_TTL_SECONDS: float = 600.0  # Provider model lists are re-fetched after this
+    
+    # LLM Response Cache (used for temperature 0 or when a request asks for it)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_DIR: str = "./llm_cache"
+    LLM_CACHE_MAX_MB: int = 200  # Least recently used entries are evicted beyond this
+    LLM_CACHE_TTL_HOURS: float = 168.0  # One week
+    LLM_SEMANTIC_CACHE_ENABLED: bool = False  # Also serve near-identical prompts (requests with a cache_scope)
+    LLM_SEMANTIC_CACHE_THRESHOLD: float = 0.95  # Minimum cosine similarity of normalized prompts
+    LLM_SEMANTIC_CACHE_MAX_ENTRIES: int = 200  # Indexed prompts per scope; oldest dropped first
+    LLM_SEMANTIC_CACHE_DIM: int = 1024
+    
+    # LLM HTTP Connection Pooling
+    LLM_HTTP_MAX_CONNECTIONS: int = 20  # Per provider base URL
+    LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    LLM_HTTP_KEEPALIVE_EXPIRY: float = 60.0  # Seconds an idle connection is kept open
+    LLM_HTTP_CONNECT_TIMEOUT: float = 5.0
+    LLM_HTTP2_ENABLED: bool = True  # Used for https providers when the h2 package is installed
+    
+    # LLM Cassettes (record/replay provider traffic for reproducible benchmarks)
+    LLM_CASSETTE_MODE: str = ""  # "" (off), "record" or "replay"
+    LLM_CASSETTE_PATH: str = "./cassettes/llm.json"
+    LLM_CASSETTE_SPEED: float = 0.0  # Replay timing: 0 = full speed, 1.0 = as recorded
+    
+    # LLM Call Stats and Routing
+    LLM_STATS_WINDOW_SECONDS: float = 3600.0  # Percentiles cover calls from the last hour
+    LLM_STATS_MAX_SAMPLES: int = 1000  # Per provider/model
+    LLM_ROUTING_POLICY: str = "configured"  # "configured" (configured order) or "fastest" (fastest healthy model)
+    LLM_ROUTING_METRIC: str = "latency"  # "latency" (total) or "first_token"
+    LLM_ROUTING_MIN_SAMPLES: int = 5  # Successful calls before a model's latency is trusted
+    LLM_ROUTING_MAX_ERROR_RATE: float = 0.2
     
     # File Upload
     MAX_UPLOAD_SIZE_MB: int = 50
@@ -63,6 +138,51 @@ class Settings(BaseSettings):
         """Parse KB allowed file extensions from comma-separated string."""
         return [ext.strip() for ext in self.KB_ALLOWED_EXTENSIONS.split(",")]
     
+    # KB Retrieval
+    KB_INDEX_TYPE: str = "hnsw"  # hnsw (approximate) or exact (brute force)
+    KB_EMBEDDING_DIM: int = 384
+    KB_CHUNK_SIZE: int = 1000  # Characters per chunk
+    KB_CHUNK_OVERLAP: int = 150
+    KB_HNSW_M: int = 16  # Graph degree: higher = better recall, more memory
+    KB_HNSW_EF_CONSTRUCTION: int = 100
+    KB_HNSW_EF_SEARCH: int = 64  # Query beam width: higher = better recall, slower
+    KB_SEARCH_MODE: str = "hybrid"  # vector, lexical or hybrid (rank-fused)
+    KB_HYBRID_CANDIDATES: int = 50  # Chunks each retriever contributes to fusion
+    KB_RRF_K: int = 60  # Reciprocal Rank Fusion damping constant
+    
+    # KB Context Packing
+    KB_CONTEXT_MAX_TOKENS: int = 3000  # Upper bound on KB context per prompt
+    KB_CONTEXT_CANDIDATES: int = 20  # Chunks retrieved before packing
+    KB_PROMPT_RESERVE_TOKENS: int = 1000  # Room left for instructions and requirements
+    KB_CONTEXT_CACHE_SIZE: int = 256  # Assembled contexts kept in the LRU cache
+    
+    # KB Near-Duplicate Detection (MinHash + LSH)
+    KB_NEAR_DUPLICATE_THRESHOLD: float = 0.85  # Estimated Jaccard similarity
+    KB_MINHASH_PERMUTATIONS: int = 128
+    KB_MINHASH_BANDS: int = 16  # LSH bands; permutations / bands rows per band
+    KB_SHINGLE_SIZE: int = 5  # Words per shingle
+    KB_AUTO_SUPERSEDE_DUPLICATES: bool = False  # Deactivate older near-duplicates on upload
+    
+    # KB Embeddings
+    KB_EMBEDDING_PROVIDER: str = "hashing"  # hashing (local, inline) or ollama (background jobs)
+    KB_EMBEDDING_MODEL: str = "nomic-embed-text"
+    KB_EMBEDDING_BATCH_SIZE: int = 32  # Chunks per embedding request
+    KB_EMBEDDING_CONCURRENCY: int = 4  # Embedding requests in flight per job
+    KB_EMBEDDING_REQUESTS_PER_SECOND: float = 8.0  # Token-bucket rate; 0 disables limiting
+    KB_EMBEDDING_MAX_RETRIES: int = 3
+    KB_EMBEDDING_TIMEOUT: int = 60  # Seconds per embedding request
+    KB_EMBEDDING_DIR: str = "./kb_embeddings"  # Persisted vectors and job progress
+    
+    # Test Case Generation (Planner → Generator → Executor)
+    GENERATION_MAX_SCENARIOS: int = 20  # Scenarios the Planner may emit per run
+    GENERATION_CASES_PER_SCENARIO: int = 5
+    GENERATION_ITEM_RETRIES: int = 1  # Repair attempts for a malformed streamed test case
+    GENERATION_CONCURRENCY: int = 4  # Scenarios generated at the same time
+    GENERATION_EXECUTOR_WORKERS: int = 2  # Workers validating and persisting test cases
+    GENERATION_REQUIREMENTS_MAX_TOKENS: int = 6000  # Requirement text included in prompts
+    GENERATION_SSE_HEARTBEAT_SECONDS: float = 15.0  # Keep-alive comment interval on idle progress streams
+    GENERATION_CHECKPOINT_DIR: str = "./generation_checkpoints"  # Stage artifacts for resuming failed runs
+    
     class Config:
         env_file = str(BACKEND_DIR / ".env")
         env_file_encoding = 'utf-8'
@@ -1,23 +1,59 @@
 """
 FastAPI main application.
 """
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.database import engine, Base, SessionLocal
 from app.api.v1 import api_router
+from app.services.configuration_service import configuration_service
+from app.services.connection_monitor import connection_monitor
+from app.services.http_clients import llm_http_clients
+from app.services.llm.ollama_models import ollama_models
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
+
+async def warm_up_ollama_models():
+    """Load the models of active Ollama configurations so first calls skip the load time."""
+    try:
+        db = SessionLocal()
+        try:
+            configurations = configuration_service.list_ollama_warmup_configurations(db)
+        finally:
+            db.close()
+        await ollama_models.warm_up_configurations(configurations)
+    except Exception:
+        # Warm-up is best effort; the app must start even if the DB or Ollama is down
+        pass
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open pooled LLM provider clients and the connection prober at startup; close them on shutdown."""
+    await llm_http_clients.start()
+    await connection_monitor.start()
+    warmup = asyncio.create_task(warm_up_ollama_models()) if settings.OLLAMA_WARMUP_ON_STARTUP else None
+    yield
+    if warmup is not None:
+        warmup.cancel()
+    await connection_monitor.aclose()
+    await llm_http_clients.aclose()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     description="AI-powered test case generator with Knowledge Base integration",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Configure CORS
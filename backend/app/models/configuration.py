@@ -24,6 +24,10 @@ class Configuration(Base):
     base_url = Column(String(255), nullable=True)
     api_key_encrypted = Column(Text, nullable=True)  # Encrypted API key
     
+    # Ollama Model Residency
+    ollama_keep_alive = Column(String(20), nullable=True)  # e.g. "30m", "-1" (forever); defaults to OLLAMA_KEEP_ALIVE
+    ollama_warmup = Column(Boolean, default=True, nullable=False)  # Load the model at startup and on change
+    
     # Generation Parameters
     temperature = Column(Float, default=0.7, nullable=False)
     max_tokens = Column(Integer, default=2000, nullable=False)
@@ -2,7 +2,7 @@
 KnowledgeBaseDocument model - Stores KB documents (User Guides, Manuals, etc.)
 """
 from sqlalchemy import Column, String, Integer, Text, DateTime, ForeignKey, Boolean
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import UUID, JSON
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -30,6 +30,11 @@ class KnowledgeBaseDocument(Base):
     # Extracted Content
     extracted_text = Column(Text, nullable=True)
     extraction_status = Column(String(50), default="pending", nullable=False)  # pending, completed, failed
+    extraction_stats = Column(JSON, nullable=True)  # Boilerplate stripping savings (bytes/tokens)
+    
+    # Near-Duplicate Detection
+    minhash_signature = Column(JSON, nullable=True)  # MinHash of word shingles
+    superseded_by = Column(UUID(as_uuid=True), ForeignKey("knowledge_base_documents.id", ondelete="SET NULL"), nullable=True)
     
     # Metadata
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -2,9 +2,24 @@
 Configuration Pydantic schemas for request/response validation.
 """
 from pydantic import BaseModel, Field, field_validator
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from uuid import UUID
 from datetime import datetime
+import re
+
+
+# Ollama keep_alive: seconds ("300", "-1" = forever, "0" = unload) or Go durations ("30m", "1h30m")
+KEEP_ALIVE_PATTERN = re.compile(r"^-?(\d+(\.\d+)?|(\d+(\.\d+)?(ns|us|ms|s|m|h))+)$")
+
+
+def validate_keep_alive(v: Optional[str]) -> Optional[str]:
+    """Validate an Ollama keep_alive value."""
+    if v is None:
+        return v
+    v = v.strip()
+    if not KEEP_ALIVE_PATTERN.match(v):
+        raise ValueError('keep_alive must be seconds (e.g. "300", "-1") or a duration (e.g. "30m", "1h")')
+    return v
 
 
 class ConfigurationBase(BaseModel):
@@ -26,6 +41,10 @@ class ConfigurationBase(BaseModel):
     kb_max_docs: int = Field(5, ge=1, le=10, description="Maximum KB documents to include")
     kb_settings: Optional[Dict[str, Any]] = Field(None, description="Additional KB settings")
     
+    # Ollama Model Residency
+    ollama_keep_alive: Optional[str] = Field(None, description='How long Ollama keeps the model loaded, e.g. "30m" or "-1" (forever)')
+    ollama_warmup: bool = Field(True, description="Load the Ollama model at startup and when the configuration changes")
+    
     @field_validator("provider")
     @classmethod
     def validate_provider(cls, v: str) -> str:
@@ -45,6 +64,12 @@ class ConfigurationBase(BaseModel):
         if provider in cloud_providers and not v:
             raise ValueError(f"API key is required for {provider}")
         return v
+    
+    @field_validator("ollama_keep_alive")
+    @classmethod
+    def validate_ollama_keep_alive(cls, v: Optional[str]) -> Optional[str]:
+        """Validate Ollama keep_alive."""
+        return validate_keep_alive(v)
 
 
 class ConfigurationCreate(ConfigurationBase):
@@ -65,6 +90,14 @@ class ConfigurationUpdate(BaseModel):
     kb_threshold: Optional[float] = Field(None, ge=0.0, le=1.0)
     kb_max_docs: Optional[int] = Field(None, ge=1, le=10)
     kb_settings: Optional[Dict[str, Any]] = None
+    ollama_keep_alive: Optional[str] = None
+    ollama_warmup: Optional[bool] = None
+    
+    @field_validator("ollama_keep_alive")
+    @classmethod
+    def validate_ollama_keep_alive(cls, v: Optional[str]) -> Optional[str]:
+        """Validate Ollama keep_alive."""
+        return validate_keep_alive(v)
 
 
 class ConfigurationResponse(ConfigurationBase):
@@ -88,6 +121,8 @@ class ConnectionTestRequest(BaseModel):
     model: str = Field(..., description="Model name to test")
     base_url: Optional[str] = Field(None, description="Custom base URL (for Ollama)")
     api_key: Optional[str] = Field(None, description="API key (for cloud providers)")
+    mode: str = Field("probe", description="probe (reachability and model check, no generation) or full (short generation)")
+    refresh: bool = Field(False, description="Ignore a cached result and test now")
 
 
 class ConnectionTestResponse(BaseModel):
@@ -99,3 +134,28 @@ class ConnectionTestResponse(BaseModel):
     model: str
     latency_ms: Optional[float] = None
     error: Optional[str] = None
+    mode: str = "probe"
+    cached: bool = False
+    checked_at: Optional[datetime] = None
+
+
+class ConnectionTestBatchRequest(BaseModel):
+    """Schema for testing several LLM connections at once."""
+    
+    targets: Optional[List[ConnectionTestRequest]] = Field(
+        None, description="Connections to test; defaults to all active configurations"
+    )
+    project_id: Optional[UUID] = Field(None, description="Limit configured connections to one project")
+    mode: str = Field("probe", description="Test mode for configured connections (probe or full)")
+    refresh: bool = Field(False, description="Ignore cached results and test now")
+    deadline_seconds: Optional[float] = Field(None, gt=0, le=120, description="Time budget for the whole batch")
+
+
+class ConnectionTestBatchResult(ConnectionTestResponse):
+    """One streamed result of a batch connection test."""
+    
+    type: str = "result"
+    index: int
+    base_url: Optional[str] = None
+    configuration_id: Optional[UUID] = None
+    timed_out: bool = False
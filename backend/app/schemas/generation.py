@@ -0,0 +1,36 @@
+"""
+Generation schemas for test case generation runs.
+"""
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+
+
+class GenerationRunResponse(BaseModel):
+    """Schema for a project's test case generation run."""
+    run_id: str
+    project_id: str
+    status: str = Field(..., description="pending, running, completed or failed")
+    stage: str = Field(..., description="pending, planning, generating or done")
+    provider: Optional[str] = None
+    model: Optional[str] = None
+    scenarios_planned: int = 0
+    scenarios_completed: int = 0
+    scenarios_failed: int = 0
+    test_cases_generated: int = 0
+    test_cases_passed: int = Field(0, description="Validated by the Executor and persisted")
+    test_cases_rejected: int = 0
+    test_cases_malformed: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    tokens_per_second: float = 0.0
+    planning_seconds: float = 0.0
+    first_test_case_seconds: Optional[float] = Field(None, description="Time from start to the first persisted test case")
+    elapsed_seconds: float = 0.0
+    errors: List[str] = []
+    error: Optional[str] = None
+    resumed: bool = Field(False, description="Continues an earlier run from its checkpoints")
+    scenarios_restored: int = 0
+    test_cases_restored: int = 0
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
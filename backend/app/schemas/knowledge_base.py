@@ -2,7 +2,7 @@
 Pydantic schemas for Knowledge Base Document model.
 """
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, Optional
 from pydantic import BaseModel, Field
 from uuid import UUID
 
@@ -29,10 +29,20 @@ class KnowledgeBaseDocumentUpdate(BaseModel):
     is_active: Optional[bool] = None
 
 
+class KBNearDuplicate(BaseModel):
+    """Schema for an existing document that nearly matches an upload."""
+    doc_id: UUID
+    filename: str
+    similarity: float
+    superseded: bool = False
+
+
 class KnowledgeBaseDocumentInDB(KnowledgeBaseDocumentBase):
     """Schema for Knowledge Base Document in database."""
     id: UUID
     is_active: bool
+    superseded_by: Optional[UUID] = None
+    extraction_stats: Optional[Dict[str, Any]] = None
     created_at: datetime
     updated_at: datetime
     
@@ -42,7 +52,7 @@ class KnowledgeBaseDocumentInDB(KnowledgeBaseDocumentBase):
 
 class KnowledgeBaseDocumentResponse(KnowledgeBaseDocumentInDB):
     """Schema for Knowledge Base Document API response."""
-    pass
+    near_duplicates: list[KBNearDuplicate] = Field(default_factory=list, description="Near-duplicate documents found on upload")
 
 
 class KnowledgeBaseDocumentListResponse(BaseModel):
@@ -50,3 +60,69 @@ class KnowledgeBaseDocumentListResponse(BaseModel):
     documents: list[KnowledgeBaseDocumentResponse]
     total_count: int
     active_count: int
+
+
+class KBSearchResult(BaseModel):
+    """Schema for a single KB search hit (one document chunk)."""
+    doc_id: UUID
+    filename: str
+    chunk_index: int
+    page: Optional[int] = None
+    text: str
+    score: float
+
+
+class KBSearchResponse(BaseModel):
+    """Schema for KB search results."""
+    query: str
+    mode: str
+    results: list[KBSearchResult]
+    index_type: str
+    latency_ms: float
+    timings_ms: Dict[str, float] = Field(default_factory=dict, description="Per-stage latency (load, vector, lexical, fusion, total)")
+
+
+class KBCitation(BaseModel):
+    """Schema for a citation attached to packed KB context."""
+    ref: int
+    doc_id: UUID
+    filename: str
+    pages: list[int]
+    chunk_indexes: list[int]
+    score: float
+
+
+class KBContextResponse(BaseModel):
+    """Schema for packed KB context preview."""
+    query: str
+    context: str
+    citations: list[KBCitation]
+    tokens_used: int
+    token_budget: int
+    chunks_considered: int
+    chunks_packed: int
+    duplicates_skipped: int
+    kb_version: int
+    cached: bool
+
+
+class KBEmbeddingJobResponse(BaseModel):
+    """Schema for a KB document's background embedding job."""
+    doc_id: UUID
+    project_id: Optional[UUID] = None
+    model: str
+    status: str = Field(..., description="pending, running, completed, failed or interrupted")
+    total_chunks: int = 0
+    total_batches: int = 0
+    completed_batches: int = 0
+    resumed_batches: int = Field(0, description="Batches reused from an earlier, interrupted run")
+    chunks_embedded: int = 0
+    tokens_embedded: int = 0
+    retries: int = 0
+    rate_limited_seconds: float = 0.0
+    elapsed_seconds: float = 0.0
+    chunks_per_second: float = 0.0
+    tokens_per_second: float = 0.0
+    error: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -0,0 +1,285 @@
+"""
+LLM Cassettes - Record and replay provider HTTP traffic.
+
+A cassette transport sits under the pooled provider clients (see
+HTTPClientRegistry). In record mode every request goes to the provider and
+the response is saved: status, headers and each body chunk with its time
+offset. In replay mode responses come from the cassette only, so
+generation runs are repeatable and benchmarks measure everything except the
+model. Replay is at full speed by default; `speed` 1.0 reproduces the
+recorded timing (headers and every streamed chunk), 0.5 runs twice as fast.
+
+Requests match on method, URL and JSON body. API keys are never stored:
+request headers are not recorded and the `key` query parameter is dropped.
+Repeated identical requests replay their recordings in order, cycling when
+there are more requests than recordings.
+
+Enable for the app with LLM_CASSETTE_MODE=record|replay and LLM_CASSETTE_PATH.
+"""
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
+
+import httpx
+
+from app.core.config import settings
+
+
+CASSETTE_MODES = ("record", "replay")
+CASSETTE_VERSION = 1
+
+# Query parameters carrying credentials (Gemini accepts `key`)
+_SECRET_PARAMS = {"key", "api_key"}
+_SKIPPED_RESPONSE_HEADERS = {"set-cookie", "content-length", "transfer-encoding", "connection"}
+
+
+class CassetteMissError(httpx.HTTPError):
+    """A replayed request has no recording in the cassette."""
+
+
+def _body(request: httpx.Request) -> Any:
+    content = request.content
+    if not content:
+        return None
+    try:
+        return json.loads(content)
+    except ValueError:
+        return content.decode("utf-8", "replace")
+
+
+def _url(request: httpx.Request) -> str:
+    url = request.url
+    params = [(k, v) for k, v in url.params.multi_items() if k not in _SECRET_PARAMS]
+    return str(url.copy_with(params=params or None))
+
+
+def request_key(method: str, url: str, body: Any) -> str:
+    """Match key of a request: method, URL (without credentials) and canonical body."""
+    payload = json.dumps([method.upper(), url, body], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """Recorded interactions of one cassette file."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.interactions: List[Dict[str, Any]] = []
+        self._by_key: Dict[str, List[Dict[str, Any]]] = {}
+        self._positions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "Cassette":
+        """
+        Read a cassette file.
+
+        Raises:
+            FileNotFoundError: When the file does not exist
+            ValueError: When the file is not a cassette of a supported version
+        """
+        cassette = cls(path)
+        data = json.loads(cassette.path.read_text(encoding="utf-8"))
+        if data.get("version") != CASSETTE_VERSION:
+            raise ValueError(f"Unsupported cassette version in {path}: {data.get('version')}")
+        for interaction in data.get("interactions", []):
+            cassette.add(interaction)
+        return cassette
+
+    def add(self, interaction: Dict[str, Any]) -> None:
+        with self._lock:
+            self.interactions.append(interaction)
+            self._by_key.setdefault(interaction["request"]["key"], []).append(interaction)
+
+    def next(self, key: str) -> Optional[Dict[str, Any]]:
+        """Next recording for a request key, in recorded order (cycling), or None."""
+        with self._lock:
+            recordings = self._by_key.get(key)
+            if not recordings:
+                return None
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            return recordings[position % len(recordings)]
+
+    def save(self) -> None:
+        """Write the cassette file (creating parent directories)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            data = {"version": CASSETTE_VERSION, "interactions": list(self.interactions)}
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp_path.write_text(json.dumps(data, indent=1, ensure_ascii=False), encoding="utf-8")
+        tmp_path.replace(self.path)
+
+
+class _RecordingStream(httpx.AsyncByteStream):
+    """Passes a response body through, noting each chunk's offset from the request start."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, started: float, on_complete):
+        self._stream = stream
+        self._started = started
+        self._on_complete = on_complete
+        self._chunks: List[Dict[str, Any]] = []
+        self._complete = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            self._chunks.append({
+                "offset_ms": round((time.perf_counter() - self._started) * 1000, 3),
+                "data": chunk.decode("utf-8", "surrogateescape"),
+            })
+            yield chunk
+        self._complete = True
+
+    async def aclose(self) -> None:
+        await self._stream.aclose()
+        if self._complete:
+            # Bodies abandoned midway (cancelled streams, losing hedges) are not recorded
+            self._on_complete(self._chunks)
+            self._complete = False
+
+
+class _ReplayStream(httpx.AsyncByteStream):
+    """Yields recorded chunks, optionally at their recorded offsets."""
+
+    def __init__(self, chunks: List[Dict[str, Any]], started: float, speed: float):
+        self._chunks = chunks
+        self._started = started
+        self._speed = speed
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        for chunk in self._chunks:
+            if self._speed > 0:
+                delay = self._started + chunk["offset_ms"] * self._speed / 1000 - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            yield chunk["data"].encode("utf-8", "surrogateescape")
+
+    async def aclose(self) -> None:
+        pass
+
+
+class CassetteTransport(httpx.AsyncBaseTransport):
+    """httpx transport that records provider traffic to, or replays it from, a cassette."""
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        mode: str,
+        inner: Optional[httpx.AsyncBaseTransport] = None,
+        speed: float = 0.0
+    ):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Cassette mode must be one of {', '.join(CASSETTE_MODES)}")
+        self.cassette = cassette
+        self.mode = mode
+        self.inner = inner if inner is not None or mode == "replay" else httpx.AsyncHTTPTransport()
+        self.speed = speed
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        method, url, body = request.method, _url(request), _body(request)
+        key = request_key(method, url, body)
+        started = time.perf_counter()
+
+        if self.mode == "replay":
+            interaction = self.cassette.next(key)
+            if interaction is None:
+                self.misses += 1
+                raise CassetteMissError(f"No recording for {method} {url} in {self.cassette.path}")
+            self.replayed += 1
+            recorded = interaction["response"]
+            if self.speed > 0 and recorded["headers_ms"] > 0:
+                await asyncio.sleep(recorded["headers_ms"] * self.speed / 1000)
+            return httpx.Response(
+                recorded["status_code"],
+                headers=recorded["headers"],
+                stream=_ReplayStream(recorded["chunks"], started, self.speed),
+                request=request
+            )
+
+        response = await self.inner.handle_async_request(request)
+        headers_ms = round((time.perf_counter() - started) * 1000, 3)
+        headers = [
+            (name, value) for name, value in response.headers.multi_items()
+            if name.lower() not in _SKIPPED_RESPONSE_HEADERS
+        ]
+
+        def on_complete(chunks: List[Dict[str, Any]]) -> None:
+            self.cassette.add({
+                "request": {"key": key, "method": method, "url": url, "body": body},
+                "response": {
+                    "status_code": response.status_code,
+                    "headers": headers,
+                    "headers_ms": headers_ms,
+                    "chunks": chunks,
+                },
+            })
+            self.recorded += 1
+
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=_RecordingStream(response.stream, started, on_complete),
+            extensions=response.extensions,
+            request=request
+        )
+
+    async def aclose(self) -> None:
+        # Every pooled client closes the shared transport; saving is idempotent
+        if self.mode == "record":
+            self.cassette.save()
+        if self.inner is not None:
+            await self.inner.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        """Mode, cassette and interaction counters."""
+        return {
+            "mode": self.mode,
+            "path": str(self.cassette.path),
+            "interactions": len(self.cassette.interactions),
+            "recorded": self.recorded,
+            "replayed": self.replayed,
+            "misses": self.misses,
+            "speed": self.speed,
+        }
+
+
+def open_cassette_transport(
+    path: Union[str, Path],
+    mode: str,
+    speed: float = 0.0,
+    inner: Optional[httpx.AsyncBaseTransport] = None
+) -> CassetteTransport:
+    """
+    Cassette transport for a file: a fresh cassette when recording, the saved one when replaying.
+
+    Raises:
+        FileNotFoundError: When replaying a cassette that does not exist
+    """
+    cassette = Cassette.load(path) if mode == "replay" else Cassette(path)
+    return CassetteTransport(cassette, mode, inner=inner, speed=speed)
+
+
+def cassette_transport_from_settings() -> Optional[CassetteTransport]:
+    """The transport configured by LLM_CASSETTE_MODE, or None when cassettes are off."""
+    if not settings.LLM_CASSETTE_MODE:
+        return None
+    inner = None
+    if settings.LLM_CASSETTE_MODE == "record":
+        inner = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_EXPIRY
+            )
+        )
+    return open_cassette_transport(
+        settings.LLM_CASSETTE_PATH, settings.LLM_CASSETTE_MODE, settings.LLM_CASSETTE_SPEED, inner
+    )
@@ -3,7 +3,7 @@ Configuration Service - Handles configuration CRUD operations with encryption.
 """
 from sqlalchemy.orm import Session
 from cryptography.fernet import Fernet
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from uuid import UUID
 import base64
 import os
@@ -11,6 +11,7 @@ import os
 from app.models.configuration import Configuration
 from app.schemas.configuration import ConfigurationCreate, ConfigurationUpdate
 from app.core.config import settings
+from app.services.llm.routing import llm_router
 
 
 class ConfigurationService:
@@ -73,6 +74,8 @@ class ConfigurationService:
             kb_threshold=config_data.kb_threshold,
             kb_max_docs=config_data.kb_max_docs,
             kb_settings=config_data.kb_settings,
+            ollama_keep_alive=config_data.ollama_keep_alive,
+            ollama_warmup=config_data.ollama_warmup,
             is_active=True
         )
         
@@ -96,13 +99,38 @@ class ConfigurationService:
     def get_project_configuration(
         self, 
         db: Session, 
-        project_id: UUID
+        project_id: UUID,
+        policy: Optional[str] = None
     ) -> Optional[Configuration]:
-        """Get active configuration for a project."""
+        """
+        Get active configuration for a project.
+
+        Args:
+            db: Database session
+            project_id: Project ID
+            policy: Routing policy, "configured" or "fastest" (defaults to LLM_ROUTING_POLICY);
+                "fastest" picks the fastest healthy of the project's configurations
+
+        Returns:
+            The configuration to use, or None if the project has none
+        """
+        if (policy or settings.LLM_ROUTING_POLICY) == "fastest":
+            return llm_router.choose(self.list_project_configurations(db, project_id), "fastest")
         return db.query(Configuration).filter(
             Configuration.project_id == project_id,
             Configuration.is_active == True
         ).first()
+
+    def list_project_configurations(self, db: Session, project_id: UUID) -> List[Configuration]:
+        """Active configurations of a project, oldest first."""
+        return db.query(Configuration).filter(
+            Configuration.project_id == project_id,
+            Configuration.is_active == True
+        ).order_by(Configuration.created_at).all()
+
+    def rank_project_configurations(self, db: Session, project_id: UUID) -> List[Dict[str, Any]]:
+        """A project's active configurations ranked by measured speed and health, best first."""
+        return llm_router.rank(self.list_project_configurations(db, project_id))
     
     def update_configuration(
         self, 
@@ -182,6 +210,14 @@ class ConfigurationService:
             query = query.filter(Configuration.project_id == project_id)
         
         return query.offset(skip).limit(limit).all()
+    
+    def list_ollama_warmup_configurations(self, db: Session) -> List[Configuration]:
+        """Active Ollama configurations whose models should be kept warm."""
+        return db.query(Configuration).filter(
+            Configuration.is_active == True,
+            Configuration.provider == "ollama",
+            Configuration.ollama_warmup == True
+        ).all()
 
 
 # Global service instance
@@ -0,0 +1,234 @@
+"""
+Connection Monitor - Cached LLM connection test results, kept fresh in the background.
+
+Results are cached per (provider, base_url, model, API key fingerprint,
+mode) for a short TTL, so the configuration page gets an answer instantly
+instead of waiting on the provider. Probe-mode targets that were asked
+about recently are re-probed in the background, so their cached status
+stays fresh; targets nobody has asked about for a while are dropped.
+Concurrent checks of the same target share one in-flight test, and
+`check_many` tests many targets at once under a global deadline.
+"""
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.llm_connection_tester import LLMConnectionTester, llm_tester
+
+
+TargetKey = Tuple[str, str, str, str, str]
+
+
+def key_fingerprint(api_key: Optional[str]) -> str:
+    """Short hash identifying an API key without keeping it in cache keys."""
+    if not api_key:
+        return ""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class _Target:
+    provider: str
+    model: str
+    base_url: Optional[str]
+    api_key: Optional[str] = field(repr=False)
+    mode: str
+    result: Optional[Dict[str, Any]] = None
+    checked_at: float = 0.0  # Wall clock, for display
+    fresh_until: float = 0.0  # Monotonic
+    last_requested: float = 0.0  # Monotonic
+
+
+class ConnectionMonitor:
+    """Service for cached connection tests and background probing."""
+
+    def __init__(
+        self,
+        tester: Optional[LLMConnectionTester] = None,
+        ttl_seconds: Optional[float] = None,
+        interval_seconds: Optional[float] = None,
+        idle_seconds: Optional[float] = None
+    ):
+        self.tester = tester or llm_tester
+        self.ttl_seconds = settings.LLM_CONNECTION_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.interval_seconds = settings.LLM_PROBE_INTERVAL_SECONDS if interval_seconds is None else interval_seconds
+        self.idle_seconds = settings.LLM_PROBE_IDLE_SECONDS if idle_seconds is None else idle_seconds
+        self._targets: Dict[TargetKey, _Target] = {}
+        self._inflight: Dict[TargetKey, asyncio.Task] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.background_probes = 0
+
+    @staticmethod
+    def target_key(
+        provider: str,
+        model: str,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        mode: str = "probe"
+    ) -> TargetKey:
+        return (provider, (base_url or "").rstrip("/"), model, key_fingerprint(api_key), mode)
+
+    def _response(self, target: _Target, cached: bool) -> Dict[str, Any]:
+        return {
+            **target.result,
+            "mode": target.mode,
+            "cached": cached,
+            "checked_at": datetime.fromtimestamp(target.checked_at, tz=timezone.utc),
+        }
+
+    async def _run_test(self, target: _Target) -> None:
+        target.result = await self.tester.test_connection(
+            target.provider, target.model, target.base_url, target.api_key, target.mode
+        )
+        target.checked_at = time.time()
+        target.fresh_until = time.monotonic() + self.ttl_seconds
+
+    async def _refresh(self, key: TargetKey, target: _Target) -> None:
+        """Run a test for a target, sharing it with concurrent callers."""
+        task = self._inflight.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(self._run_test(target))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        await asyncio.shield(task)
+
+    async def check(
+        self,
+        provider: str,
+        model: str,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        mode: str = "probe",
+        refresh: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Connection status of a target, from cache when fresh.
+
+        Args:
+            provider: LLM provider
+            model: Model name
+            base_url: Custom base URL
+            api_key: API key for cloud providers
+            mode: "probe" or "full" (see LLMConnectionTester)
+            refresh: Ignore a cached result and test now
+
+        Returns:
+            Test result with `mode`, `cached` and `checked_at` added
+        """
+        key = self.target_key(provider, model, base_url, api_key, mode)
+        target = self._targets.get(key)
+        if target is None:
+            target = _Target(provider, model, base_url, api_key, mode)
+            self._targets[key] = target
+        target.last_requested = time.monotonic()
+
+        if not refresh and target.result is not None and time.monotonic() < target.fresh_until:
+            self.hits += 1
+            return self._response(target, cached=True)
+
+        self.misses += 1
+        await self._refresh(key, target)
+        return self._response(target, cached=False)
+
+    async def check_many(
+        self,
+        targets: List[Dict[str, Any]],
+        deadline_seconds: float
+    ) -> AsyncIterator[Tuple[int, Optional[Dict[str, Any]]]]:
+        """
+        Check targets concurrently, yielding results as they complete.
+
+        Args:
+            targets: Keyword arguments for `check` (provider, model, base_url, api_key, mode, refresh)
+            deadline_seconds: Time budget for the whole batch
+
+        Yields:
+            (target index, result) in completion order; targets still running at
+            the deadline are yielded last with result None. Their tests keep
+            running in the background and land in the cache.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + deadline_seconds
+        tasks = {asyncio.ensure_future(self.check(**target)): index for index, target in enumerate(targets)}
+        try:
+            while tasks:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                done, _ = await asyncio.wait(tasks, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield tasks.pop(task), task.result()
+            timed_out = sorted(tasks.values())
+        finally:
+            for task in tasks:
+                task.cancel()
+        for index in timed_out:
+            yield index, None
+
+    async def probe_watched(self) -> int:
+        """
+        Re-probe watched probe-mode targets whose results are getting stale.
+
+        Full-mode targets are never re-run in the background, as they
+        generate (and may load a model).
+
+        Returns:
+            Number of targets probed
+        """
+        now = time.monotonic()
+        for key, target in list(self._targets.items()):
+            if now - target.last_requested > self.idle_seconds:
+                del self._targets[key]
+
+        due = [
+            (key, target) for key, target in self._targets.items()
+            if target.mode == "probe" and target.fresh_until - now < self.interval_seconds
+        ]
+        await asyncio.gather(*(self._refresh(key, target) for key, target in due))
+        self.background_probes += len(due)
+        return len(due)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.probe_watched()
+            except Exception:
+                # Keep the prober alive; a failing target surfaces on its next check
+                pass
+
+    async def start(self) -> None:
+        """Start the background prober (no-op when the interval is 0)."""
+        if self.interval_seconds > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    async def aclose(self) -> None:
+        """Stop the background prober."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache counters and watched target count."""
+        return {
+            "targets": len(self._targets),
+            "hits": self.hits,
+            "misses": self.misses,
+            "background_probes": self.background_probes,
+            "ttl_seconds": self.ttl_seconds,
+            "interval_seconds": self.interval_seconds,
+        }
+
+
+# Global connection monitor instance
+connection_monitor = ConnectionMonitor()
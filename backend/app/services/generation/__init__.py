@@ -0,0 +1,51 @@
+"""
+Test case generation services (Planner → Generator → Executor).
+"""
+from .agents import (
+    AgentOutputError,
+    ExecutorAgent,
+    GeneratedTestCase,
+    GenerationInputs,
+    GeneratorAgent,
+    PlannedScenario,
+    PlannerAgent,
+    Scenario,
+    Verdict,
+    parse_json,
+    stream_items,
+)
+from .json_stream import IncrementalJSONParser, StreamedItem, loads_tolerant
+from .checkpoints import CheckpointError, GenerationCheckpointStore, RunCheckpoint, inputs_fingerprint
+from .events import GenerationEventLog, GenerationProgress
+from .pipeline import GenerationPipeline, GenerationRun
+from .jobs import GenerationInputError, GenerationJobManager, generation_jobs, load_generation_inputs, persist_test_case
+
+__all__ = [
+    "AgentOutputError",
+    "ExecutorAgent",
+    "GeneratedTestCase",
+    "GenerationInputs",
+    "GeneratorAgent",
+    "PlannedScenario",
+    "PlannerAgent",
+    "Scenario",
+    "Verdict",
+    "parse_json",
+    "stream_items",
+    "IncrementalJSONParser",
+    "StreamedItem",
+    "loads_tolerant",
+    "CheckpointError",
+    "GenerationCheckpointStore",
+    "RunCheckpoint",
+    "inputs_fingerprint",
+    "GenerationEventLog",
+    "GenerationProgress",
+    "GenerationPipeline",
+    "GenerationRun",
+    "GenerationInputError",
+    "GenerationJobManager",
+    "generation_jobs",
+    "load_generation_inputs",
+    "persist_test_case",
+]
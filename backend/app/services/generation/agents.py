@@ -0,0 +1,532 @@
+"""
+Generation Agents - Planner, Generator and Executor for test case generation.
+
+- Planner: reads the requirements (and KB context) and emits test scenarios.
+- Generator: writes the test cases of one scenario.
+- Executor: validates and normalizes each generated test case into the
+  shape of a TestCase row, scoring its KB compliance. It is rule-based, so
+  it can run on every test case the moment it is generated.
+
+Planner and Generator stream their completions through an incremental JSON
+parser and yield each scenario or test case the moment it closes, so the
+pipeline starts downstream work while the LLM is still writing. Their calls
+go through the LLM hedger, with the project's other active configurations as
+alternates, so a late or failing provider is raced or failed over.
+"""
+import asyncio
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Type, Union
+
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator
+
+from app.services.generation.json_stream import IncrementalJSONParser, StreamedItem
+from app.services.llm.base import LLMRequest, LLMResponse
+from app.services.llm.hedging import llm_hedger
+
+
+PRIORITIES = {"high": "High", "medium": "Medium", "low": "Low", "critical": "High", "p1": "High", "p2": "Medium", "p3": "Low"}
+
+_FENCE_RE = re.compile(r"^```[a-zA-Z]*\s*|\s*```$")
+_REF_RE = re.compile(r"\[(\d+)\]")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+PLANNER_SYSTEM_PROMPT = (
+    "You are the Planner agent of a test case generation system. Read the requirements and "
+    "identify distinct, testable scenarios covering functional, negative and edge cases. "
+    "Answer with JSON only: {\"scenarios\": [{\"title\": str, \"description\": str, "
+    "\"category\": str, \"priority\": \"High\"|\"Medium\"|\"Low\"}]}"
+)
+
+GENERATOR_SYSTEM_PROMPT = (
+    "You are the Generator agent of a test case generation system. Write detailed manual test "
+    "cases for the given scenario. Cite knowledge base passages you rely on by their [n] "
+    "reference. Answer with JSON only: {\"test_cases\": [{\"title\": str, \"category\": str, "
+    "\"priority\": \"High\"|\"Medium\"|\"Low\", \"system\": str, \"preconditions\": str, "
+    "\"steps\": [{\"action\": str, \"expected\": str}], \"expected_result\": str, "
+    "\"test_data\": object, \"kb_references\": [str]}]}"
+)
+
+REPAIR_SYSTEM_PROMPT = (
+    "You fix malformed test cases. Rewrite the given test case as one valid JSON object with the "
+    "fields title, category, priority, system, preconditions, steps ([{\"action\": str, "
+    "\"expected\": str}], at least one), expected_result, test_data and kb_references. "
+    "Answer with the JSON object only."
+)
+
+
+class AgentOutputError(ValueError):
+    """An agent's LLM output could not be read as the expected JSON."""
+
+
+def parse_json(text: str) -> Any:
+    """
+    Parse JSON from LLM output, tolerating code fences and surrounding prose.
+
+    Raises:
+        AgentOutputError: When no JSON value can be found
+    """
+    text = _FENCE_RE.sub("", text.strip())
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if starts:
+        try:
+            value, _ = json.JSONDecoder().raw_decode(text[min(starts):])
+            return value
+        except ValueError:
+            pass
+    raise AgentOutputError(f"No JSON found in output: {text[:200]!r}")
+
+
+def _items(value: Any, key: str) -> List[Dict[str, Any]]:
+    """Objects under `key` (or the value itself if it is a list)."""
+    if isinstance(value, dict):
+        value = value.get(key, [])
+    if not isinstance(value, list):
+        raise AgentOutputError(f"Expected a list of {key}")
+    return [item for item in value if isinstance(item, dict)]
+
+
+@dataclass
+class Scenario:
+    """A test scenario emitted by the Planner."""
+    scenario_id: str
+    title: str
+    description: str = ""
+    category: Optional[str] = None
+    priority: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "scenario_id": self.scenario_id,
+            "title": self.title,
+            "description": self.description,
+            "category": self.category,
+            "priority": self.priority,
+        }
+
+
+@dataclass
+class GenerationInputs:
+    """Everything the agents need for one project's generation run."""
+    project_id: str
+    requirements: str
+    provider: str
+    model: str
+    base_url: Optional[str] = None
+    api_key: Optional[str] = None
+    temperature: float = 0.7
+    max_tokens: int = 2000
+    options: Dict[str, Any] = field(default_factory=dict)
+    kb_context: str = ""
+    citations: List[Dict[str, Any]] = field(default_factory=list)
+    # The project's other active configurations (provider, model, base_url, api_key,
+    # temperature, max_tokens, options), used to hedge and fail over
+    alternates: List[Dict[str, Any]] = field(default_factory=list)
+    test_case_offset: int = 0  # Highest TC number the project already has; new test cases follow it
+
+    def request(self, system: str, prompt: str) -> LLMRequest:
+        """LLM request under the project's configuration."""
+        primary = {
+            "provider": self.provider,
+            "model": self.model,
+            "base_url": self.base_url,
+            "api_key": self.api_key,
+            "options": self.options,
+        }
+        return self._request(primary, system, prompt)
+
+    def alternate_requests(self, system: str, prompt: str) -> List[LLMRequest]:
+        """The same request under each alternate configuration, in order of preference."""
+        return [self._request(alternate, system, prompt) for alternate in self.alternates]
+
+    def _request(self, config: Dict[str, Any], system: str, prompt: str) -> LLMRequest:
+        return LLMRequest.from_prompt(
+            config["provider"],
+            config["model"],
+            prompt,
+            system=system,
+            temperature=config.get("temperature", self.temperature),
+            max_tokens=config.get("max_tokens", self.max_tokens),
+            base_url=config.get("base_url"),
+            api_key=config.get("api_key"),
+            options=dict(config.get("options") or {}),
+            cache_scope=self.project_id
+        )
+
+    def kb_section(self) -> str:
+        if not self.kb_context:
+            return ""
+        return f"\n\nKnowledge base (cite as [n]):\n{self.kb_context}"
+
+
+@dataclass
+class Verdict:
+    """Executor result for one generated test case."""
+    passed: bool
+    test_case: Dict[str, Any]  # Normalized TestCase fields
+    errors: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "passed": self.passed,
+            "errors": self.errors,
+            "warnings": self.warnings,
+            "test_case": self.test_case,
+        }
+
+
+class PlannedScenario(BaseModel):
+    """Schema of one scenario in the Planner's output."""
+    model_config = ConfigDict(extra="allow")
+
+    title: str = Field(..., min_length=1)
+    description: Optional[str] = None
+    category: Optional[str] = None
+    priority: Optional[str] = None
+
+
+class GeneratedTestCase(BaseModel):
+    """Schema of one test case in the Generator's output (checked before the Executor sees it)."""
+    model_config = ConfigDict(extra="allow")
+
+    title: str = Field(..., min_length=1)
+    steps: Union[List[Union[str, Dict[str, Any]]], str]
+    expected_result: Optional[Union[str, List[str]]] = None
+    priority: Optional[str] = None
+    category: Optional[str] = None
+    system: Optional[str] = None
+    preconditions: Optional[Union[str, List[str]]] = None
+    test_data: Optional[Any] = None
+    kb_references: Optional[List[Union[str, int]]] = None
+
+    @field_validator("steps")
+    @classmethod
+    def steps_not_empty(cls, value):
+        if not value:
+            raise ValueError("at least one step is required")
+        return value
+
+
+def _validated(item: StreamedItem, schema: Type[BaseModel]) -> Optional[Dict[str, Any]]:
+    """The item as a dict if it matches the schema; otherwise records why on the item."""
+    if not item.ok:
+        return None
+    if not isinstance(item.value, dict):
+        item.error = "not a JSON object"
+        return None
+    try:
+        schema.model_validate(item.value)
+    except ValidationError as e:
+        item.error = "; ".join(
+            f"{'.'.join(str(part) for part in error['loc']) or 'item'}: {error['msg']}" for error in e.errors()
+        )
+        return None
+    return item.value
+
+
+async def stream_items(
+    llm,
+    request: LLMRequest,
+    key: str,
+    on_response: Optional[Callable[[LLMResponse], None]] = None,
+    alternates: Sequence[LLMRequest] = ()
+) -> AsyncIterator[StreamedItem]:
+    """
+    Stream a completion and yield each item of its JSON list as soon as it closes.
+
+    Falls back to parsing the whole output when no list items were found
+    while streaming (e.g. a single object instead of a list).
+
+    Args:
+        llm: LLM client, scheduler or hedger (alternates need a hedger)
+        request: Primary request
+        key: Key of the item list when the output is an object
+        on_response: Called with the LLM response (for token accounting)
+        alternates: Requests the hedger may race or fail over to
+
+    Raises:
+        LLMError: When the LLM call fails
+        AgentOutputError: When the output holds no items at all
+    """
+    parser = IncrementalJSONParser()
+    async with (llm.stream(request, alternates) if alternates else llm.stream(request)) as stream:
+        async for delta in stream:
+            for item in parser.feed(delta):
+                yield item
+    if on_response is not None:
+        on_response(stream.response)
+    for item in parser.close():
+        yield item
+    if parser.items == 0:
+        for value in _items(parse_json(stream.response.text), key):
+            yield StreamedItem(index=parser.items, raw=json.dumps(value), value=value)
+            parser.items += 1
+
+
+class PlannerAgent:
+    """Agent that turns requirements into test scenarios."""
+
+    def __init__(self, llm=None, max_scenarios: int = 20):
+        self.llm = llm or llm_hedger
+        self.max_scenarios = max_scenarios
+
+    def prompt(self, inputs: GenerationInputs) -> str:
+        return (
+            f"Requirements:\n{inputs.requirements}{inputs.kb_section()}\n\n"
+            f"List at most {self.max_scenarios} test scenarios."
+        )
+
+    async def plan(
+        self,
+        inputs: GenerationInputs,
+        on_response: Optional[Callable[[LLMResponse], None]] = None
+    ) -> AsyncIterator[Scenario]:
+        """
+        Emit the scenarios for a run's requirements, each as soon as the Planner has written it.
+
+        Args:
+            inputs: Run inputs
+            on_response: Called with the LLM response (for token accounting)
+
+        Raises:
+            LLMError: When the LLM call fails
+            AgentOutputError: When the output has no scenario list
+        """
+        prompt = self.prompt(inputs)
+        request = inputs.request(PLANNER_SYSTEM_PROMPT, prompt)
+        alternates = inputs.alternate_requests(PLANNER_SYSTEM_PROMPT, prompt)
+        count = 0
+        async for item in stream_items(self.llm, request, "scenarios", on_response, alternates):
+            value = _validated(item, PlannedScenario)
+            if value is None:
+                continue  # A broken scenario is dropped; the others still run
+            count += 1
+            yield Scenario(
+                scenario_id=f"S{count}",
+                title=value["title"].strip(),
+                description=str(value.get("description") or ""),
+                category=value.get("category"),
+                priority=value.get("priority")
+            )
+            if count >= self.max_scenarios:
+                return
+
+
+class GeneratorAgent:
+    """Agent that writes the test cases of one scenario."""
+
+    def __init__(self, llm=None, cases_per_scenario: int = 5, item_retries: int = 1):
+        self.llm = llm or llm_hedger
+        self.cases_per_scenario = cases_per_scenario
+        self.item_retries = item_retries
+
+    def prompt(self, scenario: Scenario, inputs: GenerationInputs) -> str:
+        return (
+            f"Requirements:\n{inputs.requirements}{inputs.kb_section()}\n\n"
+            f"Scenario {scenario.scenario_id}: {scenario.title}\n{scenario.description}\n\n"
+            f"Write up to {self.cases_per_scenario} test cases for this scenario."
+        )
+
+    async def generate(
+        self,
+        scenario: Scenario,
+        inputs: GenerationInputs,
+        on_response: Optional[Callable[[LLMResponse], None]] = None,
+        on_broken: Optional[Callable[[StreamedItem], None]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Emit the test case objects of a scenario, each as soon as it closes in the stream.
+
+        A test case that isn't valid JSON or doesn't match GeneratedTestCase
+        is repaired on its own with a short follow-up request (started right
+        away, while the stream continues) instead of regenerating the scenario.
+
+        Args:
+            scenario: Scenario to write test cases for
+            inputs: Run inputs
+            on_response: Called with each LLM response (for token accounting)
+            on_broken: Called with each malformed item
+
+        Raises:
+            LLMError: When the LLM call fails
+            AgentOutputError: When the output has no test case list
+        """
+        prompt = self.prompt(scenario, inputs)
+        request = inputs.request(GENERATOR_SYSTEM_PROMPT, prompt)
+        alternates = inputs.alternate_requests(GENERATOR_SYSTEM_PROMPT, prompt)
+        repairs: List[asyncio.Task] = []
+        emitted = 0
+        try:
+            async for item in stream_items(self.llm, request, "test_cases", on_response, alternates):
+                value = _validated(item, GeneratedTestCase)
+                if value is None:
+                    if on_broken is not None:
+                        on_broken(item)
+                    if self.item_retries > 0:
+                        repairs.append(asyncio.create_task(self.repair(item, inputs, on_response, on_broken)))
+                    continue
+                yield value
+                emitted += 1
+                if emitted >= self.cases_per_scenario:
+                    return
+            for task in repairs:
+                value = await task
+                if value is not None and emitted < self.cases_per_scenario:
+                    yield value
+                    emitted += 1
+        finally:
+            for task in repairs:
+                task.cancel()
+
+    async def repair(
+        self,
+        item: StreamedItem,
+        inputs: GenerationInputs,
+        on_response: Optional[Callable[[LLMResponse], None]] = None,
+        on_broken: Optional[Callable[[StreamedItem], None]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Ask for one malformed test case to be rewritten; None if it still fails."""
+        broken = item
+        for _ in range(self.item_retries):
+            prompt = f"Problem: {broken.error}\n\nTest case:\n{broken.raw}"
+            try:
+                request = inputs.request(REPAIR_SYSTEM_PROMPT, prompt)
+                alternates = inputs.alternate_requests(REPAIR_SYSTEM_PROMPT, prompt)
+                response = await (self.llm.complete(request, alternates) if alternates else self.llm.complete(request))
+            except Exception:
+                return None
+            if on_response is not None:
+                on_response(response)
+            try:
+                value = parse_json(response.text)
+            except AgentOutputError as e:
+                broken = StreamedItem(index=item.index, raw=response.text, error=str(e))
+            else:
+                broken = StreamedItem(index=item.index, raw=response.text, value=value)
+                fixed = _validated(broken, GeneratedTestCase)
+                if fixed is not None:
+                    return fixed
+            if on_broken is not None:
+                on_broken(broken)
+        return None
+
+
+def _text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return _WHITESPACE_RE.sub(" ", str(value)).strip()
+
+
+def _steps(value: Any) -> List[Dict[str, Any]]:
+    """Steps as [{"step": n, "action": ..., "expected": ...}], from objects or plain strings."""
+    if isinstance(value, str):
+        value = [line for line in value.splitlines() if line.strip()]
+    if not isinstance(value, list):
+        return []
+    steps = []
+    for item in value:
+        if isinstance(item, dict):
+            action = _text(item.get("action") or item.get("step") or item.get("description"))
+            expected = _text(item.get("expected") or item.get("expected_result"))
+        else:
+            action, expected = _text(item), ""
+        if action:
+            steps.append({"step": len(steps) + 1, "action": action, "expected": expected})
+    return steps
+
+
+class ExecutorAgent:
+    """Agent that validates generated test cases and scores their KB compliance."""
+
+    def validate(
+        self,
+        raw: Dict[str, Any],
+        scenario: Scenario,
+        citations: Optional[List[Dict[str, Any]]] = None
+    ) -> Verdict:
+        """
+        Validate one generated test case.
+
+        Args:
+            raw: Test case object from the Generator
+            scenario: Scenario it was generated for (category and priority defaults)
+            citations: KB citations the Generator was given
+
+        Returns:
+            Verdict with the normalized TestCase fields; failed verdicts are not persisted
+        """
+        errors: List[str] = []
+        warnings: List[str] = []
+        title = _text(raw.get("title"))[:500]
+        if not title:
+            errors.append("missing title")
+        steps = _steps(raw.get("steps"))
+        if not steps:
+            errors.append("no steps")
+        expected_result = _text(raw.get("expected_result"))
+        if not expected_result and steps and steps[-1]["expected"]:
+            expected_result = steps[-1]["expected"]
+            warnings.append("expected_result taken from the last step")
+        if not expected_result:
+            errors.append("missing expected result")
+
+        priority = PRIORITIES.get(_text(raw.get("priority") or scenario.priority).lower())
+        if priority is None:
+            priority = "Medium"
+            warnings.append("unknown priority, defaulted to Medium")
+        test_data = raw.get("test_data")
+        if test_data is not None and not isinstance(test_data, (dict, list)):
+            test_data = {"value": test_data}
+
+        references = raw.get("kb_references") or []
+        if not isinstance(references, list):
+            references = [references]
+        references = [_text(ref) for ref in references if _text(ref)]
+        score = self.kb_compliance(references, citations or [])
+        if citations and not references:
+            warnings.append("no KB references")
+
+        test_case = {
+            "title": title,
+            "category": (_text(raw.get("category")) or scenario.category or None),
+            "priority": priority,
+            "system": _text(raw.get("system"))[:100] or None,
+            "preconditions": _text(raw.get("preconditions")) or None,
+            "steps": steps,
+            "expected_result": expected_result,
+            "test_data": test_data,
+            "kb_references": references or None,
+            "kb_compliance_score": score,
+            "scenario_id": scenario.scenario_id,
+        }
+        if test_case["category"]:
+            test_case["category"] = test_case["category"][:100]
+        return Verdict(passed=not errors, test_case=test_case, errors=errors, warnings=warnings)
+
+    @staticmethod
+    def kb_compliance(references: List[str], citations: List[Dict[str, Any]]) -> Optional[int]:
+        """
+        Share of a test case's KB references that point at passages it was given (0-100).
+
+        None when no KB context was used; 0 when KB context was given but not cited.
+        """
+        if not citations:
+            return None
+        if not references:
+            return 0
+        refs = {citation["ref"] for citation in citations}
+        filenames = {str(citation.get("filename", "")).lower() for citation in citations}
+        valid = 0
+        for reference in references:
+            numbers = [int(n) for n in _REF_RE.findall(reference)]
+            if (numbers and all(n in refs for n in numbers)) or reference.lower() in filenames:
+                valid += 1
+        return round(100 * valid / len(references))
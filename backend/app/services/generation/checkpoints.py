@@ -0,0 +1,181 @@
+"""
+On-disk checkpoints of generation runs, so a failed run can be resumed.
+
+Layout: <root>/<project_id>/<run_id>/run.json (manifest with the inputs
+fingerprint and status), scenarios.json (Planner output, written once
+planning completes), outputs/<scenario_id>.json (a scenario's Generator
+output, written once the scenario completes) and verdicts/<scenario_id>-<n>.json
+(the Executor verdict of each test case, with its TC number and TestCase
+id once persisted). Every file is written to a temp file and moved into
+place, so an interrupted run never leaves a half-written artifact behind.
+
+Resuming replays the stored artifacts instead of calling the LLM: the
+Planner is skipped when its scenarios are stored, completed scenarios are
+not regenerated, and test cases with a stored verdict are neither
+revalidated nor persisted twice. Artifacts are only reused while the
+inputs fingerprint (requirements, KB context, model and generation
+settings) matches the run's.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.services.generation.agents import GENERATOR_SYSTEM_PROMPT, PLANNER_SYSTEM_PROMPT, GenerationInputs, Scenario
+
+
+class CheckpointError(ValueError):
+    """A run can't be resumed (no checkpoint, or its inputs changed)."""
+
+
+def inputs_fingerprint(inputs: GenerationInputs, *settings: Any) -> str:
+    """Identify everything a run's LLM output depends on, so stale checkpoints are never reused."""
+    payload = {
+        "requirements": inputs.requirements,
+        "kb_context": inputs.kb_context,
+        "citations": inputs.citations,
+        "provider": inputs.provider,
+        "model": inputs.model,
+        "temperature": inputs.temperature,
+        "max_tokens": inputs.max_tokens,
+        "prompts": [PLANNER_SYSTEM_PROMPT, GENERATOR_SYSTEM_PROMPT],
+        "settings": list(settings),
+    }
+    data = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def _safe(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]", "_", str(name))
+
+
+def _write_atomic(path: Path, value: Any) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(value, indent=2, default=str), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _read(path: Path) -> Optional[Any]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+class RunCheckpoint:
+    """Stage artifacts of one generation run."""
+
+    def __init__(self, directory: Path, fingerprint: str):
+        self.directory = directory
+        self.fingerprint = fingerprint
+
+    def manifest(self) -> Optional[Dict[str, Any]]:
+        return _read(self.directory / "run.json")
+
+    def save_manifest(self, **fields: Any) -> None:
+        manifest = self.manifest() or {}
+        manifest.update(fields, fingerprint=self.fingerprint, updated_at=datetime.utcnow())
+        _write_atomic(self.directory / "run.json", manifest)
+
+    def _load(self, path: Path, key: str) -> Optional[Any]:
+        data = _read(path)
+        if not data or data.get("fingerprint") != self.fingerprint:
+            return None
+        return data.get(key)
+
+    def load_scenarios(self) -> Optional[List[Scenario]]:
+        """The Planner's scenarios, or None if planning hasn't completed."""
+        scenarios = self._load(self.directory / "scenarios.json", "scenarios")
+        if scenarios is None:
+            return None
+        return [Scenario(**scenario) for scenario in scenarios]
+
+    def save_scenarios(self, scenarios: List[Scenario]) -> None:
+        _write_atomic(self.directory / "scenarios.json", {
+            "fingerprint": self.fingerprint,
+            "scenarios": [scenario.to_dict() for scenario in scenarios],
+        })
+
+    def _output_path(self, scenario: Scenario) -> Path:
+        return self.directory / "outputs" / f"{_safe(scenario.scenario_id)}.json"
+
+    def load_outputs(self, scenario: Scenario) -> Optional[List[Dict[str, Any]]]:
+        """A scenario's generated test cases, or None if it hasn't completed."""
+        data = _read(self._output_path(scenario))
+        if not data or data.get("fingerprint") != self.fingerprint or data.get("scenario") != scenario.to_dict():
+            return None
+        return data.get("outputs")
+
+    def save_outputs(self, scenario: Scenario, outputs: List[Dict[str, Any]]) -> None:
+        _write_atomic(self._output_path(scenario), {
+            "fingerprint": self.fingerprint,
+            "scenario": scenario.to_dict(),
+            "outputs": outputs,
+        })
+
+    def load_verdicts(self) -> Dict[str, Dict[str, Any]]:
+        """Stored Executor verdicts by test case key (<scenario_id>-<index>)."""
+        verdicts = {}
+        for path in sorted((self.directory / "verdicts").glob("*.json")):
+            verdict = self._load(path, "verdict")
+            if verdict is not None:
+                verdicts[path.stem] = verdict
+        return verdicts
+
+    def save_verdict(self, key: str, verdict: Dict[str, Any]) -> None:
+        _write_atomic(self.directory / "verdicts" / f"{_safe(key)}.json", {
+            "fingerprint": self.fingerprint,
+            "verdict": verdict,
+        })
+
+
+class GenerationCheckpointStore:
+    """Persists generation run checkpoints per (project, run)."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _dir(self, project_id: str, run_id: str) -> Path:
+        return self.root / _safe(project_id) / _safe(run_id)
+
+    def begin(self, project_id: str, run_id: str, fingerprint: str) -> RunCheckpoint:
+        """Checkpoint a new run; earlier checkpoints of the project are discarded."""
+        shutil.rmtree(self.root / _safe(project_id), ignore_errors=True)
+        checkpoint = RunCheckpoint(self._dir(project_id, run_id), fingerprint)
+        checkpoint.save_manifest(run_id=run_id, project_id=project_id, status="running", created_at=datetime.utcnow())
+        return checkpoint
+
+    def find(self, project_id: str, run_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Manifest of a checkpointed run (the project's latest if no run_id), or None."""
+        if run_id is not None:
+            return _read(self._dir(project_id, run_id) / "run.json")
+        manifests = [
+            manifest for manifest in (_read(path) for path in (self.root / _safe(project_id)).glob("*/run.json"))
+            if manifest
+        ]
+        return max(manifests, key=lambda manifest: manifest.get("created_at", ""), default=None)
+
+    def open(self, project_id: str, run_id: str, fingerprint: str) -> RunCheckpoint:
+        """
+        Reopen a checkpointed run for resuming.
+
+        Raises:
+            CheckpointError: When the run has no checkpoint or was made from different inputs
+        """
+        manifest = self.find(project_id, run_id)
+        if manifest is None:
+            raise CheckpointError(f"No checkpoint found for generation run {run_id}")
+        if manifest.get("fingerprint") != fingerprint:
+            raise CheckpointError(
+                f"Requirements, KB context or model changed since generation run {run_id}; start a new run instead"
+            )
+        return RunCheckpoint(self._dir(project_id, run_id), fingerprint)
+
+    def delete(self, project_id: str, run_id: str) -> None:
+        """Remove a run's checkpoints."""
+        shutil.rmtree(self._dir(project_id, run_id), ignore_errors=True)
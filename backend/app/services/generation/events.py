@@ -0,0 +1,175 @@
+"""
+Generation Events - Progress feed of a generation run for SSE and WebSocket clients.
+
+Pipeline events are translated into the messages the frontend understands
+(see frontend/src/lib/sse.ts):
+
+    {"type": "progress" | "step" | "kb_message" | "test_case" | "complete" | "error",
+     "progress", "message", "kbMessage", "testCase", "estimatedTime",
+     "testCasesCount", "kbComplianceScore", "error", ...}
+
+Every message gets a sequential `id` and is kept in the run's event log, so
+a client that connects late (or reconnects with Last-Event-ID) replays what
+it missed and then follows live messages.
+"""
+import asyncio
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+
+# Share of the progress bar for planning; generation fills the rest up to 99
+PLANNING_PROGRESS = 10
+
+AGENT_MESSAGES = {
+    "planning": "Planner Agent: Analyzing requirements...",
+    "generating": "Generator Agent: Creating test cases...",
+}
+
+
+class GenerationEventLog:
+    """Append-only message log that any number of clients can follow."""
+
+    def __init__(self):
+        self.events: List[Dict[str, Any]] = []
+        self.closed = False
+        self._changed = asyncio.Event()
+
+    def publish(self, event_type: str, **data: Any) -> Dict[str, Any]:
+        """Append a message and wake up followers."""
+        event = {"id": len(self.events) + 1, "type": event_type}
+        event.update({key: value for key, value in data.items() if value is not None})
+        self.events.append(event)
+        self._wake()
+        return event
+
+    def close(self) -> None:
+        """Mark the log complete; followers stop after the last message."""
+        self.closed = True
+        self._wake()
+
+    def _wake(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def follow(self, after: int = 0, heartbeat: Optional[float] = None) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Messages with an id above `after`, then live ones until the log closes.
+
+        Args:
+            after: Last message id the client has seen
+            heartbeat: Yield None after this many idle seconds (keep-alive)
+        """
+        index = max(0, after)
+        while True:
+            while index < len(self.events):
+                yield self.events[index]
+                index += 1
+            if self.closed:
+                return
+            changed = self._changed
+            try:
+                await asyncio.wait_for(changed.wait(), heartbeat)
+            except asyncio.TimeoutError:
+                yield None
+
+
+def _client_test_case(test_case: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in test_case.items() if key != "scenario_id"}
+
+
+class GenerationProgress:
+    """Translates pipeline events of one run into client messages."""
+
+    def __init__(self, run: Any, citations: Optional[List[Dict[str, Any]]] = None):
+        self.run = run
+        self.log: GenerationEventLog = run.events
+        self.citations = citations or []
+        self.started = time.perf_counter()
+        self.generating_started: Optional[float] = None
+        self.scores: List[int] = []
+        self.progress = 0
+
+    def _progress(self) -> int:
+        run = self.run
+        planned = len(run.scenarios)
+        if not planned:
+            return 0
+        done = run.scenarios_completed + run.scenarios_failed
+        progress = PLANNING_PROGRESS + int((99 - PLANNING_PROGRESS) * done / planned)
+        self.progress = max(self.progress, min(progress, 99))
+        return self.progress
+
+    def _estimated_time(self) -> Optional[int]:
+        """Seconds left, from the average time per finished scenario so far."""
+        run = self.run
+        done = run.scenarios_completed + run.scenarios_failed
+        if self.generating_started is None or not done:
+            return None
+        per_scenario = (time.perf_counter() - self.generating_started) / done
+        return round(per_scenario * max(0, len(run.scenarios) - done))
+
+    def _tokens_per_second(self) -> float:
+        elapsed = time.perf_counter() - self.started
+        return round(self.run.completion_tokens / elapsed, 2) if elapsed > 0 else 0.0
+
+    def __call__(self, event: str, data: Dict[str, Any]) -> None:
+        publish = self.log.publish
+        if event == "stage":
+            stage = data["stage"]
+            if stage == "generating":
+                self.generating_started = time.perf_counter()
+            publish("step", message=AGENT_MESSAGES.get(stage, stage), stage=stage, progress=self._progress())
+            if stage == "planning" and self.citations:
+                filenames = list(dict.fromkeys(c.get("filename") for c in self.citations if c.get("filename")))
+                publish("kb_message", kbMessage=f"Using {', '.join(filenames)} for context")
+        elif event == "scenario":
+            scenario, status = data["scenario"], data["status"]
+            if status == "planned":
+                publish("step", message=f"Planner Agent: Scenario {scenario['scenario_id']}: {scenario['title']}")
+                return
+            message = f"Generator Agent: Scenario {scenario['scenario_id']} {status}"
+            if status == "failed":
+                message += f" ({data.get('error')})"
+            publish("step", message=message)
+            publish(
+                "progress",
+                progress=self._progress(),
+                estimatedTime=self._estimated_time(),
+                testCasesCount=self.run.test_cases_passed,
+                tokensPerSecond=self._tokens_per_second()
+            )
+        elif event == "test_case":
+            test_case = data["verdict"]["test_case"]
+            if test_case.get("kb_compliance_score") is not None:
+                self.scores.append(test_case["kb_compliance_score"])
+            publish(
+                "test_case",
+                testCase=_client_test_case(test_case),
+                testCasesCount=self.run.test_cases_passed,
+                kbComplianceScore=test_case.get("kb_compliance_score")
+            )
+        elif event == "rejected":
+            verdict = data["verdict"]
+            title = verdict["test_case"].get("title") or "untitled"
+            publish("step", message=f"Executor Agent: Rejected '{title}': {', '.join(verdict['errors'])}")
+
+    def finish(self) -> None:
+        """Publish the final complete or error message and close the log."""
+        run = self.run
+        if run.status == "completed":
+            self.log.publish(
+                "complete",
+                progress=100,
+                message="Generation complete!",
+                testCasesCount=run.test_cases_passed,
+                kbComplianceScore=round(sum(self.scores) / len(self.scores)) if self.scores else None,
+                tokensPerSecond=self._tokens_per_second(),
+                elapsedSeconds=round(time.perf_counter() - self.started, 3)
+            )
+        else:
+            self.log.publish(
+                "error",
+                error=run.error or "Generation failed",
+                testCasesCount=run.test_cases_passed
+            )
+        self.log.close()
@@ -0,0 +1,237 @@
+"""
+Generation Jobs - Background generation runs per project.
+
+Inputs are loaded from the database up front (requirement text of the
+project's extracted files, its LLM configuration and KB context), so a
+request can be rejected before any run starts. The run itself executes in
+the background and persists each validated test case as a TestCase row the
+moment the Executor accepts it; its progress is published to the run's
+event log for streaming clients.
+
+Runs are checkpointed under GENERATION_CHECKPOINT_DIR. A run that fails
+(provider timeout, worker restart) can be resumed by its run id: planning,
+completed scenarios and persisted test cases are not redone. Checkpoints of
+a completed run are removed.
+"""
+import asyncio
+import re
+from typing import Any, Callable, Dict, Optional
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models import File, Project, TestCase
+from app.services.configuration_service import configuration_service
+from app.services.generation.agents import GenerationInputs
+from app.services.generation.checkpoints import CheckpointError, GenerationCheckpointStore, RunCheckpoint
+from app.services.generation.events import GenerationProgress
+from app.services.generation.pipeline import GenerationPipeline, GenerationRun
+from app.services.kb.context_builder import kb_context_builder
+from app.services.llm.ollama_models import keep_alive_options
+from app.services.tokens import token_estimator
+
+
+class GenerationInputError(ValueError):
+    """A project is missing something a generation run needs."""
+
+
+_TEST_CASE_NUMBER_RE = re.compile(r"^TC(\d+)$")
+
+
+def last_test_case_number(db: Session, project_id: UUID) -> int:
+    """Highest TCnnn number among a project's test cases (0 if it has none)."""
+    rows = db.query(TestCase.test_case_id).filter(TestCase.project_id == project_id).all()
+    numbers = [int(match.group(1)) for (test_case_id,) in rows if (match := _TEST_CASE_NUMBER_RE.match(test_case_id or ""))]
+    return max(numbers, default=0)
+
+
+def load_generation_inputs(db: Session, project_id: UUID) -> GenerationInputs:
+    """
+    Collect a project's requirements, LLM configuration and KB context.
+
+    The project's other active configurations become alternates the agents
+    hedge and fail over to.
+
+    Args:
+        db: Database session
+        project_id: Project to generate test cases for
+
+    Returns:
+        GenerationInputs for the pipeline
+
+    Raises:
+        GenerationInputError: When the project, its extracted requirements or its configuration is missing
+    """
+    project = db.query(Project).filter(Project.id == project_id, Project.is_active == True).first()
+    if project is None:
+        raise GenerationInputError(f"Project with id {project_id} not found")
+
+    files = db.query(File).filter(
+        File.project_id == project_id,
+        File.extraction_status == "completed"
+    ).order_by(File.created_at).all()
+    parts = [f"## {f.filename}\n{f.extracted_text.strip()}" for f in files if f.extracted_text and f.extracted_text.strip()]
+    if not parts:
+        raise GenerationInputError(f"Project {project_id} has no extracted requirement files")
+
+    config = configuration_service.get_project_configuration(db, project_id)
+    if config is None:
+        raise GenerationInputError(f"No active configuration found for project {project_id}")
+
+    requirements = token_estimator.truncate(
+        "\n\n".join(parts), settings.GENERATION_REQUIREMENTS_MAX_TOKENS, config.model
+    )
+    inputs = GenerationInputs(
+        project_id=str(project_id),
+        requirements=requirements,
+        provider=config.provider,
+        model=config.model,
+        base_url=config.base_url,
+        api_key=configuration_service.get_decrypted_api_key(db, config.id),
+        temperature=config.temperature,
+        max_tokens=config.max_tokens,
+        options=keep_alive_options(config),
+        alternates=[
+            {
+                "provider": alternate.provider,
+                "model": alternate.model,
+                "base_url": alternate.base_url,
+                "api_key": configuration_service.get_decrypted_api_key(db, alternate.id),
+                "temperature": alternate.temperature,
+                "max_tokens": alternate.max_tokens,
+                "options": keep_alive_options(alternate),
+            }
+            for alternate in configuration_service.list_project_configurations(db, project_id)
+            if alternate.id != config.id
+        ],
+        test_case_offset=last_test_case_number(db, project_id)
+    )
+    if config.kb_enabled or project.kb_enabled:
+        packed = kb_context_builder.build_kb_context(db, project_id, requirements, config=config)
+        inputs.kb_context = packed.text
+        inputs.citations = packed.citations
+    return inputs
+
+
+def persist_test_case(project_id: str, test_case: Dict[str, Any], session_factory: Callable[[], Session] = SessionLocal) -> str:
+    """Insert one validated test case; returns its id."""
+    db = session_factory()
+    try:
+        row = TestCase(
+            project_id=UUID(project_id),
+            test_case_id=test_case["test_case_id"],
+            title=test_case["title"],
+            category=test_case.get("category"),
+            priority=test_case.get("priority"),
+            system=test_case.get("system"),
+            preconditions=test_case.get("preconditions"),
+            steps=test_case.get("steps"),
+            expected_result=test_case.get("expected_result"),
+            test_data=test_case.get("test_data"),
+            kb_references=test_case.get("kb_references"),
+            kb_compliance_score=test_case.get("kb_compliance_score"),
+            created_by_agent="Generator"
+        )
+        db.add(row)
+        db.commit()
+        return str(row.id)
+    finally:
+        db.close()
+
+
+class GenerationJobManager:
+    """Service that runs at most one background generation run per project."""
+
+    def __init__(
+        self,
+        pipeline: Optional[GenerationPipeline] = None,
+        session_factory: Callable[[], Session] = SessionLocal,
+        checkpoints: Optional[GenerationCheckpointStore] = None
+    ):
+        self.pipeline = pipeline or GenerationPipeline()
+        self.session_factory = session_factory
+        self.checkpoints = checkpoints or GenerationCheckpointStore(settings.GENERATION_CHECKPOINT_DIR)
+        self._runs: Dict[str, GenerationRun] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    async def start(self, inputs: GenerationInputs) -> GenerationRun:
+        """
+        Start a generation run for a project; returns immediately.
+
+        If a run for the project is already in progress it is returned as is.
+        """
+        key = inputs.project_id
+        task = self._tasks.get(key)
+        if task is not None and not task.done():
+            return self._runs[key]
+
+        run = GenerationRun(project_id=key)
+        checkpoint = self.checkpoints.begin(key, run.run_id, self.pipeline.fingerprint(inputs))
+        self._runs[key] = run
+        self._tasks[key] = asyncio.create_task(self._run(run, inputs, checkpoint))
+        return run
+
+    async def resume(self, inputs: GenerationInputs, run_id: Optional[str] = None) -> GenerationRun:
+        """
+        Resume a failed or interrupted run from its checkpoints; returns immediately.
+
+        Args:
+            inputs: The project's current inputs (must match the run's)
+            run_id: Run to resume (default: the project's latest checkpointed run)
+
+        Raises:
+            CheckpointError: When there is no checkpointed run or the inputs changed since it ran
+        """
+        key = inputs.project_id
+        task = self._tasks.get(key)
+        if task is not None and not task.done():
+            if run_id is None or self._runs[key].run_id == run_id:
+                return self._runs[key]
+            raise CheckpointError(f"Generation run {self._runs[key].run_id} is still in progress")
+
+        manifest = self.checkpoints.find(key, run_id)
+        if manifest is None:
+            raise CheckpointError(f"No resumable generation run found for project {key}")
+        checkpoint = self.checkpoints.open(key, manifest["run_id"], self.pipeline.fingerprint(inputs))
+
+        run = GenerationRun(project_id=key, run_id=manifest["run_id"], resumed=True)
+        self._runs[key] = run
+        self._tasks[key] = asyncio.create_task(self._run(run, inputs, checkpoint))
+        return run
+
+    async def _run(self, run: GenerationRun, inputs: GenerationInputs, checkpoint: RunCheckpoint) -> None:
+        async def sink(test_case: Dict[str, Any]) -> str:
+            return await asyncio.to_thread(persist_test_case, run.project_id, test_case, self.session_factory)
+
+        progress = GenerationProgress(run, inputs.citations)
+        try:
+            await self.pipeline.run(run, inputs, sink=sink, on_event=progress, checkpoint=checkpoint)
+        except Exception as e:
+            run.status = "failed"
+            run.error = str(e)
+        finally:
+            progress.finish()
+            try:
+                if run.status == "completed":
+                    self.checkpoints.delete(run.project_id, run.run_id)
+                else:
+                    checkpoint.save_manifest(status=run.status, error=run.error)
+            except Exception:
+                pass  # Checkpoints are best effort; the run's own outcome stands
+
+    async def wait(self, project_id) -> Optional[GenerationRun]:
+        """Wait for a project's running generation to finish."""
+        task = self._tasks.get(str(project_id))
+        if task is not None:
+            await task
+        return self._runs.get(str(project_id))
+
+    def get(self, project_id) -> Optional[GenerationRun]:
+        """Latest generation run of a project."""
+        return self._runs.get(str(project_id))
+
+
+# Global generation job manager instance
+generation_jobs = GenerationJobManager()
@@ -0,0 +1,149 @@
+"""
+Incremental JSON parsing of streamed LLM output.
+
+Agents answer with a JSON list of objects, usually wrapped in an object
+(`{"test_cases": [{...}, {...}]}`), sometimes bare, fenced or preceded by
+prose. `IncrementalJSONParser` is fed text deltas as they stream in and
+returns each list item the moment its closing brace arrives, so downstream
+work starts long before the completion ends.
+
+The parser tracks strings, escapes and nesting one character at a time. The
+item list is the first array whose first element is an object; bracketed
+prose such as "[1]" before the JSON is skipped. An item that isn't valid
+JSON is retried once with trailing commas removed, and otherwise reported
+as a broken item (with its raw text) instead of aborting the stream.
+"""
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+
+
+@dataclass
+class StreamedItem:
+    """One list item from the stream: parsed value, or the raw text and why it failed."""
+    index: int
+    raw: str
+    value: Any = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def loads_tolerant(text: str) -> Any:
+    """json.loads, retrying with trailing commas removed."""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return json.loads(_TRAILING_COMMA_RE.sub(r"\1", text))
+
+
+class IncrementalJSONParser:
+    """Yields the objects of a streamed JSON list as soon as each one closes."""
+
+    def __init__(self):
+        self.text = ""  # Everything fed so far
+        self._pos = 0  # Next character to scan
+        self._stack: List[str] = []  # Open containers: "{" or "["
+        self._in_string = False
+        self._escape = False
+        self._started = False  # Inside the JSON document (past any leading prose)
+        self._pending_array: Optional[int] = None  # Depth of an array whose first element isn't known yet
+        self._items_depth: Optional[int] = None  # Stack depth of the item list once found
+        self._item_start: Optional[int] = None
+        self.items = 0
+
+    def feed(self, delta: str) -> List[StreamedItem]:
+        """
+        Consume a text delta.
+
+        Returns:
+            Items completed by this delta, in order
+        """
+        self.text += delta
+        completed: List[StreamedItem] = []
+        text = self.text
+        while self._pos < len(text):
+            char = text[self._pos]
+            index = self._pos
+            self._pos += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if not self._started:
+                if char == "{" or (char == "[" and self._array_starts_json(index)):
+                    self._started = True
+                elif char == "[" and self._array_starts_json(index) is None:
+                    # Can't tell yet whether this bracket opens JSON or prose; wait for more text
+                    self._pos = index
+                    break
+                else:
+                    continue
+
+            if char.isspace():
+                continue
+            if self._pending_array is not None and self._pending_array == len(self._stack) and char != "]":
+                # The array's first element decides whether it is the item list
+                if char == "{" and self._items_depth is None:
+                    self._items_depth = len(self._stack)
+                self._pending_array = None
+
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if char == "{" and self._items_depth is not None and len(self._stack) == self._items_depth:
+                    self._item_start = index
+                self._stack.append(char)
+                if char == "[" and self._items_depth is None:
+                    self._pending_array = len(self._stack)
+            elif char in "}]" and self._stack:
+                self._stack.pop()
+                if self._pending_array is not None and self._pending_array > len(self._stack):
+                    self._pending_array = None
+                if char == "}" and self._item_start is not None and len(self._stack) == self._items_depth:
+                    completed.append(self._item(text[self._item_start:index + 1]))
+                    self._item_start = None
+        return completed
+
+    def _array_starts_json(self, index: int) -> Optional[bool]:
+        """Whether the "[" at index opens a JSON array (None: not enough text yet)."""
+        for char in self.text[index + 1:]:
+            if not char.isspace():
+                return char in '{["]'
+        return None
+
+    def _item(self, raw: str) -> StreamedItem:
+        item = StreamedItem(index=self.items, raw=raw)
+        self.items += 1
+        try:
+            item.value = loads_tolerant(raw)
+        except ValueError as e:
+            item.error = f"invalid JSON: {e}"
+        return item
+
+    def close(self) -> List[StreamedItem]:
+        """
+        End of stream.
+
+        Returns:
+            A broken item for an object left open (e.g. output cut off at max_tokens), if any
+        """
+        if self._item_start is None:
+            return []
+        raw = self.text[self._item_start:]
+        self._item_start = None
+        item = StreamedItem(index=self.items, raw=raw, error="truncated: output ended inside the item")
+        self.items += 1
+        return [item]
@@ -0,0 +1,327 @@
+"""
+Generation Pipeline - Planner → Generator → Executor with overlapping stages.
+
+The stages form a small DAG that is run as a stream rather than in batches:
+
+    Planner ──scenario──▶ Generator (one task per scenario, bounded) ──test case──▶ Executor workers
+
+Each scenario is handed to a Generator task as soon as the Planner emits
+it, at most GENERATION_CONCURRENCY at a time (the LLM scheduler applies the
+provider's own limits underneath). Every generated test case goes on a
+queue that GENERATION_EXECUTOR_WORKERS workers drain, so validation and
+persistence of the first test cases run while later scenarios are still
+being generated - and, since the Generator yields each test case as soon as
+it closes in the LLM stream, while the same scenario is still being
+written. A failing scenario is recorded and skipped; the run only fails if
+planning fails or no scenario succeeds.
+
+With a RunCheckpoint, every stage's artifact is stored as it completes and
+a resumed run replays stored artifacts instead of redoing the work. Test
+case numbers continue after the project's existing test cases (and, when
+resuming, after the highest stored one).
+"""
+import asyncio
+import itertools
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional
+
+from app.core.config import settings
+from app.services.generation.agents import (
+    ExecutorAgent,
+    GenerationInputs,
+    GeneratorAgent,
+    PlannerAgent,
+    Scenario,
+    Verdict,
+)
+from app.services.generation.checkpoints import RunCheckpoint, inputs_fingerprint
+from app.services.generation.events import GenerationEventLog
+from app.services.generation.json_stream import StreamedItem
+from app.services.llm.base import LLMResponse
+
+
+# Persists a validated test case; returns its database id
+TestCaseSink = Callable[[Dict[str, Any]], Awaitable[Optional[str]]]
+
+# Receives pipeline events: (event type, data)
+EventListener = Callable[[str, Dict[str, Any]], None]
+
+
+@dataclass
+class GenerationRun:
+    """Progress, throughput and results of one generation run."""
+    project_id: str
+    run_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = "pending"  # pending, running, completed, failed
+    stage: str = "pending"  # pending, planning, generating, done
+    provider: Optional[str] = None
+    model: Optional[str] = None
+    scenarios: List[Dict[str, Any]] = field(default_factory=list)
+    scenarios_completed: int = 0
+    scenarios_failed: int = 0
+    test_cases_generated: int = 0
+    test_cases_passed: int = 0
+    test_cases_rejected: int = 0
+    test_cases_malformed: int = 0  # Streamed items that failed to parse or match the schema (each retried alone)
+    test_case_ids: List[str] = field(default_factory=list)  # Persisted TestCase ids, in order
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    planning_seconds: float = 0.0
+    first_test_case_seconds: Optional[float] = None  # Time to first persisted test case
+    elapsed_seconds: float = 0.0
+    errors: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    resumed: bool = False  # Continues an earlier run from its checkpoints
+    scenarios_restored: int = 0  # Scenarios whose Generator output came from a checkpoint
+    test_cases_restored: int = 0  # Executor verdicts that came from a checkpoint
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    events: GenerationEventLog = field(default_factory=GenerationEventLog, repr=False)  # Client progress feed
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    @property
+    def tokens_per_second(self) -> float:
+        return self.completion_tokens / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def add_usage(self, response: LLMResponse) -> None:
+        self.prompt_tokens += response.usage.prompt_tokens
+        self.completion_tokens += response.usage.completion_tokens
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "run_id": self.run_id,
+            "project_id": self.project_id,
+            "status": self.status,
+            "stage": self.stage,
+            "provider": self.provider,
+            "model": self.model,
+            "scenarios_planned": len(self.scenarios),
+            "scenarios_completed": self.scenarios_completed,
+            "scenarios_failed": self.scenarios_failed,
+            "test_cases_generated": self.test_cases_generated,
+            "test_cases_passed": self.test_cases_passed,
+            "test_cases_rejected": self.test_cases_rejected,
+            "test_cases_malformed": self.test_cases_malformed,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "tokens_per_second": round(self.tokens_per_second, 2),
+            "planning_seconds": round(self.planning_seconds, 3),
+            "first_test_case_seconds": (
+                round(self.first_test_case_seconds, 3) if self.first_test_case_seconds is not None else None
+            ),
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "errors": self.errors[:10],
+            "error": self.error,
+            "resumed": self.resumed,
+            "scenarios_restored": self.scenarios_restored,
+            "test_cases_restored": self.test_cases_restored,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class GenerationPipeline:
+    """Runs Planner, Generator and Executor as overlapping async stages."""
+
+    def __init__(
+        self,
+        planner: Optional[PlannerAgent] = None,
+        generator: Optional[GeneratorAgent] = None,
+        executor: Optional[ExecutorAgent] = None,
+        concurrency: Optional[int] = None,
+        executor_workers: Optional[int] = None
+    ):
+        self.planner = planner or PlannerAgent(max_scenarios=settings.GENERATION_MAX_SCENARIOS)
+        self.generator = generator or GeneratorAgent(
+            cases_per_scenario=settings.GENERATION_CASES_PER_SCENARIO,
+            item_retries=settings.GENERATION_ITEM_RETRIES
+        )
+        self.executor = executor or ExecutorAgent()
+        self.concurrency = max(1, concurrency or settings.GENERATION_CONCURRENCY)
+        self.executor_workers = max(1, executor_workers or settings.GENERATION_EXECUTOR_WORKERS)
+
+    def fingerprint(self, inputs: GenerationInputs) -> str:
+        """Checkpoint key of a run's inputs under this pipeline's settings."""
+        return inputs_fingerprint(inputs, self.planner.max_scenarios, self.generator.cases_per_scenario)
+
+    async def run(
+        self,
+        run: GenerationRun,
+        inputs: GenerationInputs,
+        sink: Optional[TestCaseSink] = None,
+        on_event: Optional[EventListener] = None,
+        checkpoint: Optional[RunCheckpoint] = None
+    ) -> GenerationRun:
+        """
+        Generate, validate and persist a project's test cases.
+
+        Args:
+            run: Run record updated in place as work completes
+            inputs: Requirements, KB context and LLM configuration
+            sink: Persists each test case that passes validation
+            on_event: Called with ("stage" | "scenario" | "test_case" | "rejected", data)
+            checkpoint: Stores each stage's artifacts; those already stored are replayed instead of redone
+
+        Returns:
+            The run with final status, counts and timings
+        """
+        def emit(event: str, **data: Any) -> None:
+            if on_event is not None:
+                on_event(event, data)
+
+        run.status, run.stage = "running", "planning"
+        run.provider, run.model = inputs.provider, inputs.model
+        run.started_at = datetime.utcnow()
+        started = time.perf_counter()
+        emit("stage", stage="planning")
+
+        queue: asyncio.Queue = asyncio.Queue()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        generators: List[asyncio.Task] = []
+        restored = checkpoint.load_verdicts() if checkpoint is not None else {}
+        numbers = itertools.count(1 + max([
+            inputs.test_case_offset,
+            *(int(verdict["test_case"]["test_case_id"][2:]) for verdict in restored.values() if verdict["passed"])
+        ]))
+
+        def broken(item: StreamedItem) -> None:
+            run.test_cases_malformed += 1
+            run.errors.append(f"malformed test case: {item.error}")
+
+        async def generate(scenario: Scenario) -> None:
+            outputs = checkpoint.load_outputs(scenario) if checkpoint is not None else None
+            if outputs is not None:
+                run.scenarios_restored += 1
+                for index, raw in enumerate(outputs):
+                    run.test_cases_generated += 1
+                    await queue.put((scenario, index, raw))
+                run.scenarios_completed += 1
+                emit("scenario", scenario=scenario.to_dict(), status="completed")
+                return
+            outputs = []
+            async with semaphore:
+                try:
+                    async for raw in self.generator.generate(
+                        scenario, inputs, on_response=run.add_usage, on_broken=broken
+                    ):
+                        run.test_cases_generated += 1
+                        await queue.put((scenario, len(outputs), raw))
+                        outputs.append(raw)
+                    if checkpoint is not None:
+                        checkpoint.save_outputs(scenario, outputs)
+                except Exception as e:
+                    run.scenarios_failed += 1
+                    run.errors.append(f"{scenario.scenario_id}: {e}")
+                    emit("scenario", scenario=scenario.to_dict(), status="failed", error=str(e))
+                    return
+            run.scenarios_completed += 1
+            emit("scenario", scenario=scenario.to_dict(), status="completed")
+
+        async def execute() -> None:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                scenario, index, raw = item
+                key = f"{scenario.scenario_id}-{index}"
+                if key in restored:
+                    self._restore(run, restored[key], emit)
+                    continue
+                verdict = self.executor.validate(raw, scenario, inputs.citations)
+                await self._accept(run, verdict, sink, emit, started, numbers)
+                if checkpoint is not None:
+                    checkpoint.save_verdict(key, verdict.to_dict())
+
+        planned = checkpoint.load_scenarios() if checkpoint is not None else None
+        if planned is not None:
+            scenarios = self._replay(planned)
+        else:
+            scenarios = self.planner.plan(inputs, on_response=run.add_usage)
+
+        workers = [asyncio.create_task(execute()) for _ in range(self.executor_workers)]
+        try:
+            try:
+                async for scenario in scenarios:
+                    run.scenarios.append(scenario.to_dict())
+                    if len(run.scenarios) == 1:
+                        run.stage = "generating"
+                        emit("stage", stage="generating")
+                    emit("scenario", scenario=scenario.to_dict(), status="planned")
+                    generators.append(asyncio.create_task(generate(scenario)))
+            finally:
+                run.planning_seconds = time.perf_counter() - started
+            if not run.scenarios:
+                raise ValueError("Planner returned no scenarios")
+            if checkpoint is not None and planned is None:
+                checkpoint.save_scenarios([Scenario(**scenario) for scenario in run.scenarios])
+            await asyncio.gather(*generators)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        except Exception as e:
+            run.status = "failed"
+            run.error = str(e) or type(e).__name__
+        else:
+            if run.scenarios_completed == 0:
+                run.status = "failed"
+                run.error = f"All {len(run.scenarios)} scenarios failed: {run.errors[0]}"
+            else:
+                run.status = "completed"
+        finally:
+            for task in generators + workers:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*generators, *workers, return_exceptions=True)
+            run.stage = "done"
+            run.elapsed_seconds = time.perf_counter() - started
+            run.finished_at = datetime.utcnow()
+        return run
+
+    async def _accept(
+        self,
+        run: GenerationRun,
+        verdict: Verdict,
+        sink: Optional[TestCaseSink],
+        emit: Callable[..., None],
+        started: float,
+        numbers: Iterator[int]
+    ) -> None:
+        """Persist a passed test case (numbered in completion order) or count a rejection."""
+        if not verdict.passed:
+            run.test_cases_rejected += 1
+            emit("rejected", verdict=verdict.to_dict())
+            return
+        run.test_cases_passed += 1
+        test_case = verdict.test_case
+        test_case["test_case_id"] = f"TC{next(numbers):03d}"
+        if sink is not None:
+            test_case_id = await sink(test_case)
+            if test_case_id is not None:
+                test_case["id"] = test_case_id
+                run.test_case_ids.append(test_case_id)
+        if run.first_test_case_seconds is None:
+            run.first_test_case_seconds = time.perf_counter() - started
+        emit("test_case", verdict=verdict.to_dict())
+
+    def _restore(self, run: GenerationRun, verdict: Dict[str, Any], emit: Callable[..., None]) -> None:
+        """Count a checkpointed verdict without validating or persisting its test case again."""
+        run.test_cases_restored += 1
+        if not verdict["passed"]:
+            run.test_cases_rejected += 1
+            emit("rejected", verdict=verdict)
+            return
+        run.test_cases_passed += 1
+        if verdict["test_case"].get("id") is not None:
+            run.test_case_ids.append(verdict["test_case"]["id"])
+        emit("test_case", verdict=verdict)
+
+    @staticmethod
+    async def _replay(scenarios: List[Scenario]) -> AsyncIterator[Scenario]:
+        for scenario in scenarios:
+            yield scenario
@@ -0,0 +1,151 @@
+"""
+HTTP Client Registry - Long-lived, pooled httpx clients per LLM provider.
+
+Opening a new AsyncClient per call pays DNS, TCP and TLS setup every time.
+The registry keeps one client per origin (scheme + host + port) whose
+keep-alive connections are reused across requests, using HTTP/2 for https
+providers when the `h2` package is installed. Clients are created at app
+startup and closed on shutdown (see app.main).
+"""
+import asyncio
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.core.config import settings
+from app.services.cassettes import CassetteTransport, cassette_transport_from_settings
+
+
+# Default API base URLs of the hosted providers (overridable, e.g. to target the mock server)
+PROVIDER_BASE_URLS = {
+    "openrouter": settings.OPENROUTER_BASE_URL.rstrip("/"),
+    "deepseek": settings.DEEPSEEK_BASE_URL.rstrip("/"),
+    "gemini": settings.GEMINI_BASE_URL.rstrip("/"),
+}
+
+
+def http2_available() -> bool:
+    """True if httpx can negotiate HTTP/2 (the optional h2 package is installed)."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    if not parts.scheme or not parts.netloc:
+        raise ValueError(f"Invalid base URL: {url}")
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+
+class HTTPClientRegistry:
+    """Service that hands out one pooled AsyncClient per provider origin."""
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+        http2: Optional[bool] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections or settings.LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=max_keepalive_connections or settings.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=keepalive_expiry if keepalive_expiry is not None else settings.LLM_HTTP_KEEPALIVE_EXPIRY
+        )
+        self.connect_timeout = connect_timeout or settings.LLM_HTTP_CONNECT_TIMEOUT
+        enabled = settings.LLM_HTTP2_ENABLED if http2 is None else http2
+        self.http2 = enabled and http2_available()
+        self.transport = transport
+        # Keyed by (origin, event loop); None is a client created outside any loop, not yet used
+        self._clients: Dict[Tuple[str, Optional[asyncio.AbstractEventLoop]], httpx.AsyncClient] = {}
+        self._created = 0
+
+    def _new_client(self, origin: str) -> httpx.AsyncClient:
+        self._created += 1
+        return httpx.AsyncClient(
+            base_url=origin,
+            limits=self.limits,
+            timeout=httpx.Timeout(30.0, connect=self.connect_timeout),
+            http2=self.http2 and origin.startswith("https://"),
+            transport=self.transport
+        )
+
+    def get(self, base_url: str) -> httpx.AsyncClient:
+        """
+        Pooled client for a base URL's origin, created on first use.
+
+        Request URLs may still be absolute; the client is shared by every
+        base URL on the same origin. Connections belong to an event loop, so
+        each loop (e.g. a worker thread's) keeps its own client per origin;
+        clients of loops that have since closed are dropped.
+        """
+        origin = _origin(base_url)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        self._prune()
+        client = self._clients.get((origin, loop))
+        if client is None and loop is not None:
+            # A client created before the loop started (e.g. at import) is adopted by the first loop to use it
+            client = self._clients.pop((origin, None), None)
+            if client is not None:
+                self._clients[(origin, loop)] = client
+        if client is not None and not client.is_closed:
+            return client
+        client = self._new_client(origin)
+        self._clients[(origin, loop)] = client
+        return client
+
+    def _prune(self) -> None:
+        """Forget clients whose event loop is closed (their connections can never be used again)."""
+        stale = [
+            key for key, client in self._clients.items()
+            if client.is_closed or (key[1] is not None and key[1].is_closed())
+        ]
+        for key in stale:
+            del self._clients[key]
+
+    def for_provider(self, provider: str, base_url: Optional[str] = None) -> httpx.AsyncClient:
+        """Pooled client for a provider (base_url overrides its default API URL)."""
+        if base_url is None:
+            base_url = settings.OLLAMA_BASE_URL if provider == "ollama" else PROVIDER_BASE_URLS[provider]
+        return self.get(base_url)
+
+    async def start(self) -> None:
+        """Create clients for the configured providers (called at app startup)."""
+        self.for_provider("ollama")
+        for provider in PROVIDER_BASE_URLS:
+            self.for_provider(provider)
+
+    async def aclose(self) -> None:
+        """Close every client and its pooled connections (called at app shutdown)."""
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            if not client.is_closed:
+                try:
+                    await client.aclose()
+                except Exception:
+                    pass  # Bound to another thread's loop; its connections go with that loop
+
+    def stats(self) -> Dict:
+        """Open clients and pool configuration."""
+        return {
+            "origins": sorted({origin for origin, _ in self._clients}),
+            "clients_created": self._created,
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "keepalive_expiry": self.limits.keepalive_expiry,
+            "cassette": self.transport.stats() if isinstance(self.transport, CassetteTransport) else None,
+        }
+
+
+# Global HTTP client registry instance
+llm_http_clients = HTTPClientRegistry(transport=cassette_transport_from_settings())
@@ -0,0 +1,56 @@
+"""
+Knowledge Base retrieval services.
+"""
+from .chunker import KBChunk, chunk_text
+from .embeddings import HashingEmbedder, OllamaEmbedder, create_embedder
+from .embedding_store import EmbeddingStore, chunks_fingerprint
+from .vector_index import VectorIndex, ExactIndex, HNSWIndex, create_index
+from .index_manager import KBIndexManager, KBSearchHit, kb_index_manager
+from .lexical_index import BM25Index
+from .near_duplicate import MinHasher, MinHashLSH, NearDuplicateDetector, estimate_similarity, kb_duplicate_detector
+from .retriever import KBRetriever, RetrievalResult, SEARCH_MODES, kb_retriever, reciprocal_rank_fusion
+from .context_packer import PackedContext, estimate_tokens, pack_chunks
+from .context_cache import KBContextCache, kb_context_cache, query_fingerprint
+from .context_builder import KBContextBuilder, kb_context_builder, kb_token_budget
+from .embedding_jobs import EmbeddingJob, EmbeddingPipeline, EmbeddingJobManager, kb_embedding_jobs
+
+__all__ = [
+    "KBChunk",
+    "chunk_text",
+    "HashingEmbedder",
+    "OllamaEmbedder",
+    "create_embedder",
+    "EmbeddingStore",
+    "chunks_fingerprint",
+    "VectorIndex",
+    "ExactIndex",
+    "HNSWIndex",
+    "create_index",
+    "KBIndexManager",
+    "KBSearchHit",
+    "kb_index_manager",
+    "BM25Index",
+    "MinHasher",
+    "MinHashLSH",
+    "NearDuplicateDetector",
+    "estimate_similarity",
+    "kb_duplicate_detector",
+    "KBRetriever",
+    "RetrievalResult",
+    "SEARCH_MODES",
+    "kb_retriever",
+    "reciprocal_rank_fusion",
+    "PackedContext",
+    "estimate_tokens",
+    "pack_chunks",
+    "KBContextCache",
+    "kb_context_cache",
+    "query_fingerprint",
+    "KBContextBuilder",
+    "kb_context_builder",
+    "kb_token_budget",
+    "EmbeddingJob",
+    "EmbeddingPipeline",
+    "EmbeddingJobManager",
+    "kb_embedding_jobs",
+]
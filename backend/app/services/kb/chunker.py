@@ -0,0 +1,106 @@
+"""
+Split extracted KB document text into retrieval chunks.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Tuple
+
+
+# PDFParser prefixes each page with "--- Page N ---"
+PAGE_MARKER_RE = re.compile(r"^--- Page (\d+) ---$", re.MULTILINE)
+
+
+@dataclass
+class KBChunk:
+    """A contiguous slice of a KB document's extracted text."""
+    doc_id: str
+    chunk_index: int
+    text: str
+    start: int  # Character offset into extracted_text
+    end: int
+    page: Optional[int] = None
+    filename: str = ""
+    minhash: Optional[Any] = field(default=None, repr=False, compare=False)
+
+    @property
+    def chunk_id(self) -> str:
+        """Stable label used as the vector index key."""
+        return f"{self.doc_id}:{self.chunk_index}"
+
+
+def _page_sections(text: str) -> List[Tuple[Optional[int], int, int]]:
+    """Return (page, start, end) spans; a single unpaged span for non-PDF text."""
+    markers = list(PAGE_MARKER_RE.finditer(text))
+    if not markers:
+        return [(None, 0, len(text))]
+
+    sections = []
+    if markers[0].start() > 0:
+        sections.append((None, 0, markers[0].start()))
+    for i, marker in enumerate(markers):
+        end = markers[i + 1].start() if i + 1 < len(markers) else len(text)
+        sections.append((int(marker.group(1)), marker.end(), end))
+    return sections
+
+
+def _window_end(text: str, start: int, limit: int) -> int:
+    """Pick a chunk end at or before `limit`, preferring line then word breaks."""
+    if limit >= len(text):
+        return len(text)
+    floor = start + (limit - start) // 2
+    for separator in ("\n\n", "\n", ". ", " "):
+        pos = text.rfind(separator, floor, limit)
+        if pos != -1:
+            return pos + len(separator)
+    return limit
+
+
+def chunk_text(
+    doc_id: str,
+    text: str,
+    chunk_size: int = 1000,
+    overlap: int = 150,
+    filename: str = ""
+) -> List[KBChunk]:
+    """
+    Split document text into overlapping chunks that never cross page boundaries.
+
+    Args:
+        doc_id: KB document ID (string form)
+        text: Extracted document text
+        chunk_size: Target chunk length in characters
+        overlap: Characters shared between consecutive chunks of a page
+        filename: Document filename, carried on chunks for citations
+
+    Returns:
+        Ordered list of chunks
+    """
+    if not text:
+        return []
+    overlap = max(0, min(overlap, chunk_size // 2))
+
+    chunks: List[KBChunk] = []
+    for page, section_start, section_end in _page_sections(text):
+        start = section_start
+        while start < section_end:
+            end = _window_end(text, start, min(start + chunk_size, section_end))
+            piece = text[start:end]
+            stripped = piece.strip()
+            if stripped:
+                lead = len(piece) - len(piece.lstrip())
+                chunks.append(KBChunk(
+                    doc_id=doc_id,
+                    chunk_index=len(chunks),
+                    text=stripped,
+                    start=start + lead,
+                    end=start + lead + len(stripped),
+                    page=page,
+                    filename=filename
+                ))
+            if end >= section_end:
+                break
+            next_start = max(end - overlap, start + 1)
+            # Don't start the overlap mid-word
+            space = text.find(" ", next_start, end)
+            start = space + 1 if space != -1 else next_start
+    return chunks
@@ -0,0 +1,91 @@
+"""
+KB Context Builder - Retrieves and packs KB context for agent prompts.
+"""
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.configuration import Configuration
+from app.services.kb.context_cache import KBContextCache, kb_context_cache
+from app.services.kb.context_packer import PackedContext, pack_chunks
+from app.services.kb.retriever import KBRetriever, kb_retriever
+from app.services.tokens import context_windows
+
+
+def kb_token_budget(config: Optional[Configuration] = None) -> int:
+    """
+    Token budget for KB context under a configuration.
+
+    The model's context window (see ContextWindowRegistry) must hold the
+    prompt scaffolding, the KB context and the completion (`max_tokens`). KB context gets what's left,
+    capped at KB_CONTEXT_MAX_TOKENS (or kb_settings["max_context_tokens"]).
+    """
+    cap = settings.KB_CONTEXT_MAX_TOKENS
+    if config is None:
+        return cap
+    if config.kb_settings and config.kb_settings.get("max_context_tokens"):
+        cap = int(config.kb_settings["max_context_tokens"])
+    available = context_windows.get(config.provider, config.model) - config.max_tokens - settings.KB_PROMPT_RESERVE_TOKENS
+    return max(0, min(cap, available))
+
+
+class KBContextBuilder:
+    """Service that turns a query into a packed, cited KB context."""
+
+    def __init__(self, retriever: KBRetriever = kb_retriever, cache: KBContextCache = kb_context_cache):
+        self.retriever = retriever
+        self.cache = cache
+
+    def build_kb_context(
+        self,
+        db: Session,
+        project_id: UUID,
+        query: str,
+        config: Optional[Configuration] = None,
+        token_budget: Optional[int] = None
+    ) -> PackedContext:
+        """
+        Build KB context for a query.
+
+        Results are cached per KB version, so repeated generations against
+        an unchanged KB skip retrieval and packing entirely.
+
+        Args:
+            db: Database session
+            project_id: Project whose KB to use
+            query: Requirement text or scenario the context should support
+            config: Optional configuration (budget and kb_max_docs)
+            token_budget: Explicit token budget (overrides config-derived budget)
+
+        Returns:
+            PackedContext with rendered text and citations
+        """
+        budget = token_budget if token_budget is not None else kb_token_budget(config)
+        if budget <= 0 or not query.strip():
+            return PackedContext(text="", token_budget=budget)
+
+        max_documents = config.kb_max_docs if config is not None else None
+        version = self.cache.version(project_id)
+        key = self.cache.make_key(project_id, version, query, budget, max_documents, settings.KB_SEARCH_MODE)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        retrieval = self.retriever.search_sync(
+            db, project_id, query, top_k=settings.KB_CONTEXT_CANDIDATES, mode=settings.KB_SEARCH_MODE
+        )
+        packed = pack_chunks(
+            retrieval.hits,
+            budget,
+            max_documents=max_documents,
+            dedupe_threshold=settings.KB_NEAR_DUPLICATE_THRESHOLD
+        )
+        packed.kb_version = version
+        self.cache.put(key, packed)
+        return packed
+
+
+# Global context builder instance
+kb_context_builder = KBContextBuilder()
@@ -0,0 +1,94 @@
+"""
+Versioned LRU cache of assembled KB contexts.
+
+Each project has a KB version counter that is bumped on every KB mutation
+(upload, patch, deactivate, delete, re-index). Cache keys include the
+version, so entries built from an older KB can never be served; bumping
+also evicts the project's stale entries eagerly.
+"""
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from app.core.config import settings
+from app.services.kb.context_packer import PackedContext
+
+
+def query_fingerprint(query: str) -> str:
+    """Hash of the query after case and whitespace normalization."""
+    normalized = re.sub(r"\s+", " ", query).strip().lower()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:32]
+
+
+class KBContextCache:
+    """Thread-safe LRU cache keyed by (project, KB version, query fingerprint, budget, ...)."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, PackedContext]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, project_id) -> int:
+        """Current KB version for a project."""
+        with self._lock:
+            return self._versions.get(str(project_id), 0)
+
+    def bump_version(self, project_id) -> int:
+        """Invalidate a project's cached contexts; returns the new version."""
+        key = str(project_id)
+        with self._lock:
+            version = self._versions.get(key, 0) + 1
+            self._versions[key] = version
+            for cache_key in [k for k in self._entries if k[0] == key]:
+                del self._entries[cache_key]
+            return version
+
+    def make_key(self, project_id, version: int, query: str, budget: int, *extra: Hashable) -> Tuple:
+        return (str(project_id), version, query_fingerprint(query), budget) + tuple(extra)
+
+    def get(self, key: Tuple) -> Optional[PackedContext]:
+        with self._lock:
+            packed = self._entries.get(key)
+            if packed is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return replace(packed, cached=True)
+
+    def put(self, key: Tuple, packed: PackedContext) -> None:
+        with self._lock:
+            # Don't store results computed against a version that has since been bumped
+            if key[1] != self._versions.get(key[0], 0):
+                return
+            self._entries[key] = packed
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Global KB context cache instance
+kb_context_cache = KBContextCache(max_entries=settings.KB_CONTEXT_CACHE_SIZE)
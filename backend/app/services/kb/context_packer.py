@@ -0,0 +1,186 @@
+"""
+Token-budgeted KB context packer.
+
+Takes ranked KB chunks and packs the most relevant, non-redundant set into a
+token budget: overlapping chunks are de-duplicated, adjacent chunks from the
+same document are merged into one passage, and every passage carries a
+citation (document + pages) the agents can reference.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.core.config import settings
+from app.services.kb.chunker import KBChunk
+from app.services.kb.near_duplicate import MinHashLSH
+from app.services.tokens import estimate_tokens
+
+
+@dataclass
+class _Passage:
+    """One or more merged chunks from a single document."""
+    doc_id: str
+    filename: str
+    chunks: List[KBChunk]
+    score: float
+
+    @property
+    def start(self) -> int:
+        return self.chunks[0].start
+
+    @property
+    def end(self) -> int:
+        return max(chunk.end for chunk in self.chunks)
+
+    @property
+    def pages(self) -> List[int]:
+        return sorted({chunk.page for chunk in self.chunks if chunk.page is not None})
+
+    @property
+    def text(self) -> str:
+        """Concatenate chunk texts, dropping the part already covered by the previous chunk."""
+        parts = [self.chunks[0].text]
+        covered = self.chunks[0].end
+        for chunk in self.chunks[1:]:
+            if chunk.end <= covered:
+                continue
+            if chunk.start < covered:
+                parts.append(chunk.text[covered - chunk.start:].lstrip())
+            else:
+                parts.append("\n" + chunk.text)
+            covered = chunk.end
+        return "".join(parts)
+
+    def header(self, ref: int) -> str:
+        pages = self.pages
+        if not pages:
+            location = ""
+        elif len(pages) == 1:
+            location = f" (p. {pages[0]})"
+        else:
+            location = f" (pp. {pages[0]}-{pages[-1]})"
+        return f"[{ref}] {self.filename}{location}"
+
+    def can_join(self, chunk: KBChunk) -> bool:
+        """True if chunk overlaps or directly follows/precedes this passage."""
+        if chunk.doc_id != self.doc_id:
+            return False
+        indexes = {c.chunk_index for c in self.chunks}
+        if chunk.chunk_index - 1 in indexes or chunk.chunk_index + 1 in indexes:
+            return True
+        return chunk.start < self.end and chunk.end > self.start
+
+    def join(self, chunk: KBChunk, score: float) -> "_Passage":
+        chunks = sorted(self.chunks + [chunk], key=lambda c: (c.start, c.end))
+        return _Passage(self.doc_id, self.filename, chunks, max(self.score, score))
+
+
+@dataclass
+class PackedContext:
+    """KB context assembled for an agent prompt."""
+    text: str
+    citations: List[Dict[str, Any]] = field(default_factory=list)
+    tokens_used: int = 0
+    token_budget: int = 0
+    chunks_considered: int = 0
+    chunks_packed: int = 0
+    duplicates_skipped: int = 0
+    kb_version: int = 0
+    cached: bool = False
+
+
+def _render(passages: Sequence[_Passage]) -> str:
+    return "\n\n".join(
+        f"{passage.header(ref)}\n{passage.text}"
+        for ref, passage in enumerate(passages, start=1)
+    )
+
+
+def pack_chunks(
+    ranked: Sequence[Any],
+    token_budget: int,
+    max_documents: Optional[int] = None,
+    token_counter=estimate_tokens,
+    dedupe_threshold: Optional[float] = None,
+    minhash_bands: Optional[int] = None
+) -> PackedContext:
+    """
+    Pack ranked chunks into a token budget.
+
+    Chunks are taken greedily in rank order. A chunk that overlaps or is
+    adjacent to an already selected passage is merged into it (paying only
+    for the new text); a chunk that doesn't fit is skipped so smaller,
+    lower-ranked chunks can still use the remaining budget. With
+    `dedupe_threshold`, a chunk whose MinHash nearly matches an already
+    packed chunk (e.g. the same section in a re-exported guide) is dropped.
+
+    Args:
+        ranked: Objects with `.chunk` (KBChunk) and `.score`, best first
+        token_budget: Maximum tokens for the rendered context
+        max_documents: Optional cap on distinct documents cited
+        token_counter: Function estimating tokens for a string
+        dedupe_threshold: Optional estimated-Jaccard cutoff for near-duplicate chunks
+        minhash_bands: LSH bands for the dedupe index (defaults to KB_MINHASH_BANDS)
+
+    Returns:
+        PackedContext with rendered text and citations
+    """
+    passages: List[_Passage] = []
+    seen = set()
+    used = 0
+    packed = 0
+    duplicates = 0
+    lsh = MinHashLSH(
+        num_perm=len(ranked[0].chunk.minhash),
+        bands=minhash_bands or settings.KB_MINHASH_BANDS
+    ) if (
+        dedupe_threshold and ranked and ranked[0].chunk.minhash is not None
+    ) else None
+
+    for hit in ranked:
+        chunk, score = hit.chunk, hit.score
+        if chunk.chunk_id in seen:
+            continue
+        seen.add(chunk.chunk_id)
+
+        if lsh is not None and chunk.minhash is not None:
+            if lsh.query(chunk.minhash, dedupe_threshold):
+                duplicates += 1
+                continue
+
+        target = next((i for i, p in enumerate(passages) if p.can_join(chunk)), None)
+        if target is not None:
+            candidate = passages[:target] + [passages[target].join(chunk, score)] + passages[target + 1:]
+        else:
+            documents = {p.doc_id for p in passages}
+            if max_documents and chunk.doc_id not in documents and len(documents) >= max_documents:
+                continue
+            candidate = passages + [_Passage(chunk.doc_id, chunk.filename, [chunk], score)]
+
+        cost = token_counter(_render(candidate))
+        if cost > token_budget:
+            continue
+        passages, used = candidate, cost
+        packed += 1
+        if lsh is not None and chunk.minhash is not None:
+            lsh.insert(chunk.chunk_id, chunk.minhash)
+
+    citations = [
+        {
+            "ref": ref,
+            "doc_id": passage.doc_id,
+            "filename": passage.filename,
+            "pages": passage.pages,
+            "chunk_indexes": [chunk.chunk_index for chunk in passage.chunks],
+            "score": round(passage.score, 4),
+        }
+        for ref, passage in enumerate(passages, start=1)
+    ]
+    return PackedContext(
+        text=_render(passages),
+        citations=citations,
+        tokens_used=used,
+        token_budget=token_budget,
+        chunks_considered=len(ranked),
+        chunks_packed=packed,
+        duplicates_skipped=duplicates
+    )
@@ -0,0 +1,310 @@
+"""
+Background embedding jobs for KB documents.
+
+A job splits a document's chunks into batches, embeds them with a bounded
+number of concurrent requests paced by a token bucket, and persists every
+finished batch. A rerun of an interrupted or failed job skips the batches
+already on disk. Once all batches are stored the document's vectors are
+added to the project's search index.
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.services.kb.chunker import KBChunk, chunk_text
+from app.services.kb.context_cache import kb_context_cache
+from app.services.tokens import estimate_tokens
+from app.services.kb.embedding_store import EmbeddingStore, chunks_fingerprint
+from app.services.kb.index_manager import kb_index_manager
+from app.services.rate_limiter import TokenBucket
+
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+@dataclass
+class EmbeddingJob:
+    """Progress and throughput of one document's embedding run."""
+    doc_id: str
+    project_id: str
+    model: str
+    status: str = "pending"  # pending, running, completed, failed
+    total_chunks: int = 0
+    total_batches: int = 0
+    completed_batches: int = 0
+    resumed_batches: int = 0  # Batches found on disk from an earlier run
+    chunks_embedded: int = 0  # Chunks embedded by this run
+    tokens_embedded: int = 0
+    retries: int = 0
+    rate_limited_seconds: float = 0.0
+    elapsed_seconds: float = 0.0
+    error: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks_embedded / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    @property
+    def tokens_per_second(self) -> float:
+        return self.tokens_embedded / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "doc_id": self.doc_id,
+            "project_id": self.project_id or None,
+            "model": self.model,
+            "status": self.status,
+            "total_chunks": self.total_chunks,
+            "total_batches": self.total_batches,
+            "completed_batches": self.completed_batches,
+            "resumed_batches": self.resumed_batches,
+            "chunks_embedded": self.chunks_embedded,
+            "tokens_embedded": self.tokens_embedded,
+            "retries": self.retries,
+            "rate_limited_seconds": round(self.rate_limited_seconds, 3),
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "chunks_per_second": round(self.chunks_per_second, 2),
+            "tokens_per_second": round(self.tokens_per_second, 2),
+            "error": self.error,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
+
+class EmbeddingPipeline:
+    """Embeds a document's chunks in rate-limited, concurrent, resumable batches."""
+
+    def __init__(
+        self,
+        embedder,
+        store: EmbeddingStore,
+        batch_size: int = 32,
+        concurrency: int = 4,
+        requests_per_second: float = 8.0,
+        max_retries: int = 3,
+        backoff_seconds: float = 0.5,
+        timeout: float = 60.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.embedder = embedder
+        self.store = store
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.requests_per_second = requests_per_second
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.timeout = timeout
+        self.transport = transport
+
+    def fingerprint(self, chunks: List[KBChunk]) -> str:
+        return chunks_fingerprint(self.embedder.model_name, [chunk.text for chunk in chunks], self.batch_size)
+
+    async def _embed_with_retry(self, job: EmbeddingJob, texts: List[str], client, limiter: TokenBucket):
+        for attempt in range(self.max_retries + 1):
+            job.rate_limited_seconds += await limiter.acquire()
+            delay = self.backoff_seconds * (2 ** attempt)
+            try:
+                return await self.embedder.embed_batch(texts, client)
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code not in RETRYABLE_STATUS_CODES or attempt == self.max_retries:
+                    raise
+                retry_after = _retry_after(e.response)
+                if retry_after is not None:
+                    limiter.penalize(retry_after)
+                    delay = max(delay, retry_after)
+            except httpx.TransportError:
+                if attempt == self.max_retries:
+                    raise
+            job.retries += 1
+            await asyncio.sleep(delay)
+
+    async def run(self, job: EmbeddingJob, chunks: List[KBChunk]) -> EmbeddingJob:
+        """
+        Embed all chunks not already stored for this document.
+
+        Args:
+            job: Job record updated in place as batches finish
+            chunks: The document's chunks, in index order
+
+        Returns:
+            The job with final status and throughput
+        """
+        model, doc_id = self.embedder.model_name, job.doc_id
+        fingerprint = self.fingerprint(chunks)
+        batches = [chunks[i:i + self.batch_size] for i in range(0, len(chunks), self.batch_size)]
+
+        progress = self.store.load_progress(model, doc_id)
+        if not progress or progress.get("fingerprint") != fingerprint:
+            # Document text, chunking or batching changed: start over
+            self.store.delete(model, doc_id)
+            progress = {
+                "fingerprint": fingerprint,
+                "project_id": job.project_id,
+                "total_batches": len(batches),
+                "completed_batches": []
+            }
+        done = {i for i in progress["completed_batches"] if self.store.has_batch(model, doc_id, i)}
+
+        job.status = "running"
+        job.error = None
+        job.total_chunks = len(chunks)
+        job.total_batches = len(batches)
+        job.completed_batches = job.resumed_batches = len(done)
+        job.started_at = datetime.utcnow()
+        progress.update({"status": "running", "completed_batches": sorted(done)})
+        self.store.save_progress(model, doc_id, progress)
+
+        limiter = TokenBucket(self.requests_per_second, capacity=self.concurrency)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        progress_lock = asyncio.Lock()
+        started = time.perf_counter()
+
+        async def embed_batch(index: int, client) -> None:
+            texts = [chunk.text for chunk in batches[index]]
+            async with semaphore:
+                vectors = await self._embed_with_retry(job, texts, client, limiter)
+            self.store.save_batch(model, doc_id, index, vectors)
+            async with progress_lock:
+                done.add(index)
+                progress["completed_batches"] = sorted(done)
+                self.store.save_progress(model, doc_id, progress)
+                job.completed_batches = len(done)
+                job.chunks_embedded += len(texts)
+                job.tokens_embedded += sum(estimate_tokens(text) for text in texts)
+                job.elapsed_seconds = time.perf_counter() - started
+
+        pending = [i for i in range(len(batches)) if i not in done]
+        async with httpx.AsyncClient(timeout=self.timeout, transport=self.transport) as client:
+            results = await asyncio.gather(
+                *(embed_batch(i, client) for i in pending),
+                return_exceptions=True
+            )
+
+        errors = [result for result in results if isinstance(result, BaseException)]
+        job.elapsed_seconds = time.perf_counter() - started
+        job.finished_at = datetime.utcnow()
+        if errors:
+            job.status = "failed"
+            job.error = f"{len(errors)} of {len(batches)} batches failed: {errors[0]}"
+        else:
+            job.status = "completed"
+        progress["status"] = job.status
+        self.store.save_progress(model, doc_id, progress)
+        return job
+
+
+class EmbeddingJobManager:
+    """Service that runs at most one background embedding job per KB document."""
+
+    def __init__(self, index_manager=None, pipeline: Optional[EmbeddingPipeline] = None):
+        self.index_manager = index_manager or kb_index_manager
+        self.pipeline = pipeline or EmbeddingPipeline(
+            self.index_manager.embedder,
+            self.index_manager.store,
+            batch_size=settings.KB_EMBEDDING_BATCH_SIZE,
+            concurrency=settings.KB_EMBEDDING_CONCURRENCY,
+            requests_per_second=settings.KB_EMBEDDING_REQUESTS_PER_SECOND,
+            max_retries=settings.KB_EMBEDDING_MAX_RETRIES,
+            timeout=settings.KB_EMBEDDING_TIMEOUT
+        )
+        self._jobs: Dict[str, EmbeddingJob] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    @property
+    def enabled(self) -> bool:
+        """Background jobs are only needed for remote embedders."""
+        return bool(getattr(self.index_manager.embedder, "remote", False))
+
+    async def start(self, project_id, doc_id, text: str, filename: str = "") -> EmbeddingJob:
+        """
+        Start (or resume) embedding a document; returns immediately.
+
+        If a job for the document is already running it is returned as is.
+        """
+        key = str(doc_id)
+        task = self._tasks.get(key)
+        if task is not None and not task.done():
+            return self._jobs[key]
+
+        chunks = chunk_text(
+            key,
+            text or "",
+            chunk_size=settings.KB_CHUNK_SIZE,
+            overlap=settings.KB_CHUNK_OVERLAP,
+            filename=filename
+        )
+        job = EmbeddingJob(doc_id=key, project_id=str(project_id), model=self.pipeline.embedder.model_name)
+        self._jobs[key] = job
+        self._tasks[key] = asyncio.create_task(self._run(job, chunks, project_id, doc_id, text, filename))
+        return job
+
+    async def _run(self, job: EmbeddingJob, chunks, project_id, doc_id, text: str, filename: str) -> None:
+        try:
+            await self.pipeline.run(job, chunks)
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            return
+        if job.status == "completed":
+            # Vectors are on disk now; put them in the search index
+            await asyncio.to_thread(self.index_manager.index_document, project_id, doc_id, text, filename)
+            kb_context_cache.bump_version(project_id)
+
+    async def wait(self, doc_id) -> Optional[EmbeddingJob]:
+        """Wait for a document's running job to finish."""
+        task = self._tasks.get(str(doc_id))
+        if task is not None:
+            await task
+        return self._jobs.get(str(doc_id))
+
+    def get(self, doc_id) -> Optional[EmbeddingJob]:
+        """
+        Job status for a document.
+
+        Falls back to progress persisted by an earlier process, so a job
+        interrupted by a restart shows how far it got.
+        """
+        key = str(doc_id)
+        job = self._jobs.get(key)
+        if job is not None:
+            return job
+        model = self.pipeline.embedder.model_name
+        progress = self.pipeline.store.load_progress(model, key)
+        if not progress:
+            return None
+        status = progress.get("status")
+        return EmbeddingJob(
+            doc_id=key,
+            project_id=progress.get("project_id", ""),
+            model=model,
+            status=status if status == "completed" else "interrupted",
+            total_batches=progress.get("total_batches", 0),
+            completed_batches=len(progress.get("completed_batches", []))
+        )
+
+    def discard(self, doc_id) -> None:
+        """Cancel a document's job and delete its stored vectors."""
+        key = str(doc_id)
+        task = self._tasks.pop(key, None)
+        if task is not None and not task.done():
+            task.cancel()
+        self._jobs.pop(key, None)
+        self.pipeline.store.delete(self.pipeline.embedder.model_name, key)
+
+
+# Global embedding job manager instance
+kb_embedding_jobs = EmbeddingJobManager()
@@ -0,0 +1,92 @@
+"""
+On-disk store for KB chunk embeddings and embedding job progress.
+
+Layout: <root>/<model>/<doc_id>/progress.json plus one batch_NNNNN.npy per
+embedded batch. Every file is written to a temp file and moved into place,
+so an interrupted job never leaves a half-written batch behind and a rerun
+only embeds the batches that are missing.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+
+def chunks_fingerprint(model: str, texts: Sequence[str], batch_size: int) -> str:
+    """Identify a document's chunking + model + batching, so stale progress is discarded."""
+    digest = hashlib.sha256(f"{model}\0{batch_size}".encode("utf-8"))
+    for text in texts:
+        digest.update(b"\0")
+        digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class EmbeddingStore:
+    """Persists embedded batches and progress per (model, document)."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _dir(self, model: str, doc_id: str) -> Path:
+        safe_model = re.sub(r"[^A-Za-z0-9._-]", "_", model)
+        return self.root / safe_model / str(doc_id)
+
+    def _write_atomic(self, path: Path, write) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as handle:
+            write(handle)
+        os.replace(tmp, path)
+
+    def load_progress(self, model: str, doc_id: str) -> Optional[Dict[str, Any]]:
+        """Saved progress for a document, or None."""
+        path = self._dir(model, doc_id) / "progress.json"
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def save_progress(self, model: str, doc_id: str, progress: Dict[str, Any]) -> None:
+        data = json.dumps(progress, indent=2).encode("utf-8")
+        self._write_atomic(self._dir(model, doc_id) / "progress.json", lambda handle: handle.write(data))
+
+    def save_batch(self, model: str, doc_id: str, batch_index: int, vectors: np.ndarray) -> None:
+        path = self._dir(model, doc_id) / f"batch_{batch_index:05d}.npy"
+        self._write_atomic(path, lambda handle: np.save(handle, vectors.astype(np.float32)))
+
+    def has_batch(self, model: str, doc_id: str, batch_index: int) -> bool:
+        return (self._dir(model, doc_id) / f"batch_{batch_index:05d}.npy").exists()
+
+    def load_vectors(self, model: str, doc_id: str, fingerprint: str) -> Optional[np.ndarray]:
+        """
+        All chunk vectors of a completely embedded document.
+
+        Returns:
+            (n_chunks, dim) array, or None if the job hasn't completed or
+            the document/model/batching changed since it ran
+        """
+        progress = self.load_progress(model, doc_id)
+        if not progress or progress.get("fingerprint") != fingerprint:
+            return None
+        if progress.get("status") != "completed":
+            return None
+        directory = self._dir(model, doc_id)
+        try:
+            batches = [
+                np.load(directory / f"batch_{i:05d}.npy")
+                for i in range(progress["total_batches"])
+            ]
+        except FileNotFoundError:
+            return None
+        if not batches:
+            return None
+        return np.vstack(batches)
+
+    def delete(self, model: str, doc_id: str) -> None:
+        """Remove a document's stored vectors and progress."""
+        shutil.rmtree(self._dir(model, doc_id), ignore_errors=True)
@@ -0,0 +1,128 @@
+"""
+Text embedders for KB chunks and queries.
+"""
+import hashlib
+import re
+from functools import lru_cache
+from typing import Optional, Sequence, Tuple
+
+import httpx
+import numpy as np
+
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+@lru_cache(maxsize=200_000)
+def _hash_feature(feature: str, dim: int) -> Tuple[int, float]:
+    """Map a feature to a (bucket, sign) pair with a stable hash."""
+    digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+    return digest % dim, (1.0 if digest >> 63 else -1.0)
+
+
+class HashingEmbedder:
+    """
+    Deterministic feature-hashing embedder (word unigrams + bigrams).
+
+    Needs no model download or network access, so KB documents can be
+    indexed synchronously at upload time. Vectors are L2-normalized.
+    """
+
+    remote = False
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self.model_name = f"hashing-{dim}"
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed texts into an (n, dim) float32 array."""
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = TOKEN_RE.findall(text.lower())
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            for feature in features:
+                bucket, sign = _hash_feature(feature, self.dim)
+                vectors[row, bucket] += sign
+            norm = np.linalg.norm(vectors[row])
+            if norm > 0:
+                vectors[row] /= norm
+        return vectors
+
+    def embed_query(self, text: str) -> np.ndarray:
+        """Embed a single query string."""
+        return self.embed([text])[0]
+
+
+class OllamaEmbedder:
+    """
+    Embeds text with an Ollama embedding model via POST /api/embed.
+
+    Document chunks are embedded in batches by the background embedding
+    pipeline (see embedding_jobs); `embed`/`embed_query` are synchronous
+    helpers for small inputs such as search queries.
+    """
+
+    remote = True
+
+    def __init__(
+        self,
+        base_url: str,
+        model: str,
+        dim: int,
+        timeout: float = 60.0,
+        transport: Optional[httpx.BaseTransport] = None
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.model_name = model
+        self.dim = dim
+        self.timeout = timeout
+        self.transport = transport
+
+    def _parse(self, data: dict, expected: int) -> np.ndarray:
+        embeddings = data.get("embeddings")
+        if not isinstance(embeddings, list) or len(embeddings) != expected:
+            raise ValueError(f"Expected {expected} embeddings from Ollama, got {len(embeddings or [])}")
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.shape[1] != self.dim:
+            raise ValueError(
+                f"Embedding model '{self.model}' returned dimension {vectors.shape[1]}, "
+                f"but KB_EMBEDDING_DIM is {self.dim}"
+            )
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1.0)
+
+    async def embed_batch(self, texts: Sequence[str], client: httpx.AsyncClient) -> np.ndarray:
+        """Embed a batch of texts with one request."""
+        response = await client.post(
+            f"{self.base_url}/api/embed",
+            json={"model": self.model, "input": list(texts)}
+        )
+        response.raise_for_status()
+        return self._parse(response.json(), len(texts))
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed texts synchronously (single request)."""
+        with httpx.Client(timeout=self.timeout, transport=self.transport) as client:
+            response = client.post(
+                f"{self.base_url}/api/embed",
+                json={"model": self.model, "input": list(texts)}
+            )
+            response.raise_for_status()
+            return self._parse(response.json(), len(texts))
+
+    def embed_query(self, text: str) -> np.ndarray:
+        """Embed a single query string."""
+        return self.embed([text])[0]
+
+
+def create_embedder():
+    """Embedder selected by KB_EMBEDDING_PROVIDER."""
+    from app.core.config import settings
+
+    provider = settings.KB_EMBEDDING_PROVIDER.lower()
+    if provider == "hashing":
+        return HashingEmbedder(settings.KB_EMBEDDING_DIM)
+    if provider == "ollama":
+        return OllamaEmbedder(settings.OLLAMA_BASE_URL, settings.KB_EMBEDDING_MODEL, settings.KB_EMBEDDING_DIM)
+    raise ValueError(f"Unsupported KB embedding provider: {provider}")
@@ -0,0 +1,262 @@
+"""
+KB Index Manager - Keeps per-project vector and keyword indexes of active KB document chunks.
+
+Indexes are built lazily from the database on the first search for a project
+and then kept in sync incrementally as documents are uploaded, deactivated,
+reactivated or deleted.
+
+With the local hashing embedder chunks are embedded inline. With a remote
+embedder (Ollama) vectors come from the embedding store, filled by
+background embedding jobs; until a document's job completes it is only
+searchable by keyword.
+"""
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.knowledge_base_document import KnowledgeBaseDocument
+from app.services.kb.chunker import KBChunk, chunk_text
+from app.services.kb.embedding_store import EmbeddingStore, chunks_fingerprint
+from app.services.kb.embeddings import create_embedder
+from app.services.kb.lexical_index import BM25Index
+from app.services.kb.near_duplicate import MinHasher
+from app.services.kb.vector_index import VectorIndex, create_index
+
+
+@dataclass
+class KBSearchHit:
+    """A chunk returned by KB search with its similarity score."""
+    chunk: KBChunk
+    score: float
+
+
+@dataclass
+class _ProjectIndex:
+    """
+    Vector and keyword indexes plus chunk bookkeeping for one project.
+
+    `lock` serializes writers; each index also has its own lock so vector
+    and keyword searches can run concurrently.
+    """
+    index: VectorIndex
+    lexical: BM25Index = field(default_factory=BM25Index)
+    chunks: Dict[str, KBChunk] = field(default_factory=dict)
+    doc_chunks: Dict[str, List[str]] = field(default_factory=dict)
+    loaded: bool = False
+    lock: threading.RLock = field(default_factory=threading.RLock)
+    vector_lock: threading.Lock = field(default_factory=threading.Lock)
+    lexical_lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class KBIndexManager:
+    """Service for maintaining and querying per-project KB indexes."""
+
+    def __init__(
+        self,
+        embedder=None,
+        index_type: Optional[str] = None,
+        store: Optional[EmbeddingStore] = None
+    ):
+        self.embedder = embedder or create_embedder()
+        self.index_type = index_type or settings.KB_INDEX_TYPE
+        self.store = store or EmbeddingStore(settings.KB_EMBEDDING_DIR)
+        self.hasher = MinHasher(
+            num_perm=settings.KB_MINHASH_PERMUTATIONS,
+            shingle_size=settings.KB_SHINGLE_SIZE
+        )
+        self._projects: Dict[str, _ProjectIndex] = {}
+        self._lock = threading.Lock()
+
+    def _new_index(self) -> VectorIndex:
+        params = {}
+        if self.index_type.lower() == "hnsw":
+            params = {
+                "M": settings.KB_HNSW_M,
+                "ef_construction": settings.KB_HNSW_EF_CONSTRUCTION,
+                "ef_search": settings.KB_HNSW_EF_SEARCH,
+            }
+        return create_index(self.index_type, self.embedder.dim, **params)
+
+    def _project(self, project_id) -> _ProjectIndex:
+        key = str(project_id)
+        with self._lock:
+            project = self._projects.get(key)
+            if project is None:
+                project = _ProjectIndex(index=self._new_index())
+                self._projects[key] = project
+            return project
+
+    def _add_chunks(self, project: _ProjectIndex, doc_id: str, chunks: List[KBChunk]) -> None:
+        self._remove_chunks(project, doc_id)
+        if not chunks:
+            return
+        texts = [chunk.text for chunk in chunks]
+        if self.embedder.remote:
+            vectors = self.store.load_vectors(
+                self.embedder.model_name,
+                doc_id,
+                chunks_fingerprint(self.embedder.model_name, texts, settings.KB_EMBEDDING_BATCH_SIZE)
+            )
+        else:
+            vectors = self.embedder.embed(texts)
+        labels = [chunk.chunk_id for chunk in chunks]
+        for chunk in chunks:
+            # Signatures let the context packer drop near-duplicate passages
+            chunk.minhash = self.hasher.signature(chunk.text)
+            project.chunks[chunk.chunk_id] = chunk
+        if vectors is not None:
+            with project.vector_lock:
+                project.index.add_batch(labels, vectors)
+        with project.lexical_lock:
+            for chunk in chunks:
+                project.lexical.add(chunk.chunk_id, chunk.text)
+        project.doc_chunks[doc_id] = labels
+
+    def _remove_chunks(self, project: _ProjectIndex, doc_id: str) -> None:
+        labels = project.doc_chunks.pop(doc_id, [])
+        if not labels:
+            return
+        with project.vector_lock:
+            for label in labels:
+                project.index.remove(label)
+        with project.lexical_lock:
+            for label in labels:
+                project.lexical.remove(label)
+        for label in labels:
+            project.chunks.pop(label, None)
+
+    def load_project(self, db: Session, project_id) -> None:
+        """Build the project's index from its active KB documents (once)."""
+        project = self._project(project_id)
+        with project.lock:
+            if project.loaded:
+                return
+            documents = db.query(KnowledgeBaseDocument).filter(
+                KnowledgeBaseDocument.project_id == project_id,
+                KnowledgeBaseDocument.is_active == True
+            ).all()
+            for document in documents:
+                doc_id = str(document.id)
+                chunks = chunk_text(
+                    doc_id,
+                    document.extracted_text or "",
+                    chunk_size=settings.KB_CHUNK_SIZE,
+                    overlap=settings.KB_CHUNK_OVERLAP,
+                    filename=document.filename
+                )
+                self._add_chunks(project, doc_id, chunks)
+            project.loaded = True
+
+    def index_document(self, project_id, doc_id, text: str, filename: str = "") -> int:
+        """
+        Index (or re-index) one document's chunks.
+
+        No-op if the project's index hasn't been loaded yet; the document
+        will be picked up from the database on first search.
+
+        Returns:
+            Number of chunks indexed
+        """
+        project = self._project(project_id)
+        with project.lock:
+            if not project.loaded:
+                return 0
+            chunks = chunk_text(
+                str(doc_id),
+                text or "",
+                chunk_size=settings.KB_CHUNK_SIZE,
+                overlap=settings.KB_CHUNK_OVERLAP,
+                filename=filename
+            )
+            self._add_chunks(project, str(doc_id), chunks)
+            return len(chunks)
+
+    def remove_document(self, project_id, doc_id) -> None:
+        """Drop a document's chunks from the project's index."""
+        project = self._project(project_id)
+        with project.lock:
+            self._remove_chunks(project, str(doc_id))
+
+    def rename_document(self, project_id, doc_id, filename: str) -> None:
+        """Update the filename carried on a document's chunks."""
+        project = self._project(project_id)
+        with project.lock:
+            for label in project.doc_chunks.get(str(doc_id), []):
+                project.chunks[label].filename = filename
+
+    def _hits(self, project: _ProjectIndex, results) -> List[KBSearchHit]:
+        hits = []
+        for label, score in results:
+            chunk = project.chunks.get(label)
+            if chunk is not None:
+                hits.append(KBSearchHit(chunk=chunk, score=score))
+        return hits
+
+    def vector_search(
+        self,
+        project_id,
+        query: str,
+        top_k: int = 5,
+        ef_search: Optional[int] = None
+    ) -> List[KBSearchHit]:
+        """Embedding similarity search on an already loaded project index."""
+        project = self._project(project_id)
+        if not len(project.index):
+            return []
+        query_vector = self.embedder.embed_query(query)
+        with project.vector_lock:
+            results = project.index.search(query_vector, k=top_k, ef_search=ef_search)
+        return self._hits(project, results)
+
+    def lexical_search(self, project_id, query: str, top_k: int = 5) -> List[KBSearchHit]:
+        """BM25 keyword search on an already loaded project index."""
+        project = self._project(project_id)
+        with project.lexical_lock:
+            results = project.lexical.search(query, k=top_k)
+        return self._hits(project, results)
+
+    def search(
+        self,
+        db: Session,
+        project_id: UUID,
+        query: str,
+        top_k: int = 5,
+        ef_search: Optional[int] = None
+    ) -> List[KBSearchHit]:
+        """
+        Return the top_k most similar chunks for a query.
+
+        Args:
+            db: Database session (used only to lazily load the index)
+            project_id: Project whose KB to search
+            query: Free-text query
+            top_k: Number of chunks to return
+            ef_search: Optional HNSW beam width override (recall vs latency)
+        """
+        self.load_project(db, project_id)
+        return self.vector_search(project_id, query, top_k=top_k, ef_search=ef_search)
+
+    def stats(self, project_id) -> Dict:
+        """Index statistics for a project."""
+        project = self._project(project_id)
+        with project.lock:
+            stats = project.index.stats()
+            stats.update({
+                "loaded": project.loaded,
+                "documents": len(project.doc_chunks),
+                "lexical_size": len(project.lexical),
+            })
+            return stats
+
+    def reset(self) -> None:
+        """Drop all in-memory indexes (they rebuild lazily)."""
+        with self._lock:
+            self._projects.clear()
+
+
+# Global index manager instance
+kb_index_manager = KBIndexManager()
@@ -0,0 +1,82 @@
+"""
+Incremental BM25 keyword index for KB chunks.
+
+Indexes word unigrams plus adjacent-word bigrams, so exact field names and
+menu paths ("Net Plan Price", "Home → Subscription") score above chunks that
+merely contain the same words far apart.
+"""
+import heapq
+import math
+from collections import Counter
+from operator import itemgetter
+from typing import Dict, Hashable, List, Tuple
+
+from app.services.kb.embeddings import TOKEN_RE
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word unigrams followed by bigrams."""
+    words = TOKEN_RE.findall(text.lower())
+    return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+
+class BM25Index:
+    """Okapi BM25 over an inverted index that supports add/remove."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[Hashable, int]] = {}
+        self._doc_terms: Dict[Hashable, Counter] = {}
+        self._doc_len: Dict[Hashable, int] = {}
+        self._total_len = 0
+
+    def add(self, label: Hashable, text: str) -> None:
+        if label in self._doc_terms:
+            self.remove(label)
+        terms = Counter(tokenize(text))
+        for term, count in terms.items():
+            self._postings.setdefault(term, {})[label] = count
+        length = sum(terms.values())
+        self._doc_terms[label] = terms
+        self._doc_len[label] = length
+        self._total_len += length
+
+    def remove(self, label: Hashable) -> bool:
+        terms = self._doc_terms.pop(label, None)
+        if terms is None:
+            return False
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(label, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_len -= self._doc_len.pop(label)
+        return True
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[Hashable, float]]:
+        """Return up to k (label, score) pairs with score > 0, best first."""
+        num_docs = len(self._doc_len)
+        if num_docs == 0 or k <= 0:
+            return []
+        avg_len = self._total_len / num_docs or 1.0
+
+        scores: Dict[Hashable, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1.0 + (num_docs - df + 0.5) / (df + 0.5))
+            for label, tf in postings.items():
+                norm = self.k1 * (1.0 - self.b + self.b * self._doc_len[label] / avg_len)
+                scores[label] = scores.get(label, 0.0) + idf * tf * (self.k1 + 1.0) / (tf + norm)
+
+        return heapq.nlargest(k, scores.items(), key=itemgetter(1))
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    def __contains__(self, label: Hashable) -> bool:
+        return label in self._doc_len
@@ -0,0 +1,218 @@
+"""
+Near-duplicate detection for KB documents and chunks (MinHash + LSH).
+
+A document is reduced to its set of word k-shingles; MinHash compresses that
+set into a fixed-size signature whose slot-wise agreement estimates Jaccard
+similarity. Locality-Sensitive Hashing buckets signatures by bands, so only
+documents sharing at least one band are compared.
+"""
+import threading
+import zlib
+from typing import Dict, Hashable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.knowledge_base_document import KnowledgeBaseDocument
+from app.services.kb.embeddings import TOKEN_RE
+
+
+_PRIME = (1 << 31) - 1  # Mersenne prime; keeps a * x + b inside int64
+_BLOCK = 4096
+
+
+def shingle_hashes(text: str, size: int = 5) -> np.ndarray:
+    """Hash the set of word `size`-shingles of a text."""
+    words = TOKEN_RE.findall(text.lower())
+    if not words:
+        return np.empty(0, dtype=np.int64)
+    if len(words) < size:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    return np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) % _PRIME for s in shingles),
+        dtype=np.int64,
+        count=len(shingles)
+    )
+
+
+class MinHasher:
+    """Computes MinHash signatures with `num_perm` universal hash functions."""
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, size=num_perm, dtype=np.int64)[:, None]
+        self._b = rng.integers(0, _PRIME, size=num_perm, dtype=np.int64)[:, None]
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature of a text; all-max for text without words."""
+        hashes = shingle_hashes(text, self.shingle_size)
+        signature = np.full(self.num_perm, _PRIME, dtype=np.int64)
+        for start in range(0, len(hashes), _BLOCK):
+            block = hashes[start:start + _BLOCK][None, :]
+            np.minimum(signature, ((self._a * block + self._b) % _PRIME).min(axis=1), out=signature)
+        return signature
+
+
+def estimate_similarity(a: Sequence[int], b: Sequence[int]) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    a, b = np.asarray(a), np.asarray(b)
+    if a.shape != b.shape or a.size == 0:
+        return 0.0
+    if np.all(a == _PRIME) or np.all(b == _PRIME):
+        return 0.0
+    return float(np.mean(a == b))
+
+
+class MinHashLSH:
+    """
+    Banded LSH index over MinHash signatures.
+
+    With b bands of r rows, two sets with Jaccard s become candidates with
+    probability 1 - (1 - s^r)^b (a steep S-curve around (1/b)^(1/r)).
+    Candidates are then verified against `threshold` on the full signature.
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 16):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._tables: List[Dict[bytes, Set[Hashable]]] = [{} for _ in range(bands)]
+        self._signatures: Dict[Hashable, np.ndarray] = {}
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [
+            signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            for band in range(self.bands)
+        ]
+
+    def insert(self, key: Hashable, signature: Sequence[int]) -> None:
+        signature = np.asarray(signature, dtype=np.int64)
+        self.remove(key)
+        self._signatures[key] = signature
+        for table, band_key in zip(self._tables, self._band_keys(signature)):
+            table.setdefault(band_key, set()).add(key)
+
+    def remove(self, key: Hashable) -> bool:
+        signature = self._signatures.pop(key, None)
+        if signature is None:
+            return False
+        for table, band_key in zip(self._tables, self._band_keys(signature)):
+            bucket = table.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del table[band_key]
+        return True
+
+    def query(
+        self,
+        signature: Sequence[int],
+        threshold: float,
+        exclude: Optional[Hashable] = None
+    ) -> List[Tuple[Hashable, float]]:
+        """Keys whose estimated similarity is >= threshold, most similar first."""
+        signature = np.asarray(signature, dtype=np.int64)
+        candidates: Set[Hashable] = set()
+        for table, band_key in zip(self._tables, self._band_keys(signature)):
+            candidates.update(table.get(band_key, ()))
+        candidates.discard(exclude)
+
+        matches = []
+        for key in candidates:
+            similarity = estimate_similarity(signature, self._signatures[key])
+            if similarity >= threshold:
+                matches.append((key, similarity))
+        return sorted(matches, key=lambda item: item[1], reverse=True)
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._signatures
+
+
+class NearDuplicateDetector:
+    """Service that flags near-duplicate KB documents per project."""
+
+    def __init__(self):
+        self.hasher = MinHasher(
+            num_perm=settings.KB_MINHASH_PERMUTATIONS,
+            shingle_size=settings.KB_SHINGLE_SIZE
+        )
+        self.threshold = settings.KB_NEAR_DUPLICATE_THRESHOLD
+        self._projects: Dict[str, MinHashLSH] = {}
+        self._lock = threading.Lock()
+
+    def signature(self, text: str) -> List[int]:
+        """MinHash signature as a JSON-serializable list."""
+        return self.hasher.signature(text or "").tolist()
+
+    def _new_lsh(self) -> MinHashLSH:
+        return MinHashLSH(num_perm=settings.KB_MINHASH_PERMUTATIONS, bands=settings.KB_MINHASH_BANDS)
+
+    def _load(self, db: Session, project_id) -> MinHashLSH:
+        key = str(project_id)
+        lsh = self._projects.get(key)
+        if lsh is not None:
+            return lsh
+        lsh = self._new_lsh()
+        documents = db.query(KnowledgeBaseDocument).filter(
+            KnowledgeBaseDocument.project_id == project_id,
+            KnowledgeBaseDocument.is_active == True
+        ).all()
+        for document in documents:
+            signature = document.minhash_signature or self.signature(document.extracted_text)
+            lsh.insert(str(document.id), signature)
+        self._projects[key] = lsh
+        return lsh
+
+    def find_near_duplicates(
+        self,
+        db: Session,
+        project_id,
+        signature: Sequence[int],
+        exclude_id=None
+    ) -> List[Tuple[str, float]]:
+        """
+        Active documents in a project whose content nearly matches a signature.
+
+        Returns:
+            (doc_id, estimated similarity) pairs, most similar first
+        """
+        with self._lock:
+            lsh = self._load(db, project_id)
+            return lsh.query(
+                signature,
+                self.threshold,
+                exclude=str(exclude_id) if exclude_id is not None else None
+            )
+
+    def add(self, project_id, doc_id, signature: Optional[Sequence[int]]) -> None:
+        """Register an active document (no-op until the project is loaded)."""
+        if not signature:
+            return
+        with self._lock:
+            lsh = self._projects.get(str(project_id))
+            if lsh is not None:
+                lsh.insert(str(doc_id), signature)
+
+    def remove(self, project_id, doc_id) -> None:
+        """Forget a deactivated or deleted document."""
+        with self._lock:
+            lsh = self._projects.get(str(project_id))
+            if lsh is not None:
+                lsh.remove(str(doc_id))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._projects.clear()
+
+
+# Global near-duplicate detector instance
+kb_duplicate_detector = NearDuplicateDetector()
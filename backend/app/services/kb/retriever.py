@@ -0,0 +1,174 @@
+"""
+KB Retriever - Vector, lexical and hybrid (rank-fused) KB search.
+
+Hybrid mode runs BM25 keyword search and embedding search concurrently and
+merges the two rankings with Reciprocal Rank Fusion (RRF):
+
+    score(chunk) = sum over rankings of 1 / (rrf_k + rank)
+
+RRF needs no score calibration between BM25 and cosine similarity, and
+rewards chunks that both retrievers agree on.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.kb.index_manager import KBIndexManager, KBSearchHit, kb_index_manager
+
+
+SEARCH_MODES = ("vector", "lexical", "hybrid")
+
+# Shared pool for running the hybrid stages from synchronous callers
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="kb-search")
+
+
+@dataclass
+class RetrievalResult:
+    """Ranked hits plus per-stage latency."""
+    mode: str
+    hits: List[KBSearchHit]
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Hashable]],
+    rrf_k: int = 60,
+    weights: Optional[Sequence[float]] = None
+) -> List[Tuple[Hashable, float]]:
+    """
+    Merge ranked label lists with Reciprocal Rank Fusion.
+
+    Args:
+        rankings: Label lists, best first
+        rrf_k: Damping constant (60 per Cormack et al.)
+        weights: Optional per-ranking weights
+
+    Returns:
+        (label, fused score) pairs, best first
+    """
+    weights = weights or [1.0] * len(rankings)
+    scores: Dict[Hashable, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, label in enumerate(ranking, start=1):
+            scores[label] = scores.get(label, 0.0) + weight / (rrf_k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def _timed(fn: Callable[[], List[KBSearchHit]]) -> Tuple[List[KBSearchHit], float]:
+    start = time.perf_counter()
+    hits = fn()
+    return hits, round((time.perf_counter() - start) * 1000, 2)
+
+
+class KBRetriever:
+    """Service for KB retrieval in vector, lexical or hybrid mode."""
+
+    def __init__(self, index_manager: KBIndexManager = kb_index_manager):
+        self.index_manager = index_manager
+
+    def _stages(self, project_id, query: str, top_k: int, mode: str, ef_search: Optional[int]):
+        depth = max(top_k, settings.KB_HYBRID_CANDIDATES) if mode == "hybrid" else top_k
+        stages = {}
+        if mode in ("vector", "hybrid"):
+            stages["vector"] = lambda: self.index_manager.vector_search(
+                project_id, query, top_k=depth, ef_search=ef_search
+            )
+        if mode in ("lexical", "hybrid"):
+            stages["lexical"] = lambda: self.index_manager.lexical_search(project_id, query, top_k=depth)
+        return stages
+
+    def _fuse(self, mode: str, results: Dict[str, List[KBSearchHit]], top_k: int) -> List[KBSearchHit]:
+        if mode != "hybrid":
+            return results[mode][:top_k]
+        chunks = {}
+        for hits in results.values():
+            for hit in hits:
+                chunks.setdefault(hit.chunk.chunk_id, hit.chunk)
+        fused = reciprocal_rank_fusion(
+            [[hit.chunk.chunk_id for hit in results["lexical"]],
+             [hit.chunk.chunk_id for hit in results["vector"]]],
+            rrf_k=settings.KB_RRF_K
+        )
+        return [KBSearchHit(chunk=chunks[label], score=score) for label, score in fused[:top_k]]
+
+    def _check_mode(self, mode: str) -> str:
+        mode = mode.lower()
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unsupported KB search mode: {mode}")
+        return mode
+
+    async def search(
+        self,
+        db: Session,
+        project_id: UUID,
+        query: str,
+        top_k: int = 5,
+        mode: str = "hybrid",
+        ef_search: Optional[int] = None
+    ) -> RetrievalResult:
+        """
+        Search a project's KB, running retrieval stages concurrently.
+
+        Args:
+            db: Database session (used only to lazily load the index)
+            project_id: Project whose KB to search
+            query: Free-text query
+            top_k: Number of chunks to return
+            mode: "vector", "lexical" or "hybrid"
+            ef_search: Optional HNSW beam width override
+
+        Returns:
+            RetrievalResult with hits and per-stage timings
+        """
+        mode = self._check_mode(mode)
+        total_start = time.perf_counter()
+        timings: Dict[str, float] = {}
+
+        _, timings["load"] = await asyncio.to_thread(
+            _timed, lambda: self.index_manager.load_project(db, project_id) or []
+        )
+        stages = self._stages(project_id, query, top_k, mode, ef_search)
+        outcomes = await asyncio.gather(*(asyncio.to_thread(_timed, fn) for fn in stages.values()))
+
+        results = {}
+        for name, (hits, elapsed) in zip(stages, outcomes):
+            results[name] = hits
+            timings[name] = elapsed
+        hits, timings["fusion"] = _timed(lambda: self._fuse(mode, results, top_k))
+        timings["total"] = round((time.perf_counter() - total_start) * 1000, 2)
+        return RetrievalResult(mode=mode, hits=hits, timings_ms=timings)
+
+    def search_sync(
+        self,
+        db: Session,
+        project_id: UUID,
+        query: str,
+        top_k: int = 5,
+        mode: str = "hybrid",
+        ef_search: Optional[int] = None
+    ) -> RetrievalResult:
+        """Same as `search` for synchronous callers; stages run on a thread pool."""
+        mode = self._check_mode(mode)
+        total_start = time.perf_counter()
+        timings: Dict[str, float] = {}
+
+        _, timings["load"] = _timed(lambda: self.index_manager.load_project(db, project_id) or [])
+        stages = self._stages(project_id, query, top_k, mode, ef_search)
+        futures = {name: _executor.submit(_timed, fn) for name, fn in stages.items()}
+
+        results = {}
+        for name, future in futures.items():
+            results[name], timings[name] = future.result()
+        hits, timings["fusion"] = _timed(lambda: self._fuse(mode, results, top_k))
+        timings["total"] = round((time.perf_counter() - total_start) * 1000, 2)
+        return RetrievalResult(mode=mode, hits=hits, timings_ms=timings)
+
+
+# Global retriever instance
+kb_retriever = KBRetriever()
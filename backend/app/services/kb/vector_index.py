@@ -0,0 +1,390 @@
+"""
+Vector indexes for Knowledge Base chunk embeddings.
+
+Two interchangeable implementations share the same interface:
+
+- ExactIndex: brute-force cosine similarity (one matrix-vector product).
+- HNSWIndex: Hierarchical Navigable Small World graph (Malkov & Yashunin),
+  pure Python/NumPy, incrementally updatable with add/remove.
+
+All vectors are L2-normalized on insert so inner product == cosine similarity.
+"""
+import heapq
+import math
+import random
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+SearchResult = Tuple[Hashable, float]
+
+
+def _normalize(vector: np.ndarray) -> np.ndarray:
+    """Return an L2-normalized float32 copy of a vector."""
+    vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+    norm = float(np.linalg.norm(vector))
+    if norm > 0:
+        vector = vector / norm
+    return vector
+
+
+class VectorIndex:
+    """Common interface for KB vector indexes."""
+
+    index_type = "base"
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self._vectors = np.zeros((16, dim), dtype=np.float32)
+
+    def _grow(self, needed: int) -> None:
+        """Ensure the vector buffer has room for `needed` rows."""
+        capacity = self._vectors.shape[0]
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        grown = np.zeros((capacity, self.dim), dtype=np.float32)
+        grown[:self._vectors.shape[0]] = self._vectors
+        self._vectors = grown
+
+    def _check_dim(self, vector: np.ndarray) -> np.ndarray:
+        vector = _normalize(vector)
+        if vector.shape[0] != self.dim:
+            raise ValueError(f"Vector dimension {vector.shape[0]} does not match index dimension {self.dim}")
+        return vector
+
+    def add(self, label: Hashable, vector: Sequence[float]) -> None:
+        raise NotImplementedError
+
+    def add_batch(self, labels: Sequence[Hashable], vectors: np.ndarray) -> None:
+        """Add several vectors; `vectors` is an (n, dim) array."""
+        for label, vector in zip(labels, vectors):
+            self.add(label, vector)
+
+    def remove(self, label: Hashable) -> bool:
+        raise NotImplementedError
+
+    def search(self, query: Sequence[float], k: int = 5, ef_search: Optional[int] = None) -> List[SearchResult]:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {"index_type": self.index_type, "size": len(self), "dim": self.dim}
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def __contains__(self, label: Hashable) -> bool:
+        raise NotImplementedError
+
+
+class ExactIndex(VectorIndex):
+    """Brute-force cosine similarity over a dense matrix."""
+
+    index_type = "exact"
+
+    def __init__(self, dim: int):
+        super().__init__(dim)
+        self._labels: List[Hashable] = []
+        self._label_to_row: Dict[Hashable, int] = {}
+
+    def add(self, label: Hashable, vector: Sequence[float]) -> None:
+        vector = self._check_dim(vector)
+        row = self._label_to_row.get(label)
+        if row is None:
+            row = len(self._labels)
+            self._grow(row + 1)
+            self._labels.append(label)
+            self._label_to_row[label] = row
+        self._vectors[row] = vector
+
+    def remove(self, label: Hashable) -> bool:
+        row = self._label_to_row.pop(label, None)
+        if row is None:
+            return False
+        # Keep the matrix dense by moving the last row into the hole
+        last = len(self._labels) - 1
+        if row != last:
+            last_label = self._labels[last]
+            self._vectors[row] = self._vectors[last]
+            self._labels[row] = last_label
+            self._label_to_row[last_label] = row
+        self._labels.pop()
+        return True
+
+    def search(self, query: Sequence[float], k: int = 5, ef_search: Optional[int] = None) -> List[SearchResult]:
+        count = len(self._labels)
+        if count == 0 or k <= 0:
+            return []
+        query = self._check_dim(query)
+        scores = self._vectors[:count] @ query
+        k = min(k, count)
+        if k < count:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(count)
+        top = top[np.argsort(-scores[top])]
+        return [(self._labels[i], float(scores[i])) for i in top]
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def __contains__(self, label: Hashable) -> bool:
+        return label in self._label_to_row
+
+
+class HNSWIndex(VectorIndex):
+    """
+    Hierarchical Navigable Small World graph index.
+
+    Recall-vs-latency knobs:
+        M: max neighbors per node on upper layers (2*M on layer 0).
+           Higher = better recall, more memory, slower inserts.
+        ef_construction: candidate list size while inserting.
+        ef_search: candidate list size while querying (overridable per query).
+
+    Removal marks nodes as deleted (they still route traffic but are never
+    returned). Once deleted nodes exceed `compact_threshold` of the graph,
+    the index is rebuilt from the live vectors.
+    """
+
+    index_type = "hnsw"
+
+    def __init__(
+        self,
+        dim: int,
+        M: int = 16,
+        ef_construction: int = 100,
+        ef_search: int = 64,
+        compact_threshold: float = 0.3,
+        seed: Optional[int] = None
+    ):
+        super().__init__(dim)
+        if M < 2:
+            raise ValueError("M must be at least 2")
+        self.M = M
+        self.max_m0 = 2 * M
+        self.ef_construction = max(ef_construction, M)
+        self.ef_search = ef_search
+        self.compact_threshold = compact_threshold
+        self._seed = seed
+        self._rng = random.Random(seed)
+        self._level_mult = 1.0 / math.log(M)
+        self._reset()
+
+    def _reset(self) -> None:
+        self._count = 0
+        self._labels: List[Hashable] = []
+        self._label_to_node: Dict[Hashable, int] = {}
+        self._deleted: List[bool] = []
+        self._num_deleted = 0
+        self._graph: List[List[List[int]]] = []  # node -> level -> neighbor ids
+        self._entry_point: Optional[int] = None
+        self._max_level = -1
+
+    # ------------------------------------------------------------------ #
+    # Graph primitives
+    # ------------------------------------------------------------------ #
+
+    def _random_level(self) -> int:
+        return int(-math.log(1.0 - self._rng.random()) * self._level_mult)
+
+    def _distances(self, nodes: List[int], query: np.ndarray) -> List[float]:
+        """Cosine distances from query to nodes (vectors are normalized)."""
+        return (1.0 - self._vectors[nodes] @ query).tolist()
+
+    def _search_layer(
+        self,
+        query: np.ndarray,
+        entry_points: List[Tuple[float, int]],
+        ef: int,
+        level: int
+    ) -> List[Tuple[float, int]]:
+        """Best-first search on one layer; returns up to `ef` (distance, node) ascending."""
+        visited = {node for _, node in entry_points}
+        candidates = list(entry_points)
+        heapq.heapify(candidates)
+        results = [(-dist, node) for dist, node in entry_points]
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+
+        while candidates:
+            dist, node = heapq.heappop(candidates)
+            if dist > -results[0][0] and len(results) >= ef:
+                break
+            neighbors = [n for n in self._graph[node][level] if n not in visited]
+            if not neighbors:
+                continue
+            visited.update(neighbors)
+            worst = -results[0][0]
+            for neighbor, neighbor_dist in zip(neighbors, self._distances(neighbors, query)):
+                if len(results) < ef or neighbor_dist < worst:
+                    heapq.heappush(candidates, (neighbor_dist, neighbor))
+                    heapq.heappush(results, (-neighbor_dist, neighbor))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+                    worst = -results[0][0]
+
+        return sorted((-neg_dist, node) for neg_dist, node in results)
+
+    def _select_neighbors(self, candidates: List[Tuple[float, int]], m: int) -> List[int]:
+        """
+        Neighbor selection heuristic: keep a candidate only if it is closer to
+        the base node than to any already selected neighbor. This preserves
+        links between clusters; pruned candidates backfill remaining slots.
+        """
+        if len(candidates) <= 1:
+            return [node for _, node in candidates[:m]]
+        nodes = [node for _, node in candidates]
+        vectors = self._vectors[nodes]
+        pairwise = vectors @ vectors.T
+        # Highest similarity of each candidate to any selected neighbor so far
+        closest = np.full(len(nodes), -np.inf, dtype=np.float32)
+
+        selected: List[int] = []
+        pruned: List[int] = []
+        for i, (dist, node) in enumerate(candidates):
+            if len(selected) >= m:
+                break
+            if 1.0 - closest[i] < dist:
+                pruned.append(node)
+                continue
+            selected.append(node)
+            np.maximum(closest, pairwise[i], out=closest)
+        for node in pruned:
+            if len(selected) >= m:
+                break
+            selected.append(node)
+        return selected
+
+    def _insert(self, label: Hashable, vector: np.ndarray) -> None:
+        node = self._count
+        self._grow(node + 1)
+        self._vectors[node] = vector
+        self._count += 1
+        self._labels.append(label)
+        self._label_to_node[label] = node
+        self._deleted.append(False)
+
+        level = self._random_level()
+        self._graph.append([[] for _ in range(level + 1)])
+
+        if self._entry_point is None:
+            self._entry_point = node
+            self._max_level = level
+            return
+
+        entry = [(self._distances([self._entry_point], vector)[0], self._entry_point)]
+        for lc in range(self._max_level, level, -1):
+            entry = self._search_layer(vector, entry, 1, lc)[:1]
+
+        for lc in range(min(level, self._max_level), -1, -1):
+            found = self._search_layer(vector, entry, self.ef_construction, lc)
+            neighbors = self._select_neighbors(found, self.M)
+            self._graph[node][lc] = neighbors
+            max_conn = self.max_m0 if lc == 0 else self.M
+            for neighbor in neighbors:
+                links = self._graph[neighbor][lc]
+                links.append(node)
+                if len(links) > max_conn:
+                    ranked = sorted(zip(self._distances(links, self._vectors[neighbor]), links))
+                    self._graph[neighbor][lc] = self._select_neighbors(ranked, max_conn)
+            entry = found
+
+        if level > self._max_level:
+            self._entry_point = node
+            self._max_level = level
+
+    def _compact(self) -> None:
+        """Rebuild the graph from live vectors, dropping deleted nodes."""
+        live = [
+            (self._labels[node], self._vectors[node].copy())
+            for node in range(self._count)
+            if not self._deleted[node]
+        ]
+        self._rng = random.Random(self._seed)
+        self._reset()
+        for label, vector in live:
+            self._insert(label, vector)
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    # ------------------------------------------------------------------ #
+
+    def add(self, label: Hashable, vector: Sequence[float]) -> None:
+        vector = self._check_dim(vector)
+        if label in self._label_to_node:
+            self.remove(label)
+        self._insert(label, vector)
+
+    def remove(self, label: Hashable) -> bool:
+        node = self._label_to_node.pop(label, None)
+        if node is None:
+            return False
+        self._deleted[node] = True
+        self._num_deleted += 1
+        if self._count and self._num_deleted / self._count > self.compact_threshold:
+            self._compact()
+        return True
+
+    def search(self, query: Sequence[float], k: int = 5, ef_search: Optional[int] = None) -> List[SearchResult]:
+        if self._entry_point is None or k <= 0 or not self._label_to_node:
+            return []
+        query = self._check_dim(query)
+        ef = max(ef_search or self.ef_search, k)
+        if self._num_deleted:
+            # Widen the beam so tombstoned nodes don't starve the result list
+            ef = int(ef * (1 + self._num_deleted / self._count))
+
+        entry = [(self._distances([self._entry_point], query)[0], self._entry_point)]
+        for lc in range(self._max_level, 0, -1):
+            entry = self._search_layer(query, entry, 1, lc)[:1]
+        found = self._search_layer(query, entry, ef, 0)
+
+        results: List[SearchResult] = []
+        for dist, node in found:
+            if self._deleted[node]:
+                continue
+            results.append((self._labels[node], 1.0 - dist))
+            if len(results) >= k:
+                break
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats.update({
+            "M": self.M,
+            "ef_construction": self.ef_construction,
+            "ef_search": self.ef_search,
+            "max_level": self._max_level,
+            "deleted": self._num_deleted,
+        })
+        return stats
+
+    def __len__(self) -> int:
+        return len(self._label_to_node)
+
+    def __contains__(self, label: Hashable) -> bool:
+        return label in self._label_to_node
+
+
+def create_index(index_type: str, dim: int, **params) -> VectorIndex:
+    """
+    Create a vector index by type name.
+
+    Args:
+        index_type: "hnsw" or "exact"
+        dim: Embedding dimension
+        **params: HNSW parameters (M, ef_construction, ef_search); ignored for exact
+
+    Returns:
+        Empty vector index
+    """
+    index_type = index_type.lower()
+    if index_type == "hnsw":
+        return HNSWIndex(dim, **params)
+    if index_type == "exact":
+        return ExactIndex(dim)
+    raise ValueError(f"Unsupported KB index type: {index_type}")
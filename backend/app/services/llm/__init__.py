@@ -0,0 +1,56 @@
+"""
+LLM provider services.
+"""
+from .base import SUPPORTED_PROVIDERS, ContextWindowExceededError, LLMError, LLMRequest, LLMResponse, LLMUsage
+from .providers import ProviderAdapter, StreamEvent, get_adapter, keep_alive_value
+from .context_guard import ContextWindowGuard, context_guard
+from .response_cache import LLMResponseCache, cache_key, is_cacheable, llm_response_cache
+from .semantic_cache import SemanticResponseCache, semantic_response_cache
+from .stats import LLMStatsStore, llm_stats
+from .client import LLMClient, LLMStream, llm_client
+from .circuit_breaker import CircuitBreaker, CircuitBreakerRegistry, CircuitOpenError, llm_circuit_breakers
+from .scheduler import LLMScheduler, ProviderLimits, llm_scheduler
+from .hedging import HedgedStream, LLMHedger, llm_hedger
+from .routing import LLMRouter, llm_router
+from .ollama_models import OllamaModelManager, keep_alive_options, ollama_models
+
+__all__ = [
+    "SUPPORTED_PROVIDERS",
+    "ContextWindowExceededError",
+    "LLMError",
+    "LLMRequest",
+    "LLMResponse",
+    "LLMUsage",
+    "ProviderAdapter",
+    "StreamEvent",
+    "get_adapter",
+    "keep_alive_value",
+    "ContextWindowGuard",
+    "context_guard",
+    "LLMResponseCache",
+    "cache_key",
+    "is_cacheable",
+    "llm_response_cache",
+    "SemanticResponseCache",
+    "semantic_response_cache",
+    "LLMStatsStore",
+    "llm_stats",
+    "LLMClient",
+    "LLMStream",
+    "llm_client",
+    "CircuitBreaker",
+    "CircuitBreakerRegistry",
+    "CircuitOpenError",
+    "llm_circuit_breakers",
+    "LLMScheduler",
+    "ProviderLimits",
+    "llm_scheduler",
+    "HedgedStream",
+    "LLMHedger",
+    "llm_hedger",
+    "LLMRouter",
+    "llm_router",
+    "OllamaModelManager",
+    "keep_alive_options",
+    "ollama_models",
+]
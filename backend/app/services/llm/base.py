@@ -0,0 +1,127 @@
+"""
+Provider-independent LLM request, response and error types.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+
+SUPPORTED_PROVIDERS = ("ollama", "openrouter", "deepseek", "gemini")
+
+
+@dataclass
+class LLMRequest:
+    """A chat completion request for any supported provider."""
+    provider: str
+    model: str
+    messages: List[Dict[str, str]]  # [{"role": "system"|"user"|"assistant", "content": ...}]
+    temperature: float = 0.7
+    max_tokens: int = 2000
+    base_url: Optional[str] = None  # Overrides the provider's default API URL
+    api_key: Optional[str] = None  # Falls back to the provider key in settings
+    stop: Optional[List[str]] = None
+    timeout: Optional[float] = None  # Read timeout; defaults to LLM_REQUEST_TIMEOUT
+    options: Dict[str, Any] = field(default_factory=dict)  # Extra provider-specific body fields
+    cache: Optional[bool] = None  # Response cache: None = only at temperature 0, True/False = force
+    cache_scope: Optional[str] = None  # Enables semantic cache matching within this scope (e.g. a project id)
+
+    @classmethod
+    def from_prompt(cls, provider: str, model: str, prompt: str, system: Optional[str] = None, **kwargs) -> "LLMRequest":
+        """Build a request from a single user prompt and optional system prompt."""
+        messages = [{"role": "system", "content": system}] if system else []
+        messages.append({"role": "user", "content": prompt})
+        return cls(provider=provider.lower(), model=model, messages=messages, **kwargs)
+
+    @property
+    def prompt_text(self) -> str:
+        """All message contents, for token estimation."""
+        return "\n".join(message["content"] for message in self.messages)
+
+
+@dataclass
+class LLMUsage:
+    """Token accounting; `estimated` is True when the provider reported none."""
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    estimated: bool = False
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+            "estimated": self.estimated,
+        }
+
+
+@dataclass
+class LLMResponse:
+    """A finished (or cancelled) completion with usage and latency."""
+    provider: str
+    model: str
+    text: str
+    usage: LLMUsage = field(default_factory=LLMUsage)
+    finish_reason: Optional[str] = None
+    latency_ms: float = 0.0  # Request start to last token
+    first_token_ms: Optional[float] = None  # Request start to first token
+    cancelled: bool = False
+    cached: bool = False
+    cache_similarity: Optional[float] = None  # Set when served for a similar (not identical) prompt
+
+    @property
+    def tokens_per_second(self) -> float:
+        if not self.latency_ms or not self.usage.completion_tokens:
+            return 0.0
+        return self.usage.completion_tokens / (self.latency_ms / 1000)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "provider": self.provider,
+            "model": self.model,
+            "text": self.text,
+            "usage": self.usage.to_dict(),
+            "finish_reason": self.finish_reason,
+            "latency_ms": round(self.latency_ms, 2),
+            "first_token_ms": round(self.first_token_ms, 2) if self.first_token_ms is not None else None,
+            "tokens_per_second": round(self.tokens_per_second, 2),
+            "cancelled": self.cancelled,
+            "cached": self.cached,
+            "cache_similarity": self.cache_similarity,
+        }
+
+
+class LLMError(Exception):
+    """
+    An LLM call failed.
+
+    `retryable` marks transient failures (rate limits, 5xx, network errors);
+    `retry_after` carries the provider's Retry-After hint in seconds.
+    """
+
+    def __init__(
+        self,
+        message: str,
+        provider: str = "",
+        status_code: Optional[int] = None,
+        retryable: bool = False,
+        retry_after: Optional[float] = None
+    ):
+        super().__init__(message)
+        self.message = message
+        self.provider = provider
+        self.status_code = status_code
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class ContextWindowExceededError(LLMError):
+    """A prompt plus its completion budget does not fit the model's context window."""
+
+    def __init__(self, message: str, provider: str, prompt_tokens: int, max_tokens: int, context_window: int):
+        super().__init__(message, provider=provider)
+        self.prompt_tokens = prompt_tokens
+        self.max_tokens = max_tokens
+        self.context_window = context_window
@@ -0,0 +1,210 @@
+"""
+Per-provider circuit breakers driven by rolling error and latency stats.
+
+Each provider keeps a time window of recent call outcomes. When enough
+calls in the window failed or were slow (time to first token above the
+slow-call threshold), the circuit opens and calls fail fast instead of
+waiting out timeouts. After a cooldown the circuit goes half-open and lets
+a single probe call through; its outcome closes or re-opens the circuit.
+
+The same window yields latency percentiles, which hedged requests use to
+decide when a primary provider is running late.
+"""
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional
+
+from app.core.config import settings
+from app.services.llm.base import LLMError
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(LLMError):
+    """A call was rejected because the provider's circuit is open."""
+
+
+@dataclass
+class _Outcome:
+    at: float
+    ok: bool
+    slow: bool
+    latency_ms: Optional[float]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of unsorted values (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = math.ceil(pct / 100 * len(ordered))
+    return ordered[min(len(ordered), max(rank, 1)) - 1]
+
+
+class CircuitBreaker:
+    """Circuit breaker for one provider."""
+
+    def __init__(
+        self,
+        provider: str,
+        window_seconds: float,
+        min_calls: int,
+        failure_rate: float,
+        slow_call_ms: float,
+        cooldown_seconds: float
+    ):
+        self.provider = provider
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_ms = slow_call_ms
+        self.cooldown_seconds = cooldown_seconds
+        self._outcomes: Deque[_Outcome] = deque()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def _prune(self, now: float) -> None:
+        while self._outcomes and now - self._outcomes[0].at > self.window_seconds:
+            self._outcomes.popleft()
+
+    @property
+    def state(self) -> str:
+        """Current state; an open circuit turns half-open once the cooldown has passed."""
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.cooldown_seconds:
+                self._state = HALF_OPEN
+                self._probing = False
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; in half-open state only one probe is allowed."""
+        state = self.state
+        with self._lock:
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def check(self) -> None:
+        """
+        Reserve a call.
+
+        Raises:
+            CircuitOpenError: When the circuit is open
+        """
+        if not self.allow():
+            raise CircuitOpenError(f"{self.provider} is unavailable (circuit open)", provider=self.provider)
+
+    def release(self) -> None:
+        """Give back a half-open probe that ended without an outcome (e.g. cancelled)."""
+        with self._lock:
+            self._probing = False
+
+    def record(self, ok: bool, latency_ms: Optional[float] = None) -> None:
+        """Record a call outcome; `latency_ms` is the time to first token when known."""
+        now = time.monotonic()
+        slow = latency_ms is not None and latency_ms > self.slow_call_ms
+        with self._lock:
+            self._outcomes.append(_Outcome(now, ok, slow, latency_ms))
+            self._prune(now)
+            if self._state == HALF_OPEN:
+                if ok and not slow:
+                    self._state = CLOSED
+                    self._outcomes.clear()
+                else:
+                    self._trip(now)
+                return
+            if self._state == CLOSED and len(self._outcomes) >= self.min_calls:
+                bad = sum(1 for o in self._outcomes if not o.ok or o.slow)
+                if bad / len(self._outcomes) >= self.failure_rate:
+                    self._trip(now)
+
+    def _trip(self, now: float) -> None:
+        self._state = OPEN
+        self._opened_at = now
+        self._probing = False
+
+    def latency_percentile(self, pct: float) -> Optional[float]:
+        """Latency percentile of successful calls in the window, or None with too few samples."""
+        with self._lock:
+            self._prune(time.monotonic())
+            latencies = [o.latency_ms for o in self._outcomes if o.ok and o.latency_ms is not None]
+        if len(latencies) < self.min_calls:
+            return None
+        return percentile(latencies, pct)
+
+    def stats(self) -> Dict:
+        """State, window counts and latency percentiles."""
+        state = self.state
+        with self._lock:
+            self._prune(time.monotonic())
+            outcomes = list(self._outcomes)
+        latencies = [o.latency_ms for o in outcomes if o.ok and o.latency_ms is not None]
+        return {
+            "state": state,
+            "calls": len(outcomes),
+            "failures": sum(1 for o in outcomes if not o.ok),
+            "slow_calls": sum(1 for o in outcomes if o.slow),
+            "rejected": self.rejected,
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+        }
+
+
+class CircuitBreakerRegistry:
+    """Service holding one circuit breaker per provider."""
+
+    def __init__(
+        self,
+        window_seconds: Optional[float] = None,
+        min_calls: Optional[int] = None,
+        failure_rate: Optional[float] = None,
+        slow_call_ms: Optional[float] = None,
+        cooldown_seconds: Optional[float] = None
+    ):
+        self.window_seconds = settings.LLM_CIRCUIT_WINDOW_SECONDS if window_seconds is None else window_seconds
+        self.min_calls = settings.LLM_CIRCUIT_MIN_CALLS if min_calls is None else min_calls
+        self.failure_rate = settings.LLM_CIRCUIT_FAILURE_RATE if failure_rate is None else failure_rate
+        self.slow_call_ms = settings.LLM_CIRCUIT_SLOW_CALL_MS if slow_call_ms is None else slow_call_ms
+        self.cooldown_seconds = settings.LLM_CIRCUIT_COOLDOWN_SECONDS if cooldown_seconds is None else cooldown_seconds
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, provider: str) -> CircuitBreaker:
+        """The breaker for a provider, created on first use."""
+        provider = provider.lower()
+        with self._lock:
+            breaker = self._breakers.get(provider)
+            if breaker is None:
+                breaker = CircuitBreaker(
+                    provider,
+                    window_seconds=self.window_seconds,
+                    min_calls=self.min_calls,
+                    failure_rate=self.failure_rate,
+                    slow_call_ms=self.slow_call_ms,
+                    cooldown_seconds=self.cooldown_seconds
+                )
+                self._breakers[provider] = breaker
+            return breaker
+
+    def stats(self) -> Dict[str, Dict]:
+        """Per-provider breaker stats."""
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {provider: breaker.stats() for provider, breaker in breakers.items()}
+
+
+# Global circuit breaker registry instance
+llm_circuit_breakers = CircuitBreakerRegistry()
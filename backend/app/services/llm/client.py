@@ -0,0 +1,296 @@
+"""
+Unified async LLM client with token streaming.
+
+    async with llm_client.stream(request) as stream:
+        async for text in stream:
+            ...  # React to tokens as they arrive
+    response = stream.response  # Full text, usage, latency
+
+`complete()` drains a stream into an LLMResponse. A stream can be cancelled
+with `cancel()` (or by cancelling the consuming task); the HTTP response is
+closed, so the provider stops generating, and the partial response is
+marked `cancelled`.
+
+Deterministic requests are served from the response cache when possible;
+a cache hit streams the stored text as a single delta. With the semantic
+cache enabled, scoped requests that miss exactly may be served for a
+near-identical earlier prompt. Every provider call (not cache hits) is
+recorded in the rolling stats store: latency, tokens and errors.
+"""
+import time
+from functools import partial
+from typing import AsyncIterator, Callable, List, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.services.http_clients import HTTPClientRegistry, llm_http_clients
+from app.services.llm.base import LLMError, LLMRequest, LLMResponse, LLMUsage
+from app.services.llm.context_guard import ContextWindowGuard, context_guard
+from app.services.llm.providers import ProviderAdapter, get_adapter
+from app.services.llm.response_cache import LLMResponseCache, cache_key, is_cacheable, llm_response_cache
+from app.services.llm.semantic_cache import SemanticResponseCache, semantic_response_cache
+from app.services.llm.stats import LLMStatsStore, llm_stats
+from app.services.tokens import token_estimator
+
+
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
+
+class LLMStream:
+    """
+    An in-flight streaming completion.
+
+    Iterate it for text deltas; `response` is filled in as tokens arrive
+    and finalized when the stream ends, fails or is cancelled.
+    """
+
+    def __init__(
+        self,
+        client: Optional[httpx.AsyncClient],
+        adapter: ProviderAdapter,
+        request: LLMRequest,
+        cached: Optional[LLMResponse] = None,
+        on_complete: Optional[Callable[[LLMResponse], None]] = None,
+        stats: Optional[LLMStatsStore] = None
+    ):
+        self._client = client
+        self._adapter = adapter
+        self.request = request
+        self.response = LLMResponse(provider=request.provider, model=request.model, text="")
+        self._cached = cached
+        self._on_complete = on_complete
+        self._stats = stats
+        self._recorded = False
+        self._parts: List[str] = []
+        self._http_response: Optional[httpx.Response] = None
+        self._opened = False
+        self._started = 0.0
+        self._cancelled = False
+        self._finished = False
+
+    @property
+    def from_cache(self) -> bool:
+        """True if this stream replays a cached response (no provider call)."""
+        return self._cached is not None
+
+    async def open(self) -> None:
+        """
+        Send the request and check the response status.
+
+        Safe to call again after an LLMError, until streaming has started,
+        so callers can retry without building a new stream.
+        """
+        if self._cached is not None:
+            self._started = time.perf_counter()
+            self._opened = True
+            return
+        url, headers, body = self._adapter.build(self.request)
+        timeout = httpx.Timeout(
+            self.request.timeout or settings.LLM_REQUEST_TIMEOUT,
+            connect=settings.LLM_HTTP_CONNECT_TIMEOUT
+        )
+        self._started = time.perf_counter()
+        self._recorded = False  # Each attempt is a separate call
+        try:
+            http_request = self._client.build_request("POST", url, headers=headers, json=body, timeout=timeout)
+            self._http_response = await self._client.send(http_request, stream=True)
+        except httpx.TimeoutException as e:
+            raise self._failed(
+                LLMError(f"Request to {self.request.provider} timed out", self.request.provider, retryable=True)
+            ) from e
+        except httpx.TransportError as e:
+            raise self._failed(
+                LLMError(f"Cannot connect to {self.request.provider}: {e}", self.request.provider, retryable=True)
+            ) from e
+
+        if self._http_response.status_code >= 400:
+            response = self._http_response
+            await response.aread()
+            await response.aclose()
+            try:
+                payload = response.json()
+            except ValueError:
+                payload = None
+            raise self._failed(LLMError(
+                self._adapter.error_message(payload, response.status_code),
+                provider=self.request.provider,
+                status_code=response.status_code,
+                retryable=response.status_code in RETRYABLE_STATUS_CODES,
+                retry_after=_retry_after(response)
+            ))
+        self._opened = True
+
+    async def __aenter__(self) -> "LLMStream":
+        if not self._opened:
+            await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if not self._finished:
+            # Left early: consumer stopped reading, raised or was cancelled
+            self._cancelled = True
+        await self.aclose()
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        if self._cached is not None:
+            async for text in self._replay_cached():
+                yield text
+            return
+        if not self._opened:
+            await self.open()
+        done = False
+        try:
+            async for payload in self._adapter.events(self._http_response):
+                if self._cancelled:
+                    break
+                if done:
+                    # Read to the end of the body so the connection goes back to the pool
+                    continue
+                event = self._adapter.parse(payload)
+                if event.text:
+                    if self.response.first_token_ms is None:
+                        self.response.first_token_ms = (time.perf_counter() - self._started) * 1000
+                    self._parts.append(event.text)
+                    yield event.text
+                if event.usage is not None:
+                    self.response.usage = event.usage
+                if event.finish_reason:
+                    self.response.finish_reason = event.finish_reason
+                done = event.done
+            self._finished = not self._cancelled
+        except httpx.TimeoutException as e:
+            raise self._failed(
+                LLMError(f"{self.request.provider} stream timed out", self.request.provider, retryable=True)
+            ) from e
+        except httpx.TransportError as e:
+            raise self._failed(
+                LLMError(f"{self.request.provider} stream interrupted: {e}", self.request.provider, retryable=True)
+            ) from e
+        except LLMError as e:
+            # Error event in the stream body
+            raise self._failed(e)
+        finally:
+            await self.aclose()
+
+    async def _replay_cached(self) -> AsyncIterator[str]:
+        if not self._started:
+            self._started = time.perf_counter()
+        cached = self._cached
+        self.response.cached = True
+        self.response.cache_similarity = cached.cache_similarity
+        self.response.usage = cached.usage
+        self.response.finish_reason = cached.finish_reason
+        self.response.first_token_ms = (time.perf_counter() - self._started) * 1000
+        if cached.text:
+            self._parts.append(cached.text)
+            yield cached.text
+        self._finished = not self._cancelled
+        self._finalize()
+
+    def _failed(self, error: LLMError) -> LLMError:
+        if self._stats is not None and not self._recorded:
+            self._recorded = True
+            self._stats.record_error(self.request, error, (time.perf_counter() - self._started) * 1000)
+        return error
+
+    def cancel(self) -> None:
+        """Stop the stream after the current chunk; the connection is closed."""
+        self._cancelled = True
+
+    async def aclose(self) -> None:
+        """Close the HTTP response and finalize `response`."""
+        if self._http_response is not None and not self._http_response.is_closed:
+            await self._http_response.aclose()
+        self._finalize()
+
+    def _finalize(self) -> None:
+        response = self.response
+        response.text = "".join(self._parts)
+        response.cancelled = self._cancelled
+        if self._started and not response.latency_ms:
+            response.latency_ms = (time.perf_counter() - self._started) * 1000
+        if not response.usage.total_tokens:
+            # Provider reported no usage (or the stream was cut short)
+            response.usage = LLMUsage(
+                prompt_tokens=token_estimator.count_messages(self.request.messages, self.request.model),
+                completion_tokens=token_estimator.count(response.text, self.request.model),
+                estimated=True
+            )
+        if self._finished and not self._cancelled and self._stats is not None and not self._recorded:
+            self._recorded = True
+            self._stats.record_response(response)
+        if self._finished and not self._cancelled and self._on_complete is not None:
+            callback, self._on_complete = self._on_complete, None
+            callback(response)
+
+
+class LLMClient:
+    """Service for calling any supported LLM provider through one interface."""
+
+    def __init__(
+        self,
+        clients: Optional[HTTPClientRegistry] = None,
+        cache: Optional[LLMResponseCache] = None,
+        guard: Optional[ContextWindowGuard] = None,
+        semantic_cache: Optional[SemanticResponseCache] = None,
+        stats: Optional[LLMStatsStore] = None
+    ):
+        self.clients = clients or llm_http_clients
+        self.stats = stats or llm_stats
+        self.guard = guard or context_guard
+        if cache is None and settings.LLM_CACHE_ENABLED:
+            cache = llm_response_cache
+        self.cache = cache
+        if semantic_cache is None and cache is llm_response_cache and settings.LLM_SEMANTIC_CACHE_ENABLED:
+            semantic_cache = semantic_response_cache
+        self.semantic_cache = semantic_cache if cache is not None else None
+
+    def stream(self, request: LLMRequest) -> LLMStream:
+        """
+        Start a streaming completion (use with `async with` and `async for`).
+
+        Raises:
+            ContextWindowExceededError: When the prompt can't fit the model's context window
+        """
+        request = self.guard.fit(request)
+        adapter = get_adapter(request.provider)
+        on_complete = None
+        if self.cache is not None and is_cacheable(request):
+            key = cache_key(request)
+            cached = self.cache.get(key)
+            if cached is None and self.semantic_cache is not None:
+                cached = self.semantic_cache.lookup(request)
+            if cached is not None:
+                return LLMStream(None, adapter, request, cached=cached)
+            on_complete = partial(self._store, key, request)
+        client = self.clients.get(adapter.base_url(request))
+        return LLMStream(client, adapter, request, on_complete=on_complete, stats=self.stats)
+
+    def _store(self, key: str, request: LLMRequest, response: LLMResponse) -> None:
+        self.cache.put(key, response)
+        if self.semantic_cache is not None:
+            self.semantic_cache.add(request, key)
+
+    async def complete(self, request: LLMRequest) -> LLMResponse:
+        """
+        Run a completion to the end and return the full response.
+
+        Raises:
+            LLMError: On HTTP errors, connection failures and timeouts
+        """
+        async with self.stream(request) as stream:
+            async for _ in stream:
+                pass
+        return stream.response
+
+
+# Global LLM client instance
+llm_client = LLMClient()
@@ -0,0 +1,120 @@
+"""
+Context-window guard: catch oversized prompts before they are sent.
+
+A prompt whose tokens plus `max_tokens` exceed the model's context window
+would cost a full round-trip just to fail (or be silently truncated by the
+provider). The guard counts tokens locally and either rejects the request
+or trims it to fit: first by lowering `max_tokens` (down to
+LLM_MIN_COMPLETION_TOKENS), then by cutting the end of the longest
+non-system message.
+"""
+from dataclasses import replace
+from typing import Optional
+
+from app.core.config import settings
+from app.services.llm.base import ContextWindowExceededError, LLMRequest
+from app.services.tokens import (
+    MESSAGE_OVERHEAD_TOKENS,
+    ContextWindowRegistry,
+    TokenEstimator,
+    context_windows,
+    token_estimator,
+)
+
+
+TRUNCATION_MARKER = "\n[... truncated to fit the model's context window ...]"
+
+
+class ContextWindowGuard:
+    """Service that rejects or trims requests that exceed a model's context window."""
+
+    def __init__(
+        self,
+        estimator: Optional[TokenEstimator] = None,
+        windows: Optional[ContextWindowRegistry] = None,
+        overflow: Optional[str] = None,
+        min_completion_tokens: Optional[int] = None
+    ):
+        self.estimator = estimator or token_estimator
+        self.windows = windows or context_windows
+        self.overflow = overflow or settings.LLM_CONTEXT_OVERFLOW
+        self.min_completion_tokens = (
+            settings.LLM_MIN_COMPLETION_TOKENS if min_completion_tokens is None else min_completion_tokens
+        )
+        self.rejected = 0
+        self.trimmed = 0
+
+    def prompt_tokens(self, request: LLMRequest) -> int:
+        return self.estimator.count_messages(request.messages, request.model)
+
+    def _error(self, request: LLMRequest, prompt_tokens: int, window: int) -> ContextWindowExceededError:
+        return ContextWindowExceededError(
+            f"Prompt of ~{prompt_tokens} tokens plus max_tokens={request.max_tokens} exceeds "
+            f"the {window}-token context window of {request.model}",
+            provider=request.provider,
+            prompt_tokens=prompt_tokens,
+            max_tokens=request.max_tokens,
+            context_window=window
+        )
+
+    def fit(self, request: LLMRequest, overflow: Optional[str] = None) -> LLMRequest:
+        """
+        Check a request against its model's context window.
+
+        Args:
+            request: Request to check
+            overflow: "reject" or "trim" (defaults to LLM_CONTEXT_OVERFLOW)
+
+        Returns:
+            The request unchanged if it fits, otherwise a trimmed copy
+
+        Raises:
+            ContextWindowExceededError: When rejecting, or when even trimming can't make it fit
+        """
+        window = self.windows.get(request.provider, request.model)
+        prompt_tokens = self.prompt_tokens(request)
+        if prompt_tokens + request.max_tokens <= window:
+            return request
+
+        if (overflow or self.overflow) != "trim":
+            self.rejected += 1
+            raise self._error(request, prompt_tokens, window)
+
+        # Cheapest fix first: a smaller completion budget
+        min_completion = min(self.min_completion_tokens, request.max_tokens)
+        room = window - prompt_tokens
+        if room >= min_completion:
+            self.trimmed += 1
+            return replace(request, max_tokens=room)
+
+        # Otherwise cut the longest non-system message
+        candidates = [i for i, m in enumerate(request.messages) if m["role"] != "system"]
+        if not candidates:
+            self.rejected += 1
+            raise self._error(request, prompt_tokens, window)
+        index = max(candidates, key=lambda i: len(request.messages[i]["content"]))
+        content = request.messages[index]["content"]
+        others = prompt_tokens - MESSAGE_OVERHEAD_TOKENS - self.estimator.count(content, request.model)
+        budget = window - min_completion - others - MESSAGE_OVERHEAD_TOKENS
+        budget -= self.estimator.count(TRUNCATION_MARKER, request.model)
+        if budget <= 0:
+            self.rejected += 1
+            raise self._error(request, prompt_tokens, window)
+
+        messages = list(request.messages)
+        messages[index] = {
+            **messages[index],
+            "content": self.estimator.truncate(content, budget, request.model) + TRUNCATION_MARKER,
+        }
+        trimmed = replace(request, messages=messages)
+        trimmed.max_tokens = min(request.max_tokens, window - self.prompt_tokens(trimmed))
+        self.trimmed += 1
+        return trimmed
+
+    def stats(self):
+        """Overflow policy and counters."""
+        return {"overflow": self.overflow, "rejected": self.rejected, "trimmed": self.trimmed}
+
+
+# Global context window guard instance
+context_guard = ContextWindowGuard()
@@ -0,0 +1,256 @@
+"""
+Hedged LLM requests across providers.
+
+    response = await llm_hedger.complete(primary, alternates=[fallback])
+
+The primary request is sent first. If it has not produced a first token
+by its provider's p95 time to first token (from the circuit breaker's
+rolling window), the next alternate is fired as well and whichever
+finishes first wins; the other streams are cancelled, which closes their
+connections so providers stop generating. Once any candidate is
+streaming, no further hedges are sent. A candidate that fails (including
+an open circuit) is replaced by the next alternate immediately, so the
+alternates double as failover.
+
+    async with llm_hedger.stream(primary, alternates=[fallback]) as stream:
+        async for text in stream:
+            ...
+
+Streams race on time to first token the same way: the first candidate to
+produce a token wins and the others are cancelled. A candidate that fails
+before its first token fails over; one that fails midway raises, since its
+output was already consumed.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Sequence
+
+from app.core.config import settings
+from app.services.llm.base import LLMError, LLMRequest, LLMResponse
+from app.services.llm.circuit_breaker import CircuitBreakerRegistry
+from app.services.llm.scheduler import LLMScheduler, llm_scheduler
+
+
+class HedgedStream:
+    """Deltas of the candidate that won a streaming race, relayed from its task."""
+
+    def __init__(self, index: int, request: LLMRequest):
+        self.index = index
+        self.request = request
+        self.response: Optional[LLMResponse] = None
+        self.error: Optional[Exception] = None
+        self.started = False
+        self.deltas: asyncio.Queue = asyncio.Queue()  # Text deltas, then None at the end
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        while True:
+            delta = await self.deltas.get()
+            if delta is None:
+                break
+            yield delta
+        if self.error is not None:
+            raise self.error
+
+
+class LLMHedger:
+    """Service for racing a primary LLM request against alternates."""
+
+    def __init__(
+        self,
+        scheduler: Optional[LLMScheduler] = None,
+        enabled: Optional[bool] = None,
+        percentile: Optional[float] = None,
+        min_delay_ms: Optional[float] = None,
+        default_delay_ms: Optional[float] = None
+    ):
+        self.scheduler = scheduler or llm_scheduler
+        self.enabled = settings.LLM_HEDGE_ENABLED if enabled is None else enabled
+        self.percentile = settings.LLM_HEDGE_PERCENTILE if percentile is None else percentile
+        self.min_delay_ms = settings.LLM_HEDGE_MIN_DELAY_MS if min_delay_ms is None else min_delay_ms
+        self.default_delay_ms = settings.LLM_HEDGE_DEFAULT_DELAY_MS if default_delay_ms is None else default_delay_ms
+        self.counters = {"calls": 0, "hedged": 0, "failovers": 0, "alternate_wins": 0}
+
+    @property
+    def breakers(self) -> CircuitBreakerRegistry:
+        return self.scheduler.breakers
+
+    def hedge_delay(self, request: LLMRequest) -> float:
+        """Seconds to wait for a first token before hedging a request."""
+        observed = self.breakers.get(request.provider).latency_percentile(self.percentile)
+        delay_ms = self.default_delay_ms if observed is None else max(self.min_delay_ms, observed)
+        return delay_ms / 1000
+
+    async def _run(self, request: LLMRequest, first_token: asyncio.Event) -> LLMResponse:
+        async with self.scheduler.stream(request) as stream:
+            async for _ in stream:
+                first_token.set()
+        return stream.response
+
+    async def _relay(self, candidate: HedgedStream, ready: asyncio.Queue) -> None:
+        """Run one candidate's stream, reporting to `ready` at its first token or when it ends."""
+        try:
+            async with self.scheduler.stream(candidate.request) as stream:
+                async for delta in stream:
+                    if not candidate.started:
+                        candidate.started = True
+                        ready.put_nowait(candidate)
+                    candidate.deltas.put_nowait(delta)
+            candidate.response = stream.response
+        except Exception as e:
+            candidate.error = e
+        finally:
+            if not candidate.started:
+                ready.put_nowait(candidate)
+            candidate.deltas.put_nowait(None)
+
+    @asynccontextmanager
+    async def stream(self, request: LLMRequest, alternates: Sequence[LLMRequest] = ()) -> AsyncIterator:
+        """
+        Open a streaming completion, hedging with alternates while the primary has no first token.
+
+        Args:
+            request: Primary request
+            alternates: Fallback requests (other providers or models), in order of preference
+
+        Yields:
+            The winning stream (iterate for text; `response` is set once it ends)
+
+        Raises:
+            LLMError: When every candidate failed before its first token (the primary's error is raised)
+        """
+        if not alternates:
+            async with self.scheduler.stream(request) as stream:
+                yield stream
+            return
+
+        candidates = [request, *alternates]
+        self.counters["calls"] += 1
+        ready: asyncio.Queue = asyncio.Queue()
+        tasks: Dict[int, asyncio.Task] = {}
+        errors: Dict[int, Exception] = {}
+        winner: Optional[HedgedStream] = None
+
+        def launch() -> None:
+            index = len(tasks)
+            candidate = HedgedStream(index, candidates[index])
+            tasks[index] = asyncio.ensure_future(self._relay(candidate, ready))
+
+        try:
+            launch()
+            while winner is None:
+                live = len(tasks) - len(errors)
+                can_hedge = self.enabled and len(tasks) < len(candidates)
+                timeout = self.hedge_delay(candidates[len(tasks) - 1]) if can_hedge else None
+                try:
+                    candidate = await asyncio.wait_for(ready.get(), timeout)
+                except asyncio.TimeoutError:
+                    self.counters["hedged"] += 1
+                    launch()
+                    continue
+                if candidate.started or candidate.error is None:
+                    winner = candidate
+                    break
+                if not isinstance(candidate.error, LLMError):
+                    raise candidate.error
+                errors[candidate.index] = candidate.error
+                if live == 1:
+                    if len(tasks) == len(candidates):
+                        raise errors[min(errors)]
+                    self.counters["failovers"] += 1
+                    launch()
+
+            if winner.index:
+                self.counters["alternate_wins"] += 1
+            losers = [task for index, task in tasks.items() if index != winner.index]
+            for task in losers:
+                task.cancel()
+            await asyncio.gather(*losers, return_exceptions=True)
+            yield winner
+        finally:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+    async def complete(self, request: LLMRequest, alternates: Sequence[LLMRequest] = ()) -> LLMResponse:
+        """
+        Run a completion, hedging with alternates when the primary runs late.
+
+        Args:
+            request: Primary request
+            alternates: Fallback requests (other providers or models), in order of preference
+
+        Returns:
+            The first successful response
+
+        Raises:
+            LLMError: When every candidate failed (the primary's error is raised)
+        """
+        candidates = [request, *alternates]
+        self.counters["calls"] += 1
+        tasks: Dict[asyncio.Task, int] = {}
+        first_tokens: List[asyncio.Event] = []
+        errors: Dict[int, LLMError] = {}
+        streaming = False
+
+        def launch() -> None:
+            index = len(first_tokens)
+            first_tokens.append(asyncio.Event())
+            task = asyncio.ensure_future(self._run(candidates[index], first_tokens[index]))
+            tasks[task] = index
+
+        try:
+            launch()
+            while tasks:
+                can_hedge = self.enabled and not streaming and len(first_tokens) < len(candidates)
+                timeout = self.hedge_delay(candidates[len(first_tokens) - 1]) if can_hedge else None
+                done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    streaming = any(event.is_set() for event in first_tokens)
+                    if not streaming:
+                        self.counters["hedged"] += 1
+                        launch()
+                    continue
+
+                # Retrieve every finished task's outcome before picking a winner
+                winner: Optional[int] = None
+                unexpected: Optional[BaseException] = None
+                for task in done:
+                    index = tasks.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        if winner is None or index < winner:
+                            winner, response = index, task.result()
+                    elif isinstance(error, LLMError):
+                        errors[index] = error
+                    elif unexpected is None:
+                        unexpected = error
+                if winner is not None:
+                    if winner:
+                        self.counters["alternate_wins"] += 1
+                    return response
+                if unexpected is not None:
+                    raise unexpected
+
+                if not tasks and len(first_tokens) < len(candidates):
+                    self.counters["failovers"] += 1
+                    launch()
+        finally:
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+        raise errors[min(errors)]
+
+    def stats(self) -> Dict:
+        """Hedging settings and counters."""
+        return {
+            "enabled": self.enabled,
+            "percentile": self.percentile,
+            **self.counters,
+        }
+
+
+# Global LLM hedger instance
+llm_hedger = LLMHedger()
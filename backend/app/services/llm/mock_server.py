@@ -0,0 +1,680 @@
+"""
+Mock LLM server: the Ollama, OpenRouter, DeepSeek and Gemini APIs on one port.
+
+Serves the endpoints used by the LLM client, connection tester, model catalog
+and Ollama model manager, streaming and non-streaming. Latency, error rates,
+token rate and responses (canned text or an echo of the prompt) are
+configurable, so LLM-heavy paths can be load-tested and profiled offline.
+Each provider is mounted under its own prefix:
+
+- Ollama: http://host:port
+- OpenRouter: http://host:port/openrouter/api/v1
+- DeepSeek: http://host:port/deepseek/v1
+- Gemini: http://host:port/gemini/v1beta
+
+Point the app at it with OLLAMA_BASE_URL, OPENROUTER_BASE_URL,
+DEEPSEEK_BASE_URL and GEMINI_BASE_URL, or start it from tests and benchmarks
+with MockLLMServer.
+
+Usage:
+    python -m app.services.llm.mock_server --port 11500 --latency-ms 300 --tokens-per-second 40
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Literal, Optional, Tuple
+
+import httpx
+from fastapi import APIRouter, FastAPI, Header, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from app.services.tokens import estimate_tokens
+
+
+DEFAULT_MODELS = ["llama3", "mock-model", "deepseek-chat", "gemini-1.5-flash"]
+DEFAULT_RESPONSE = (
+    '[{"title": "Valid login", "steps": ["Open the login page", "Enter valid credentials", '
+    '"Submit the form"], "expected_result": "The dashboard is shown"}]'
+)
+
+# Path prefixes of the hosted providers (Ollama is served at the root)
+PROVIDER_PREFIXES = {
+    "openrouter": "/openrouter/api/v1",
+    "deepseek": "/deepseek/v1",
+    "gemini": "/gemini/v1beta",
+}
+
+_TOKEN_RE = re.compile(r"\s*\S+|\s+")
+
+
+class MockBehavior(BaseModel):
+    """Tunable behaviour of the mock server; can be changed at runtime via PUT /mock/behavior."""
+    models: List[str] = Field(default_factory=lambda: list(DEFAULT_MODELS))
+    response_mode: Literal["canned", "echo"] = "canned"  # Echo repeats the last user message
+    response_text: str = DEFAULT_RESPONSE
+    latency_ms: float = Field(0.0, ge=0)  # Delay before the response starts
+    latency_spread_ms: float = Field(0.0, ge=0)
+    latency_distribution: Literal["fixed", "uniform", "normal", "exponential"] = "fixed"
+    tokens_per_second: float = Field(0.0, ge=0)  # Streaming rate; 0 sends tokens without delay
+    error_rate: float = Field(0.0, ge=0, le=1)  # Requests answered with error_status
+    error_status: int = Field(503, ge=400, le=599)
+    stream_error_rate: float = Field(0.0, ge=0, le=1)  # Streams that fail partway through
+    context_length: int = Field(8192, gt=0)
+    api_key: Optional[str] = None  # When set, requests with another key are rejected
+    seed: Optional[int] = None
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into word-sized stream chunks that concatenate back to the text."""
+    return _TOKEN_RE.findall(text)
+
+
+def sample_latency_ms(behavior: MockBehavior, rng: random.Random) -> float:
+    """Draw a response latency from the configured distribution."""
+    mean, spread = behavior.latency_ms, behavior.latency_spread_ms
+    if behavior.latency_distribution == "uniform":
+        value = rng.uniform(mean - spread, mean + spread)
+    elif behavior.latency_distribution == "normal":
+        value = rng.gauss(mean, spread)
+    elif behavior.latency_distribution == "exponential":
+        # Long tail on top of a fixed floor
+        value = mean + (rng.expovariate(1 / spread) if spread > 0 else 0.0)
+    else:
+        value = mean
+    return max(0.0, value)
+
+
+def _ollama_name(model: str) -> str:
+    return model if ":" in model else f"{model}:latest"
+
+
+class _MockState:
+    """Behaviour, random source and counters shared by the routes."""
+
+    def __init__(self, behavior: MockBehavior):
+        self.configure(behavior)
+        self.requests: Dict[str, int] = {}
+        self.injected_errors = 0
+        self.stream_errors = 0
+        self.completion_tokens = 0
+        self.loaded: Dict[str, datetime] = {}  # Ollama model -> expiry
+
+    def configure(self, behavior: MockBehavior) -> None:
+        self.behavior = behavior
+        self.rng = random.Random(behavior.seed)
+
+    def count(self, endpoint: str) -> None:
+        self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+
+    def has_model(self, model: str, ollama: bool = False) -> bool:
+        if ollama:
+            return _ollama_name(model) in {_ollama_name(m) for m in self.behavior.models}
+        return model in self.behavior.models
+
+    def authorized(self, api_key: Optional[str]) -> bool:
+        return not self.behavior.api_key or api_key == self.behavior.api_key
+
+    async def wait_latency(self) -> None:
+        delay = sample_latency_ms(self.behavior, self.rng)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+    def inject_error(self) -> bool:
+        if self.rng.random() < self.behavior.error_rate:
+            self.injected_errors += 1
+            return True
+        return False
+
+    def reply(self, prompt: str, max_tokens: Optional[int]) -> Tuple[List[str], str]:
+        """Completion chunks and finish reason ("stop" or "length")."""
+        text = prompt if self.behavior.response_mode == "echo" else self.behavior.response_text
+        tokens = tokenize(text)
+        if max_tokens and len(tokens) > max_tokens:
+            return tokens[:max_tokens], "length"
+        return tokens, "stop"
+
+    async def stream(
+        self,
+        tokens: List[str],
+        chunk: Callable[[str], bytes],
+        final: Callable[[], bytes],
+        error: Callable[[str], bytes]
+    ) -> AsyncIterator[bytes]:
+        """Emit token chunks at the configured rate, failing partway when drawn to."""
+        fail_at = self.rng.randrange(len(tokens)) if tokens and self.rng.random() < self.behavior.stream_error_rate else None
+        for index, token in enumerate(tokens):
+            if index == fail_at:
+                self.stream_errors += 1
+                yield error("Mock stream interrupted")
+                return
+            if index and self.behavior.tokens_per_second > 0:
+                await asyncio.sleep(1 / self.behavior.tokens_per_second)
+            self.completion_tokens += 1
+            yield chunk(token)
+        yield final()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": dict(self.requests),
+            "total_requests": sum(self.requests.values()),
+            "injected_errors": self.injected_errors,
+            "stream_errors": self.stream_errors,
+            "completion_tokens": self.completion_tokens,
+        }
+
+
+def _last_user_text(messages: List[Dict[str, Any]]) -> str:
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            return message.get("content") or ""
+    return ""
+
+
+def _prompt_tokens(texts: List[str]) -> int:
+    return sum(estimate_tokens(text) for text in texts)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _ndjson(payload: Dict[str, Any]) -> bytes:
+    return (json.dumps(payload) + "\n").encode("utf-8")
+
+
+def _sse(payload: Any) -> bytes:
+    data = payload if isinstance(payload, str) else json.dumps(payload)
+    return f"data: {data}\n\n".encode("utf-8")
+
+
+def _retry_headers(status_code: int) -> Dict[str, str]:
+    return {"Retry-After": "1"} if status_code == 429 else {}
+
+
+def _ollama_router(state: _MockState) -> APIRouter:
+    router = APIRouter()
+
+    def error(message: str, status_code: int) -> JSONResponse:
+        return JSONResponse({"error": message}, status_code=status_code, headers=_retry_headers(status_code))
+
+    @router.get("/api/version")
+    async def version():
+        return {"version": "0.0.0-mock"}
+
+    @router.get("/api/tags")
+    async def tags():
+        state.count("ollama.tags")
+        await state.wait_latency()
+        return {
+            "models": [
+                {"name": _ollama_name(m), "model": _ollama_name(m), "size": 0, "details": {"family": "mock", "parameter_size": "0B"}}
+                for m in state.behavior.models
+            ]
+        }
+
+    @router.get("/api/ps")
+    async def running():
+        now = datetime.now(timezone.utc)
+        state.loaded = {name: expiry for name, expiry in state.loaded.items() if expiry > now}
+        return {
+            "models": [
+                {"name": name, "model": name, "size": 0, "size_vram": 0, "expires_at": expiry.isoformat()}
+                for name, expiry in state.loaded.items()
+            ]
+        }
+
+    async def generate(body: Dict[str, Any], chat: bool):
+        model = body.get("model", "")
+        state.count("ollama.chat" if chat else "ollama.generate")
+        await state.wait_latency()
+        if state.inject_error():
+            return error("Mock injected error", state.behavior.error_status)
+        if not state.has_model(model, ollama=True):
+            return error(f"model '{model}' not found", 404)
+
+        state.loaded[_ollama_name(model)] = datetime.now(timezone.utc) + timedelta(minutes=5)
+        if chat:
+            messages = body.get("messages") or []
+            prompt, prompt_texts = _last_user_text(messages), [m.get("content") or "" for m in messages]
+        else:
+            prompt = body.get("prompt") or ""
+            prompt_texts = [prompt]
+            if not prompt:
+                # No prompt: load (or with keep_alive 0, unload) only
+                unload = body.get("keep_alive") in (0, "0")
+                if unload:
+                    state.loaded.pop(_ollama_name(model), None)
+                return {"model": model, "created_at": _now(), "response": "", "done": True, "done_reason": "unload" if unload else "load"}
+
+        tokens, finish_reason = state.reply(prompt, (body.get("options") or {}).get("num_predict"))
+
+        def payload(text: str, done: bool) -> Dict[str, Any]:
+            content = {"message": {"role": "assistant", "content": text}} if chat else {"response": text}
+            result = {"model": model, "created_at": _now(), **content, "done": done}
+            if done:
+                result.update(
+                    done_reason=finish_reason,
+                    prompt_eval_count=_prompt_tokens(prompt_texts),
+                    eval_count=len(tokens)
+                )
+            return result
+
+        if body.get("stream", True) is False:
+            state.completion_tokens += len(tokens)
+            return payload("".join(tokens), done=True)
+        return StreamingResponse(
+            state.stream(
+                tokens,
+                chunk=lambda token: _ndjson(payload(token, done=False)),
+                final=lambda: _ndjson(payload("", done=True)),
+                error=lambda message: _ndjson({"error": message})
+            ),
+            media_type="application/x-ndjson"
+        )
+
+    @router.post("/api/chat")
+    async def chat(request: Request):
+        return await generate(await request.json(), chat=True)
+
+    @router.post("/api/generate")
+    async def generate_text(request: Request):
+        return await generate(await request.json(), chat=False)
+
+    return router
+
+
+def _openai_router(state: _MockState, provider: str) -> APIRouter:
+    router = APIRouter()
+
+    def error(message: str, status_code: int) -> JSONResponse:
+        return JSONResponse(
+            {"error": {"message": message, "code": status_code}},
+            status_code=status_code,
+            headers=_retry_headers(status_code)
+        )
+
+    def api_key(authorization: Optional[str]) -> Optional[str]:
+        return authorization[7:] if authorization and authorization.startswith("Bearer ") else None
+
+    def model_entry(model: str) -> Dict[str, Any]:
+        return {"id": model, "name": model, "object": "model", "context_length": state.behavior.context_length}
+
+    @router.get("/models")
+    async def list_models(authorization: Optional[str] = Header(None)):
+        state.count(f"{provider}.models")
+        await state.wait_latency()
+        if not state.authorized(api_key(authorization)):
+            return error("Invalid API key", 401)
+        return {"object": "list", "data": [model_entry(m) for m in state.behavior.models]}
+
+    @router.get("/auth/key")
+    async def auth_key(authorization: Optional[str] = Header(None)):
+        state.count(f"{provider}.auth_key")
+        await state.wait_latency()
+        if not state.authorized(api_key(authorization)):
+            return error("Invalid API key", 401)
+        return {"data": {"label": "mock", "usage": 0, "limit": None, "is_free_tier": False}}
+
+    @router.get("/models/{model:path}/endpoints")
+    async def model_endpoints(model: str, authorization: Optional[str] = Header(None)):
+        state.count(f"{provider}.endpoints")
+        await state.wait_latency()
+        if not state.authorized(api_key(authorization)):
+            return error("Invalid API key", 401)
+        if not state.has_model(model):
+            return error(f"Model {model} not found", 404)
+        return {"data": {"id": model, "endpoints": [{"name": "mock", "context_length": state.behavior.context_length}]}}
+
+    @router.post("/chat/completions")
+    async def chat_completions(request: Request, authorization: Optional[str] = Header(None)):
+        state.count(f"{provider}.chat")
+        body = await request.json()
+        await state.wait_latency()
+        if not state.authorized(api_key(authorization)):
+            return error("Invalid API key", 401)
+        if state.inject_error():
+            return error("Mock injected error", state.behavior.error_status)
+        model = body.get("model", "")
+        if not state.has_model(model):
+            return error(f"Model {model} not found", 404)
+
+        messages = body.get("messages") or []
+        tokens, finish_reason = state.reply(_last_user_text(messages), body.get("max_tokens"))
+        usage = {
+            "prompt_tokens": _prompt_tokens([m.get("content") or "" for m in messages]),
+            "completion_tokens": len(tokens),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+
+        if not body.get("stream"):
+            state.completion_tokens += len(tokens)
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens)}, "finish_reason": finish_reason}],
+                "usage": usage,
+            }
+
+        def chunk(delta: Dict[str, Any], reason: Optional[str] = None) -> Dict[str, Any]:
+            return {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": reason}],
+            }
+
+        def final() -> bytes:
+            events = _sse(chunk({}, finish_reason))
+            if (body.get("stream_options") or {}).get("include_usage"):
+                events += _sse({**chunk({}), "choices": [], "usage": usage})
+            return events + _sse("[DONE]")
+
+        return StreamingResponse(
+            state.stream(
+                tokens,
+                chunk=lambda token: _sse(chunk({"content": token})),
+                final=final,
+                error=lambda message: _sse({"error": {"message": message, "code": 500}})
+            ),
+            media_type="text/event-stream"
+        )
+
+    return router
+
+
+def _gemini_router(state: _MockState) -> APIRouter:
+    router = APIRouter()
+
+    def error(message: str, status_code: int, status: str) -> JSONResponse:
+        return JSONResponse(
+            {"error": {"code": status_code, "message": message, "status": status}},
+            status_code=status_code,
+            headers=_retry_headers(status_code)
+        )
+
+    def invalid_key() -> JSONResponse:
+        return error("API key not valid. Please pass a valid API key.", 400, "INVALID_ARGUMENT")
+
+    def model_entry(model: str) -> Dict[str, Any]:
+        return {
+            "name": f"models/{model}",
+            "displayName": model,
+            "inputTokenLimit": state.behavior.context_length,
+            "outputTokenLimit": 8192,
+            "supportedGenerationMethods": ["generateContent", "streamGenerateContent"],
+        }
+
+    @router.get("/models")
+    async def list_models(key: Optional[str] = Query(None), x_goog_api_key: Optional[str] = Header(None)):
+        state.count("gemini.models")
+        await state.wait_latency()
+        if not state.authorized(x_goog_api_key or key):
+            return invalid_key()
+        return {"models": [model_entry(m) for m in state.behavior.models]}
+
+    @router.get("/models/{model}")
+    async def get_model(model: str, key: Optional[str] = Query(None), x_goog_api_key: Optional[str] = Header(None)):
+        state.count("gemini.model")
+        await state.wait_latency()
+        if not state.authorized(x_goog_api_key or key):
+            return invalid_key()
+        if not state.has_model(model):
+            return error(f"models/{model} is not found", 404, "NOT_FOUND")
+        return model_entry(model)
+
+    @router.post("/models/{target}")
+    async def generate_content(
+        target: str,
+        request: Request,
+        key: Optional[str] = Query(None),
+        x_goog_api_key: Optional[str] = Header(None)
+    ):
+        model, _, action = target.rpartition(":")
+        state.count(f"gemini.{action}")
+        body = await request.json()
+        await state.wait_latency()
+        if action not in ("generateContent", "streamGenerateContent"):
+            return error(f"Unknown method {action}", 404, "NOT_FOUND")
+        if not state.authorized(x_goog_api_key or key):
+            return invalid_key()
+        if state.inject_error():
+            return error("Mock injected error", state.behavior.error_status, "UNAVAILABLE")
+        if not state.has_model(model):
+            return error(f"models/{model} is not found", 404, "NOT_FOUND")
+
+        contents = body.get("contents") or []
+        texts = [part.get("text", "") for content in contents for part in content.get("parts", [])]
+        user_texts = [
+            part.get("text", "") for content in contents if content.get("role", "user") == "user"
+            for part in content.get("parts", [])
+        ]
+        system = [part.get("text", "") for part in (body.get("systemInstruction") or {}).get("parts", [])]
+        max_tokens = (body.get("generationConfig") or {}).get("maxOutputTokens")
+        tokens, finish_reason = state.reply(user_texts[-1] if user_texts else "", max_tokens)
+        usage = {"promptTokenCount": _prompt_tokens(texts + system), "candidatesTokenCount": len(tokens)}
+        usage["totalTokenCount"] = usage["promptTokenCount"] + usage["candidatesTokenCount"]
+
+        def candidate(text: str, reason: Optional[str] = None) -> Dict[str, Any]:
+            result = {"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}
+            if reason:
+                result["finishReason"] = "MAX_TOKENS" if reason == "length" else "STOP"
+            return result
+
+        if action == "generateContent":
+            state.completion_tokens += len(tokens)
+            return {"candidates": [candidate("".join(tokens), finish_reason)], "usageMetadata": usage}
+
+        return StreamingResponse(
+            state.stream(
+                tokens,
+                chunk=lambda token: _sse({"candidates": [candidate(token)]}),
+                final=lambda: _sse({"candidates": [candidate("", finish_reason)], "usageMetadata": usage}),
+                error=lambda message: _sse({"error": {"code": 500, "message": message, "status": "INTERNAL"}})
+            ),
+            media_type="text/event-stream"
+        )
+
+    return router
+
+
+def create_mock_app(behavior: Optional[MockBehavior] = None) -> FastAPI:
+    """
+    Build the mock server application.
+
+    Args:
+        behavior: Initial behaviour (defaults to instant canned responses)
+
+    Returns:
+        FastAPI app serving all four provider APIs plus /health and /mock/* admin routes
+    """
+    state = _MockState(behavior or MockBehavior())
+    app = FastAPI(title="Mock LLM Server")
+    app.state.mock = state
+
+    app.include_router(_ollama_router(state))
+    app.include_router(_openai_router(state, "openrouter"), prefix=PROVIDER_PREFIXES["openrouter"])
+    app.include_router(_openai_router(state, "deepseek"), prefix=PROVIDER_PREFIXES["deepseek"])
+    app.include_router(_gemini_router(state), prefix=PROVIDER_PREFIXES["gemini"])
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    @app.get("/mock/behavior")
+    async def get_behavior():
+        return state.behavior
+
+    @app.put("/mock/behavior")
+    async def set_behavior(behavior: MockBehavior):
+        state.configure(behavior)
+        return state.behavior
+
+    @app.get("/mock/stats")
+    async def stats():
+        return state.stats()
+
+    return app
+
+
+def base_urls(url: str) -> Dict[str, str]:
+    """Provider base URLs of a mock server running at `url`."""
+    url = url.rstrip("/")
+    return {"ollama": url, **{provider: f"{url}{prefix}" for provider, prefix in PROVIDER_PREFIXES.items()}}
+
+
+def _free_port(host: str) -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+class MockLLMServer:
+    """
+    Runs the mock server in a child process, for tests and benchmarks.
+
+    Example:
+        with MockLLMServer(MockBehavior(latency_ms=200, tokens_per_second=50)) as server:
+            request = LLMRequest.from_prompt("ollama", "llama3", "Hi", base_url=server.base_urls["ollama"])
+    """
+
+    def __init__(
+        self,
+        behavior: Optional[MockBehavior] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        startup_timeout: float = 15.0
+    ):
+        self.behavior = behavior or MockBehavior()
+        self.host = host
+        self.port = port
+        self.startup_timeout = startup_timeout
+        self._process: Optional[subprocess.Popen] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def base_urls(self) -> Dict[str, str]:
+        return base_urls(self.url)
+
+    def start(self) -> "MockLLMServer":
+        """
+        Start the server process and wait until it answers.
+
+        Raises:
+            RuntimeError: When the server exits or doesn't come up within startup_timeout
+        """
+        if self.port == 0:
+            self.port = _free_port(self.host)
+        log = tempfile.TemporaryFile()
+        self._process = subprocess.Popen(
+            [
+                sys.executable, "-m", "app.services.llm.mock_server",
+                "--host", self.host, "--port", str(self.port),
+                "--config", self.behavior.model_dump_json(),
+            ],
+            cwd=Path(__file__).resolve().parents[3],
+            stdout=subprocess.DEVNULL,
+            stderr=log
+        )
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                break
+            try:
+                if httpx.get(f"{self.url}/health", timeout=1.0).status_code == 200:
+                    log.close()
+                    return self
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.05)
+        self.stop()
+        log.seek(0)
+        output = log.read().decode("utf-8", "replace")
+        log.close()
+        raise RuntimeError(f"Mock LLM server did not start on {self.url}: {output[-2000:]}")
+
+    def configure(self, **changes: Any) -> MockBehavior:
+        """Change the running server's behaviour (unspecified fields keep their values)."""
+        self.behavior = self.behavior.model_copy(update=changes)
+        response = httpx.put(f"{self.url}/mock/behavior", json=json.loads(self.behavior.model_dump_json()), timeout=5.0)
+        response.raise_for_status()
+        return self.behavior
+
+    def stats(self) -> Dict[str, Any]:
+        """Request and token counters of the running server."""
+        return httpx.get(f"{self.url}/mock/stats", timeout=5.0).json()
+
+    def stop(self) -> None:
+        """Stop the server process."""
+        if self._process is None:
+            return
+        self._process.terminate()
+        try:
+            self._process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            self._process.wait()
+        self._process = None
+
+    def __enter__(self) -> "MockLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Mock Ollama / OpenRouter / DeepSeek / Gemini server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--config", help="Behaviour as JSON (MockBehavior fields); flags below override it")
+    parser.add_argument("--models", nargs="+")
+    parser.add_argument("--response-mode", choices=["canned", "echo"])
+    parser.add_argument("--response-file", type=Path, help="File whose text is the canned response")
+    parser.add_argument("--latency-ms", type=float)
+    parser.add_argument("--latency-spread-ms", type=float)
+    parser.add_argument("--latency-distribution", choices=["fixed", "uniform", "normal", "exponential"])
+    parser.add_argument("--tokens-per-second", type=float)
+    parser.add_argument("--error-rate", type=float)
+    parser.add_argument("--error-status", type=int)
+    parser.add_argument("--stream-error-rate", type=float)
+    parser.add_argument("--context-length", type=int)
+    parser.add_argument("--api-key")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    config = json.loads(args.config) if args.config else {}
+    for name in MockBehavior.model_fields:
+        value = getattr(args, name, None)
+        if value is not None:
+            config[name] = value
+    if args.response_file:
+        config["response_text"] = args.response_file.read_text(encoding="utf-8")
+    behavior = MockBehavior(**config)
+
+    print(json.dumps({"url": f"http://{args.host}:{args.port}", "base_urls": base_urls(f"http://{args.host}:{args.port}")}), flush=True)
+    uvicorn.run(create_mock_app(behavior), host=args.host, port=args.port, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Ollama model residency: warm-up, keep-alive and loaded-model status.
+
+Ollama unloads idle models after their keep-alive expires, and the next
+call pays the full load time. Configured models are warmed up when the app
+starts and whenever an Ollama configuration changes: a generate call
+without a prompt only loads the model, and its `keep_alive` sets how long
+the model stays resident. `/api/ps` reports which models are loaded and
+when they expire.
+"""
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+from app.services.http_clients import HTTPClientRegistry, llm_http_clients
+from app.services.llm.providers import keep_alive_value
+
+
+def keep_alive_options(configuration: Any) -> Dict[str, Any]:
+    """LLMRequest options carrying a configuration's keep_alive, if it sets one."""
+    if getattr(configuration, "provider", None) != "ollama" or not configuration.ollama_keep_alive:
+        return {}
+    return {"keep_alive": keep_alive_value(configuration.ollama_keep_alive)}
+
+
+class OllamaModelManager:
+    """Service for loading, unloading and inspecting Ollama models."""
+
+    def __init__(
+        self,
+        clients: Optional[HTTPClientRegistry] = None,
+        keep_alive: Optional[str] = None,
+        timeout: Optional[float] = None
+    ):
+        self.clients = clients or llm_http_clients
+        self.keep_alive = keep_alive or settings.OLLAMA_KEEP_ALIVE
+        self.timeout = settings.OLLAMA_WARMUP_TIMEOUT if timeout is None else timeout
+        self.warmups: Dict[Tuple[str, str], Dict[str, Any]] = {}  # (base_url, model) -> last result
+
+    @staticmethod
+    def _base_url(base_url: Optional[str]) -> str:
+        return (base_url or settings.OLLAMA_BASE_URL).rstrip("/")
+
+    async def _generate(self, base_url: str, model: str, keep_alive: str) -> httpx.Response:
+        client = self.clients.for_provider("ollama", base_url)
+        # No prompt: Ollama only loads (or, with keep_alive 0, unloads) the model
+        return await client.post(
+            f"{base_url}/api/generate",
+            json={"model": model, "keep_alive": keep_alive_value(keep_alive)},
+            timeout=httpx.Timeout(self.timeout, connect=settings.LLM_HTTP_CONNECT_TIMEOUT)
+        )
+
+    async def warm_up(
+        self,
+        base_url: Optional[str],
+        model: str,
+        keep_alive: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Load a model into memory and set its keep-alive.
+
+        Args:
+            base_url: Ollama base URL (defaults to OLLAMA_BASE_URL)
+            model: Model name
+            keep_alive: How long the model stays loaded (defaults to OLLAMA_KEEP_ALIVE)
+
+        Returns:
+            Result with success, load_ms (time to load) and error
+        """
+        base_url = self._base_url(base_url)
+        keep_alive = keep_alive or self.keep_alive
+        result = {
+            "base_url": base_url,
+            "model": model,
+            "keep_alive": keep_alive,
+            "success": False,
+            "load_ms": None,
+            "error": None,
+            "warmed_at": datetime.now(timezone.utc),
+        }
+        start_time = time.perf_counter()
+        try:
+            response = await self._generate(base_url, model, keep_alive)
+            if response.status_code == 200:
+                result["success"] = True
+                result["load_ms"] = round((time.perf_counter() - start_time) * 1000, 2)
+            else:
+                try:
+                    result["error"] = response.json().get("error") or f"HTTP {response.status_code}"
+                except ValueError:
+                    result["error"] = f"HTTP {response.status_code}"
+        except httpx.ConnectError:
+            result["error"] = f"Cannot connect to Ollama at {base_url}"
+        except httpx.TimeoutException:
+            result["error"] = "Model load timed out"
+        except httpx.HTTPError as e:
+            result["error"] = str(e)
+
+        self.warmups[(base_url, model)] = result
+        return result
+
+    async def warm_up_many(self, targets: Iterable[Tuple[Optional[str], str, Optional[str]]]) -> List[Dict[str, Any]]:
+        """Warm up (base_url, model, keep_alive) targets concurrently, once per model."""
+        unique = {}
+        for base_url, model, keep_alive in targets:
+            unique.setdefault((self._base_url(base_url), model), keep_alive)
+        return await asyncio.gather(*(
+            self.warm_up(base_url, model, keep_alive)
+            for (base_url, model), keep_alive in unique.items()
+        ))
+
+    async def warm_up_configurations(self, configurations: Iterable[Any]) -> List[Dict[str, Any]]:
+        """Warm up the models of Ollama configurations that have warm-up enabled."""
+        return await self.warm_up_many(
+            (config.base_url, config.model, config.ollama_keep_alive)
+            for config in configurations
+            if config.provider == "ollama" and config.ollama_warmup
+        )
+
+    async def unload(self, base_url: Optional[str], model: str) -> bool:
+        """Unload a model now (keep_alive 0); returns True if Ollama accepted."""
+        base_url = self._base_url(base_url)
+        try:
+            response = await self._generate(base_url, model, "0")
+        except httpx.HTTPError:
+            return False
+        self.warmups.pop((base_url, model), None)
+        return response.status_code == 200
+
+    async def running(self, base_url: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Models currently loaded in Ollama (`/api/ps`).
+
+        Raises:
+            httpx.HTTPError: When Ollama cannot be reached or returns an error
+        """
+        base_url = self._base_url(base_url)
+        client = self.clients.for_provider("ollama", base_url)
+        response = await client.get(f"{base_url}/api/ps", timeout=settings.LLM_PROBE_TIMEOUT)
+        response.raise_for_status()
+        return [
+            {
+                "name": m.get("name"),
+                "size": m.get("size"),
+                "size_vram": m.get("size_vram"),
+                "expires_at": m.get("expires_at"),
+            }
+            for m in response.json().get("models", [])
+        ]
+
+    async def status(self, base_url: Optional[str] = None) -> Dict[str, Any]:
+        """Loaded models plus the last warm-up result of each model on this server."""
+        base_url = self._base_url(base_url)
+        try:
+            running = await self.running(base_url)
+            error = None
+        except httpx.HTTPError as e:
+            running = []
+            error = f"Cannot query Ollama at {base_url}: {e}"
+        return {
+            "base_url": base_url,
+            "reachable": error is None,
+            "error": error,
+            "running": running,
+            "warmups": [result for (url, _), result in self.warmups.items() if url == base_url],
+        }
+
+
+# Global Ollama model manager instance
+ollama_models = OllamaModelManager()
@@ -0,0 +1,259 @@
+"""
+Per-provider adapters: request building and stream decoding.
+
+Each adapter turns an LLMRequest into an HTTP request and decodes the
+provider's streaming format into StreamEvents:
+
+- Ollama: POST /api/chat, newline-delimited JSON
+- OpenRouter / DeepSeek: POST /chat/completions, OpenAI-style server-sent events
+- Gemini: POST /models/{model}:streamGenerateContent?alt=sse, server-sent events
+"""
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Optional, Tuple, Union
+
+import httpx
+
+from app.core.config import settings
+from app.services.http_clients import PROVIDER_BASE_URLS
+from app.services.llm.base import LLMError, LLMRequest, LLMUsage
+
+
+_NUMBER_RE = re.compile(r"^-?\d+(\.\d+)?$")
+
+
+def keep_alive_value(keep_alive: str) -> Union[str, float, int]:
+    """
+    Ollama `keep_alive` as sent on the wire.
+
+    Durations ("30m", "1h") are passed as strings; bare numbers ("-1", "0",
+    "300") must be sent as JSON numbers (seconds), since Ollama rejects
+    unit-less duration strings.
+    """
+    keep_alive = keep_alive.strip()
+    if _NUMBER_RE.match(keep_alive):
+        number = float(keep_alive)
+        return int(number) if number.is_integer() else number
+    return keep_alive
+
+
+@dataclass
+class StreamEvent:
+    """One decoded stream payload: a text delta and/or final metadata."""
+    text: str = ""
+    usage: Optional[LLMUsage] = None
+    finish_reason: Optional[str] = None
+    done: bool = False
+
+
+async def iter_ndjson(response: httpx.Response) -> AsyncIterator[Dict[str, Any]]:
+    """Decode a newline-delimited JSON body."""
+    async for line in response.aiter_lines():
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+async def iter_sse(response: httpx.Response) -> AsyncIterator[Dict[str, Any]]:
+    """Decode server-sent events whose data fields are JSON; stops at `[DONE]`."""
+    data_lines = []
+    lines = response.aiter_lines()
+    async for line in lines:
+        if line.startswith("data:"):
+            data_lines.append(line[5:].lstrip())
+            continue
+        if line.strip() or not data_lines:
+            continue  # Comments (": keep-alive"), event/id fields
+        data, data_lines = "\n".join(data_lines), []
+        if data == "[DONE]":
+            # Read to the end of the body so the connection goes back to the pool
+            async for _ in lines:
+                pass
+            return
+        yield json.loads(data)
+    if data_lines and data_lines != ["[DONE]"]:
+        yield json.loads("\n".join(data_lines))
+
+
+class ProviderAdapter:
+    """Base adapter; subclasses define the wire format of one provider."""
+
+    name = ""
+
+    def base_url(self, request: LLMRequest) -> str:
+        return (request.base_url or PROVIDER_BASE_URLS[self.name]).rstrip("/")
+
+    def api_key(self, request: LLMRequest) -> str:
+        return request.api_key or ""
+
+    def build(self, request: LLMRequest) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
+        """Return (url, headers, json body) for a streaming request."""
+        raise NotImplementedError
+
+    def events(self, response: httpx.Response) -> AsyncIterator[Dict[str, Any]]:
+        return iter_sse(response)
+
+    def parse(self, payload: Dict[str, Any]) -> StreamEvent:
+        raise NotImplementedError
+
+    def error_message(self, payload: Any, status_code: int) -> str:
+        """Extract a readable error from an error response body."""
+        if isinstance(payload, dict):
+            error = payload.get("error")
+            if isinstance(error, dict):
+                return error.get("message") or f"HTTP {status_code}"
+            if isinstance(error, str):
+                return error
+        return f"HTTP {status_code}"
+
+
+class OllamaAdapter(ProviderAdapter):
+    """Ollama /api/chat with NDJSON streaming."""
+
+    name = "ollama"
+
+    def base_url(self, request: LLMRequest) -> str:
+        return (request.base_url or settings.OLLAMA_BASE_URL).rstrip("/")
+
+    def build(self, request: LLMRequest):
+        options = {"temperature": request.temperature, "num_predict": request.max_tokens}
+        if request.stop:
+            options["stop"] = request.stop
+        body = {
+            "model": request.model,
+            "messages": request.messages,
+            "stream": True,
+            "options": options,
+            "keep_alive": keep_alive_value(settings.OLLAMA_KEEP_ALIVE),
+        }
+        body.update(request.options)  # A configuration's keep_alive overrides the default
+        return f"{self.base_url(request)}/api/chat", {"Content-Type": "application/json"}, body
+
+    def events(self, response: httpx.Response) -> AsyncIterator[Dict[str, Any]]:
+        return iter_ndjson(response)
+
+    def parse(self, payload: Dict[str, Any]) -> StreamEvent:
+        if payload.get("error"):
+            raise LLMError(payload["error"], provider=self.name)
+        text = (payload.get("message") or {}).get("content", "")
+        if not payload.get("done"):
+            return StreamEvent(text=text)
+        usage = None
+        if "eval_count" in payload or "prompt_eval_count" in payload:
+            usage = LLMUsage(
+                prompt_tokens=payload.get("prompt_eval_count", 0),
+                completion_tokens=payload.get("eval_count", 0)
+            )
+        return StreamEvent(text=text, usage=usage, finish_reason=payload.get("done_reason", "stop"), done=True)
+
+
+class OpenAICompatibleAdapter(ProviderAdapter):
+    """OpenAI-style /chat/completions with SSE streaming (OpenRouter, DeepSeek)."""
+
+    def __init__(self, name: str, settings_key: str):
+        self.name = name
+        self.settings_key = settings_key
+
+    def api_key(self, request: LLMRequest) -> str:
+        return request.api_key or getattr(settings, self.settings_key, "")
+
+    def build(self, request: LLMRequest):
+        body = {
+            "model": request.model,
+            "messages": request.messages,
+            "temperature": request.temperature,
+            "max_tokens": request.max_tokens,
+            "stream": True,
+            "stream_options": {"include_usage": True},
+        }
+        if request.stop:
+            body["stop"] = request.stop
+        body.update(request.options)
+        headers = {
+            "Authorization": f"Bearer {self.api_key(request)}",
+            "Content-Type": "application/json",
+        }
+        return f"{self.base_url(request)}/chat/completions", headers, body
+
+    def parse(self, payload: Dict[str, Any]) -> StreamEvent:
+        if payload.get("error"):
+            raise LLMError(self.error_message(payload, 200), provider=self.name)
+        event = StreamEvent()
+        choices = payload.get("choices") or []
+        if choices:
+            event.text = (choices[0].get("delta") or {}).get("content") or ""
+            event.finish_reason = choices[0].get("finish_reason")
+        usage = payload.get("usage")
+        if usage:
+            event.usage = LLMUsage(
+                prompt_tokens=usage.get("prompt_tokens", 0),
+                completion_tokens=usage.get("completion_tokens", 0)
+            )
+        return event
+
+
+class GeminiAdapter(ProviderAdapter):
+    """Google Gemini streamGenerateContent with SSE (alt=sse)."""
+
+    name = "gemini"
+
+    def api_key(self, request: LLMRequest) -> str:
+        return request.api_key or settings.GOOGLE_GEMINI_API_KEY
+
+    def build(self, request: LLMRequest):
+        system = [m["content"] for m in request.messages if m["role"] == "system"]
+        contents = [
+            {"role": "model" if m["role"] == "assistant" else "user", "parts": [{"text": m["content"]}]}
+            for m in request.messages if m["role"] != "system"
+        ]
+        generation_config = {"temperature": request.temperature, "maxOutputTokens": request.max_tokens}
+        if request.stop:
+            generation_config["stopSequences"] = request.stop
+        body = {"contents": contents, "generationConfig": generation_config}
+        if system:
+            body["systemInstruction"] = {"parts": [{"text": "\n\n".join(system)}]}
+        body.update(request.options)
+        headers = {"Content-Type": "application/json", "x-goog-api-key": self.api_key(request)}
+        url = f"{self.base_url(request)}/models/{request.model}:streamGenerateContent?alt=sse"
+        return url, headers, body
+
+    def parse(self, payload: Dict[str, Any]) -> StreamEvent:
+        if payload.get("error"):
+            raise LLMError(self.error_message(payload, 200), provider=self.name)
+        event = StreamEvent()
+        candidates = payload.get("candidates") or []
+        if candidates:
+            parts = (candidates[0].get("content") or {}).get("parts") or []
+            event.text = "".join(part.get("text", "") for part in parts)
+            finish_reason = candidates[0].get("finishReason")
+            event.finish_reason = finish_reason.lower() if finish_reason else None
+        metadata = payload.get("usageMetadata")
+        if metadata:
+            event.usage = LLMUsage(
+                prompt_tokens=metadata.get("promptTokenCount", 0),
+                completion_tokens=metadata.get("candidatesTokenCount", 0)
+            )
+        return event
+
+    def error_message(self, payload: Any, status_code: int) -> str:
+        # Error bodies may arrive as a one-element list
+        if isinstance(payload, list) and payload:
+            payload = payload[0]
+        return super().error_message(payload, status_code)
+
+
+ADAPTERS: Dict[str, ProviderAdapter] = {
+    "ollama": OllamaAdapter(),
+    "openrouter": OpenAICompatibleAdapter("openrouter", "OPENROUTER_API_KEY"),
+    "deepseek": OpenAICompatibleAdapter("deepseek", "DEEPSEEK_API_KEY"),
+    "gemini": GeminiAdapter(),
+}
+
+
+def get_adapter(provider: str) -> ProviderAdapter:
+    """Adapter for a provider name."""
+    adapter = ADAPTERS.get(provider.lower())
+    if adapter is None:
+        raise LLMError(f"Unsupported provider: {provider}", provider=provider)
+    return adapter
@@ -0,0 +1,215 @@
+"""
+Deterministic LLM response cache persisted on disk.
+
+Entries are keyed by provider, resolved base URL, model, a hash of the
+whitespace-normalized messages, temperature, max_tokens and stop sequences
+(so two hosts serving the same model tag, or a mock server, never share
+entries). The cache is only consulted for deterministic requests
+(temperature 0) or when a request opts in explicitly, so regenerating for
+an unchanged requirement and KB returns immediately. Entries expire after
+a TTL and the store is bounded in size, evicting least recently used
+entries first.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.services.llm.base import LLMRequest, LLMResponse, LLMUsage
+from app.services.llm.providers import get_adapter
+
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_messages(request: LLMRequest) -> str:
+    """Messages with whitespace runs collapsed, as a stable JSON string."""
+    return json.dumps(
+        [[m["role"], _WHITESPACE_RE.sub(" ", m["content"]).strip()] for m in request.messages],
+        ensure_ascii=False,
+        separators=(",", ":")
+    )
+
+
+def endpoint(request: LLMRequest) -> str:
+    """Base URL the request is sent to (the provider default if it sets none)."""
+    return get_adapter(request.provider).base_url(request)
+
+
+def cache_key(request: LLMRequest) -> str:
+    """Cache key of a request's output-determining parameters."""
+    prompt_hash = hashlib.sha256(normalize_messages(request).encode("utf-8")).hexdigest()
+    key = json.dumps(
+        {
+            "provider": request.provider.lower(),
+            "base_url": endpoint(request),
+            "model": request.model,
+            "prompt": prompt_hash,
+            "temperature": round(request.temperature, 4),
+            "max_tokens": request.max_tokens,
+            "stop": request.stop or [],
+            "options": request.options,
+        },
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(request: LLMRequest) -> bool:
+    """Requests opt in or out with `cache`; otherwise only temperature 0 is cached."""
+    if request.cache is not None:
+        return request.cache
+    return request.temperature == 0
+
+
+class LLMResponseCache:
+    """Service for a size-bounded, TTL-expiring on-disk LLM response cache."""
+
+    def __init__(self, directory: str, max_bytes: int, ttl_seconds: float):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._index: Optional[Dict[str, Tuple[int, float]]] = None  # key -> (bytes, last used)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _load_index(self) -> Dict[str, Tuple[int, float]]:
+        """Scan the directory once so size accounting survives restarts."""
+        if self._index is None:
+            self._index = {}
+            self._bytes = 0
+            if self.directory.exists():
+                for path in self.directory.glob("*/*.json"):
+                    stat = path.stat()
+                    self._index[path.stem] = (stat.st_size, stat.st_mtime)
+                    self._bytes += stat.st_size
+        return self._index
+
+    def _drop(self, key: str) -> None:
+        size, _ = self._load_index().pop(key, (0, 0.0))
+        self._bytes -= size
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def get(self, key: str, record_stats: bool = True) -> Optional[LLMResponse]:
+        """
+        Cached response for a key, or None if missing or expired.
+
+        Args:
+            key: Cache key
+            record_stats: Count the lookup as a hit or miss (off for semantic cache follow-ups)
+        """
+        with self._lock:
+            index = self._load_index()
+            entry = None
+            if key in index:
+                try:
+                    entry = json.loads(self._path(key).read_text(encoding="utf-8"))
+                except (FileNotFoundError, ValueError):
+                    self._drop(key)
+            if entry is not None and time.time() - entry["created_at"] > self.ttl_seconds:
+                self._drop(key)
+                entry = None
+            if entry is None:
+                if record_stats:
+                    self.misses += 1
+                return None
+            index[key] = (index[key][0], time.time())
+            if record_stats:
+                self.hits += 1
+
+        data = entry["response"]
+        return LLMResponse(
+            provider=data["provider"],
+            model=data["model"],
+            text=data["text"],
+            usage=LLMUsage(**data["usage"]),
+            finish_reason=data.get("finish_reason"),
+            cached=True
+        )
+
+    def put(self, key: str, response: LLMResponse) -> None:
+        """Store a completed response, evicting least recently used entries over the size limit."""
+        entry = {
+            "created_at": time.time(),
+            "response": {
+                "provider": response.provider,
+                "model": response.model,
+                "text": response.text,
+                "usage": {
+                    "prompt_tokens": response.usage.prompt_tokens,
+                    "completion_tokens": response.usage.completion_tokens,
+                    "estimated": response.usage.estimated,
+                },
+                "finish_reason": response.finish_reason,
+            },
+        }
+        data = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+        if len(data) > self.max_bytes:
+            return
+
+        with self._lock:
+            index = self._load_index()
+            if key in index:
+                self._drop(key)
+            path = self._path(key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(path.name + ".tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+            index[key] = (len(data), time.time())
+            self._bytes += len(data)
+            self.writes += 1
+
+            while self._bytes > self.max_bytes and len(index) > 1:
+                oldest = min((k for k in index if k != key), key=lambda k: index[k][1])
+                self._drop(oldest)
+                self.evictions += 1
+
+    def clear(self) -> int:
+        """Delete every entry; returns how many were removed."""
+        with self._lock:
+            keys = list(self._load_index())
+            for key in keys:
+                self._drop(key)
+            return len(keys)
+
+    def stats(self) -> Dict:
+        """Entry count, size and hit rate."""
+        with self._lock:
+            index = self._load_index()
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(index),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Global LLM response cache instance
+llm_response_cache = LLMResponseCache(
+    settings.LLM_CACHE_DIR,
+    max_bytes=settings.LLM_CACHE_MAX_MB * 1024 * 1024,
+    ttl_seconds=settings.LLM_CACHE_TTL_HOURS * 3600
+)
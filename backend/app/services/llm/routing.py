@@ -0,0 +1,112 @@
+"""
+LLM Routing - Pick a project's fastest healthy model from measured stats.
+
+With the "fastest" policy, a project's active configurations are ranked by
+the rolling p50 latency recorded in the stats store (total latency, or time
+to first token with LLM_ROUTING_METRIC="first_token"). A model is unhealthy
+when its provider's circuit is open, its recent error rate is above
+LLM_ROUTING_MAX_ERROR_RATE, or its last connection test failed with no
+successful call since. Ranking order: healthy models with at least
+LLM_ROUTING_MIN_SAMPLES calls, fastest first; then healthy models without
+enough data, in configured order; then unhealthy ones. The "configured"
+policy keeps the configured order.
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.services.llm.circuit_breaker import OPEN, CircuitBreakerRegistry, llm_circuit_breakers
+from app.services.llm.stats import LLMStatsStore, llm_stats
+
+
+ROUTING_POLICIES = ("configured", "fastest")
+ROUTING_METRICS = {"latency": "latency_ms", "first_token": "first_token_ms"}
+
+
+class LLMRouter:
+    """Service ranking candidate models by measured speed and health."""
+
+    def __init__(
+        self,
+        stats: Optional[LLMStatsStore] = None,
+        breakers: Optional[CircuitBreakerRegistry] = None,
+        policy: Optional[str] = None,
+        metric: Optional[str] = None,
+        min_samples: Optional[int] = None,
+        max_error_rate: Optional[float] = None
+    ):
+        self.stats = stats or llm_stats
+        self.breakers = breakers or llm_circuit_breakers
+        self.policy = policy or settings.LLM_ROUTING_POLICY
+        self.metric = metric or settings.LLM_ROUTING_METRIC
+        self.min_samples = settings.LLM_ROUTING_MIN_SAMPLES if min_samples is None else min_samples
+        self.max_error_rate = settings.LLM_ROUTING_MAX_ERROR_RATE if max_error_rate is None else max_error_rate
+
+    def health(self, provider: str, summary: Optional[Dict[str, Any]]) -> Tuple[bool, Optional[str]]:
+        """Whether a model is healthy, and why not."""
+        if self.breakers.get(provider).state == OPEN:
+            return False, "circuit open"
+        if summary is None:
+            return True, None
+        if summary["calls"] >= self.min_samples and summary["error_rate"] > self.max_error_rate:
+            return False, f"error rate {summary['error_rate']:.0%}"
+        probe = summary["probe"]
+        if probe is not None and not probe["success"]:
+            last_call, last_error = summary["last_call_at"], summary["last_error_at"]
+            recovered = last_call is not None and last_call > probe["checked_at"] and last_call != last_error
+            if not recovered:
+                return False, "last connection test failed"
+        return True, None
+
+    def rank(self, candidates: Sequence[Any]) -> List[Dict[str, Any]]:
+        """
+        Rank candidates (objects with `provider` and `model`, e.g. Configurations).
+
+        Returns:
+            One entry per candidate, best first, with the candidate, health,
+            score (p50 ms, None without enough samples) and sample count
+        """
+        entries = []
+        for position, candidate in enumerate(candidates):
+            summary = self.stats.summary(candidate.provider, candidate.model)
+            healthy, reason = self.health(candidate.provider, summary)
+            metric = (summary or {}).get(ROUTING_METRICS.get(self.metric, "latency_ms"))
+            samples = summary["calls"] - summary["errors"] if summary else 0
+            score = metric["p50"] if metric and samples >= self.min_samples else None
+            entries.append({
+                "candidate": candidate,
+                "provider": candidate.provider,
+                "model": candidate.model,
+                "healthy": healthy,
+                "reason": reason,
+                "score_ms": score,
+                "samples": samples,
+                "position": position,
+            })
+        # Unhealthy models keep their configured order; their speed doesn't matter
+        return sorted(entries, key=lambda e: (
+            not e["healthy"],
+            e["healthy"] and e["score_ms"] is None,
+            e["score_ms"] if e["healthy"] and e["score_ms"] is not None else 0.0,
+            e["position"],
+        ))
+
+    def choose(self, candidates: Sequence[Any], policy: Optional[str] = None) -> Optional[Any]:
+        """
+        Candidate to use under a routing policy.
+
+        Args:
+            candidates: Candidates in configured order
+            policy: "configured" or "fastest" (defaults to LLM_ROUTING_POLICY)
+
+        Returns:
+            The chosen candidate, or None if there are none
+        """
+        if not candidates:
+            return None
+        if (policy or self.policy) != "fastest":
+            return candidates[0]
+        return self.rank(candidates)[0]["candidate"]
+
+
+# Global LLM router instance
+llm_router = LLMRouter()
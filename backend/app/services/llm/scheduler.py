@@ -0,0 +1,257 @@
+"""
+LLM Scheduler - Per-provider concurrency caps, rate limits and retries.
+
+Every generation call goes through the scheduler. For each provider it
+keeps a concurrency cap, a requests-per-minute and a tokens-per-minute
+token bucket, so traffic is paced just under the provider's limits instead
+of bursting into 429s and then sitting idle. Transient failures (429, 5xx,
+network errors) are retried with jittered exponential backoff; a
+Retry-After hint also drains the provider's request bucket, so concurrent
+calls back off together.
+
+Outcomes feed the provider's circuit breaker; while a circuit is open,
+calls fail fast with CircuitOpenError instead of queueing for a provider
+that is down.
+"""
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, Optional
+
+from app.core.config import settings
+from app.services.llm.base import LLMError, LLMRequest, LLMResponse
+from app.services.llm.circuit_breaker import CircuitBreaker, CircuitBreakerRegistry, llm_circuit_breakers
+from app.services.llm.client import LLMClient, LLMStream, llm_client
+from app.services.rate_limiter import TokenBucket
+from app.services.tokens import token_estimator
+
+
+# Buckets hold this many seconds of budget, smoothing bursts
+BURST_SECONDS = 10.0
+
+
+@dataclass
+class ProviderLimits:
+    """Limits for one provider; 0 disables a limit."""
+    max_concurrency: int = 4
+    requests_per_minute: float = 0
+    tokens_per_minute: float = 0
+
+
+@dataclass
+class _ProviderState:
+    limits: ProviderLimits
+    semaphore: asyncio.Semaphore
+    requests: TokenBucket
+    tokens: TokenBucket
+    in_flight: int = 0
+    waiting: int = 0
+    stats: Dict[str, float] = field(default_factory=lambda: {
+        "requests": 0,
+        "completed": 0,
+        "failed": 0,
+        "retries": 0,
+        "rate_limited": 0,
+        "queue_seconds": 0.0,
+    })
+
+
+def _bucket(per_minute: float) -> TokenBucket:
+    rate = per_minute / 60.0
+    return TokenBucket(rate, capacity=max(1.0, rate * BURST_SECONDS))
+
+
+class LLMScheduler:
+    """Service that schedules LLM calls per provider."""
+
+    def __init__(
+        self,
+        client: Optional[LLMClient] = None,
+        limits: Optional[Dict[str, ProviderLimits]] = None,
+        max_retries: Optional[int] = None,
+        base_delay: Optional[float] = None,
+        max_delay: Optional[float] = None,
+        breakers: Optional[CircuitBreakerRegistry] = None
+    ):
+        self.client = client or llm_client
+        self.breakers = breakers or llm_circuit_breakers
+        if limits is None:
+            limits = {
+                provider: ProviderLimits(
+                    max_concurrency=int(values.get("max_concurrency", 4)),
+                    requests_per_minute=values.get("requests_per_minute", 0),
+                    tokens_per_minute=values.get("tokens_per_minute", 0)
+                )
+                for provider, values in settings.LLM_PROVIDER_LIMITS.items()
+            }
+        self.limits = limits
+        self.max_retries = settings.LLM_MAX_RETRIES if max_retries is None else max_retries
+        self.base_delay = settings.LLM_RETRY_BASE_DELAY if base_delay is None else base_delay
+        self.max_delay = settings.LLM_RETRY_MAX_DELAY if max_delay is None else max_delay
+        self._states: Dict[str, _ProviderState] = {}
+
+    def _state(self, provider: str) -> _ProviderState:
+        state = self._states.get(provider)
+        if state is None:
+            limits = self.limits.get(provider, ProviderLimits())
+            state = _ProviderState(
+                limits=limits,
+                semaphore=asyncio.Semaphore(max(1, limits.max_concurrency)),
+                requests=_bucket(limits.requests_per_minute),
+                tokens=_bucket(limits.tokens_per_minute)
+            )
+            self._states[provider] = state
+        return state
+
+    def backoff_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Exponential backoff with equal jitter, raised to at least Retry-After."""
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        delay = delay / 2 + random.uniform(0, delay / 2)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    @asynccontextmanager
+    async def _slot(self, state: _ProviderState, reserved_tokens: int) -> AsyncIterator[None]:
+        queued = time.perf_counter()
+        state.waiting += 1
+        try:
+            await state.semaphore.acquire()
+        finally:
+            state.waiting -= 1
+        try:
+            await state.tokens.acquire(reserved_tokens)
+            state.stats["queue_seconds"] += time.perf_counter() - queued
+            state.in_flight += 1
+            try:
+                yield
+            finally:
+                state.in_flight -= 1
+        finally:
+            state.semaphore.release()
+
+    async def _open(self, state: _ProviderState, breaker: CircuitBreaker, stream: LLMStream) -> None:
+        """Open a stream, retrying transient failures."""
+        for attempt in range(self.max_retries + 1):
+            breaker.check()
+            try:
+                await state.requests.acquire()
+                state.stats["requests"] += 1
+                await stream.open()
+                return
+            except asyncio.CancelledError:
+                breaker.release()
+                raise
+            except LLMError as e:
+                # Client errors (bad key, unknown model) say nothing about provider health
+                breaker.record(not e.retryable)
+                if e.status_code == 429:
+                    state.stats["rate_limited"] += 1
+                if not e.retryable or attempt == self.max_retries:
+                    state.stats["failed"] += 1
+                    raise
+                if e.retry_after is not None:
+                    state.requests.penalize(e.retry_after)
+                state.stats["retries"] += 1
+                await asyncio.sleep(self.backoff_delay(attempt, e.retry_after))
+
+    def _reservation(self, request: LLMRequest) -> int:
+        """Tokens reserved up front: the prompt plus the full completion budget."""
+        return token_estimator.count_messages(request.messages, request.model) + request.max_tokens
+
+    @asynccontextmanager
+    async def stream(self, request: LLMRequest) -> AsyncIterator[LLMStream]:
+        """
+        Open a scheduled streaming completion.
+
+        The provider slot is held until the block exits. Failures before the
+        first token are retried; a stream interrupted midway is not.
+
+        Raises:
+            CircuitOpenError: When the provider's circuit is open
+            LLMError: When opening fails and retries are exhausted
+        """
+        stream = self.client.stream(request)
+        if stream.from_cache:
+            async with stream:
+                yield stream
+            return
+
+        state = self._state(request.provider)
+        breaker = self.breakers.get(request.provider)
+        reserved = self._reservation(stream.request)
+        async with self._slot(state, reserved):
+            try:
+                await self._open(state, breaker, stream)
+            except BaseException:
+                # Nothing was generated, so the whole reservation goes back
+                state.tokens.refund(reserved)
+                raise
+            failed = cancelled = False
+            try:
+                async with stream:
+                    yield stream
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+            except LLMError:
+                failed = True
+                raise
+            finally:
+                response = stream.response
+                if cancelled:
+                    # A cancelled call (e.g. a hedge loser) says nothing about the provider
+                    breaker.release()
+                else:
+                    # Time to first token; a call cut off before any token counts its elapsed time
+                    latency = response.first_token_ms if response.first_token_ms is not None else response.latency_ms
+                    breaker.record(not failed, latency)
+                if failed:
+                    state.stats["failed"] += 1
+                elif not response.cancelled:
+                    state.stats["completed"] += 1
+                state.tokens.refund(reserved - response.usage.total_tokens)
+
+    async def complete(self, request: LLMRequest) -> LLMResponse:
+        """
+        Run a scheduled completion, retrying transient failures.
+
+        Raises:
+            LLMError: When the error isn't transient or retries are exhausted
+        """
+        for attempt in range(self.max_retries + 1):
+            opened = False
+            try:
+                async with self.stream(request) as stream:
+                    opened = True
+                    async for _ in stream:
+                        pass
+                return stream.response
+            except LLMError as e:
+                # Errors while opening were already retried; a dropped stream
+                # leaves stream() first, so the breaker and stats record it
+                if not opened or not e.retryable or attempt == self.max_retries:
+                    raise
+            self._state(request.provider).stats["retries"] += 1
+            await asyncio.sleep(self.backoff_delay(attempt))
+
+    def stats(self) -> Dict[str, Dict]:
+        """Per-provider limits, queue depth and counters."""
+        return {
+            provider: {
+                "max_concurrency": state.limits.max_concurrency,
+                "requests_per_minute": state.limits.requests_per_minute,
+                "tokens_per_minute": state.limits.tokens_per_minute,
+                "in_flight": state.in_flight,
+                "waiting": state.waiting,
+                **{key: round(value, 3) for key, value in state.stats.items()},
+                "circuit": self.breakers.get(provider).stats(),
+            }
+            for provider, state in self._states.items()
+        }
+
+
+# Global LLM scheduler instance
+llm_scheduler = LLMScheduler()
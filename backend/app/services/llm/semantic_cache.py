@@ -0,0 +1,202 @@
+"""
+Semantic LLM response cache for near-identical prompts.
+
+Regenerating after a tiny edit (whitespace, reordered KB chunks, a reworded
+sentence) misses the exact-match response cache although the answer would
+not change. The semantic cache embeds each cached prompt and, when an exact
+lookup misses, serves the response of the most similar prompt in the same
+scope if its cosine similarity reaches LLM_SEMANTIC_CACHE_THRESHOLD.
+
+Matching is deliberately strict around it:
+- only requests with a `cache_scope` (e.g. the project) take part, and
+  candidates must share the scope, provider, base URL, model and generation parameters;
+- numbers in the prompt must be identical ("5 test cases" never matches
+  "10 test cases"), however similar the rest of the text is;
+- anything else falls back to exact matching only.
+
+The index is in memory and points at entries of the on-disk response
+cache, so responses are stored once and expire with it.
+"""
+import hashlib
+import json
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.kb.embeddings import HashingEmbedder
+from app.services.llm.base import LLMRequest, LLMResponse
+from app.services.llm.response_cache import LLMResponseCache, endpoint, llm_response_cache
+
+
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)*")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def scope_key(request: LLMRequest) -> Optional[str]:
+    """Scope of a request: its cache_scope plus everything but the prompt; None if unscoped."""
+    if not request.cache_scope:
+        return None
+    key = json.dumps(
+        {
+            "scope": request.cache_scope,
+            "provider": request.provider.lower(),
+            "base_url": endpoint(request),
+            "model": request.model,
+            "temperature": round(request.temperature, 4),
+            "max_tokens": request.max_tokens,
+            "stop": request.stop or [],
+            "options": request.options,
+        },
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def prompt_text(request: LLMRequest) -> str:
+    """Whitespace-normalized, lowercased prompt used for embedding."""
+    return "\n".join(
+        f"{m['role']}: {_WHITESPACE_RE.sub(' ', m['content']).strip().lower()}" for m in request.messages
+    )
+
+
+def prompt_numbers(text: str) -> Tuple[str, ...]:
+    """Numbers in a prompt (order-independent), which must match exactly."""
+    return tuple(sorted(_NUMBER_RE.findall(text)))
+
+
+@dataclass
+class _Scope:
+    keys: List[str] = field(default_factory=list)  # Response cache keys, oldest first
+    numbers: List[Tuple[str, ...]] = field(default_factory=list)
+    vectors: List[np.ndarray] = field(default_factory=list)
+    matrix: Optional[np.ndarray] = None  # Stacked vectors, rebuilt after changes
+
+    def remove(self, index: int) -> None:
+        del self.keys[index], self.numbers[index], self.vectors[index]
+        self.matrix = None
+
+
+class SemanticResponseCache:
+    """Service that finds cached responses for near-identical prompts."""
+
+    def __init__(
+        self,
+        cache: Optional[LLMResponseCache] = None,
+        threshold: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        dim: Optional[int] = None
+    ):
+        self.cache = cache or llm_response_cache
+        self.threshold = settings.LLM_SEMANTIC_CACHE_THRESHOLD if threshold is None else threshold
+        self.max_entries = max_entries or settings.LLM_SEMANTIC_CACHE_MAX_ENTRIES
+        # Local feature hashing: word unigrams and bigrams, independent of order across chunks
+        self.embedder = HashingEmbedder(dim or settings.LLM_SEMANTIC_CACHE_DIM)
+        self._scopes: Dict[str, _Scope] = {}
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.misses = 0
+        self.number_mismatches = 0  # Similar enough, but the numbers differed
+        self.similarity_sum = 0.0
+
+    def add(self, request: LLMRequest, key: str) -> None:
+        """Index a request whose response was stored under `key` in the response cache."""
+        scope = scope_key(request)
+        if scope is None:
+            return
+        text = prompt_text(request)
+        vector = self.embedder.embed_query(text)
+        with self._lock:
+            entries = self._scopes.setdefault(scope, _Scope())
+            if key in entries.keys:
+                entries.remove(entries.keys.index(key))
+            entries.keys.append(key)
+            entries.numbers.append(prompt_numbers(text))
+            entries.vectors.append(vector)
+            entries.matrix = None
+            while len(entries.keys) > self.max_entries:
+                entries.remove(0)
+
+    def lookup(self, request: LLMRequest) -> Optional[LLMResponse]:
+        """
+        Cached response of the most similar prompt in the request's scope.
+
+        Args:
+            request: Request that missed the exact-match cache
+
+        Returns:
+            The cached response (with `cache_similarity` set), or None
+        """
+        scope = scope_key(request)
+        if scope is None:
+            return None
+        text = prompt_text(request)
+        vector = self.embedder.embed_query(text)
+        numbers = prompt_numbers(text)
+
+        with self._lock:
+            self.lookups += 1
+            entries = self._scopes.get(scope)
+            if entries is None or not entries.keys:
+                self.misses += 1
+                return None
+            if entries.matrix is None:
+                entries.matrix = np.vstack(entries.vectors)
+            similarities = entries.matrix @ vector
+            best, best_similarity = None, -1.0
+            for index in np.argsort(-similarities):
+                if similarities[index] < self.threshold:
+                    break
+                if entries.numbers[index] == numbers:
+                    best, best_similarity = int(index), float(similarities[index])
+                    break
+                self.number_mismatches += 1
+            if best is None:
+                self.misses += 1
+                return None
+            key = entries.keys[best]
+
+        response = self.cache.get(key, record_stats=False)
+        with self._lock:
+            if response is None:
+                # Expired or evicted from the response cache
+                entries = self._scopes.get(scope)
+                if entries is not None and key in entries.keys:
+                    entries.remove(entries.keys.index(key))
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.similarity_sum += best_similarity
+        response.cache_similarity = round(best_similarity, 4)
+        return response
+
+    def clear(self) -> int:
+        """Drop the index; returns how many entries were removed."""
+        with self._lock:
+            removed = sum(len(entries.keys) for entries in self._scopes.values())
+            self._scopes = {}
+            return removed
+
+    def stats(self) -> Dict:
+        """Index size and hit/miss telemetry."""
+        with self._lock:
+            return {
+                "scopes": len(self._scopes),
+                "entries": sum(len(entries.keys) for entries in self._scopes.values()),
+                "threshold": self.threshold,
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "misses": self.misses,
+                "number_mismatches": self.number_mismatches,
+                "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+                "avg_hit_similarity": round(self.similarity_sum / self.hits, 4) if self.hits else None,
+            }
+
+
+# Global semantic response cache instance
+semantic_response_cache = SemanticResponseCache()
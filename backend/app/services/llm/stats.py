@@ -0,0 +1,184 @@
+"""
+LLM Call Stats - Rolling latency, token and error accounting per provider and model.
+
+Every provider call made through LLMClient is recorded: total latency, time
+to first token, prompt and completion tokens, and errors. Connection test
+results are kept alongside as the model's last probe. Records older than
+LLM_STATS_WINDOW_SECONDS are dropped, so percentiles describe recent
+behaviour; the store is in memory and starts empty on restart.
+"""
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.llm.base import LLMError, LLMRequest, LLMResponse
+from app.services.llm.circuit_breaker import percentile
+
+
+StatsKey = Tuple[str, str]
+
+
+@dataclass
+class _Call:
+    at: float  # Monotonic
+    latency_ms: float
+    first_token_ms: Optional[float]
+    prompt_tokens: int
+    completion_tokens: int
+    ok: bool
+
+
+@dataclass
+class _ModelStats:
+    calls: Deque[_Call]
+    last_error: Optional[str] = None
+    last_error_at: Optional[datetime] = None
+    last_call_at: Optional[datetime] = None
+    probe: Optional[Dict[str, Any]] = None
+
+
+def _percentiles(values: List[float]) -> Optional[Dict[str, float]]:
+    if not values:
+        return None
+    return {
+        "p50": round(percentile(values, 50), 2),
+        "p90": round(percentile(values, 90), 2),
+        "p99": round(percentile(values, 99), 2),
+        "mean": round(sum(values) / len(values), 2),
+    }
+
+
+class LLMStatsStore:
+    """Service keeping a rolling window of LLM call outcomes per (provider, model)."""
+
+    def __init__(self, window_seconds: Optional[float] = None, max_samples: Optional[int] = None):
+        self.window_seconds = settings.LLM_STATS_WINDOW_SECONDS if window_seconds is None else window_seconds
+        self.max_samples = max_samples or settings.LLM_STATS_MAX_SAMPLES
+        self._models: Dict[StatsKey, _ModelStats] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, provider: str, model: str) -> _ModelStats:
+        key = (provider.lower(), model)
+        entry = self._models.get(key)
+        if entry is None:
+            entry = _ModelStats(calls=deque(maxlen=self.max_samples))
+            self._models[key] = entry
+        return entry
+
+    def _prune(self, entry: _ModelStats, now: float) -> None:
+        while entry.calls and now - entry.calls[0].at > self.window_seconds:
+            entry.calls.popleft()
+
+    def record(
+        self,
+        provider: str,
+        model: str,
+        latency_ms: float,
+        first_token_ms: Optional[float] = None,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        error: Optional[str] = None
+    ) -> None:
+        """Record one provider call (error is None for a success)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entry(provider, model)
+            self._prune(entry, now)
+            entry.calls.append(_Call(now, latency_ms, first_token_ms, prompt_tokens, completion_tokens, error is None))
+            entry.last_call_at = datetime.now(timezone.utc)
+            if error is not None:
+                entry.last_error = error
+                entry.last_error_at = entry.last_call_at
+
+    def record_response(self, response: LLMResponse) -> None:
+        """Record a completed provider response."""
+        self.record(
+            response.provider,
+            response.model,
+            response.latency_ms,
+            response.first_token_ms,
+            response.usage.prompt_tokens,
+            response.usage.completion_tokens
+        )
+
+    def record_error(self, request: LLMRequest, error: LLMError, latency_ms: float) -> None:
+        """Record a failed provider call."""
+        self.record(request.provider, request.model, latency_ms, error=str(error) or type(error).__name__)
+
+    def record_probe(self, provider: str, model: str, result: Dict[str, Any]) -> None:
+        """Keep a connection test result as the model's last probe."""
+        with self._lock:
+            self._entry(provider, model).probe = {
+                "success": bool(result.get("success")),
+                "latency_ms": result.get("latency_ms"),
+                "error": result.get("error"),
+                "checked_at": datetime.now(timezone.utc),
+            }
+
+    def summary(self, provider: str, model: str) -> Optional[Dict[str, Any]]:
+        """Rolling stats of one model, or None if it has never been seen."""
+        with self._lock:
+            entry = self._models.get((provider.lower(), model))
+            if entry is None:
+                return None
+            self._prune(entry, time.monotonic())
+            return self._summary(provider.lower(), model, entry)
+
+    def _summary(self, provider: str, model: str, entry: _ModelStats) -> Dict[str, Any]:
+        calls = list(entry.calls)
+        ok = [c for c in calls if c.ok]
+        errors = len(calls) - len(ok)
+        speeds = [
+            c.completion_tokens / (c.latency_ms / 1000)
+            for c in ok if c.latency_ms > 0 and c.completion_tokens
+        ]
+        return {
+            "provider": provider,
+            "model": model,
+            "calls": len(calls),
+            "errors": errors,
+            "error_rate": round(errors / len(calls), 4) if calls else 0.0,
+            "latency_ms": _percentiles([c.latency_ms for c in ok]),
+            "first_token_ms": _percentiles([c.first_token_ms for c in ok if c.first_token_ms is not None]),
+            "prompt_tokens": sum(c.prompt_tokens for c in ok),
+            "completion_tokens": sum(c.completion_tokens for c in ok),
+            "tokens_per_second": round(percentile(speeds, 50), 2) if speeds else None,
+            "last_call_at": entry.last_call_at,
+            "last_error": entry.last_error,
+            "last_error_at": entry.last_error_at,
+            "probe": entry.probe,
+        }
+
+    def summaries(self, provider: Optional[str] = None, model: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Rolling stats of every model seen, optionally filtered."""
+        now = time.monotonic()
+        with self._lock:
+            results = []
+            for (key_provider, key_model), entry in sorted(self._models.items()):
+                if (provider and key_provider != provider.lower()) or (model and key_model != model):
+                    continue
+                self._prune(entry, now)
+                results.append(self._summary(key_provider, key_model, entry))
+            return results
+
+    def reset(self) -> None:
+        """Forget all recorded calls and probes."""
+        with self._lock:
+            self._models = {}
+
+    def stats(self) -> Dict[str, Any]:
+        """Store configuration and size."""
+        with self._lock:
+            return {
+                "models": len(self._models),
+                "window_seconds": self.window_seconds,
+                "max_samples": self.max_samples,
+            }
+
+
+# Global LLM stats store instance
+llm_stats = LLMStatsStore()
@@ -1,16 +1,55 @@
 """
 LLM Connection Testing Service - Tests connectivity to LLM providers.
+
+Two modes:
+- probe: checks reachability, the API key and that the model exists, using
+  cheap metadata endpoints; nothing is generated and no model is loaded.
+- full: runs a short generation, proving the model actually answers.
+
+Each result is kept in the LLM stats store as the model's last probe, which
+routing uses to skip models that failed their last check.
 """
 import httpx
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 from app.core.config import settings
+from app.services.http_clients import PROVIDER_BASE_URLS, HTTPClientRegistry, llm_http_clients
+from app.services.llm.stats import llm_stats
+
+
+PROVIDER_DISPLAY_NAMES = {
+    "ollama": "Ollama",
+    "openrouter": "OpenRouter",
+    "deepseek": "Deepseek",
+    "gemini": "Google Gemini",
+}
+
+TEST_MODES = ("probe", "full")
+
+
+def _ollama_has_model(available: List[str], model: str) -> bool:
+    """Ollama lists untagged models with an implicit ':latest' tag."""
+    return model in available or f"{model}:latest" in available
+
+
+def _error_message(response: httpx.Response) -> str:
+    try:
+        error = response.json().get("error")
+    except ValueError:
+        error = None
+    if isinstance(error, dict):
+        error = error.get("message")
+    return error or f"HTTP {response.status_code}"
 
 
 class LLMConnectionTester:
     """Service for testing LLM provider connections."""
     
+    def __init__(self, clients: Optional[HTTPClientRegistry] = None):
+        # Pooled keep-alive clients shared across tests and generation calls
+        self.clients = clients or llm_http_clients
+    
     async def test_ollama_connection(
         self, 
         base_url: str, 
@@ -24,51 +63,52 @@ class LLMConnectionTester:
             url = base_url or settings.OLLAMA_BASE_URL
             
             # Test 1: Check if Ollama is running
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(f"{url}/api/tags")
-                
-                if response.status_code != 200:
-                    return {
-                        "success": False,
-                        "message": "Ollama server not responding",
-                        "error": f"HTTP {response.status_code}"
-                    }
-                
-                # Test 2: Check if model is available
-                models_data = response.json()
-                available_models = [m["name"] for m in models_data.get("models", [])]
-                
-                if model not in available_models:
-                    return {
-                        "success": False,
-                        "message": f"Model '{model}' not found in Ollama",
-                        "error": f"Available models: {', '.join(available_models)}"
-                    }
-                
-                # Test 3: Quick generation test
-                test_response = await client.post(
-                    f"{url}/api/generate",
-                    json={
-                        "model": model,
-                        "prompt": "Test",
-                        "stream": False
-                    }
-                )
-                
-                if test_response.status_code != 200:
-                    return {
-                        "success": False,
-                        "message": "Model generation test failed",
-                        "error": f"HTTP {test_response.status_code}"
-                    }
-                
-                latency_ms = (time.time() - start_time) * 1000
-                
+            client = self.clients.for_provider("ollama", url)
+            response = await client.get(f"{url}/api/tags", timeout=10.0)
+            
+            if response.status_code != 200:
                 return {
-                    "success": True,
-                    "message": f"Successfully connected to Ollama with model '{model}'",
-                    "latency_ms": round(latency_ms, 2)
+                    "success": False,
+                    "message": "Ollama server not responding",
+                    "error": f"HTTP {response.status_code}"
                 }
+            
+            # Test 2: Check if model is available
+            models_data = response.json()
+            available_models = [m["name"] for m in models_data.get("models", [])]
+            
+            if not _ollama_has_model(available_models, model):
+                return {
+                    "success": False,
+                    "message": f"Model '{model}' not found in Ollama",
+                    "error": f"Available models: {', '.join(available_models)}"
+                }
+            
+            # Test 3: Quick generation test
+            test_response = await client.post(
+                f"{url}/api/generate",
+                json={
+                    "model": model,
+                    "prompt": "Test",
+                    "stream": False
+                },
+                timeout=10.0
+            )
+            
+            if test_response.status_code != 200:
+                return {
+                    "success": False,
+                    "message": "Model generation test failed",
+                    "error": f"HTTP {test_response.status_code}"
+                }
+            
+            latency_ms = (time.time() - start_time) * 1000
+            
+            return {
+                "success": True,
+                "message": f"Successfully connected to Ollama with model '{model}'",
+                "latency_ms": round(latency_ms, 2)
+            }
         
         except httpx.ConnectError:
             return {
@@ -98,42 +138,43 @@ class LLMConnectionTester:
         start_time = time.time()
         
         try:
-            async with httpx.AsyncClient(timeout=15.0) as client:
-                response = await client.post(
-                    "https://openrouter.ai/api/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {api_key}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": model,
-                        "messages": [{"role": "user", "content": "Test"}],
-                        "max_tokens": 10
-                    }
-                )
-                
-                if response.status_code == 401:
-                    return {
-                        "success": False,
-                        "message": "Invalid API key",
-                        "error": "Authentication failed"
-                    }
-                
-                if response.status_code != 200:
-                    error_data = response.json() if response.text else {}
-                    return {
-                        "success": False,
-                        "message": "OpenRouter API error",
-                        "error": error_data.get("error", {}).get("message", f"HTTP {response.status_code}")
-                    }
-                
-                latency_ms = (time.time() - start_time) * 1000
-                
+            client = self.clients.for_provider("openrouter")
+            response = await client.post(
+                f"{PROVIDER_BASE_URLS['openrouter']}/chat/completions",
+                headers={
+                    "Authorization": f"Bearer {api_key}",
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "model": model,
+                    "messages": [{"role": "user", "content": "Test"}],
+                    "max_tokens": 10
+                },
+                timeout=15.0
+            )
+            
+            if response.status_code == 401:
+                return {
+                    "success": False,
+                    "message": "Invalid API key",
+                    "error": "Authentication failed"
+                }
+            
+            if response.status_code != 200:
+                error_data = response.json() if response.text else {}
                 return {
-                    "success": True,
-                    "message": f"Successfully connected to OpenRouter with model '{model}'",
-                    "latency_ms": round(latency_ms, 2)
+                    "success": False,
+                    "message": "OpenRouter API error",
+                    "error": error_data.get("error", {}).get("message", f"HTTP {response.status_code}")
                 }
+            
+            latency_ms = (time.time() - start_time) * 1000
+            
+            return {
+                "success": True,
+                "message": f"Successfully connected to OpenRouter with model '{model}'",
+                "latency_ms": round(latency_ms, 2)
+            }
         
         except httpx.TimeoutException:
             return {
@@ -157,42 +198,43 @@ class LLMConnectionTester:
         start_time = time.time()
         
         try:
-            async with httpx.AsyncClient(timeout=15.0) as client:
-                response = await client.post(
-                    "https://api.deepseek.com/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {api_key}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": model,
-                        "messages": [{"role": "user", "content": "Test"}],
-                        "max_tokens": 10
-                    }
-                )
-                
-                if response.status_code == 401:
-                    return {
-                        "success": False,
-                        "message": "Invalid API key",
-                        "error": "Authentication failed"
-                    }
-                
-                if response.status_code != 200:
-                    error_data = response.json() if response.text else {}
-                    return {
-                        "success": False,
-                        "message": "Deepseek API error",
-                        "error": error_data.get("error", {}).get("message", f"HTTP {response.status_code}")
-                    }
-                
-                latency_ms = (time.time() - start_time) * 1000
-                
+            client = self.clients.for_provider("deepseek")
+            response = await client.post(
+                f"{PROVIDER_BASE_URLS['deepseek']}/chat/completions",
+                headers={
+                    "Authorization": f"Bearer {api_key}",
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "model": model,
+                    "messages": [{"role": "user", "content": "Test"}],
+                    "max_tokens": 10
+                },
+                timeout=15.0
+            )
+            
+            if response.status_code == 401:
+                return {
+                    "success": False,
+                    "message": "Invalid API key",
+                    "error": "Authentication failed"
+                }
+            
+            if response.status_code != 200:
+                error_data = response.json() if response.text else {}
                 return {
-                    "success": True,
-                    "message": f"Successfully connected to Deepseek with model '{model}'",
-                    "latency_ms": round(latency_ms, 2)
+                    "success": False,
+                    "message": "Deepseek API error",
+                    "error": error_data.get("error", {}).get("message", f"HTTP {response.status_code}")
                 }
+            
+            latency_ms = (time.time() - start_time) * 1000
+            
+            return {
+                "success": True,
+                "message": f"Successfully connected to Deepseek with model '{model}'",
+                "latency_ms": round(latency_ms, 2)
+            }
         
         except httpx.TimeoutException:
             return {
@@ -216,37 +258,38 @@ class LLMConnectionTester:
         start_time = time.time()
         
         try:
-            async with httpx.AsyncClient(timeout=15.0) as client:
-                response = await client.post(
-                    f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={api_key}",
-                    headers={"Content-Type": "application/json"},
-                    json={
-                        "contents": [{"parts": [{"text": "Test"}]}]
-                    }
-                )
-                
-                if response.status_code == 401 or response.status_code == 403:
-                    return {
-                        "success": False,
-                        "message": "Invalid API key",
-                        "error": "Authentication failed"
-                    }
-                
-                if response.status_code != 200:
-                    error_data = response.json() if response.text else {}
-                    return {
-                        "success": False,
-                        "message": "Gemini API error",
-                        "error": error_data.get("error", {}).get("message", f"HTTP {response.status_code}")
-                    }
-                
-                latency_ms = (time.time() - start_time) * 1000
-                
+            client = self.clients.for_provider("gemini")
+            response = await client.post(
+                f"{PROVIDER_BASE_URLS['gemini']}/models/{model}:generateContent?key={api_key}",
+                headers={"Content-Type": "application/json"},
+                json={
+                    "contents": [{"parts": [{"text": "Test"}]}]
+                },
+                timeout=15.0
+            )
+            
+            if response.status_code == 401 or response.status_code == 403:
+                return {
+                    "success": False,
+                    "message": "Invalid API key",
+                    "error": "Authentication failed"
+                }
+            
+            if response.status_code != 200:
+                error_data = response.json() if response.text else {}
                 return {
-                    "success": True,
-                    "message": f"Successfully connected to Google Gemini with model '{model}'",
-                    "latency_ms": round(latency_ms, 2)
+                    "success": False,
+                    "message": "Gemini API error",
+                    "error": error_data.get("error", {}).get("message", f"HTTP {response.status_code}")
                 }
+            
+            latency_ms = (time.time() - start_time) * 1000
+            
+            return {
+                "success": True,
+                "message": f"Successfully connected to Google Gemini with model '{model}'",
+                "latency_ms": round(latency_ms, 2)
+            }
         
         except httpx.TimeoutException:
             return {
@@ -261,6 +304,118 @@ class LLMConnectionTester:
                 "error": str(e)
             }
 
+    async def test_connection(
+        self,
+        provider: str,
+        model: str,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        mode: str = "probe"
+    ) -> Dict[str, Any]:
+        """
+        Test a provider connection in probe or full mode.
+
+        Args:
+            provider: LLM provider (ollama, openrouter, deepseek, gemini)
+            model: Model name
+            base_url: Custom base URL (Ollama, or to override a hosted provider's API URL)
+            api_key: API key for cloud providers
+            mode: "probe" (no generation) or "full" (short generation)
+
+        Returns:
+            Result with success, message and latency_ms or error
+        """
+        if mode == "probe":
+            result = await self.probe(provider, model, base_url, api_key)
+        elif provider == "ollama":
+            result = await self.test_ollama_connection(base_url, model)
+        elif provider == "openrouter":
+            result = await self.test_openrouter_connection(api_key, model)
+        elif provider == "deepseek":
+            result = await self.test_deepseek_connection(api_key, model)
+        else:
+            result = await self.test_gemini_connection(api_key, model)
+        llm_stats.record_probe(provider, model, result)
+        return result
+
+    async def probe(
+        self,
+        provider: str,
+        model: str,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Check reachability, credentials and model availability without generating."""
+        name = PROVIDER_DISPLAY_NAMES[provider]
+        url = (base_url or (settings.OLLAMA_BASE_URL if provider == "ollama" else PROVIDER_BASE_URLS[provider])).rstrip("/")
+        client = self.clients.for_provider(provider, url)
+        timeout = settings.LLM_PROBE_TIMEOUT
+        start_time = time.time()
+
+        try:
+            if provider == "ollama":
+                response = await client.get(f"{url}/api/tags", timeout=timeout)
+                if response.status_code != 200:
+                    return {"success": False, "message": "Ollama server not responding", "error": f"HTTP {response.status_code}"}
+                available = [m["name"] for m in response.json().get("models", [])]
+                if not _ollama_has_model(available, model):
+                    return {
+                        "success": False,
+                        "message": f"Model '{model}' not found in Ollama",
+                        "error": f"Available models: {', '.join(available)}"
+                    }
+
+            elif provider == "openrouter":
+                headers = {"Authorization": f"Bearer {api_key}"}
+                response = await client.get(f"{url}/auth/key", headers=headers, timeout=timeout)
+                if response.status_code in (401, 403):
+                    return {"success": False, "message": "Invalid API key", "error": "Authentication failed"}
+                if response.status_code != 200:
+                    return {"success": False, "message": "OpenRouter API error", "error": _error_message(response)}
+                response = await client.get(f"{url}/models/{model}/endpoints", headers=headers, timeout=timeout)
+                if response.status_code == 404:
+                    return {"success": False, "message": f"Model '{model}' not found on OpenRouter", "error": _error_message(response)}
+                if response.status_code != 200:
+                    return {"success": False, "message": "OpenRouter API error", "error": _error_message(response)}
+
+            elif provider == "deepseek":
+                response = await client.get(f"{url}/models", headers={"Authorization": f"Bearer {api_key}"}, timeout=timeout)
+                if response.status_code in (401, 403):
+                    return {"success": False, "message": "Invalid API key", "error": "Authentication failed"}
+                if response.status_code != 200:
+                    return {"success": False, "message": "Deepseek API error", "error": _error_message(response)}
+                available = [m["id"] for m in response.json().get("data", [])]
+                if model not in available:
+                    return {
+                        "success": False,
+                        "message": f"Model '{model}' not found on Deepseek",
+                        "error": f"Available models: {', '.join(available)}"
+                    }
+
+            else:
+                response = await client.get(f"{url}/models/{model}", headers={"x-goog-api-key": api_key or ""}, timeout=timeout)
+                if response.status_code == 404:
+                    return {"success": False, "message": f"Model '{model}' not found on Google Gemini", "error": _error_message(response)}
+                if response.status_code in (400, 401, 403):
+                    # Gemini answers 400 API_KEY_INVALID for bad keys
+                    return {"success": False, "message": "Invalid API key", "error": _error_message(response)}
+                if response.status_code != 200:
+                    return {"success": False, "message": "Gemini API error", "error": _error_message(response)}
+
+            latency_ms = (time.time() - start_time) * 1000
+            return {
+                "success": True,
+                "message": f"{name} is reachable and model '{model}' is available",
+                "latency_ms": round(latency_ms, 2)
+            }
+
+        except httpx.ConnectError:
+            return {"success": False, "message": f"Cannot connect to {name}", "error": f"Ensure {name} is reachable at {url}"}
+        except httpx.TimeoutException:
+            return {"success": False, "message": "Connection timeout", "error": f"{name} took too long to respond"}
+        except Exception as e:
+            return {"success": False, "message": "Unexpected error during connection probe", "error": str(e)}
+
 
 # Global tester instance
 llm_tester = LLMConnectionTester()
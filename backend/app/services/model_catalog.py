@@ -0,0 +1,255 @@
+"""
+Model Catalog Service - Cached lists of the models each provider offers.
+
+Model lists are fetched once per (provider, base_url, API key fingerprint)
+and served from memory for LLM_MODEL_CATALOG_TTL_SECONDS, so model pickers
+don't call providers on every render. Once the TTL has passed, the next
+refresh is conditional: the upstream ETag / Last-Modified is sent back and
+a 304 keeps the cached list. If a refresh fails, the last known list is
+returned and marked stale.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+from app.services.connection_monitor import key_fingerprint
+from app.services.http_clients import PROVIDER_BASE_URLS, HTTPClientRegistry, llm_http_clients
+from app.services.tokens import ContextWindowRegistry, context_windows
+
+
+# Settings holding each hosted provider's default API key
+PROVIDER_KEY_SETTINGS = {
+    "openrouter": "OPENROUTER_API_KEY",
+    "deepseek": "DEEPSEEK_API_KEY",
+    "gemini": "GOOGLE_GEMINI_API_KEY",
+}
+
+# While a provider is failing, the stale list is served this long before retrying
+ERROR_RETRY_SECONDS = 30.0
+
+
+class ModelCatalogError(Exception):
+    """A provider's model list could not be fetched."""
+
+
+@dataclass
+class _CatalogEntry:
+    models: List[Dict[str, Any]] = field(default_factory=list)
+    etag: str = ""  # Hash of `models`, for clients' conditional requests
+    upstream_validators: Dict[str, str] = field(default_factory=dict)  # ETag / Last-Modified from the provider
+    fetched_at: float = 0.0  # Wall clock
+    fresh_until: float = 0.0  # Monotonic
+    error: Optional[str] = None
+
+
+def _catalog_etag(models: List[Dict[str, Any]]) -> str:
+    payload = json.dumps(models, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def _parse_ollama(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": m["name"],
+            "name": m["name"],
+            "context_length": None,
+            "size": m.get("size"),
+            "family": (m.get("details") or {}).get("family"),
+            "parameter_size": (m.get("details") or {}).get("parameter_size"),
+        }
+        for m in payload.get("models", [])
+    ]
+
+
+def _parse_openai(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": m["id"],
+            "name": m.get("name") or m["id"],
+            "context_length": m.get("context_length"),
+        }
+        for m in payload.get("data", [])
+    ]
+
+
+def _parse_gemini(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": m["name"].split("/", 1)[-1],
+            "name": m.get("displayName") or m["name"],
+            "context_length": m.get("inputTokenLimit"),
+            "output_token_limit": m.get("outputTokenLimit"),
+        }
+        for m in payload.get("models", [])
+        if "generateContent" in m.get("supportedGenerationMethods", ["generateContent"])
+    ]
+
+
+class ModelCatalog:
+    """Service for listing provider models with caching."""
+
+    def __init__(
+        self,
+        clients: Optional[HTTPClientRegistry] = None,
+        ttl_seconds: Optional[float] = None,
+        windows: Optional[ContextWindowRegistry] = None
+    ):
+        self.clients = clients or llm_http_clients
+        self.windows = windows or context_windows
+        self.ttl_seconds = settings.LLM_MODEL_CATALOG_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self._entries: Dict[Tuple[str, str, str], _CatalogEntry] = {}
+        self._inflight: Dict[Tuple[str, str, str], asyncio.Task] = {}
+        self.upstream_requests = 0
+        self.not_modified = 0
+
+    @staticmethod
+    def _base_url(provider: str, base_url: Optional[str]) -> str:
+        default = settings.OLLAMA_BASE_URL if provider == "ollama" else PROVIDER_BASE_URLS[provider]
+        return (base_url or default).rstrip("/")
+
+    @staticmethod
+    def _api_key(provider: str, api_key: Optional[str]) -> str:
+        return api_key or getattr(settings, PROVIDER_KEY_SETTINGS.get(provider, ""), "")
+
+    async def _get(self, url: str, provider: str, headers: Dict[str, str], params: Optional[Dict[str, Any]] = None) -> httpx.Response:
+        client = self.clients.for_provider(provider, url)
+        self.upstream_requests += 1
+        return await client.get(url, headers=headers, params=params, timeout=settings.LLM_PROBE_TIMEOUT)
+
+    async def _fetch(self, provider: str, base_url: str, api_key: str, entry: _CatalogEntry) -> Optional[List[Dict[str, Any]]]:
+        """Fetch a provider's models; None means the upstream list has not changed."""
+        headers = {}
+        if entry.models:
+            if "etag" in entry.upstream_validators:
+                headers["If-None-Match"] = entry.upstream_validators["etag"]
+            if "last-modified" in entry.upstream_validators:
+                headers["If-Modified-Since"] = entry.upstream_validators["last-modified"]
+
+        if provider == "gemini":
+            # Paginated; conditional requests are not supported
+            models, page_token = [], None
+            while True:
+                params = {"pageSize": 1000, **({"pageToken": page_token} if page_token else {})}
+                response = await self._get(f"{base_url}/models", provider, {"x-goog-api-key": api_key}, params)
+                self._raise_for_status(provider, response)
+                payload = response.json()
+                models.extend(_parse_gemini(payload))
+                page_token = payload.get("nextPageToken")
+                if not page_token:
+                    return models
+
+        if provider == "ollama":
+            url, parse = f"{base_url}/api/tags", _parse_ollama
+        else:
+            url, parse = f"{base_url}/models", _parse_openai
+            if api_key:
+                headers["Authorization"] = f"Bearer {api_key}"
+
+        response = await self._get(url, provider, headers)
+        if response.status_code == 304:
+            self.not_modified += 1
+            return None
+        self._raise_for_status(provider, response)
+        entry.upstream_validators = {
+            name: response.headers[name] for name in ("etag", "last-modified") if name in response.headers
+        }
+        return parse(response.json())
+
+    @staticmethod
+    def _raise_for_status(provider: str, response: httpx.Response) -> None:
+        if response.status_code in (401, 403):
+            raise ModelCatalogError(f"{provider}: invalid API key")
+        if response.status_code != 200:
+            raise ModelCatalogError(f"{provider}: HTTP {response.status_code}")
+
+    async def _refresh(self, key: Tuple[str, str, str], provider: str, base_url: str, api_key: str) -> None:
+        entry = self._entries.setdefault(key, _CatalogEntry())
+        try:
+            models = await self._fetch(provider, base_url, api_key, entry)
+        except (httpx.HTTPError, ValueError, ModelCatalogError) as e:
+            entry.error = str(e) or type(e).__name__
+            if not entry.models:
+                raise ModelCatalogError(entry.error) from e
+            entry.fresh_until = time.monotonic() + min(self.ttl_seconds, ERROR_RETRY_SECONDS)
+            return
+        if models is not None:
+            entry.models = sorted(models, key=lambda m: m["id"])
+            entry.etag = _catalog_etag(entry.models)
+            for model in entry.models:
+                # Provider-reported windows feed the context-window guard
+                self.windows.learn(provider, model["id"], model.get("context_length"))
+        entry.error = None
+        entry.fetched_at = time.time()
+        entry.fresh_until = time.monotonic() + self.ttl_seconds
+
+    async def list_models(
+        self,
+        provider: str,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        refresh: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Models offered by a provider, from cache while fresh.
+
+        Args:
+            provider: LLM provider
+            base_url: Custom base URL (Ollama, or to override a hosted provider's API URL)
+            api_key: API key; falls back to the provider key in settings
+            refresh: Fetch now even if the cached list is fresh
+
+        Returns:
+            Catalog with models, etag, fetched_at, cached and stale flags
+
+        Raises:
+            ModelCatalogError: When the list cannot be fetched and nothing is cached
+        """
+        provider = provider.lower()
+        base_url = self._base_url(provider, base_url)
+        api_key = self._api_key(provider, api_key)
+        key = (provider, base_url, key_fingerprint(api_key))
+
+        entry = self._entries.get(key)
+        # Freshness comes from the last successful fetch; an empty list (no models pulled) is cached too
+        cached = entry is not None and entry.fetched_at > 0 and not refresh and time.monotonic() < entry.fresh_until
+        if not cached:
+            task = self._inflight.get(key)
+            if task is None or task.get_loop() is not asyncio.get_running_loop():
+                task = asyncio.ensure_future(self._refresh(key, provider, base_url, api_key))
+                self._inflight[key] = task
+                task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            await asyncio.shield(task)
+            entry = self._entries[key]
+
+        return {
+            "provider": provider,
+            "base_url": base_url,
+            "models": entry.models,
+            "count": len(entry.models),
+            "etag": entry.etag,
+            "fetched_at": datetime.fromtimestamp(entry.fetched_at, tz=timezone.utc) if entry.fetched_at else None,
+            "expires_in": max(0.0, round(entry.fresh_until - time.monotonic(), 1)),
+            "cached": bool(cached),
+            "stale": entry.error is not None,
+            "error": entry.error,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Cached catalogs and upstream request counters."""
+        return {
+            "catalogs": len(self._entries),
+            "upstream_requests": self.upstream_requests,
+            "not_modified": self.not_modified,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+# Global model catalog instance
+model_catalog = ModelCatalog()
@@ -4,5 +4,6 @@ Document parsing services.
 from .pdf_parser import PDFParser
 from .excel_parser import ExcelParser
 from .text_parser import TextParser
+from .text_normalizer import normalization_stats, strip_repeated_lines
 
-__all__ = ["PDFParser", "ExcelParser", "TextParser"]
+__all__ = ["PDFParser", "ExcelParser", "TextParser", "normalization_stats", "strip_repeated_lines"]
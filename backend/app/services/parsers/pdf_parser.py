@@ -6,17 +6,24 @@ from pathlib import Path
 from typing import Dict, Any
 import PyPDF2
 
+from app.services.parsers.text_normalizer import normalization_stats, strip_repeated_lines
+
 
 class PDFParser:
     """Parse PDF files and extract text content."""
     
-    def __init__(self):
+    def __init__(self, strip_boilerplate: bool = True):
         self.supported_extensions = [".pdf"]
+        self.strip_boilerplate = strip_boilerplate
     
     def parse(self, file_path: str) -> Dict[str, Any]:
         """
         Parse a PDF file and extract text content.
         
+        Running headers, footers and page numbers are stripped unless the
+        parser was created with strip_boilerplate=False; the savings are
+        reported in metadata["normalization"].
+        
         Args:
             file_path: Path to the PDF file
             
@@ -46,13 +53,15 @@ class PDFParser:
                 }
                 
                 # Extract text from all pages
-                text_content = []
-                for page_num, page in enumerate(pdf_reader.pages, start=1):
-                    page_text = page.extract_text()
-                    if page_text:
-                        text_content.append(f"--- Page {page_num} ---\n{page_text}")
+                page_texts = [page.extract_text() or "" for page in pdf_reader.pages]
+                full_text = self._join_pages(page_texts)
                 
-                full_text = "\n\n".join(text_content)
+                # Strip repeated headers/footers and collapse whitespace
+                if self.strip_boilerplate:
+                    normalized_pages, strip_stats = strip_repeated_lines(page_texts)
+                    normalized_text = self._join_pages(normalized_pages)
+                    metadata["normalization"] = normalization_stats(full_text, normalized_text, **strip_stats)
+                    full_text = normalized_text
                 
                 # Calculate file hash for deduplication
                 file_hash = self._calculate_file_hash(file_path)
@@ -82,6 +91,14 @@ class PDFParser:
                 "error": f"Unexpected error parsing PDF: {str(e)}"
             }
     
+    def _join_pages(self, page_texts) -> str:
+        """Join page texts, prefixing each non-empty page with its page marker."""
+        return "\n\n".join(
+            f"--- Page {page_num} ---\n{page_text}"
+            for page_num, page_text in enumerate(page_texts, start=1)
+            if page_text
+        )
+    
     def _calculate_file_hash(self, file_path: str) -> str:
         """Calculate SHA-256 hash of file for deduplication."""
         sha256_hash = hashlib.sha256()
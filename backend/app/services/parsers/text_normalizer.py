@@ -0,0 +1,118 @@
+"""
+Post-extraction normalization for paged documents.
+
+PDF text extraction emits running headers, footers, page numbers and
+copyright lines on every page. They add nothing to retrieval or prompts, so
+lines that recur in the header/footer zone of many pages are detected by
+frequency and removed, and whitespace is collapsed.
+"""
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, List, Sequence, Tuple
+
+from app.services.tokens import estimate_tokens
+
+
+_SPACES_RE = re.compile(r"[ \t\u00a0\u2000-\u200b]+")
+_DIGITS_RE = re.compile(r"\d+")
+# Only short lines are matched digit-insensitively; longer numbered lines are body text
+_MAX_TEMPLATE_WORDS = 8
+# Page number lines, compared after digits are replaced by "#"
+_PAGE_NUMBER_RE = re.compile(r"^[-–—\s]*(page\s*)?#(\s*(of|/)\s*#)?[-–—\s]*$")
+
+
+def _line_key(line: str) -> str:
+    """Key under which header/footer variants match ("Page 3 of 40" ~ "Page 4 of 40")."""
+    key = _SPACES_RE.sub(" ", line).strip().lower()
+    if len(key.split(" ")) <= _MAX_TEMPLATE_WORDS:
+        key = _DIGITS_RE.sub("#", key)
+    return key
+
+
+def _edge_positions(lines: List[str], edge_lines: int) -> List[int]:
+    """Indexes of the first and last `edge_lines` non-empty lines of a page."""
+    filled = [i for i, line in enumerate(lines) if line.strip()]
+    return sorted(set(filled[:edge_lines] + filled[-edge_lines:]))
+
+
+def _collapse_whitespace(lines: List[str]) -> str:
+    """Collapse runs of spaces within lines and keep at most one blank line in a row."""
+    collapsed: List[str] = []
+    for line in lines:
+        line = _SPACES_RE.sub(" ", line).strip()
+        if line or (collapsed and collapsed[-1]):
+            collapsed.append(line)
+    while collapsed and not collapsed[-1]:
+        collapsed.pop()
+    return "\n".join(collapsed)
+
+
+def strip_repeated_lines(
+    pages: Sequence[str],
+    min_pages: int = 3,
+    min_page_ratio: float = 0.3,
+    edge_lines: int = 3
+) -> Tuple[List[str], Dict[str, Any]]:
+    """
+    Remove running headers/footers and page numbers from page texts.
+
+    A line counts as boilerplate when, within the first/last `edge_lines`
+    non-empty lines of a page, the same line (ignoring case, spacing and,
+    for short lines, digits) occurs on at least `min_pages` pages and
+    `min_page_ratio` of all pages. A bare page number is removed only as the
+    first or last non-empty line of a page, so a value line such as "42"
+    elsewhere is kept. Pages with 2 * `edge_lines` or fewer non-empty lines
+    lie entirely inside the zones, so a line repeated on enough of them is
+    removed wherever it sits.
+
+    Args:
+        pages: Extracted text per page
+        min_pages: Minimum number of pages a line must repeat on
+        min_page_ratio: Minimum fraction of pages a line must repeat on
+        edge_lines: Size of the header and footer zones, in lines
+
+    Returns:
+        (normalized page texts, stats) where stats counts removed lines
+    """
+    page_lines = [page.splitlines() for page in pages]
+    edges = [_edge_positions(lines, edge_lines) for lines in page_lines]
+    outermost = [set(_edge_positions(lines, 1)) for lines in page_lines]
+
+    frequency: Counter = Counter()
+    for lines, positions in zip(page_lines, edges):
+        frequency.update({_line_key(lines[i]) for i in positions})
+    required = max(min_pages, math.ceil(min_page_ratio * len(pages)))
+    repeated = {key for key, count in frequency.items() if key and count >= required}
+
+    removed = 0
+    normalized = []
+    for lines, positions, outer in zip(page_lines, edges, outermost):
+        drop = set()
+        for i in positions:
+            key = _line_key(lines[i])
+            if key in repeated or (i in outer and _PAGE_NUMBER_RE.match(key)):
+                drop.add(i)
+        removed += len(drop)
+        normalized.append(_collapse_whitespace([line for i, line in enumerate(lines) if i not in drop]))
+
+    return normalized, {"boilerplate_lines_removed": removed, "repeated_patterns": len(repeated)}
+
+
+def normalization_stats(original: str, normalized: str, **extra: Any) -> Dict[str, Any]:
+    """Byte and estimated-token savings of a normalization pass."""
+    original_bytes = len(original.encode("utf-8"))
+    normalized_bytes = len(normalized.encode("utf-8"))
+    original_tokens = estimate_tokens(original)
+    normalized_tokens = estimate_tokens(normalized)
+    stats = {
+        "original_bytes": original_bytes,
+        "normalized_bytes": normalized_bytes,
+        "bytes_saved": original_bytes - normalized_bytes,
+        "original_tokens": original_tokens,
+        "normalized_tokens": normalized_tokens,
+        "tokens_saved": original_tokens - normalized_tokens,
+        "token_savings_pct": round(100.0 * (original_tokens - normalized_tokens) / original_tokens, 1) if original_tokens else 0.0,
+    }
+    stats.update(extra)
+    return stats
@@ -0,0 +1,76 @@
+"""
+Rate Limiting Service - Async token bucket for outbound API calls.
+"""
+import asyncio
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter.
+
+    Tokens refill continuously at `rate` per second up to `capacity`.
+    `acquire(n)` waits until n tokens are available, so bursts up to
+    `capacity` go through immediately and sustained traffic is smoothed
+    to `rate`. A rate of 0 disables limiting.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def available(self) -> float:
+        """Tokens available right now."""
+        if self.rate <= 0:
+            return float("inf")
+        self._refill()
+        return self._tokens
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """
+        Wait until `amount` tokens are available and take them.
+
+        Requests larger than capacity are allowed once the bucket is full
+        (the bucket goes negative), so oversized requests are delayed rather
+        than rejected.
+
+        Returns:
+            Seconds spent waiting
+        """
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        async with self._lock:
+            self._refill()
+            needed = min(amount, self.capacity)
+            if self._tokens < needed:
+                delay = (needed - self._tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited = delay
+                self._refill()
+            self._tokens -= amount
+        return waited
+
+    def refund(self, amount: float) -> None:
+        """Return unused tokens (e.g. when a request used fewer than reserved)."""
+        if self.rate <= 0 or amount <= 0:
+            return
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + amount)
+
+    def penalize(self, seconds: float) -> None:
+        """Drain the bucket so the next acquire waits at least `seconds` (e.g. after HTTP 429)."""
+        if self.rate <= 0:
+            return
+        self._refill()
+        self._tokens = min(self._tokens, -seconds * self.rate)
@@ -0,0 +1,221 @@
+"""
+Token Estimation - Fast local token counts and model context windows.
+
+Token counts drive KB context budgets, scheduler token reservations and the
+context-window guard, so they must be cheap: the default estimator divides
+character counts by a characters-per-token ratio calibrated per model
+family (larger vocabularies pack more text into a token), and counts CJK
+characters as one token each. With LLM_TOKENIZER="tiktoken" a real BPE
+tokenizer is used instead when the optional `tiktoken` package and its
+encoding files are available; otherwise the estimate is the fallback.
+
+The context-window registry answers "how many tokens fit" for a provider
+and model: settings overrides first, then windows learned from provider
+model lists, then a built-in table of known families.
+"""
+import math
+import re
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+
+
+# Characters per token by model family (normalized name prefix), most specific first
+CHARS_PER_TOKEN: Sequence[Tuple[str, float]] = (
+    ("llama3", 4.0),
+    ("llama2", 3.6),
+    ("codellama", 3.4),
+    ("mistral", 3.6),
+    ("mixtral", 3.6),
+    ("gpt4o", 4.2),
+    ("gpt", 4.0),
+    ("claude", 3.8),
+    ("gemini", 4.0),
+    ("gemma", 4.0),
+    ("deepseek", 3.8),
+    ("qwen", 3.9),
+    ("phi", 3.8),
+)
+DEFAULT_CHARS_PER_TOKEN = 4.0
+
+# Context windows (tokens) by normalized model name prefix, most specific first
+CONTEXT_WINDOWS: Sequence[Tuple[str, int]] = (
+    ("gpt4o", 128000),
+    ("gpt4turbo", 128000),
+    ("gpt4", 8192),
+    ("gpt3.5turbo", 16385),
+    ("claude", 200000),
+    ("gemini1.5pro", 2097152),
+    ("gemini1.5", 1048576),
+    ("gemini2", 1048576),
+    ("geminipro", 32760),
+    ("deepseek", 65536),
+    ("llama3.1", 131072),
+    ("llama3.2", 131072),
+    ("llama3.3", 131072),
+    ("llama3", 8192),
+    ("llama2", 4096),
+    ("codellama", 16384),
+    ("mixtral", 32768),
+    ("mistral", 32768),
+    ("qwen2.5", 32768),
+    ("qwen", 32768),
+    ("gemma2", 8192),
+    ("gemma", 8192),
+    ("phi3", 4096),
+)
+
+# Chat formatting overhead: per message (role markers) and per request (reply priming)
+MESSAGE_OVERHEAD_TOKENS = 4
+REQUEST_OVERHEAD_TOKENS = 3
+
+_CJK_RE = re.compile(r"[\u2e80-\u9fff\uac00-\ud7af\uf900-\ufaff]")
+_NON_ASCII_RE = re.compile(r"[^\x00-\x7f]")
+
+
+def normalize_model_name(model: Optional[str]) -> str:
+    """
+    Model name reduced for family matching.
+
+    Drops the vendor prefix ("meta-llama/"), the Ollama tag (":8b") and
+    separators, so "meta-llama/llama-3.1-8b-instruct" and "llama3.1:8b"
+    both start with "llama3.1".
+    """
+    if not model:
+        return ""
+    name = model.lower().rsplit("/", 1)[-1].split(":", 1)[0]
+    return re.sub(r"[-_\s]", "", name)
+
+
+def _lookup(table: Sequence[Tuple[str, Any]], model: Optional[str], default: Any) -> Any:
+    name = normalize_model_name(model)
+    for prefix, value in table:
+        if name.startswith(prefix):
+            return value
+    return default
+
+
+class TokenEstimator:
+    """Service for fast local token counts."""
+
+    def __init__(self, tokenizer: Optional[str] = None, encoding: Optional[str] = None):
+        self.tokenizer = tokenizer or settings.LLM_TOKENIZER
+        self.encoding_name = encoding or settings.LLM_TOKENIZER_ENCODING
+        self._encoding = None
+        self._encoding_loaded = False
+        self._lock = threading.Lock()
+
+    def _bpe(self):
+        """The BPE encoding if enabled and loadable, else None (loaded once)."""
+        if self.tokenizer != "tiktoken":
+            return None
+        if not self._encoding_loaded:
+            with self._lock:
+                if not self._encoding_loaded:
+                    try:
+                        import tiktoken
+                        # Offline use needs the encoding file in TIKTOKEN_CACHE_DIR
+                        self._encoding = tiktoken.get_encoding(self.encoding_name)
+                    except Exception:
+                        self._encoding = None
+                    self._encoding_loaded = True
+        return self._encoding
+
+    @property
+    def backend(self) -> str:
+        """Name of the counting backend in use: tiktoken or approx."""
+        return "tiktoken" if self._bpe() is not None else "approx"
+
+    def chars_per_token(self, model: Optional[str] = None) -> float:
+        return _lookup(CHARS_PER_TOKEN, model, DEFAULT_CHARS_PER_TOKEN)
+
+    def count(self, text: str, model: Optional[str] = None) -> int:
+        """
+        Token count of a text for a model.
+
+        Args:
+            text: Text to count
+            model: Model name (selects the family calibration); None uses the default ratio
+
+        Returns:
+            Estimated (or, with a BPE tokenizer, exact-vocabulary) token count
+        """
+        if not text:
+            return 0
+        encoding = self._bpe()
+        if encoding is not None:
+            return len(encoding.encode(text, disallowed_special=()))
+        ratio = self.chars_per_token(model)
+        if text.isascii():
+            return max(1, math.ceil(len(text) / ratio))
+        cjk = len(_CJK_RE.findall(text))
+        other = len(_NON_ASCII_RE.findall(text)) - cjk
+        ascii_chars = len(text) - cjk - other
+        return max(1, math.ceil(ascii_chars / ratio + cjk + other / 2))
+
+    def count_messages(self, messages: List[Dict[str, str]], model: Optional[str] = None) -> int:
+        """Tokens of a chat prompt, including per-message formatting overhead."""
+        return REQUEST_OVERHEAD_TOKENS + sum(
+            MESSAGE_OVERHEAD_TOKENS + self.count(message.get("content", ""), model)
+            for message in messages
+        )
+
+    def truncate(self, text: str, max_tokens: int, model: Optional[str] = None) -> str:
+        """Longest prefix of a text that fits in max_tokens."""
+        if self.count(text, model) <= max_tokens:
+            return text
+        if max_tokens <= 0:
+            return ""
+        low, high = 0, len(text)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if self.count(text[:mid], model) <= max_tokens:
+                low = mid
+            else:
+                high = mid - 1
+        return text[:low]
+
+
+class ContextWindowRegistry:
+    """Service resolving a model's context window in tokens."""
+
+    def __init__(self, overrides: Optional[Dict[str, int]] = None, default: Optional[int] = None):
+        self.overrides = {
+            name.lower(): int(window)
+            for name, window in (settings.LLM_CONTEXT_WINDOWS if overrides is None else overrides).items()
+        }
+        self.default = settings.LLM_DEFAULT_CONTEXT_WINDOW if default is None else default
+        self._learned: Dict[Tuple[str, str], int] = {}
+
+    def learn(self, provider: str, model: str, context_window: Optional[int]) -> None:
+        """Record a window reported by a provider (e.g. from its model list)."""
+        if context_window:
+            self._learned[(provider.lower(), model.lower())] = int(context_window)
+
+    def get(self, provider: Optional[str], model: Optional[str]) -> int:
+        """
+        Context window of a model.
+
+        Lookup order: LLM_CONTEXT_WINDOWS overrides, windows learned from the
+        provider, the built-in family table, then LLM_DEFAULT_CONTEXT_WINDOW.
+        """
+        name = (model or "").lower()
+        if name in self.overrides:
+            return self.overrides[name]
+        learned = self._learned.get(((provider or "").lower(), name))
+        if learned:
+            return learned
+        return _lookup(CONTEXT_WINDOWS, model, self.default)
+
+
+# Global token estimator instance
+token_estimator = TokenEstimator()
+
+# Global context window registry instance
+context_windows = ContextWindowRegistry()
+
+
+def estimate_tokens(text: str, model: Optional[str] = None) -> int:
+    """Token count of a text (see TokenEstimator.count)."""
+    return token_estimator.count(text, model)
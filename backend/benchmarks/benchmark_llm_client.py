@@ -0,0 +1,141 @@
+"""
+Benchmark: LLM client and scheduler against the mock LLM server.
+
+Starts the mock server as a separate process, then runs batches of
+streaming completions through LLMScheduler at several concurrency limits
+and reports time to first token (p50/p95), total latency, throughput and
+retries. Latency, token rate and error rates are those of the mock, so runs
+are repeatable on a laptop without any provider. With --record the traffic
+is saved to a cassette; --replay runs against a cassette instead of the
+mock (pass --replay-speed 1 to keep the recorded timing).
+
+Usage:
+    python -m benchmarks.benchmark_llm_client
+    python -m benchmarks.benchmark_llm_client --provider openrouter --requests 200 --concurrency 4 16 64 --error-rate 0.05
+    python -m benchmarks.benchmark_llm_client --record cassettes/bench.json
+    python -m benchmarks.benchmark_llm_client --replay cassettes/bench.json --replay-speed 1
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.cassettes import open_cassette_transport
+from app.services.http_clients import HTTPClientRegistry
+from app.services.llm import CircuitBreakerRegistry, LLMClient, LLMError, LLMRequest, LLMScheduler, ProviderLimits
+from app.services.llm.mock_server import MockBehavior, MockLLMServer
+
+
+MODELS = {"ollama": "llama3", "openrouter": "mock-model", "deepseek": "deepseek-chat", "gemini": "gemini-1.5-flash"}
+
+
+async def run_batch(base_url, provider, num_requests, concurrency, max_retries, transport=None):
+    """Return (ttft_ms, latency_ms, completion_tokens, failures, wall_s, scheduler stats)."""
+    clients = HTTPClientRegistry(transport=transport)
+    scheduler = LLMScheduler(
+        client=LLMClient(clients=clients),
+        limits={provider: ProviderLimits(max_concurrency=concurrency)},
+        max_retries=max_retries,
+        base_delay=0.05,
+        breakers=CircuitBreakerRegistry(min_calls=10 ** 9)
+    )
+
+    async def one(i):
+        request = LLMRequest.from_prompt(
+            provider, MODELS[provider], f"Write test case {i}", base_url=base_url, api_key="mock", max_tokens=256
+        )
+        try:
+            return await scheduler.complete(request)
+        except LLMError:
+            return None
+
+    start = time.perf_counter()
+    responses = await asyncio.gather(*(one(i) for i in range(num_requests)))
+    wall = time.perf_counter() - start
+    await clients.aclose()
+
+    ok = [r for r in responses if r is not None]
+    ttft = np.array([r.first_token_ms for r in ok if r.first_token_ms is not None])
+    latency = np.array([r.latency_ms for r in ok])
+    tokens = sum(r.usage.completion_tokens for r in ok if r.usage)
+    return ttft, latency, tokens, num_requests - len(ok), wall, scheduler.stats()[provider]
+
+
+def run(args):
+    behavior = MockBehavior(
+        latency_ms=args.latency_ms,
+        latency_spread_ms=args.latency_spread_ms,
+        latency_distribution=args.latency_distribution,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        error_status=429,
+        seed=42
+    )
+    print("=" * 88)
+    print(
+        f"LLM client benchmark  provider={args.provider}  requests={args.requests}  "
+        f"latency={args.latency_ms}±{args.latency_spread_ms}ms ({args.latency_distribution})  "
+        f"tps={args.tokens_per_second}  errors={args.error_rate:.0%}"
+    )
+    print("=" * 88)
+    header = f"{'conc':>5} {'ttft p50':>9} {'ttft p95':>9} {'lat p50':>9} {'lat p95':>9} {'req/s':>7} {'tok/s':>8} {'retries':>8} {'failed':>7}"
+    print(header)
+    print("-" * len(header))
+
+    if args.replay:
+        # Recorded traffic only; the URL just has to match the recording
+        server = None
+        base_url = args.replay_base_url
+    else:
+        server = MockLLMServer(behavior).start()
+        base_url = server.base_urls[args.provider]
+    try:
+        for concurrency in args.concurrency:
+            transport = None
+            if args.replay:
+                transport = open_cassette_transport(args.replay, "replay", speed=args.replay_speed)
+            elif args.record:
+                # Each concurrency level overwrites the cassette; the last one is kept
+                transport = open_cassette_transport(args.record, "record")
+            ttft, latency, tokens, failed, wall, stats = asyncio.run(
+                run_batch(base_url, args.provider, args.requests, concurrency, args.max_retries, transport)
+            )
+
+            def pct(values, q):
+                return f"{np.percentile(values, q):9.1f}" if len(values) else f"{'-':>9}"
+
+            print(
+                f"{concurrency:>5} {pct(ttft, 50)} {pct(ttft, 95)} {pct(latency, 50)} {pct(latency, 95)} "
+                f"{args.requests / wall:7.1f} {tokens / wall:8.0f} {stats.get('retries', 0):>8} {failed:>7}"
+            )
+    finally:
+        if server is not None:
+            server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--provider", choices=sorted(MODELS), default="ollama")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--latency-ms", type=float, default=150.0)
+    parser.add_argument("--latency-spread-ms", type=float, default=50.0)
+    parser.add_argument("--latency-distribution", choices=["fixed", "uniform", "normal", "exponential"], default="exponential")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--max-retries", type=int, default=2)
+    parser.add_argument("--record", help="Save the traffic to this cassette file")
+    parser.add_argument("--replay", help="Replay this cassette instead of starting the mock server")
+    parser.add_argument("--replay-speed", type=float, default=0.0, help="0 = full speed, 1 = recorded timing")
+    parser.add_argument("--replay-base-url", default="http://127.0.0.1:11500", help="Base URL the cassette was recorded against")
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
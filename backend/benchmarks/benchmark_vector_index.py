@@ -0,0 +1,101 @@
+"""
+Benchmark: HNSW vs exact KB vector search.
+
+Builds both indexes over synthetic clustered embeddings (clusters mimic
+chunks from the same guide section) and reports build time, query latency
+(p50/p95) and recall@k for several HNSW ef_search values.
+
+Usage:
+    python -m benchmarks.benchmark_vector_index
+    python -m benchmarks.benchmark_vector_index --sizes 2000 10000 20000 --dim 384
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.kb.vector_index import ExactIndex, HNSWIndex
+
+
+def make_dataset(n: int, dim: int, num_queries: int, seed: int = 42):
+    """Clustered vectors plus queries drawn near random cluster centres."""
+    rng = np.random.default_rng(seed)
+    num_clusters = max(10, n // 100)
+    centres = rng.standard_normal((num_clusters, dim)).astype(np.float32)
+    assignment = rng.integers(0, num_clusters, size=n)
+    vectors = centres[assignment] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    query_centres = rng.integers(0, num_clusters, size=num_queries)
+    queries = centres[query_centres] + 0.6 * rng.standard_normal((num_queries, dim)).astype(np.float32)
+    return vectors, queries
+
+
+def time_queries(index, queries, k, ef_search=None):
+    """Return (latencies_ms, results) for all queries."""
+    latencies = []
+    results = []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(index.search(query, k=k, ef_search=ef_search))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies), results
+
+
+def recall(truth, found, k):
+    hits = sum(
+        len({label for label, _ in t} & {label for label, _ in f})
+        for t, f in zip(truth, found)
+    )
+    return hits / (k * len(truth))
+
+
+def run(sizes, dim, k, num_queries, ef_values, M, ef_construction):
+    print("=" * 78)
+    print(f"KB vector index benchmark  dim={dim}  k={k}  queries={num_queries}  M={M}  efC={ef_construction}")
+    print("=" * 78)
+    header = f"{'N':>7} {'index':<14} {'build s':>8} {'p50 ms':>8} {'p95 ms':>8} {'recall@k':>9}"
+    print(header)
+    print("-" * len(header))
+
+    for n in sizes:
+        vectors, queries = make_dataset(n, dim, num_queries)
+        labels = list(range(n))
+
+        exact = ExactIndex(dim)
+        start = time.perf_counter()
+        exact.add_batch(labels, vectors)
+        exact_build = time.perf_counter() - start
+        exact_lat, truth = time_queries(exact, queries, k)
+        print(f"{n:>7} {'exact':<14} {exact_build:>8.2f} {np.percentile(exact_lat, 50):>8.2f} "
+              f"{np.percentile(exact_lat, 95):>8.2f} {1.0:>9.3f}")
+
+        hnsw = HNSWIndex(dim, M=M, ef_construction=ef_construction, seed=1)
+        start = time.perf_counter()
+        hnsw.add_batch(labels, vectors)
+        hnsw_build = time.perf_counter() - start
+        for ef in ef_values:
+            lat, found = time_queries(hnsw, queries, k, ef_search=ef)
+            print(f"{n:>7} {f'hnsw ef={ef}':<14} {hnsw_build:>8.2f} {np.percentile(lat, 50):>8.2f} "
+                  f"{np.percentile(lat, 95):>8.2f} {recall(truth, found, k):>9.3f}")
+        print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HNSW vs exact KB vector search")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 10000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--ef", type=int, nargs="+", default=[16, 64, 128])
+    parser.add_argument("--M", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=100)
+    args = parser.parse_args()
+    run(args.sizes, args.dim, args.k, args.queries, args.ef, args.M, args.ef_construction)
+
+
+if __name__ == "__main__":
+    main()
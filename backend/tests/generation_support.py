@@ -0,0 +1,108 @@
+"""
+Shared doubles for the generation tests: a mock Ollama answering the agents' prompts.
+"""
+import asyncio
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+from app.services.generation import ExecutorAgent, GenerationInputs, GenerationPipeline, GeneratorAgent, PlannerAgent
+from app.services.http_clients import HTTPClientRegistry
+from app.services.llm import LLMClient
+
+
+def sample_test_case(title: str, steps=("Open the login page", "Submit valid credentials")) -> Dict[str, Any]:
+    """A generated test case that passes the schema and the Executor (cites KB ref 1)."""
+    return {
+        "title": title,
+        "priority": "high",
+        "steps": [{"action": step, "expected": "ok"} for step in steps],
+        "expected_result": "User is logged in",
+        "kb_references": ["[1]"],
+    }
+
+
+def ollama_reply(content: str) -> httpx.Response:
+    """Streamed Ollama chat reply with 10 prompt and 5 completion tokens."""
+    lines = [
+        {"message": {"content": content}, "done": False},
+        {"done": True, "prompt_eval_count": 10, "eval_count": 5},
+    ]
+    return httpx.Response(200, content="\n".join(json.dumps(line) for line in lines).encode())
+
+
+def mock_llm(handler: Callable) -> LLMClient:
+    """Uncached LLMClient over an httpx mock transport."""
+    return LLMClient(clients=HTTPClientRegistry(transport=httpx.MockTransport(handler)), cache=None)
+
+
+def mock_generation_llm(
+    scenarios: List[str],
+    cases: Dict[str, Optional[List[Dict[str, Any]]]],
+    gate: Optional[Dict[str, asyncio.Event]] = None,
+    stats: Optional[Dict[str, Any]] = None
+) -> LLMClient:
+    """
+    LLMClient over a mock Ollama answering planner, generator and repair prompts.
+
+    The Planner gets `scenarios`; each scenario's Generator call gets
+    `cases[title]` (a 400 when it is None or missing) once its `gate` event
+    is set. `stats` records in-flight generator calls, repairs and the
+    order of calls ("planner" or the scenario title).
+    """
+    stats = stats if stats is not None else {}
+    stats.setdefault("in_flight", 0)
+    stats.setdefault("max_in_flight", 0)
+    stats.setdefault("calls", [])
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        system, prompt = body["messages"][0]["content"], body["messages"][1]["content"]
+        if system.startswith("You are the Planner"):
+            stats["calls"].append("planner")
+            return ollama_reply(json.dumps({"scenarios": [{"title": title} for title in scenarios]}))
+        if system.startswith("You fix malformed"):
+            stats["repairs"] = stats.get("repairs", 0) + 1
+            return ollama_reply(json.dumps(sample_test_case("Repaired")))
+        scenario = next(title for title in scenarios if f": {title}\n" in prompt)
+        stats["calls"].append(scenario)
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        try:
+            if gate is not None and scenario in gate:
+                await asyncio.wait_for(gate[scenario].wait(), 2)
+            else:
+                await asyncio.sleep(0.01)
+        finally:
+            stats["in_flight"] -= 1
+        if cases.get(scenario) is None:
+            return httpx.Response(400, json={"error": "bad request"})
+        return ollama_reply("```json\n" + json.dumps({"test_cases": cases[scenario]}) + "\n```")
+
+    return mock_llm(handler)
+
+
+def generation_pipeline(llm, concurrency: int = 4) -> GenerationPipeline:
+    """Pipeline whose Planner and Generator both use `llm`."""
+    return GenerationPipeline(
+        planner=PlannerAgent(llm),
+        generator=GeneratorAgent(llm),
+        executor=ExecutorAgent(),
+        concurrency=concurrency,
+        executor_workers=2
+    )
+
+
+def generation_inputs(**overrides: Any) -> GenerationInputs:
+    """Inputs of project "p1" on a mock Ollama, with one KB citation."""
+    values = {
+        "project_id": "p1",
+        "requirements": "Users log in with email and password.",
+        "provider": "ollama",
+        "model": "llama3",
+        "base_url": "http://ollama.test",
+        "citations": [{"ref": 1, "filename": "guide.pdf"}],
+    }
+    values.update(overrides)
+    return GenerationInputs(**values)
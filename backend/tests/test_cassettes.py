@@ -0,0 +1,111 @@
+"""
+Tests for recording and replaying LLM traffic with cassettes.
+"""
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+from app.services.cassettes import (
+    Cassette,
+    CassetteMissError,
+    CassetteTransport,
+    open_cassette_transport,
+    request_key,
+)
+from app.services.http_clients import HTTPClientRegistry
+from app.services.llm import LLMClient, LLMRequest, get_adapter
+
+
+def _ollama_handler(calls):
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        prompt = json.loads(request.content)["messages"][-1]["content"]
+        lines = [
+            {"message": {"content": f"Reply {len(calls)}: "}, "done": False},
+            {"message": {"content": prompt}, "done": False},
+            {"message": {"content": ""}, "done": True, "prompt_eval_count": 5, "eval_count": 2},
+        ]
+        return httpx.Response(200, content="\n".join(json.dumps(line) for line in lines).encode())
+    return handler
+
+
+def _request(prompt: str) -> LLMRequest:
+    return LLMRequest.from_prompt("ollama", "llama3", prompt, base_url="http://ollama.test")
+
+
+def _run(transport: CassetteTransport, prompts):
+    async def run():
+        clients = HTTPClientRegistry(transport=transport)
+        client = LLMClient(clients=clients)
+        try:
+            return [(await client.complete(_request(prompt))).text for prompt in prompts]
+        finally:
+            await clients.aclose()
+    return asyncio.run(run())
+
+
+def test_record_then_replay(tmp_path):
+    """Recorded responses replay identically, in order, without calling the provider."""
+    path = tmp_path / "llm.json"
+    calls = []
+    recorder = open_cassette_transport(path, "record", inner=httpx.MockTransport(_ollama_handler(calls)))
+    recorded = _run(recorder, ["login", "login", "logout"])
+    assert recorded == ["Reply 1: login", "Reply 2: login", "Reply 3: logout"]
+    assert recorder.stats()["recorded"] == 3
+
+    replayer = open_cassette_transport(path, "replay")
+    replayed = _run(replayer, ["login", "logout", "login", "login"])
+    assert replayed == ["Reply 1: login", "Reply 3: logout", "Reply 2: login", "Reply 1: login"]
+    assert len(calls) == 3
+    assert replayer.stats()["replayed"] == 4
+
+
+def test_replay_miss_raises(tmp_path):
+    """A request that was never recorded fails instead of reaching the network."""
+    path = tmp_path / "llm.json"
+    _run(open_cassette_transport(path, "record", inner=httpx.MockTransport(_ollama_handler([]))), ["login"])
+
+    with pytest.raises(CassetteMissError):
+        _run(open_cassette_transport(path, "replay"), ["something else"])
+
+
+def test_credentials_are_not_recorded(tmp_path):
+    """API keys in headers and the `key` query parameter stay out of the cassette."""
+    path = tmp_path / "llm.json"
+    transport = open_cassette_transport(path, "record", inner=httpx.MockTransport(lambda r: httpx.Response(200, json={})))
+
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as client:
+            await client.post(
+                "https://gemini.test/v1beta/models/m:generateContent?key=secret-1",
+                headers={"x-goog-api-key": "secret-2"},
+                json={"contents": []}
+            )
+    asyncio.run(run())
+
+    saved = path.read_text()
+    assert "secret" not in saved
+    interaction = json.loads(saved)["interactions"][0]
+    assert interaction["request"]["url"] == "https://gemini.test/v1beta/models/m:generateContent"
+
+
+def test_replay_speed_reproduces_timing(tmp_path):
+    """speed=1 replays the recorded delays; speed=0 replays at full speed."""
+    cassette = Cassette(tmp_path / "llm.json")
+    url, _, request_body = get_adapter("ollama").build(_request("slow"))
+    chunks = [
+        {"offset_ms": 50, "data": json.dumps({"message": {"content": "a"}, "done": False}) + "\n"},
+        {"offset_ms": 200, "data": json.dumps({"message": {"content": "b"}, "done": True}) + "\n"},
+    ]
+    cassette.add({
+        "request": {"key": request_key("POST", url, request_body), "method": "POST", "url": url, "body": request_body},
+        "response": {"status_code": 200, "headers": [], "headers_ms": 50, "chunks": chunks},
+    })
+
+    for speed, check in [(1.0, lambda s: s >= 0.19), (0.0, lambda s: s < 0.1)]:
+        start = time.perf_counter()
+        assert _run(CassetteTransport(cassette, "replay", speed=speed), ["slow"]) == ["ab"]
+        assert check(time.perf_counter() - start)
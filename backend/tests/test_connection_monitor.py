@@ -0,0 +1,184 @@
+"""
+Tests for probe-mode connection tests and the cached connection monitor.
+"""
+import asyncio
+import json
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.connection_monitor import ConnectionMonitor
+from app.services.http_clients import HTTPClientRegistry
+from app.services.llm_connection_tester import LLMConnectionTester
+
+
+def _tester(handler) -> LLMConnectionTester:
+    return LLMConnectionTester(clients=HTTPClientRegistry(transport=httpx.MockTransport(handler)))
+
+
+class CountingTester:
+    """Stand-in tester recording calls, optionally slow."""
+
+    def __init__(self, delay: float = 0.0, delays=None):
+        self.calls = []
+        self.delay = delay
+        self.delays = delays or {}
+
+    async def test_connection(self, provider, model, base_url=None, api_key=None, mode="probe"):
+        self.calls.append((provider, model, api_key, mode))
+        await asyncio.sleep(self.delays.get(provider, self.delay))
+        return {"success": True, "message": "ok", "latency_ms": 1.0}
+
+
+def test_ollama_probe_does_not_generate():
+    """Probe mode only lists models; an untagged name matches ':latest'."""
+    paths = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        paths.append(request.url.path)
+        return httpx.Response(200, json={"models": [{"name": "llama3:latest"}]})
+
+    result = asyncio.run(_tester(handler).test_connection("ollama", "llama3", "http://ollama.test"))
+
+    assert result["success"]
+    assert paths == ["/api/tags"]
+
+
+def test_deepseek_probe_checks_key_and_model():
+    """DeepSeek probes use the model list, which also validates the key."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.headers["Authorization"] != "Bearer good":
+            return httpx.Response(401, json={"error": {"message": "Authentication Fails"}})
+        return httpx.Response(200, json={"data": [{"id": "deepseek-chat"}]})
+
+    tester = _tester(handler)
+
+    async def run():
+        return (
+            await tester.probe("deepseek", "deepseek-chat", api_key="good"),
+            await tester.probe("deepseek", "deepseek-chat", api_key="bad"),
+            await tester.probe("deepseek", "deepseek-coder-v9", api_key="good"),
+        )
+
+    ok, bad_key, missing = asyncio.run(run())
+
+    assert ok["success"]
+    assert bad_key["message"] == "Invalid API key"
+    assert not missing["success"] and "not found" in missing["message"]
+
+
+def test_gemini_probe_reports_unknown_model():
+    """Gemini probes fetch the model's metadata; 404 means the model does not exist."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.headers["x-goog-api-key"] == "g-key"
+        if request.url.path.endswith("/models/gemini-1.5-flash"):
+            return httpx.Response(200, json={"name": "models/gemini-1.5-flash"})
+        return httpx.Response(404, json={"error": {"message": "model not found"}})
+
+    tester = _tester(handler)
+
+    async def run():
+        return (
+            await tester.probe("gemini", "gemini-1.5-flash", api_key="g-key"),
+            await tester.probe("gemini", "gemini-9", api_key="g-key"),
+        )
+
+    ok, missing = asyncio.run(run())
+
+    assert ok["success"]
+    assert missing["message"] == "Model 'gemini-9' not found on Google Gemini"
+
+
+def test_results_are_cached_per_key_fingerprint():
+    """Repeat checks come from cache; a different key or refresh=True tests again."""
+    tester = CountingTester()
+    monitor = ConnectionMonitor(tester=tester, ttl_seconds=60)
+
+    async def run():
+        first = await monitor.check("openrouter", "m", api_key="k1")
+        second = await monitor.check("openrouter", "m", api_key="k1")
+        await monitor.check("openrouter", "m", api_key="k2")
+        forced = await monitor.check("openrouter", "m", api_key="k1", refresh=True)
+        return first, second, forced
+
+    first, second, forced = asyncio.run(run())
+
+    assert not first["cached"] and second["cached"] and not forced["cached"]
+    assert second["checked_at"] == first["checked_at"]
+    assert len(tester.calls) == 3
+    assert monitor.stats()["hits"] == 1
+
+
+def test_concurrent_checks_share_one_test():
+    """Simultaneous checks of the same target wait on a single in-flight test."""
+    tester = CountingTester(delay=0.05)
+    monitor = ConnectionMonitor(tester=tester)
+
+    async def run():
+        return await asyncio.gather(*(monitor.check("ollama", "llama3") for _ in range(5)))
+
+    results = asyncio.run(run())
+
+    assert all(result["success"] for result in results)
+    assert len(tester.calls) == 1
+
+
+def test_background_probe_refreshes_watched_probe_targets():
+    """Stale probe targets are re-probed; full-mode and idle targets are not."""
+    tester = CountingTester()
+    monitor = ConnectionMonitor(tester=tester, ttl_seconds=0, interval_seconds=30, idle_seconds=60)
+
+    async def run():
+        await monitor.check("ollama", "llama3")
+        await monitor.check("ollama", "llama3", mode="full")
+        await monitor.check("deepseek", "deepseek-chat", api_key="k")
+        idle_key = monitor.target_key("deepseek", "deepseek-chat", api_key="k")
+        monitor._targets[idle_key].last_requested -= 120
+        return await monitor.probe_watched()
+
+    probed = asyncio.run(run())
+
+    assert probed == 1
+    assert tester.calls[-1] == ("ollama", "llama3", None, "probe")
+    assert monitor.stats()["targets"] == 2
+
+
+def test_check_many_streams_in_completion_order_with_deadline():
+    """Batch checks run concurrently, arrive fastest first, and stragglers time out."""
+    tester = CountingTester(delays={"ollama": 0.05, "deepseek": 0.0, "gemini": 5.0})
+    monitor = ConnectionMonitor(tester=tester)
+    targets = [
+        {"provider": "ollama", "model": "llama3"},
+        {"provider": "deepseek", "model": "deepseek-chat", "api_key": "k"},
+        {"provider": "gemini", "model": "gemini-1.5-flash", "api_key": "g"},
+    ]
+
+    async def run():
+        return [item async for item in monitor.check_many(targets, deadline_seconds=0.3)]
+
+    results = asyncio.run(run())
+
+    assert [index for index, _ in results] == [1, 0, 2]
+    assert results[0][1]["success"] and results[1][1]["success"]
+    assert results[2][1] is None
+
+
+def test_batch_endpoint_streams_results_and_summary():
+    """The batch endpoint streams one NDJSON line per target, then a summary."""
+    client = TestClient(app)
+    response = client.post("/api/v1/config/test-connections", json={
+        "targets": [
+            {"provider": "deepseek", "model": "deepseek-chat"},
+            {"provider": "ollama", "model": "llama3", "base_url": "http://127.0.0.1:9"},
+        ],
+        "deadline_seconds": 10,
+    })
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert lines[0]["index"] == 0 and lines[0]["error"] == "API key is required for Deepseek"
+    assert lines[1]["index"] == 1 and not lines[1]["success"]
+    assert lines[-1] == {**lines[-1], "type": "summary", "total": 2, "succeeded": 0, "failed": 2, "timed_out": 0}
@@ -0,0 +1,64 @@
+"""
+Tests for the versioned KB context cache.
+"""
+import uuid
+
+from app.services.kb.context_builder import KBContextBuilder
+from app.services.kb.context_cache import KBContextCache
+from app.services.kb.context_packer import PackedContext
+from app.services.kb.index_manager import KBIndexManager
+from app.services.kb.retriever import KBRetriever
+
+
+def _builder():
+    manager = KBIndexManager(index_type="exact")
+    cache = KBContextCache(max_entries=8)
+    return manager, cache, KBContextBuilder(KBRetriever(manager), cache)
+
+
+def test_repeat_build_hits_cache():
+    """An unchanged KB serves the second build from cache without retrieval."""
+    manager, cache, builder = _builder()
+    project_id = uuid.uuid4()
+    manager._project(project_id).loaded = True
+    manager.index_document(project_id, "doc-1", "Net Plan Price appears on the dashboard.", "guide.txt")
+
+    first = builder.build_kb_context(None, project_id, "Net plan price", token_budget=500)
+    second = builder.build_kb_context(None, project_id, "  net PLAN price ", token_budget=500)
+
+    assert not first.cached
+    assert second.cached
+    assert second.text == first.text
+    assert cache.stats()["hits"] == 1
+
+
+def test_version_bump_invalidates():
+    """Bumping the KB version forces a rebuild that sees the new document."""
+    manager, cache, builder = _builder()
+    project_id = uuid.uuid4()
+    manager._project(project_id).loaded = True
+    builder.build_kb_context(None, project_id, "escalation", token_budget=500)
+
+    manager.index_document(project_id, "doc-2", "Escalation goes to the supervisor queue.", "cases.txt")
+    cache.bump_version(project_id)
+    rebuilt = builder.build_kb_context(None, project_id, "escalation", token_budget=500)
+
+    assert not rebuilt.cached
+    assert rebuilt.kb_version == 1
+    assert "supervisor" in rebuilt.text
+
+
+def test_lru_eviction_and_stale_put():
+    """Oldest entries are evicted and results for a superseded version are not stored."""
+    cache = KBContextCache(max_entries=2)
+    project_id = uuid.uuid4()
+    keys = [cache.make_key(project_id, 0, f"q{i}", 100) for i in range(3)]
+    for key in keys:
+        cache.put(key, PackedContext(text=key[2]))
+
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[2]) is not None
+
+    cache.bump_version(project_id)
+    cache.put(keys[1], PackedContext(text="stale"))
+    assert cache.stats()["entries"] == 0
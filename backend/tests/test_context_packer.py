@@ -0,0 +1,50 @@
+"""
+Tests for the token-budgeted KB context packer.
+"""
+from app.services.kb.chunker import chunk_text
+from app.services.kb.context_packer import estimate_tokens, pack_chunks
+from app.services.kb.index_manager import KBSearchHit
+
+
+GUIDE = (
+    "--- Page 1 ---\n" + "Open Home then Subscription to view the plan. " * 30 +
+    "\n\n--- Page 2 ---\n" + "The Net Plan Price field shows the monthly price. " * 30
+)
+
+
+def _hits(chunks, scores):
+    return [KBSearchHit(chunk=chunk, score=score) for chunk, score in zip(chunks, scores)]
+
+
+def test_pack_respects_budget():
+    """Packed context never exceeds the token budget."""
+    chunks = chunk_text("doc-a", GUIDE, chunk_size=400, overlap=80, filename="guide.pdf")
+    packed = pack_chunks(_hits(chunks, [1.0 - i * 0.01 for i in range(len(chunks))]), token_budget=200)
+
+    assert 0 < packed.tokens_used <= 200
+    assert estimate_tokens(packed.text) == packed.tokens_used
+    assert packed.chunks_packed < len(chunks)
+
+
+def test_adjacent_chunks_merge_into_one_citation():
+    """Overlapping neighbours from one document become a single passage without repeated text."""
+    chunks = chunk_text("doc-a", GUIDE, chunk_size=400, overlap=80, filename="guide.pdf")
+    packed = pack_chunks(_hits(chunks[:3], [0.9, 0.8, 0.7]), token_budget=10000)
+
+    assert len(packed.citations) == 1
+    assert packed.citations[0]["chunk_indexes"] == [0, 1, 2]
+    assert packed.citations[0]["pages"] == [1]
+    assert packed.text.startswith("[1] guide.pdf (p. 1)")
+    body = packed.text.split("\n", 1)[1]
+    assert len(body) < sum(len(chunk.text) for chunk in chunks[:3])
+
+
+def test_duplicate_hits_and_document_cap():
+    """Repeated chunks are ignored and max_documents limits distinct sources."""
+    a = chunk_text("doc-a", "alpha " * 50, chunk_size=500, filename="a.txt")
+    b = chunk_text("doc-b", "beta " * 50, chunk_size=500, filename="b.txt")
+    hits = _hits([a[0], a[0], b[0]], [0.9, 0.9, 0.8])
+    packed = pack_chunks(hits, token_budget=10000, max_documents=1)
+
+    assert [c["filename"] for c in packed.citations] == ["a.txt"]
+    assert packed.chunks_packed == 1
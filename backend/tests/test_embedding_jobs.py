@@ -0,0 +1,170 @@
+"""
+Tests for batched, rate-limited, resumable KB embedding jobs.
+
+A stand-in for Ollama's /api/embed is served through httpx.MockTransport, so
+the pipeline's real HTTP client code runs without a model server.
+"""
+import asyncio
+import json
+import time
+import uuid
+
+import httpx
+
+from app.services.kb.chunker import chunk_text
+from app.services.kb.embedding_jobs import EmbeddingJob, EmbeddingJobManager, EmbeddingPipeline
+from app.services.kb.embedding_store import EmbeddingStore
+from app.services.kb.embeddings import HashingEmbedder, OllamaEmbedder
+from app.services.kb.index_manager import KBIndexManager
+from app.services.rate_limiter import TokenBucket
+
+
+DIM = 64
+DOCUMENT = "\n\n".join(
+    f"Section {i}: the billing screen shows invoice number {i} and the plan price for account {i}."
+    for i in range(40)
+)
+
+
+class StandInEmbedServer:
+    """Minimal /api/embed server; can fail requests to exercise retries and resume."""
+
+    def __init__(self, fail_inputs=(), status_code=500, fail_times=None, retry_after=None):
+        self.embedder = HashingEmbedder(DIM)
+        self.fail_inputs = set(fail_inputs)
+        self.status_code = status_code
+        self.fail_times = fail_times
+        self.retry_after = retry_after
+        self.requests = 0
+        self.failures = 0
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        assert request.url.path == "/api/embed"
+        payload = json.loads(request.content)
+        self.requests += 1
+        should_fail = any(text in self.fail_inputs for text in payload["input"])
+        if should_fail and (self.fail_times is None or self.failures < self.fail_times):
+            self.failures += 1
+            headers = {"Retry-After": str(self.retry_after)} if self.retry_after is not None else {}
+            return httpx.Response(self.status_code, headers=headers, json={"error": "unavailable"})
+        vectors = self.embedder.embed(payload["input"])
+        return httpx.Response(200, json={"model": payload["model"], "embeddings": vectors.tolist()})
+
+
+def _pipeline(server, store, **kwargs):
+    transport = httpx.MockTransport(server)
+    embedder = OllamaEmbedder("http://ollama.test", "stand-in-embed", DIM, transport=transport)
+    params = {"batch_size": 4, "concurrency": 3, "requests_per_second": 0, "max_retries": 1, "backoff_seconds": 0}
+    params.update(kwargs)
+    return EmbeddingPipeline(embedder, store, transport=transport, **params)
+
+
+def test_failed_run_resumes_missing_batches(tmp_path):
+    """A rerun after failures embeds only the batches that weren't stored."""
+    store = EmbeddingStore(str(tmp_path))
+    chunks = chunk_text("doc-1", DOCUMENT, chunk_size=200, overlap=20)
+    server = StandInEmbedServer(fail_inputs={chunks[5].text})
+    pipeline = _pipeline(server, store)
+
+    first = asyncio.run(pipeline.run(EmbeddingJob("doc-1", "p", "stand-in-embed"), chunks))
+
+    assert first.status == "failed"
+    assert first.completed_batches == first.total_batches - 1
+    assert store.load_vectors("stand-in-embed", "doc-1", pipeline.fingerprint(chunks)) is None
+
+    server.fail_inputs.clear()
+    server.requests = 0
+    second = asyncio.run(pipeline.run(EmbeddingJob("doc-1", "p", "stand-in-embed"), chunks))
+
+    assert second.status == "completed"
+    assert second.resumed_batches == first.completed_batches
+    assert server.requests == 1
+    assert second.chunks_embedded == len(chunks[4:8])
+    assert second.chunks_per_second > 0
+    vectors = store.load_vectors("stand-in-embed", "doc-1", pipeline.fingerprint(chunks))
+    assert vectors.shape == (len(chunks), DIM)
+
+
+def test_rate_limited_request_is_retried(tmp_path):
+    """HTTP 429 with Retry-After is retried rather than failing the job."""
+    store = EmbeddingStore(str(tmp_path))
+    chunks = chunk_text("doc-2", DOCUMENT, chunk_size=400, overlap=20)
+    server = StandInEmbedServer(fail_inputs={chunks[0].text}, status_code=429, fail_times=1, retry_after=0)
+
+    job = asyncio.run(_pipeline(server, store).run(EmbeddingJob("doc-2", "p", "stand-in-embed"), chunks))
+
+    assert job.status == "completed"
+    assert job.retries == 1
+
+
+def test_concurrency_is_bounded(tmp_path):
+    """No more than `concurrency` embedding requests are in flight at once."""
+    embedder = HashingEmbedder(DIM)
+    state = {"in_flight": 0, "peak": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        state["in_flight"] += 1
+        state["peak"] = max(state["peak"], state["in_flight"])
+        await asyncio.sleep(0.01)
+        state["in_flight"] -= 1
+        texts = json.loads(request.content)["input"]
+        return httpx.Response(200, json={"embeddings": embedder.embed(texts).tolist()})
+
+    transport = httpx.MockTransport(handler)
+    pipeline = EmbeddingPipeline(
+        OllamaEmbedder("http://ollama.test", "stand-in-embed", DIM),
+        EmbeddingStore(str(tmp_path)),
+        batch_size=2,
+        concurrency=2,
+        requests_per_second=0,
+        transport=transport
+    )
+    chunks = chunk_text("doc-3", DOCUMENT, chunk_size=200, overlap=20)
+
+    job = asyncio.run(pipeline.run(EmbeddingJob("doc-3", "p", "stand-in-embed"), chunks))
+
+    assert job.status == "completed"
+    assert state["peak"] == 2
+
+
+def test_completed_job_makes_document_vector_searchable(tmp_path):
+    """With a remote embedder a document is keyword-only until its job completes."""
+    server = StandInEmbedServer()
+    transport = httpx.MockTransport(server)
+    embedder = OllamaEmbedder("http://ollama.test", "stand-in-embed", DIM, transport=transport)
+    store = EmbeddingStore(str(tmp_path))
+    manager = KBIndexManager(embedder=embedder, index_type="exact", store=store)
+    jobs = EmbeddingJobManager(
+        index_manager=manager,
+        pipeline=EmbeddingPipeline(embedder, store, requests_per_second=0, transport=transport)
+    )
+    project_id = uuid.uuid4()
+    manager._project(project_id).loaded = True
+    manager.index_document(project_id, "doc-4", DOCUMENT, "billing.txt")
+
+    assert manager.vector_search(project_id, "invoice number 7") == []
+    assert manager.lexical_search(project_id, "invoice number 7")
+
+    async def embed():
+        await jobs.start(project_id, "doc-4", DOCUMENT, "billing.txt")
+        return await jobs.wait("doc-4")
+
+    job = asyncio.run(embed())
+
+    assert job.status == "completed"
+    hits = manager.vector_search(project_id, "invoice number 7", top_k=3)
+    assert hits and hits[0].chunk.doc_id == "doc-4"
+
+
+def test_token_bucket_paces_requests():
+    """Beyond the burst capacity, acquires are spaced at the configured rate."""
+    bucket = TokenBucket(rate=50, capacity=1)
+
+    async def acquire_all():
+        for _ in range(4):
+            await bucket.acquire()
+
+    started = time.perf_counter()
+    asyncio.run(acquire_all())
+
+    assert time.perf_counter() - started >= 0.05
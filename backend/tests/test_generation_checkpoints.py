@@ -0,0 +1,67 @@
+"""
+Tests for checkpointed, resumable generation runs.
+"""
+import asyncio
+
+import pytest
+
+from app.services.generation import CheckpointError, GenerationCheckpointStore, GenerationRun
+from tests.generation_support import generation_inputs, generation_pipeline, mock_generation_llm, sample_test_case
+
+
+def _pipeline(failing, stats):
+    """Pipeline planning Login and Logout; scenarios in `failing` get a 400 from the generator."""
+    cases = {
+        title: None if title in failing else [sample_test_case(f"{title} 1"), sample_test_case(f"{title} 2")]
+        for title in ("Login", "Logout")
+    }
+    return generation_pipeline(mock_generation_llm(["Login", "Logout"], cases, stats=stats), concurrency=2)
+
+
+def _inputs(requirements="Users log in and out."):
+    return generation_inputs(requirements=requirements)
+
+
+def test_resume_skips_completed_work(tmp_path):
+    """A resumed run replays the plan, completed scenarios and persisted test cases; only failed work reruns."""
+    store = GenerationCheckpointStore(str(tmp_path))
+    saved = []
+
+    async def sink(test_case):
+        saved.append(test_case["test_case_id"])
+        return f"id-{test_case['test_case_id']}"
+
+    stats = {}
+    pipeline = _pipeline({"Logout"}, stats)
+    first = GenerationRun(project_id="p1")
+    checkpoint = store.begin("p1", first.run_id, pipeline.fingerprint(_inputs()))
+    asyncio.run(pipeline.run(first, _inputs(), sink=sink, checkpoint=checkpoint))
+    assert first.scenarios_completed == 1 and first.scenarios_failed == 1
+    assert sorted(stats["calls"]) == ["Login", "Logout", "planner"] and sorted(saved) == ["TC001", "TC002"]
+
+    stats = {}
+    pipeline = _pipeline(set(), stats)
+    checkpoint = store.open("p1", first.run_id, pipeline.fingerprint(_inputs()))
+    resumed = GenerationRun(project_id="p1", run_id=first.run_id, resumed=True)
+    asyncio.run(pipeline.run(resumed, _inputs(), sink=sink, checkpoint=checkpoint))
+
+    assert resumed.status == "completed" and stats["calls"] == ["Logout"]
+    assert resumed.scenarios_restored == 1 and resumed.test_cases_restored == 2
+    assert resumed.test_cases_passed == 4 and sorted(saved) == ["TC001", "TC002", "TC003", "TC004"]
+    assert sorted(resumed.test_case_ids) == ["id-TC001", "id-TC002", "id-TC003", "id-TC004"]
+
+
+def test_changed_inputs_cannot_resume(tmp_path):
+    """Checkpoints are keyed by the inputs fingerprint; a new run discards the project's older ones."""
+    store = GenerationCheckpointStore(str(tmp_path))
+    pipeline = _pipeline(set(), {})
+    store.begin("p1", "run-1", pipeline.fingerprint(_inputs()))
+    assert store.find("p1")["run_id"] == "run-1"
+
+    with pytest.raises(CheckpointError):
+        store.open("p1", "run-1", pipeline.fingerprint(_inputs("Users reset passwords.")))
+    with pytest.raises(CheckpointError):
+        store.open("p1", "run-unknown", pipeline.fingerprint(_inputs()))
+
+    store.begin("p1", "run-2", pipeline.fingerprint(_inputs()))
+    assert store.find("p1", "run-1") is None and store.find("p1")["run_id"] == "run-2"
@@ -0,0 +1,94 @@
+"""
+Tests for streaming generation progress (event log, progress messages, SSE endpoint).
+"""
+import asyncio
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app.api.v1.generation import sse_message
+from app.main import app
+from app.services.generation import GenerationEventLog, GenerationProgress, GenerationRun
+from tests.generation_support import generation_inputs, generation_pipeline, mock_generation_llm, sample_test_case
+
+
+def _pipeline(scenarios):
+    cases = {title: [sample_test_case("Valid login")] for title in scenarios}
+    return generation_pipeline(mock_generation_llm(scenarios, cases), concurrency=2)
+
+
+def test_event_log_replays_then_follows_live_messages():
+    """Late followers get earlier messages first, heartbeats while idle, and stop on close."""
+    async def run():
+        log = GenerationEventLog()
+        log.publish("step", message="first")
+        received = []
+
+        async def follow():
+            async for event in log.follow(heartbeat=0.02):
+                received.append(event)
+                if event is None and len(received) == 2:
+                    log.publish("step", message="second", progress=None)
+                    log.close()
+
+        await asyncio.wait_for(follow(), 2)
+        resumed = [event async for event in log.follow(after=1)]
+        return received, resumed
+
+    received, resumed = asyncio.run(run())
+    assert [e and e["message"] for e in received] == ["first", None, "second"]
+    assert "progress" not in received[2]
+    assert [e["id"] for e in resumed] == [2]
+
+
+def test_progress_messages_follow_the_run():
+    """A run publishes steps, KB usage, each test case, monotonic progress and a final complete."""
+    run = GenerationRun(project_id="p1")
+    progress = GenerationProgress(run, generation_inputs().citations)
+
+    async def go():
+        await _pipeline(["Login", "Logout", "Reset"]).run(run, generation_inputs(), on_event=progress)
+        progress.finish()
+
+    asyncio.run(go())
+    events = run.events.events
+    types = [event["type"] for event in events]
+    assert types[0] == "step" and types[1] == "kb_message" and types[-1] == "complete"
+    assert events[1]["kbMessage"] == "Using guide.pdf for context"
+
+    test_cases = [event for event in events if event["type"] == "test_case"]
+    assert [event["testCasesCount"] for event in test_cases] == [1, 2, 3]
+    assert {event["testCase"]["test_case_id"] for event in test_cases} == {"TC001", "TC002", "TC003"}
+
+    percentages = [event["progress"] for event in events if event["type"] == "progress"]
+    assert len(percentages) == 3 and percentages == sorted(percentages) and percentages[-1] == 99
+    assert events[-1]["progress"] == 100 and events[-1]["kbComplianceScore"] == 100
+    assert run.events.closed and [event["id"] for event in events] == list(range(1, len(events) + 1))
+
+
+def test_failed_run_ends_with_error_message():
+    """A run that fails publishes an error message and closes the feed."""
+    run = GenerationRun(project_id="p1")
+    progress = GenerationProgress(run)
+
+    async def go():
+        await _pipeline([]).run(run, generation_inputs(), on_event=progress)
+        progress.finish()
+
+    asyncio.run(go())
+    assert run.events.events[-1] == {"id": 2, "type": "error", "error": "Planner returned no scenarios", "testCasesCount": 0}
+
+
+def test_sse_message_format():
+    """Messages carry their id for Last-Event-ID; idle ticks are comments."""
+    assert sse_message({"id": 7, "type": "step", "message": "hi"}) == (
+        'id: 7\ndata: {"id": 7, "type": "step", "message": "hi"}\n\n'
+    )
+    assert sse_message(None) == ": keep-alive\n\n"
+
+
+def test_stream_without_run_is_not_found():
+    """Following a project with no run (and not starting one) is a 404."""
+    client = TestClient(app)
+    response = client.get(f"/api/v1/generate/{uuid.uuid4()}/stream", params={"start": "false"})
+    assert response.status_code == 404
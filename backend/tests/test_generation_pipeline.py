@@ -0,0 +1,151 @@
+"""
+Tests for the Planner → Generator → Executor generation pipeline.
+"""
+import asyncio
+import json
+
+import httpx
+
+from app.services.generation import ExecutorAgent, GenerationRun, GeneratorAgent, Scenario, parse_json
+from app.services.llm import CircuitBreakerRegistry, LLMHedger, LLMScheduler
+from tests.generation_support import (
+    generation_inputs,
+    generation_pipeline,
+    mock_generation_llm,
+    mock_llm,
+    ollama_reply,
+    sample_test_case,
+)
+
+
+def _run(pipeline, sink=None):
+    saved = []
+
+    async def collect(test_case):
+        saved.append(test_case)
+        if sink is not None:
+            await sink(test_case)
+        return f"id-{len(saved)}"
+
+    run = asyncio.run(pipeline.run(GenerationRun(project_id="p1"), generation_inputs(), sink=collect))
+    return run, saved
+
+
+def test_pipeline_generates_validates_and_persists():
+    """Every scenario fans out; valid test cases are numbered and persisted, invalid ones rejected."""
+    cases = {
+        "Login": [sample_test_case("Valid login"), sample_test_case("Locked account")],
+        "Logout": [sample_test_case("Logout"), {"title": "No result", "steps": ["Click logout"]}],
+    }
+    run, saved = _run(generation_pipeline(mock_generation_llm(list(cases), cases)))
+
+    assert run.status == "completed" and run.stage == "done"
+    assert len(run.scenarios) == 2 and run.scenarios_completed == 2
+    assert run.test_cases_generated == 4 and run.test_cases_passed == 3 and run.test_cases_rejected == 1
+    assert run.test_cases_malformed == 0
+    assert sorted(tc["test_case_id"] for tc in saved) == ["TC001", "TC002", "TC003"]
+    assert run.test_case_ids == ["id-1", "id-2", "id-3"]
+    assert run.prompt_tokens == 30 and run.completion_tokens == 15
+    assert saved[0]["priority"] == "High" and saved[0]["kb_compliance_score"] == 100
+    assert run.first_test_case_seconds is not None
+
+
+def test_malformed_test_case_is_repaired_alone():
+    """A test case failing the schema is counted and re-requested on its own; the rest stream through."""
+    stats = {"in_flight": 0, "max_in_flight": 0}
+    cases = {"Login": [sample_test_case("Valid login"), {"title": "No steps", "steps": []}, sample_test_case("Locked account")]}
+    run, saved = _run(generation_pipeline(mock_generation_llm(list(cases), cases, stats=stats)))
+
+    assert run.status == "completed"
+    assert run.test_cases_malformed == 1 and stats["repairs"] == 1
+    assert run.errors == ["malformed test case: steps: Value error, at least one step is required"]
+    assert [tc["title"] for tc in saved] == ["Valid login", "Locked account", "Repaired"]
+    assert run.prompt_tokens == 30 and run.completion_tokens == 15
+
+
+def test_numbering_continues_after_existing_test_cases():
+    """A new run numbers its test cases after the project's existing ones instead of reusing TC001."""
+    cases = {"Login": [sample_test_case("Valid login"), sample_test_case("Locked account")]}
+    inputs = generation_inputs()
+    inputs.test_case_offset = 7
+    saved = []
+
+    async def sink(test_case):
+        saved.append(test_case["test_case_id"])
+
+    asyncio.run(generation_pipeline(mock_generation_llm(list(cases), cases)).run(GenerationRun(project_id="p1"), inputs, sink=sink))
+    assert sorted(saved) == ["TC008", "TC009"]
+
+
+def test_stages_overlap():
+    """Test cases of a finished scenario are persisted while another scenario is still generating."""
+    gate = {"Slow": asyncio.Event()}
+    cases = {"Fast": [sample_test_case("Fast case")], "Slow": [sample_test_case("Slow case")]}
+
+    async def sink(test_case):
+        # Only reachable before "Slow" finishes if the executor runs concurrently
+        gate["Slow"].set()
+
+    run, saved = _run(generation_pipeline(mock_generation_llm(["Slow", "Fast"], cases, gate=gate)), sink=sink)
+    assert run.status == "completed"
+    assert [tc["title"] for tc in saved] == ["Fast case", "Slow case"]
+
+
+def test_generator_concurrency_is_bounded():
+    """No more than `concurrency` scenarios are generated at once."""
+    titles = [f"Scenario {i}" for i in range(6)]
+    stats = {"in_flight": 0, "max_in_flight": 0}
+    run, _ = _run(generation_pipeline(mock_generation_llm(titles, {t: [sample_test_case(t)] for t in titles}, stats=stats), concurrency=2))
+
+    assert run.test_cases_passed == 6
+    assert stats["max_in_flight"] == 2
+
+
+def test_failed_scenario_does_not_fail_the_run():
+    """A scenario whose generation fails is skipped; the run fails only if all do."""
+    run, saved = _run(generation_pipeline(mock_generation_llm(["Good", "Broken"], {"Good": [sample_test_case("Good case")]})))
+    assert run.status == "completed" and run.scenarios_failed == 1 and len(saved) == 1
+    assert run.errors[0].startswith("S2: ")
+
+    run, saved = _run(generation_pipeline(mock_generation_llm(["Broken"], {})))
+    assert run.status == "failed" and "All 1 scenarios failed" in run.error and saved == []
+
+
+def test_executor_normalizes_and_scores():
+    """String steps, unknown priorities and KB references are normalized and scored."""
+    scenario = Scenario(scenario_id="S1", title="Login", category="Functional")
+    citations = [{"ref": 1, "filename": "guide.pdf"}, {"ref": 2, "filename": "faq.pdf"}]
+    verdict = ExecutorAgent().validate(
+        {"title": "Login", "steps": "Open page\nSubmit", "priority": "urgent", "kb_references": ["[1]", "[7]"]},
+        scenario,
+        citations
+    )
+    assert not verdict.passed and verdict.errors == ["missing expected result"]
+    assert verdict.test_case["steps"][1] == {"step": 2, "action": "Submit", "expected": ""}
+    assert verdict.test_case["priority"] == "Medium" and verdict.test_case["category"] == "Functional"
+    assert verdict.test_case["kb_compliance_score"] == 50
+    assert ExecutorAgent.kb_compliance([], []) is None
+
+
+def test_parse_json_tolerates_prose_and_fences():
+    """JSON is found inside code fences or after a preamble."""
+    assert parse_json('```json\n{"a": 1}\n```') == {"a": 1}
+    assert parse_json('Here you go: [{"a": 1}] Hope this helps!') == [{"a": 1}]
+
+
+def test_generator_fails_over_to_alternate_configuration():
+    """Generator calls go through the hedger, which fails over to the project's other configuration."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "ollama.test":
+            return httpx.Response(500, json={"error": "boom"})
+        return ollama_reply(json.dumps({"test_cases": [sample_test_case("From alternate")]}))
+
+    scheduler = LLMScheduler(client=mock_llm(handler), limits={}, max_retries=0, base_delay=0, breakers=CircuitBreakerRegistry(min_calls=100))
+    inputs = generation_inputs()
+    inputs.alternates = [{"provider": "ollama", "model": "llama3", "base_url": "http://backup.test"}]
+
+    async def collect():
+        scenario = Scenario(scenario_id="S1", title="Login")
+        return [tc async for tc in GeneratorAgent(LLMHedger(scheduler, enabled=False)).generate(scenario, inputs)]
+
+    assert [tc["title"] for tc in asyncio.run(collect())] == ["From alternate"]
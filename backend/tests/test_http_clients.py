@@ -0,0 +1,95 @@
+"""
+Tests for pooled LLM provider HTTP clients.
+"""
+import asyncio
+
+import httpx
+
+from app.services.http_clients import HTTPClientRegistry, http2_available
+from app.services.llm_connection_tester import LLMConnectionTester
+
+
+def test_one_client_per_origin():
+    """Base URLs on the same origin share a client; other origins get their own."""
+    registry = HTTPClientRegistry()
+
+    async def scenario():
+        first = registry.get("http://127.0.0.1:11434")
+        again = registry.get("http://127.0.0.1:11434/api")
+        other = registry.for_provider("deepseek")
+        await registry.aclose()
+        return first, again, other
+
+    first, again, other = asyncio.run(scenario())
+
+    assert first is again
+    assert other is not first
+    assert first.is_closed and other.is_closed
+    assert registry.stats()["clients_created"] == 2
+
+
+def test_pool_limits_and_http2_configuration():
+    """Pool limits come from the registry; HTTP/2 is only used for https origins."""
+    registry = HTTPClientRegistry(max_connections=7, max_keepalive_connections=3, http2=True)
+
+    assert registry.limits.max_connections == 7
+    assert registry.limits.max_keepalive_connections == 3
+    assert registry.http2 == http2_available()
+    assert registry.stats()["max_keepalive_connections"] == 3
+
+
+def test_new_event_loop_gets_fresh_client():
+    """Connections are loop-bound, so a client isn't reused across event loops."""
+    registry = HTTPClientRegistry()
+
+    async def get_client():
+        return registry.get("https://openrouter.ai/api/v1")
+
+    first = asyncio.run(get_client())
+    second = asyncio.run(get_client())
+
+    assert first is not second
+
+
+def test_alternating_loops_keep_their_clients():
+    """Each live loop keeps its own client; clients of closed loops are dropped."""
+    registry = HTTPClientRegistry()
+    loops = [asyncio.new_event_loop(), asyncio.new_event_loop()]
+
+    async def get_client():
+        return registry.get("http://127.0.0.1:11434")
+
+    clients = [loops[i % 2].run_until_complete(get_client()) for i in range(4)]
+    assert clients[0] is clients[2] and clients[1] is clients[3] and clients[0] is not clients[1]
+    assert registry.stats()["clients_created"] == 2
+
+    loops[0].close()
+    loops[1].run_until_complete(get_client())
+    assert len(registry._clients) == 1
+    loops[1].run_until_complete(registry.aclose())
+    loops[1].close()
+
+
+def test_connection_tester_reuses_pooled_client():
+    """Repeated connection tests go through the same pooled client."""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        if request.url.path == "/api/tags":
+            return httpx.Response(200, json={"models": [{"name": "llama3"}]})
+        return httpx.Response(200, json={"response": "ok"})
+
+    registry = HTTPClientRegistry(transport=httpx.MockTransport(handler))
+    tester = LLMConnectionTester(clients=registry)
+
+    async def scenario():
+        results = [await tester.test_ollama_connection("http://ollama.test", "llama3") for _ in range(3)]
+        await registry.aclose()
+        return results
+
+    results = asyncio.run(scenario())
+
+    assert all(result["success"] for result in results)
+    assert calls == ["/api/tags", "/api/generate"] * 3
+    assert registry.stats()["clients_created"] == 1
@@ -0,0 +1,55 @@
+"""
+Tests for BM25 keyword search and hybrid rank fusion.
+"""
+import asyncio
+import uuid
+
+from app.services.kb.index_manager import KBIndexManager
+from app.services.kb.lexical_index import BM25Index
+from app.services.kb.retriever import KBRetriever, reciprocal_rank_fusion
+
+
+def test_bm25_prefers_exact_phrase():
+    """Bigram terms rank the chunk with the exact field name first."""
+    index = BM25Index()
+    index.add("a", "The price of the net plan is shown later")
+    index.add("b", "Verify the Net Plan Price field on the dashboard")
+    index.add("c", "Escalate the case to a supervisor")
+
+    results = index.search("Net Plan Price", k=3)
+    assert results[0][0] == "b"
+    assert "c" not in {label for label, _ in results}
+
+
+def test_bm25_remove():
+    """Removed chunks no longer match."""
+    index = BM25Index()
+    index.add("a", "subscription dashboard")
+    index.remove("a")
+    assert index.search("subscription", k=5) == []
+    assert len(index) == 0
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    """Items ranked by both retrievers beat items ranked highly by only one."""
+    fused = reciprocal_rank_fusion([["x", "both"], ["y", "both"]], rrf_k=60)
+    assert fused[0][0] == "both"
+    assert {label for label, _ in fused} == {"x", "y", "both"}
+
+
+def test_hybrid_search_reports_stage_timings():
+    """Hybrid retrieval fuses both stages and reports per-stage latency."""
+    manager = KBIndexManager(index_type="exact")
+    retriever = KBRetriever(manager)
+    project_id = uuid.uuid4()
+    manager._project(project_id).loaded = True
+    manager.index_document(project_id, "doc-1", "Home → Subscription shows the Net Plan Price.", "guide.txt")
+    manager.index_document(project_id, "doc-2", "Agents escalate unresolved tickets to supervisors.", "cases.txt")
+
+    result = asyncio.run(retriever.search(None, project_id, "net plan price", top_k=2, mode="hybrid"))
+    assert result.hits[0].chunk.doc_id == "doc-1"
+    assert {"load", "vector", "lexical", "fusion", "total"} <= set(result.timings_ms)
+
+    sync_result = retriever.search_sync(None, project_id, "escalate tickets", top_k=1, mode="lexical")
+    assert sync_result.hits[0].chunk.doc_id == "doc-2"
+    assert "vector" not in sync_result.timings_ms
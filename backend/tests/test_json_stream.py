@@ -0,0 +1,86 @@
+"""
+Tests for incremental parsing of streamed LLM JSON output.
+"""
+import asyncio
+import json
+
+import httpx
+
+from app.services.generation import GeneratorAgent, IncrementalJSONParser, Scenario
+from tests.generation_support import generation_inputs, mock_llm
+
+
+def _feed(text, chunk=1):
+    parser = IncrementalJSONParser()
+    items = []
+    for start in range(0, len(text), chunk):
+        items.extend(parser.feed(text[start:start + chunk]))
+    return parser, items
+
+
+def test_items_complete_as_soon_as_they_close():
+    """Each list item is returned by the delta holding its closing brace, not at end of stream."""
+    text = '{"test_cases": [{"title": "A", "steps": ["x"]}, {"title": "B", "steps": ["y"]}]}'
+    parser = IncrementalJSONParser()
+    first_close = text.index("}") + 1
+    assert parser.feed(text[:first_close - 1]) == []
+    items = parser.feed(text[first_close - 1:first_close])
+    assert [item.value["title"] for item in items] == ["A"]
+    assert [item.value["title"] for item in parser.feed(text[first_close:])] == ["B"]
+    assert parser.close() == [] and parser.items == 2
+
+
+def test_prose_fences_and_tricky_strings():
+    """Leading prose with brackets, code fences, nested arrays and braces or quotes inside strings."""
+    case = {"title": 'Quote \\" and {brace} [1]', "steps": [{"action": "a", "expected": "}]"}], "test_data": {"ids": [1, [2]]}}
+    text = "Sure [1]! Here you go:\n```json\n" + json.dumps({"test_cases": [case, case]}) + "\n```\nDone."
+    for chunk in (1, 7, len(text)):
+        parser, items = _feed(text, chunk)
+        assert [item.value for item in items] == [case, case]
+
+
+def test_bare_list_and_trailing_commas():
+    """A bare list works, and trailing commas inside an item are tolerated."""
+    _, items = _feed('[{"title": "A", "steps": ["x",],}, {"title": "B", "steps": []}]')
+    assert [item.ok for item in items] == [True, True]
+    assert items[0].value == {"title": "A", "steps": ["x"]}
+
+
+def test_broken_and_truncated_items_are_reported():
+    """Invalid JSON is reported with its raw text; an item cut off by the end of the stream too."""
+    parser, items = _feed('{"test_cases": [{"title": "A" "steps": []}, {"title": "B", "steps": ["x"]}, {"title": "C", "ste')
+    assert [item.ok for item in items] == [False, True]
+    assert items[0].raw == '{"title": "A" "steps": []}' and items[0].error.startswith("invalid JSON")
+    truncated = parser.close()
+    assert len(truncated) == 1 and truncated[0].index == 2 and truncated[0].error.startswith("truncated")
+
+
+def test_generator_streams_and_repairs_invalid_json():
+    """The Generator yields parsed items and re-requests only the one that is not valid JSON."""
+    prompts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        system, prompt = body["messages"][0]["content"], body["messages"][1]["content"]
+        prompts.append(prompt)
+        if system.startswith("You fix malformed"):
+            content = json.dumps({"title": "Fixed", "steps": ["Retry"], "expected_result": "ok"})
+        else:
+            content = '{"test_cases": [{"title": "Good", "steps": ["Go"]}, {"title": "Bad", steps: ["Go"]}]}'
+        chunks = [content[i:i + 5] for i in range(0, len(content), 5)]
+        lines = [{"message": {"content": chunk}, "done": False} for chunk in chunks]
+        lines.append({"done": True, "prompt_eval_count": 3, "eval_count": 2})
+        return httpx.Response(200, content="\n".join(json.dumps(line) for line in lines).encode())
+
+    llm = mock_llm(handler)
+    inputs = generation_inputs()
+    broken = []
+
+    async def collect():
+        scenario = Scenario(scenario_id="S1", title="Login")
+        return [tc async for tc in GeneratorAgent(llm).generate(scenario, inputs, on_broken=broken.append)]
+
+    test_cases = asyncio.run(collect())
+    assert [tc["title"] for tc in test_cases] == ["Good", "Fixed"]
+    assert len(broken) == 1 and len(prompts) == 2
+    assert '{"title": "Bad", steps: ["Go"]}' in prompts[1]
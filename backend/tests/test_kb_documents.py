@@ -0,0 +1,78 @@
+"""
+Tests for KB document reactivation and near-duplicate superseding.
+"""
+import pytest
+from fastapi import BackgroundTasks, HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1.knowledge_base import update_kb_document
+from app.core.database import Base
+from app.models.knowledge_base_document import KnowledgeBaseDocument
+from app.models.project import Project
+from app.services.kb import kb_duplicate_detector
+
+GUIDE = " ".join(f"step {n} of the login guide opens the account page" for n in range(40))
+
+
+@compiles(UUID, "sqlite")
+def _uuid_on_sqlite(type_, compiler, **kw):
+    return "CHAR(32)"
+
+
+def _session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)()
+
+
+def _superseded_pair(db):
+    """An inactive guide superseded by a re-export that is still active."""
+    project = Project(name="KB")
+    db.add(project)
+    db.flush()
+    documents = []
+    for filename, text in (("guide.pdf", GUIDE), ("guide-v2.pdf", GUIDE + " again")):
+        document = KnowledgeBaseDocument(
+            project_id=project.id,
+            filename=filename,
+            file_type=".pdf",
+            file_size=len(text),
+            file_hash=filename,
+            extracted_text=text,
+            minhash_signature=kb_duplicate_detector.signature(text)
+        )
+        db.add(document)
+        documents.append(document)
+    db.flush()
+    old, new = documents
+    old.is_active = False
+    old.superseded_by = new.id
+    db.commit()
+    return old, new
+
+
+def _patch(db, doc_id, **params):
+    values = {"filename": None, "doc_type": None, "is_active": True, "supersede_near_duplicates": None}
+    values.update(params)
+    return update_kb_document(doc_id, BackgroundTasks(), db=db, **values)
+
+
+def test_patch_cannot_reactivate_superseded_document():
+    """Reactivating a document whose replacement is still active is refused unless it supersedes it."""
+    db = _session()
+    old, new = _superseded_pair(db)
+
+    with pytest.raises(HTTPException) as error:
+        _patch(db, old.id, supersede_near_duplicates=False)
+    db.rollback()
+    assert error.value.status_code == 409
+    assert db.get(KnowledgeBaseDocument, old.id).is_active is False
+
+    response = _patch(db, old.id, supersede_near_duplicates=True)
+    assert response.is_active and response.superseded_by is None
+    assert [duplicate.doc_id for duplicate in response.near_duplicates] == [new.id]
+    replaced = db.get(KnowledgeBaseDocument, new.id)
+    assert replaced.is_active is False and replaced.superseded_by == old.id
@@ -0,0 +1,153 @@
+"""
+Tests for the unified streaming LLM client and provider adapters.
+"""
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.services.http_clients import HTTPClientRegistry
+from app.services.llm import LLMClient, LLMError, LLMRequest
+
+
+def _client(handler) -> LLMClient:
+    return LLMClient(clients=HTTPClientRegistry(transport=httpx.MockTransport(handler)))
+
+
+def _sse(*payloads) -> bytes:
+    events = [f"data: {json.dumps(p)}\n\n" for p in payloads]
+    return "".join(events).encode()
+
+
+def _stream_all(client: LLMClient, request: LLMRequest):
+    async def run():
+        deltas = []
+        async with client.stream(request) as stream:
+            async for text in stream:
+                deltas.append(text)
+        return deltas, stream.response
+    return asyncio.run(run())
+
+
+def test_ollama_ndjson_stream():
+    """Ollama NDJSON chunks stream as deltas; the final chunk carries usage."""
+    seen = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen["path"] = request.url.path
+        seen["body"] = json.loads(request.content)
+        lines = [
+            {"message": {"content": "Given "}, "done": False},
+            {"message": {"content": "a login"}, "done": False},
+            {"message": {"content": ""}, "done": True, "done_reason": "stop", "prompt_eval_count": 12, "eval_count": 4},
+        ]
+        return httpx.Response(200, content="\n".join(json.dumps(line) for line in lines).encode())
+
+    request = LLMRequest.from_prompt("ollama", "llama3", "Write a test", system="Be brief", base_url="http://ollama.test", max_tokens=50)
+    deltas, response = _stream_all(_client(handler), request)
+
+    assert deltas == ["Given ", "a login"]
+    assert response.text == "Given a login"
+    assert response.usage.total_tokens == 16 and not response.usage.estimated
+    assert response.finish_reason == "stop"
+    assert response.first_token_ms is not None and response.latency_ms >= response.first_token_ms
+    assert seen["path"] == "/api/chat"
+    assert seen["body"]["options"]["num_predict"] == 50
+    assert seen["body"]["messages"][0] == {"role": "system", "content": "Be brief"}
+
+
+def test_openai_style_sse_stream():
+    """OpenRouter/DeepSeek SSE deltas are joined; the usage chunk and [DONE] are handled."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.headers["Authorization"] == "Bearer sk-test"
+        body = _sse(
+            {"choices": [{"delta": {"content": "Step 1"}, "finish_reason": None}]},
+            {"choices": [{"delta": {"content": ": open"}, "finish_reason": "stop"}]},
+            {"choices": [], "usage": {"prompt_tokens": 9, "completion_tokens": 3}},
+        ) + b": keep-alive\n\ndata: [DONE]\n\n"
+        return httpx.Response(200, content=body)
+
+    request = LLMRequest.from_prompt("deepseek", "deepseek-chat", "Write a test", api_key="sk-test")
+    _, response = _stream_all(_client(handler), request)
+
+    assert response.text == "Step 1: open"
+    assert response.finish_reason == "stop"
+    assert response.usage.prompt_tokens == 9 and response.usage.completion_tokens == 3
+
+
+def test_gemini_sse_stream():
+    """Gemini streamGenerateContent chunks are decoded and the key goes in a header."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.url.path.endswith("/models/gemini-1.5-flash:streamGenerateContent")
+        assert request.url.params["alt"] == "sse"
+        assert request.headers["x-goog-api-key"] == "g-key"
+        assert json.loads(request.content)["systemInstruction"]["parts"][0]["text"] == "Be brief"
+        return httpx.Response(200, content=_sse(
+            {"candidates": [{"content": {"parts": [{"text": "Verify "}]}}]},
+            {"candidates": [{"content": {"parts": [{"text": "totals"}]}, "finishReason": "STOP"}],
+             "usageMetadata": {"promptTokenCount": 7, "candidatesTokenCount": 2}},
+        ))
+
+    request = LLMRequest.from_prompt("gemini", "gemini-1.5-flash", "Write a test", system="Be brief", api_key="g-key")
+    _, response = _stream_all(_client(handler), request)
+
+    assert response.text == "Verify totals"
+    assert response.finish_reason == "stop"
+    assert response.usage.total_tokens == 9
+
+
+def test_missing_usage_is_estimated():
+    """Without provider usage, tokens are estimated locally and flagged as such."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=_sse({"choices": [{"delta": {"content": "Some output text"}}]}))
+
+    response = asyncio.run(_client(handler).complete(
+        LLMRequest.from_prompt("openrouter", "meta-llama/llama-3-8b", "prompt", api_key="k")
+    ))
+
+    assert response.usage.estimated
+    assert response.usage.completion_tokens > 0
+
+
+def test_rate_limit_raises_retryable_error():
+    """HTTP 429 surfaces as a retryable LLMError with the Retry-After hint."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(429, headers={"Retry-After": "3"}, json={"error": {"message": "Rate limit exceeded"}})
+
+    with pytest.raises(LLMError) as error:
+        asyncio.run(_client(handler).complete(LLMRequest.from_prompt("openrouter", "m", "p", api_key="k")))
+
+    assert error.value.status_code == 429
+    assert error.value.retryable
+    assert error.value.retry_after == 3.0
+    assert error.value.message == "Rate limit exceeded"
+
+
+def test_cancel_closes_stream():
+    """Cancelling mid-stream stops reading and keeps the partial response."""
+    produced = []
+
+    async def body():
+        for i in range(100):
+            produced.append(i)
+            yield (json.dumps({"message": {"content": f"t{i} "}, "done": False}) + "\n").encode()
+            await asyncio.sleep(0)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=body())
+
+    async def run():
+        async with _client(handler).stream(
+            LLMRequest.from_prompt("ollama", "llama3", "p", base_url="http://ollama.test")
+        ) as stream:
+            async for text in stream:
+                if text == "t2 ":
+                    stream.cancel()
+        return stream.response
+
+    response = asyncio.run(run())
+
+    assert response.cancelled
+    assert response.text == "t0 t1 t2 "
+    assert len(produced) < 100
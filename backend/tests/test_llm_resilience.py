@@ -0,0 +1,262 @@
+"""
+Tests for per-provider circuit breakers and hedged LLM requests.
+"""
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+from app.services.http_clients import HTTPClientRegistry
+from app.services.llm import (
+    CircuitBreakerRegistry,
+    CircuitOpenError,
+    LLMClient,
+    LLMError,
+    LLMHedger,
+    LLMRequest,
+    LLMScheduler,
+)
+from app.services.llm.circuit_breaker import CLOSED, HALF_OPEN, OPEN, percentile
+
+
+def _ndjson(*texts: str) -> bytes:
+    lines = [{"message": {"content": t}, "done": False} for t in texts]
+    lines.append({"done": True, "prompt_eval_count": 1, "eval_count": len(texts)})
+    return "\n".join(json.dumps(line) for line in lines).encode()
+
+
+def _sse(text: str) -> bytes:
+    chunk = {"choices": [{"delta": {"content": text}, "finish_reason": "stop"}]}
+    return f"data: {json.dumps(chunk)}\n\ndata: [DONE]\n\n".encode()
+
+
+def _breakers(**kwargs) -> CircuitBreakerRegistry:
+    params = {"window_seconds": 60, "min_calls": 3, "failure_rate": 0.5, "slow_call_ms": 10000, "cooldown_seconds": 60}
+    params.update(kwargs)
+    return CircuitBreakerRegistry(**params)
+
+
+def _scheduler(handler, breakers=None) -> LLMScheduler:
+    client = LLMClient(clients=HTTPClientRegistry(transport=httpx.MockTransport(handler)))
+    return LLMScheduler(client=client, limits={}, max_retries=0, base_delay=0, breakers=breakers or _breakers())
+
+
+def _ollama(host: str = "ollama.test") -> LLMRequest:
+    return LLMRequest.from_prompt("ollama", "llama3", "p", base_url=f"http://{host}")
+
+
+def _deepseek() -> LLMRequest:
+    return LLMRequest.from_prompt("deepseek", "deepseek-chat", "p", api_key="k", base_url="http://deepseek.test")
+
+
+def test_percentile_nearest_rank():
+    """Percentiles use the nearest-rank method."""
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile([7.0], 95) == 7
+    assert percentile([], 95) == 0
+
+
+def test_breaker_trips_and_recovers_through_half_open():
+    """Failures open the circuit; after the cooldown one probe decides whether it closes."""
+    breaker = _breakers(cooldown_seconds=0.05).get("openrouter")
+
+    breaker.record(True, 100)
+    breaker.record(False)
+    assert breaker.state == CLOSED
+    breaker.record(False)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+    time.sleep(0.06)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # Only one probe at a time
+    breaker.record(True, 120)
+    assert breaker.state == CLOSED
+
+
+def test_slow_calls_count_as_failures():
+    """Time to first token above the slow-call threshold trips the breaker."""
+    breaker = _breakers(slow_call_ms=1000).get("gemini")
+
+    for latency in [200, 1500, 2500]:
+        breaker.record(True, latency)
+
+    assert breaker.state == OPEN
+    assert breaker.stats()["slow_calls"] == 2
+
+
+def test_scheduler_fails_fast_when_circuit_is_open():
+    """Once a provider keeps failing, calls are rejected without reaching it."""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(1)
+        return httpx.Response(503, json={"error": "down"})
+
+    scheduler = _scheduler(handler)
+
+    async def run():
+        for _ in range(3):
+            with pytest.raises(LLMError):
+                await scheduler.complete(_ollama())
+        with pytest.raises(CircuitOpenError):
+            await scheduler.complete(_ollama())
+
+    asyncio.run(run())
+
+    assert len(calls) == 3
+    assert scheduler.stats()["ollama"]["circuit"]["state"] == OPEN
+
+
+def test_client_errors_do_not_trip_breaker():
+    """A 4xx is the caller's problem, not the provider's."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(401, json={"error": "bad key"})
+
+    scheduler = _scheduler(handler)
+
+    async def run():
+        for _ in range(5):
+            with pytest.raises(LLMError):
+                await scheduler.complete(_ollama())
+
+    asyncio.run(run())
+
+    assert scheduler.breakers.get("ollama").state == CLOSED
+
+
+def test_hedge_fires_alternate_when_primary_is_late():
+    """A primary with no first token by the hedge delay is raced by the alternate, and cancelled."""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "ollama.test":
+            await asyncio.sleep(2)
+            return httpx.Response(200, content=_ndjson("slow"))
+        return httpx.Response(200, content=_sse("fast"))
+
+    hedger = LLMHedger(_scheduler(handler), enabled=True, default_delay_ms=20)
+
+    started = time.perf_counter()
+    response = asyncio.run(hedger.complete(_ollama(), alternates=[_deepseek()]))
+
+    assert response.text == "fast"
+    assert response.provider == "deepseek"
+    assert time.perf_counter() - started < 1
+    assert hedger.stats()["hedged"] == 1
+    assert hedger.stats()["alternate_wins"] == 1
+
+
+def test_cancelled_hedge_loser_is_not_recorded():
+    """A primary cancelled mid-stream after losing the race leaves no outcome in its breaker."""
+    async def stalled_body():
+        await asyncio.sleep(1)
+        yield (json.dumps({"message": {"content": "slow"}, "done": True}) + "\n").encode()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "ollama.test":
+            return httpx.Response(200, content=stalled_body())
+        return httpx.Response(200, content=_sse("fast"))
+
+    hedger = LLMHedger(_scheduler(handler), enabled=True, default_delay_ms=20)
+    response = asyncio.run(hedger.complete(_ollama(), alternates=[_deepseek()]))
+
+    assert response.text == "fast"
+    stats = hedger.breakers.get("ollama").stats()
+    assert stats["calls"] == 0 and stats["p95_ms"] == 0
+
+
+def test_no_hedge_once_primary_is_streaming():
+    """After the primary's first token arrives, no alternate is fired."""
+    hosts = []
+
+    async def slow_tail():
+        yield (json.dumps({"message": {"content": "first "}, "done": False}) + "\n").encode()
+        await asyncio.sleep(0.1)
+        yield (json.dumps({"message": {"content": "rest"}, "done": True}) + "\n").encode()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        hosts.append(request.url.host)
+        if request.url.host == "ollama.test":
+            return httpx.Response(200, content=slow_tail())
+        return httpx.Response(200, content=_sse("alternate"))
+
+    hedger = LLMHedger(_scheduler(handler), enabled=True, default_delay_ms=20)
+    response = asyncio.run(hedger.complete(_ollama(), alternates=[_deepseek()]))
+
+    assert response.text == "first rest"
+    assert hosts == ["ollama.test"]
+
+
+def test_failed_primary_fails_over_immediately():
+    """A failing primary is replaced by the alternate without waiting for the hedge delay."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "ollama.test":
+            return httpx.Response(500, json={"error": "boom"})
+        return httpx.Response(200, content=_sse("ok"))
+
+    hedger = LLMHedger(_scheduler(handler), enabled=False, default_delay_ms=10000)
+    response = asyncio.run(hedger.complete(_ollama(), alternates=[_deepseek()]))
+
+    assert response.text == "ok"
+    assert hedger.stats()["failovers"] == 1
+
+
+def test_all_candidates_failing_raises_primary_error():
+    """When every candidate fails the primary's error is raised."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        status = 502 if request.url.host == "ollama.test" else 503
+        return httpx.Response(status, json={"error": "down"})
+
+    hedger = LLMHedger(_scheduler(handler), enabled=True, default_delay_ms=20)
+    with pytest.raises(LLMError) as error:
+        asyncio.run(hedger.complete(_ollama(), alternates=[_deepseek()]))
+
+    assert error.value.status_code == 502
+
+
+def test_stream_hedges_on_first_token():
+    """A streamed call whose primary has no first token by the hedge delay is won by the alternate."""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "ollama.test":
+            await asyncio.sleep(2)
+            return httpx.Response(200, content=_ndjson("slow"))
+        return httpx.Response(200, content=_sse("fast"))
+
+    hedger = LLMHedger(_scheduler(handler), enabled=True, default_delay_ms=20)
+
+    async def run():
+        async with hedger.stream(_ollama(), alternates=[_deepseek()]) as stream:
+            text = "".join([delta async for delta in stream])
+        return text, stream.response
+
+    started = time.perf_counter()
+    text, response = asyncio.run(run())
+
+    assert text == "fast" and response.provider == "deepseek"
+    assert time.perf_counter() - started < 1
+    assert hedger.stats()["hedged"] == 1 and hedger.stats()["alternate_wins"] == 1
+
+
+def test_stream_fails_over_before_first_token():
+    """A streamed call whose primary fails is served by the alternate; all failing raises the primary's error."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host != "deepseek.test":
+            return httpx.Response(502, json={"error": "down"})
+        return httpx.Response(200, content=_sse("ok"))
+
+    hedger = LLMHedger(_scheduler(handler), enabled=False)
+
+    async def run(alternates):
+        async with hedger.stream(_ollama(), alternates=alternates) as stream:
+            return "".join([delta async for delta in stream])
+
+    assert asyncio.run(run([_deepseek()])) == "ok"
+    assert hedger.stats()["failovers"] == 1
+    with pytest.raises(LLMError) as error:
+        asyncio.run(run([_ollama("other.test")]))
+    assert error.value.status_code == 502
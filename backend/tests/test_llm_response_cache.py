@@ -0,0 +1,108 @@
+"""
+Tests for the on-disk deterministic LLM response cache.
+"""
+import asyncio
+import json
+import time
+
+import httpx
+
+from app.services.http_clients import HTTPClientRegistry
+from app.services.llm import LLMClient, LLMRequest, LLMResponse, LLMUsage
+from app.services.llm.response_cache import LLMResponseCache, cache_key
+
+
+def _counting_client(cache):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        lines = [
+            {"message": {"content": "cached answer"}, "done": False},
+            {"done": True, "prompt_eval_count": 5, "eval_count": 2},
+        ]
+        return httpx.Response(200, content="\n".join(json.dumps(line) for line in lines).encode())
+
+    registry = HTTPClientRegistry(transport=httpx.MockTransport(handler))
+    return LLMClient(clients=registry, cache=cache), calls
+
+
+def _request(prompt="Generate tests for login", **kwargs):
+    return LLMRequest.from_prompt("ollama", "llama3", prompt, base_url="http://ollama.test", **kwargs)
+
+
+def test_deterministic_requests_are_served_from_cache(tmp_path):
+    """A repeated temperature-0 request skips the provider; whitespace differences don't matter."""
+    cache = LLMResponseCache(str(tmp_path), max_bytes=1_000_000, ttl_seconds=60)
+    client, calls = _counting_client(cache)
+
+    first = asyncio.run(client.complete(_request(temperature=0)))
+    second = asyncio.run(client.complete(_request("Generate  tests for\nlogin ", temperature=0)))
+
+    assert calls == ["/api/chat"]
+    assert not first.cached and second.cached
+    assert second.text == "cached answer"
+    assert second.usage.total_tokens == 7
+    assert cache.stats()["hit_rate"] == 0.5
+
+
+def test_sampled_requests_bypass_cache_unless_requested(tmp_path):
+    """Non-zero temperature is not cached by default but can opt in."""
+    cache = LLMResponseCache(str(tmp_path), max_bytes=1_000_000, ttl_seconds=60)
+    client, calls = _counting_client(cache)
+
+    for _ in range(2):
+        asyncio.run(client.complete(_request(temperature=0.7)))
+    assert len(calls) == 2
+
+    for _ in range(2):
+        asyncio.run(client.complete(_request(temperature=0.7, cache=True)))
+    assert len(calls) == 3
+
+
+def test_key_covers_generation_parameters():
+    """Model, temperature and max_tokens all change the cache key."""
+    base = cache_key(_request(temperature=0))
+
+    assert cache_key(_request(temperature=0, max_tokens=100)) != base
+    assert cache_key(_request(temperature=0.2)) != base
+    assert cache_key(LLMRequest.from_prompt("ollama", "mistral", "Generate tests for login", temperature=0)) != base
+
+
+def test_key_covers_base_url():
+    """The same model tag on another host (e.g. a mock server) gets its own entries."""
+    def request(base_url):
+        return LLMRequest.from_prompt("ollama", "llama3", "Generate tests for login", temperature=0, base_url=base_url)
+
+    assert cache_key(request("http://gpu-1:11434")) != cache_key(request("http://mock-llm:11434"))
+    assert cache_key(request("http://gpu-1:11434/")) == cache_key(request("http://gpu-1:11434"))
+
+
+def test_ttl_expiry_and_persistence(tmp_path):
+    """Entries survive a new cache instance on the same directory until they expire."""
+    response = LLMResponse(provider="ollama", model="llama3", text="x", usage=LLMUsage(1, 1))
+    LLMResponseCache(str(tmp_path), max_bytes=1_000_000, ttl_seconds=60).put("k1", response)
+
+    reopened = LLMResponseCache(str(tmp_path), max_bytes=1_000_000, ttl_seconds=60)
+    assert reopened.get("k1").text == "x"
+
+    expired = LLMResponseCache(str(tmp_path), max_bytes=1_000_000, ttl_seconds=0)
+    time.sleep(0.01)
+    assert expired.get("k1") is None
+    assert expired.stats()["entries"] == 0
+
+
+def test_size_bound_evicts_least_recently_used(tmp_path):
+    """Writing past max_bytes evicts the least recently used entry."""
+    cache = LLMResponseCache(str(tmp_path), max_bytes=700, ttl_seconds=60)
+    response = LLMResponse(provider="ollama", model="llama3", text="y" * 100, usage=LLMUsage(1, 1))
+
+    cache.put("a", response)
+    cache.put("b", response)
+    cache.get("a")
+    cache.put("c", response)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= 700
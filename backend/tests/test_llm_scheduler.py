@@ -0,0 +1,175 @@
+"""
+Tests for per-provider LLM scheduling: concurrency caps and retries.
+"""
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.services.http_clients import HTTPClientRegistry
+from app.services.llm import LLMClient, LLMError, LLMRequest
+from app.services.llm.circuit_breaker import CircuitBreakerRegistry
+from app.services.llm.scheduler import LLMScheduler, ProviderLimits
+
+
+def _ok_body(text: str = "ok") -> bytes:
+    lines = [{"message": {"content": text}, "done": False}, {"done": True, "eval_count": 1, "prompt_eval_count": 1}]
+    return "\n".join(json.dumps(line) for line in lines).encode()
+
+
+def _scheduler(handler, **kwargs) -> LLMScheduler:
+    client = LLMClient(clients=HTTPClientRegistry(transport=httpx.MockTransport(handler)))
+    params = {
+        "limits": {"ollama": ProviderLimits(max_concurrency=2)},
+        "max_retries": 3,
+        "base_delay": 0,
+        "breakers": CircuitBreakerRegistry(min_calls=100),
+    }
+    params.update(kwargs)
+    return LLMScheduler(client=client, **params)
+
+
+def _request(prompt: str = "p") -> LLMRequest:
+    return LLMRequest.from_prompt("ollama", "llama3", prompt, base_url="http://ollama.test")
+
+
+def test_transient_errors_are_retried():
+    """429 and 5xx responses are retried until the provider answers."""
+    statuses = [429, 503]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if statuses:
+            return httpx.Response(statuses.pop(0), headers={"Retry-After": "0"}, json={"error": "busy"})
+        return httpx.Response(200, content=_ok_body())
+
+    scheduler = _scheduler(handler)
+    response = asyncio.run(scheduler.complete(_request()))
+
+    stats = scheduler.stats()["ollama"]
+    assert response.text == "ok"
+    assert stats["requests"] == 3
+    assert stats["retries"] == 2
+    assert stats["rate_limited"] == 1
+
+
+def test_client_errors_are_not_retried():
+    """A 400 fails immediately."""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(1)
+        return httpx.Response(400, json={"error": "bad request"})
+
+    with pytest.raises(LLMError):
+        asyncio.run(_scheduler(handler).complete(_request()))
+
+    assert len(calls) == 1
+
+
+def test_retries_are_bounded():
+    """After max_retries the last transient error is raised."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(502, json={"error": "upstream"})
+
+    scheduler = _scheduler(handler, max_retries=2)
+    with pytest.raises(LLMError) as error:
+        asyncio.run(scheduler.complete(_request()))
+
+    assert error.value.status_code == 502
+    assert scheduler.stats()["ollama"]["requests"] == 3
+
+
+def test_concurrency_cap_per_provider():
+    """No more than max_concurrency requests reach a provider at once."""
+    state = {"in_flight": 0, "peak": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        state["in_flight"] += 1
+        state["peak"] = max(state["peak"], state["in_flight"])
+        await asyncio.sleep(0.01)
+        state["in_flight"] -= 1
+        return httpx.Response(200, content=_ok_body())
+
+    scheduler = _scheduler(handler)
+
+    async def run():
+        return await asyncio.gather(*(scheduler.complete(_request(f"p{i}")) for i in range(6)))
+
+    responses = asyncio.run(run())
+
+    assert len(responses) == 6
+    assert state["peak"] == 2
+    assert scheduler.stats()["ollama"]["completed"] == 6
+
+
+def test_backoff_is_jittered_and_honours_retry_after():
+    """Delays grow exponentially within jitter bounds and never undercut Retry-After."""
+    scheduler = LLMScheduler(client=LLMClient(), limits={}, base_delay=1.0, max_delay=8.0)
+
+    for attempt, ceiling in [(0, 1.0), (1, 2.0), (2, 4.0), (5, 8.0)]:
+        delay = scheduler.backoff_delay(attempt)
+        assert ceiling / 2 <= delay <= ceiling
+    assert scheduler.backoff_delay(0, retry_after=5.0) == 5.0
+
+
+def test_failed_open_refunds_token_reservation():
+    """Calls that never open (retries exhausted) give their whole token reservation back."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(503, json={"error": "unavailable"})
+
+    scheduler = _scheduler(
+        handler, max_retries=0, limits={"ollama": ProviderLimits(max_concurrency=2, tokens_per_minute=6000)}
+    )
+    request = LLMRequest.from_prompt("ollama", "llama3", "p", base_url="http://ollama.test", max_tokens=2000)
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(LLMError):
+                await scheduler.complete(request)
+
+    asyncio.run(run())
+    bucket = scheduler._state("ollama").tokens
+    assert bucket.available == pytest.approx(bucket.capacity)
+
+
+class _DroppedStream(httpx.AsyncByteStream):
+    """Body that sends one chunk, then loses the connection."""
+
+    async def __aiter__(self):
+        yield _ok_body("par").split(b"\n")[0] + b"\n"
+        raise httpx.ReadError("connection reset")
+
+
+def test_dropped_stream_counts_as_failure():
+    """A stream cut off midway is retried, and scored as a failure by the breaker and the stats."""
+    attempts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        attempts.append(1)
+        if len(attempts) == 1:
+            return httpx.Response(200, stream=_DroppedStream())
+        return httpx.Response(200, content=_ok_body())
+
+    scheduler = _scheduler(handler)
+    response = asyncio.run(scheduler.complete(_request()))
+
+    stats = scheduler.stats()["ollama"]
+    assert response.text == "ok"
+    assert stats["circuit"]["failures"] == 1
+    assert stats["failed"] == 1 and stats["retries"] == 1 and stats["completed"] == 1
+
+
+def test_opened_stream_is_sent_once():
+    """Entering a stream the scheduler already opened doesn't send the request again."""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(1)
+        return httpx.Response(200, content=_ok_body())
+
+    scheduler = _scheduler(handler)
+    response = asyncio.run(scheduler.complete(_request()))
+
+    assert response.text == "ok"
+    assert len(calls) == scheduler.stats()["ollama"]["requests"] == 1
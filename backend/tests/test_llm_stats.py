@@ -0,0 +1,124 @@
+"""
+Tests for rolling LLM call stats and fastest-model routing.
+"""
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.services.http_clients import HTTPClientRegistry
+from app.services.llm import CircuitBreakerRegistry, LLMClient, LLMError, LLMRequest, LLMRouter, LLMStatsStore
+
+
+def _client(stats, statuses):
+    """Client whose mock Ollama answers with the given status codes in turn."""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        status = statuses[(len(calls) - 1) % len(statuses)]
+        if status != 200:
+            return httpx.Response(status, json={"error": "model overloaded"})
+        lines = [
+            {"message": {"content": "hello"}, "done": False},
+            {"done": True, "prompt_eval_count": 12, "eval_count": 3},
+        ]
+        return httpx.Response(200, content="\n".join(json.dumps(line) for line in lines).encode())
+
+    clients = HTTPClientRegistry(transport=httpx.MockTransport(handler))
+    return LLMClient(clients=clients, cache=None, stats=stats), calls
+
+
+def _request(model="llama3"):
+    return LLMRequest.from_prompt("ollama", model, "Hi", base_url="http://ollama.test")
+
+
+def _breakers():
+    return CircuitBreakerRegistry(window_seconds=60, min_calls=2, failure_rate=0.5, cooldown_seconds=60)
+
+
+def test_client_records_latency_tokens_and_errors():
+    """Successful and failed provider calls land in the model's rolling summary."""
+    stats = LLMStatsStore(window_seconds=60, max_samples=100)
+    client, _ = _client(stats, [200, 200, 500])
+
+    async def run():
+        for _ in range(3):
+            try:
+                await client.complete(_request())
+            except LLMError:
+                pass
+
+    asyncio.run(run())
+    summary = stats.summary("ollama", "llama3")
+    assert summary["calls"] == 3 and summary["errors"] == 1
+    assert summary["error_rate"] == pytest.approx(1 / 3, abs=1e-3)
+    assert summary["prompt_tokens"] == 24 and summary["completion_tokens"] == 6
+    assert summary["latency_ms"]["p50"] >= 0 and summary["first_token_ms"] is not None
+    assert summary["last_error"] == "model overloaded"
+    assert stats.summaries(provider="OLLAMA")[0]["model"] == "llama3"
+    assert stats.summaries(model="other") == []
+
+
+def test_percentiles_and_window_pruning():
+    """Percentiles are nearest-rank over the window; old calls drop out."""
+    stats = LLMStatsStore(window_seconds=0.05, max_samples=100)
+    for latency in range(1, 101):
+        stats.record("openrouter", "m", float(latency), first_token_ms=latency / 2, completion_tokens=10)
+
+    summary = stats.summary("openrouter", "m")
+    assert summary["latency_ms"] == {"p50": 50.0, "p90": 90.0, "p99": 99.0, "mean": 50.5}
+    assert summary["first_token_ms"]["p50"] == 25.0
+
+    time.sleep(0.06)
+    stats.record("openrouter", "m", 7.0)
+    summary = stats.summary("openrouter", "m")
+    assert summary["calls"] == 1 and summary["latency_ms"]["p50"] == 7.0
+
+
+def test_router_prefers_fastest_healthy_model():
+    """Measured healthy models rank by p50, then unmeasured ones, then unhealthy ones."""
+    stats = LLMStatsStore(window_seconds=60, max_samples=100)
+    breakers = _breakers()
+    router = LLMRouter(stats=stats, breakers=breakers, min_samples=3, max_error_rate=0.2)
+    slow = SimpleNamespace(provider="ollama", model="llama3")
+    fast = SimpleNamespace(provider="deepseek", model="deepseek-chat")
+    new = SimpleNamespace(provider="ollama", model="mistral")
+    flaky = SimpleNamespace(provider="ollama", model="phi3")
+    down = SimpleNamespace(provider="gemini", model="gemini-1.5-flash")
+    for _ in range(3):
+        stats.record("ollama", "llama3", 900.0)
+        stats.record("deepseek", "deepseek-chat", 300.0)
+        stats.record("ollama", "phi3", 50.0)
+        stats.record("ollama", "phi3", 50.0, error="timeout")
+        stats.record("gemini", "gemini-1.5-flash", 10.0)
+    breakers.get("gemini").record(False)
+    breakers.get("gemini").record(False)
+
+    candidates = [slow, new, flaky, down, fast]
+    ranking = router.rank(candidates)
+    assert [entry["candidate"] for entry in ranking] == [fast, slow, new, flaky, down]
+    assert ranking[0]["score_ms"] == 300.0 and ranking[2]["score_ms"] is None
+    assert ranking[3]["reason"] == "error rate 50%" and ranking[4]["reason"] == "circuit open"
+
+    assert router.choose(candidates, "fastest") is fast
+    assert router.choose(candidates, "configured") is slow
+    assert router.choose([], "fastest") is None
+
+
+def test_failed_probe_marks_model_unhealthy_until_it_recovers():
+    """A failed connection test excludes a model until a later call succeeds."""
+    stats = LLMStatsStore(window_seconds=60, max_samples=100)
+    router = LLMRouter(stats=stats, breakers=_breakers(), min_samples=1)
+    candidate = SimpleNamespace(provider="openrouter", model="mock-model")
+
+    stats.record("openrouter", "mock-model", 100.0)
+    stats.record_probe("openrouter", "mock-model", {"success": False, "error": "HTTP 401"})
+    assert router.rank([candidate])[0]["reason"] == "last connection test failed"
+    assert stats.summary("openrouter", "mock-model")["probe"]["error"] == "HTTP 401"
+
+    stats.record("openrouter", "mock-model", 100.0)
+    assert router.rank([candidate])[0]["healthy"]
@@ -0,0 +1,108 @@
+"""
+Tests for the mock LLM server against the real client, tester and catalog.
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from app.services.http_clients import HTTPClientRegistry
+from app.services.llm import LLMClient, LLMError, LLMRequest
+from app.services.llm.mock_server import MockBehavior, MockLLMServer, base_urls, create_mock_app, tokenize
+from app.services.llm_connection_tester import LLMConnectionTester
+from app.services.model_catalog import ModelCatalog
+
+
+URLS = base_urls("http://mock.test")
+
+
+def _registry(**behavior) -> HTTPClientRegistry:
+    app = create_mock_app(MockBehavior(seed=1, **behavior))
+    return HTTPClientRegistry(transport=httpx.ASGITransport(app=app))
+
+
+def _request(provider: str, model: str, prompt: str = "Login works", **kwargs) -> LLMRequest:
+    return LLMRequest.from_prompt(provider, model, prompt, system="Be brief", base_url=URLS[provider], api_key="key", **kwargs)
+
+
+def test_tokenize_round_trips():
+    """Stream chunks concatenate back to the original text."""
+    text = "Given a user,  when they log in\nthen it works"
+    assert "".join(tokenize(text)) == text
+    assert len(tokenize("one two three")) == 3
+
+
+@pytest.mark.parametrize("provider,model", [
+    ("ollama", "llama3"),
+    ("openrouter", "mock-model"),
+    ("deepseek", "deepseek-chat"),
+    ("gemini", "gemini-1.5-flash"),
+])
+def test_client_streams_from_every_provider(provider, model):
+    """The client decodes each provider's streaming format from the mock."""
+    client = LLMClient(clients=_registry(response_mode="echo"))
+    response = asyncio.run(client.complete(_request(provider, model, "Given a login page")))
+
+    assert response.text == "Given a login page"
+    assert response.finish_reason == "stop"
+    assert response.usage.completion_tokens == 4 and not response.usage.estimated
+
+
+def test_max_tokens_cuts_the_reply():
+    """Replies longer than max_tokens stop early with finish reason length."""
+    client = LLMClient(clients=_registry(response_mode="echo"))
+    response = asyncio.run(client.complete(_request("openrouter", "mock-model", "one two three four", max_tokens=2)))
+    assert response.text == "one two"
+    assert response.finish_reason == "length"
+
+
+def test_injected_errors_surface_as_llm_errors():
+    """Injected 429s are retryable with Retry-After; mid-stream failures raise."""
+    client = LLMClient(clients=_registry(error_rate=1.0, error_status=429))
+    with pytest.raises(LLMError) as exc_info:
+        asyncio.run(client.complete(_request("deepseek", "deepseek-chat")))
+    assert exc_info.value.status_code == 429 and exc_info.value.retryable
+    assert exc_info.value.retry_after == 1
+
+    client = LLMClient(clients=_registry(stream_error_rate=1.0))
+    with pytest.raises(LLMError, match="interrupted"):
+        asyncio.run(client.complete(_request("gemini", "gemini-1.5-flash")))
+
+
+def test_tester_and_catalog_against_mock():
+    """Connection probes and model lists work against the mock, including key checks."""
+    registry = _registry(api_key="key")
+    tester = LLMConnectionTester(clients=registry)
+
+    async def run():
+        results = {
+            provider: await tester.probe(provider, model, URLS[provider], "key")
+            for provider, model in [("ollama", "llama3"), ("openrouter", "mock-model"), ("deepseek", "deepseek-chat"), ("gemini", "gemini-1.5-flash")]
+        }
+        results["bad_key"] = await tester.probe("gemini", "gemini-1.5-flash", URLS["gemini"], "wrong")
+        results["ollama_full"] = await tester.test_connection("ollama", "llama3", URLS["ollama"], mode="full")
+        catalog = await ModelCatalog(clients=registry).list_models("deepseek", URLS["deepseek"], "key")
+        return results, catalog
+
+    results, catalog = asyncio.run(run())
+    assert all(results[p]["success"] for p in ("ollama", "openrouter", "deepseek", "gemini", "ollama_full"))
+    assert results["bad_key"]["message"] == "Invalid API key"
+    assert {m["id"] for m in catalog["models"]} >= {"llama3", "deepseek-chat"}
+    assert catalog["models"][0]["context_length"] == 8192
+
+
+def test_server_runs_as_a_process():
+    """MockLLMServer starts a real server process that can be reconfigured live."""
+    with MockLLMServer(MockBehavior(latency_ms=20, tokens_per_second=200)) as server:
+        client = LLMClient(clients=HTTPClientRegistry())
+        request = LLMRequest.from_prompt("ollama", "llama3", "Hi", base_url=server.base_urls["ollama"])
+        response = asyncio.run(client.complete(request))
+        assert response.text.startswith("[{")
+        assert response.first_token_ms >= 20
+
+        server.configure(response_mode="echo", latency_ms=0)
+        request = LLMRequest.from_prompt("openrouter", "mock-model", "echo me", base_url=server.base_urls["openrouter"], api_key="k")
+        assert asyncio.run(LLMClient(clients=HTTPClientRegistry()).complete(request)).text == "echo me"
+
+        stats = server.stats()
+        assert stats["requests"] == {"ollama.chat": 1, "openrouter.chat": 1}
@@ -0,0 +1,140 @@
+"""
+Tests for the cached provider model catalog.
+"""
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.http_clients import HTTPClientRegistry
+from app.services.model_catalog import ModelCatalog, ModelCatalogError
+
+
+def _catalog(handler, ttl_seconds: float = 600) -> ModelCatalog:
+    return ModelCatalog(clients=HTTPClientRegistry(transport=httpx.MockTransport(handler)), ttl_seconds=ttl_seconds)
+
+
+OLLAMA_TAGS = {"models": [
+    {"name": "mistral:latest", "size": 4109865159, "details": {"family": "llama", "parameter_size": "7B"}},
+    {"name": "llama3:latest", "size": 4661224676, "details": {"family": "llama", "parameter_size": "8B"}},
+]}
+
+
+def test_models_are_served_from_cache_within_ttl():
+    """Repeated listings within the TTL make one upstream call."""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        return httpx.Response(200, json=OLLAMA_TAGS)
+
+    catalog = _catalog(handler)
+
+    async def run():
+        return [await catalog.list_models("ollama", "http://ollama.test") for _ in range(3)]
+
+    first, second, _ = asyncio.run(run())
+
+    assert calls == ["/api/tags"]
+    assert [m["id"] for m in first["models"]] == ["llama3:latest", "mistral:latest"]
+    assert first["models"][0]["parameter_size"] == "8B"
+    assert not first["cached"] and second["cached"]
+    assert second["etag"] == first["etag"]
+
+
+def test_empty_catalog_is_cached():
+    """A fresh Ollama with no pulled models is cached like any other list."""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        return httpx.Response(200, json={"models": []})
+
+    catalog = _catalog(handler)
+
+    async def run():
+        return [await catalog.list_models("ollama", "http://ollama.test") for _ in range(3)]
+
+    first, second, _ = asyncio.run(run())
+
+    assert calls == ["/api/tags"]
+    assert first["count"] == 0 and second["cached"]
+
+
+def test_expired_catalog_refreshes_conditionally():
+    """After the TTL the upstream ETag is sent back, and a 304 keeps the cached list."""
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, headers={"ETag": '"v1"'}, json={"data": [{"id": "openai/gpt-4o", "name": "GPT-4o", "context_length": 128000}]})
+
+    catalog = _catalog(handler, ttl_seconds=0)
+
+    async def run():
+        return await catalog.list_models("openrouter"), await catalog.list_models("openrouter")
+
+    first, second = asyncio.run(run())
+
+    assert seen == [None, '"v1"']
+    assert second["models"] == first["models"]
+    assert second["models"][0]["context_length"] == 128000
+    assert catalog.stats()["not_modified"] == 1
+
+
+def test_gemini_catalog_is_paginated_and_filtered():
+    """Gemini pages are followed, and only models that can generate content are listed."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.headers["x-goog-api-key"] == "g-key"
+        if "pageToken" not in request.url.params:
+            return httpx.Response(200, json={"models": [
+                {"name": "models/gemini-1.5-flash", "displayName": "Gemini 1.5 Flash", "inputTokenLimit": 1048576,
+                 "supportedGenerationMethods": ["generateContent", "countTokens"]},
+                {"name": "models/text-embedding-004", "supportedGenerationMethods": ["embedContent"]},
+            ], "nextPageToken": "p2"})
+        return httpx.Response(200, json={"models": [
+            {"name": "models/gemini-1.5-pro", "displayName": "Gemini 1.5 Pro", "supportedGenerationMethods": ["generateContent"]},
+        ]})
+
+    result = asyncio.run(_catalog(handler).list_models("gemini", api_key="g-key"))
+
+    assert [m["id"] for m in result["models"]] == ["gemini-1.5-flash", "gemini-1.5-pro"]
+    assert result["models"][0]["context_length"] == 1048576
+
+
+def test_failed_refresh_serves_stale_list():
+    """A failing provider keeps the last known list (marked stale); with nothing cached it raises."""
+    state = {"up": True}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if state["up"]:
+            return httpx.Response(200, json=OLLAMA_TAGS)
+        return httpx.Response(500)
+
+    catalog = _catalog(handler, ttl_seconds=0)
+
+    async def run():
+        await catalog.list_models("ollama", "http://ollama.test")
+        state["up"] = False
+        stale = await catalog.list_models("ollama", "http://ollama.test", refresh=True)
+        with pytest.raises(ModelCatalogError):
+            await catalog.list_models("ollama", "http://other.test")
+        return stale
+
+    stale = asyncio.run(run())
+
+    assert stale["stale"] and stale["count"] == 2
+    assert "HTTP 500" in stale["error"]
+
+
+def test_models_endpoint_errors():
+    """Unknown providers are rejected; unreachable providers surface as 502."""
+    client = TestClient(app)
+
+    assert client.get("/api/v1/config/models", params={"provider": "acme"}).status_code == 400
+    response = client.get("/api/v1/config/models", params={"provider": "ollama", "base_url": "http://127.0.0.1:9"})
+    assert response.status_code == 502
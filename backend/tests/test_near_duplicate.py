@@ -0,0 +1,65 @@
+"""
+Tests for MinHash/LSH near-duplicate detection.
+"""
+from app.services.kb.chunker import chunk_text
+from app.services.kb.context_packer import pack_chunks
+from app.services.kb.index_manager import KBSearchHit
+from app.services.kb.near_duplicate import MinHasher, MinHashLSH, estimate_similarity
+
+
+GUIDE = " ".join(f"Step {i}: open the subscription screen and confirm field {i} matches the plan." for i in range(60))
+
+
+def test_lightly_edited_copy_is_near_duplicate():
+    """A re-exported guide with a small edit scores high; unrelated text scores low."""
+    hasher = MinHasher(num_perm=128)
+    original = hasher.signature(GUIDE)
+    edited = hasher.signature(GUIDE.replace("Step 30:", "Step thirty:") + " Revised 2025.")
+    unrelated = hasher.signature("Escalate unresolved billing tickets to the supervisor queue. " * 20)
+
+    assert estimate_similarity(original, edited) > 0.85
+    assert estimate_similarity(original, unrelated) < 0.2
+
+
+def test_lsh_finds_candidates_and_forgets_removed():
+    """LSH returns verified near-duplicates and drops removed keys."""
+    hasher = MinHasher(num_perm=128)
+    lsh = MinHashLSH(num_perm=128, bands=16)
+    lsh.insert("guide-v1", hasher.signature(GUIDE))
+    lsh.insert("other", hasher.signature("Completely different content about network outages. " * 20))
+
+    matches = lsh.query(hasher.signature(GUIDE + " Appendix A."), threshold=0.85)
+    assert [key for key, _ in matches] == ["guide-v1"]
+
+    lsh.remove("guide-v1")
+    assert lsh.query(hasher.signature(GUIDE), threshold=0.85) == []
+    assert len(lsh) == 1
+
+
+def test_packer_skips_duplicate_chunks_across_documents():
+    """The same section from two documents is packed once."""
+    hasher = MinHasher(num_perm=128)
+    section = "Open Home then Subscription and verify the Net Plan Price field. " * 10
+    a = chunk_text("doc-a", section, chunk_size=2000, filename="v1.txt")[0]
+    b = chunk_text("doc-b", section, chunk_size=2000, filename="v2.txt")[0]
+    for chunk in (a, b):
+        chunk.minhash = hasher.signature(chunk.text)
+
+    packed = pack_chunks([KBSearchHit(a, 0.9), KBSearchHit(b, 0.8)], token_budget=10000, dedupe_threshold=0.85)
+    assert [c["filename"] for c in packed.citations] == ["v1.txt"]
+    assert packed.duplicates_skipped == 1
+
+
+def test_packer_uses_configured_bands():
+    """Signatures whose length isn't divisible by the default 16 bands pack with the configured bands."""
+    hasher = MinHasher(num_perm=100)
+    section = "Open Home then Subscription and verify the Net Plan Price field. " * 10
+    a = chunk_text("doc-a", section, chunk_size=2000, filename="v1.txt")[0]
+    b = chunk_text("doc-b", section, chunk_size=2000, filename="v2.txt")[0]
+    for chunk in (a, b):
+        chunk.minhash = hasher.signature(chunk.text)
+
+    packed = pack_chunks(
+        [KBSearchHit(a, 0.9), KBSearchHit(b, 0.8)], token_budget=10000, dedupe_threshold=0.85, minhash_bands=20
+    )
+    assert packed.duplicates_skipped == 1
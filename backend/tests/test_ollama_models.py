@@ -0,0 +1,117 @@
+"""
+Tests for Ollama warm-up, keep-alive and loaded-model status.
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.schemas.configuration import ConfigurationUpdate
+from app.services.http_clients import HTTPClientRegistry
+from app.services.llm import LLMRequest, OllamaModelManager, get_adapter, keep_alive_options, keep_alive_value
+
+
+def _manager(handler) -> OllamaModelManager:
+    return OllamaModelManager(clients=HTTPClientRegistry(transport=httpx.MockTransport(handler)), keep_alive="30m")
+
+
+def _config(model="llama3", provider="ollama", keep_alive=None, warmup=True, base_url="http://ollama.test"):
+    return SimpleNamespace(provider=provider, model=model, base_url=base_url, ollama_keep_alive=keep_alive, ollama_warmup=warmup)
+
+
+def test_keep_alive_wire_format():
+    """Durations stay strings; bare numbers become JSON numbers (seconds)."""
+    assert keep_alive_value("30m") == "30m"
+    assert keep_alive_value("-1") == -1
+    assert keep_alive_value("0") == 0
+    assert keep_alive_value("2.5") == 2.5
+
+
+def test_keep_alive_validation():
+    """Configurations only accept keep-alive values Ollama understands."""
+    assert ConfigurationUpdate(ollama_keep_alive="1h30m").ollama_keep_alive == "1h30m"
+    assert ConfigurationUpdate(ollama_keep_alive="-1").ollama_keep_alive == "-1"
+    with pytest.raises(ValidationError):
+        ConfigurationUpdate(ollama_keep_alive="forever")
+
+
+def test_warm_up_loads_without_generating():
+    """Warm-up posts a prompt-less generate with the keep-alive, and records the result."""
+    bodies = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        bodies.append(json.loads(request.content))
+        return httpx.Response(200, json={"model": "llama3", "done": True, "done_reason": "load"})
+
+    manager = _manager(handler)
+    result = asyncio.run(manager.warm_up("http://ollama.test/", "llama3", "-1"))
+
+    assert result["success"] and result["load_ms"] is not None
+    assert bodies == [{"model": "llama3", "keep_alive": -1}]
+    assert ("http://ollama.test", "llama3") in manager.warmups
+
+
+def test_warm_up_configurations_dedupes_and_filters():
+    """Each Ollama model is loaded once; other providers and opted-out configs are skipped."""
+    loaded = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        loaded.append(json.loads(request.content)["model"])
+        return httpx.Response(200, json={"done": True})
+
+    configs = [
+        _config("llama3"),
+        _config("llama3", keep_alive="1h"),
+        _config("mistral", warmup=False),
+        _config("deepseek-chat", provider="deepseek"),
+        _config("qwen2"),
+    ]
+    results = asyncio.run(_manager(handler).warm_up_configurations(configs))
+
+    assert sorted(loaded) == ["llama3", "qwen2"]
+    assert all(result["success"] for result in results)
+
+
+def test_failed_warm_up_reports_error():
+    """Unknown models come back as a failed warm-up with Ollama's error message."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(404, json={"error": "model 'nope' not found"})
+
+    result = asyncio.run(_manager(handler).warm_up(None, "nope"))
+
+    assert not result["success"]
+    assert result["error"] == "model 'nope' not found"
+
+
+def test_status_lists_resident_models():
+    """Loaded models come from /api/ps; an unreachable server is reported, not raised."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "down.test":
+            raise httpx.ConnectError("refused")
+        return httpx.Response(200, json={"models": [
+            {"name": "llama3:latest", "size": 5137025024, "size_vram": 5137025024, "expires_at": "2026-10-19T15:30:00Z"}
+        ]})
+
+    manager = _manager(handler)
+
+    async def run():
+        return await manager.status("http://ollama.test"), await manager.status("http://down.test")
+
+    up, down = asyncio.run(run())
+
+    assert up["reachable"] and up["running"][0]["name"] == "llama3:latest"
+    assert not down["reachable"] and down["running"] == []
+
+
+def test_chat_requests_carry_keep_alive():
+    """Generation requests use the default keep-alive unless the configuration sets one."""
+    adapter = get_adapter("ollama")
+    default = LLMRequest.from_prompt("ollama", "llama3", "p")
+    override = LLMRequest.from_prompt("ollama", "llama3", "p", options=keep_alive_options(_config(keep_alive="-1")))
+
+    assert adapter.build(default)[2]["keep_alive"] == keep_alive_value(settings.OLLAMA_KEEP_ALIVE)
+    assert adapter.build(override)[2]["keep_alive"] == -1
@@ -0,0 +1,99 @@
+"""
+Tests for the semantic LLM response cache.
+"""
+import asyncio
+import json
+
+import httpx
+
+from app.services.http_clients import HTTPClientRegistry
+from app.services.llm import LLMClient, LLMRequest, SemanticResponseCache
+from app.services.llm.response_cache import LLMResponseCache
+from app.services.llm.semantic_cache import prompt_numbers
+
+
+KB_CHUNKS = [
+    "Passwords must be at least eight characters and contain a digit.",
+    "Accounts lock after five failed login attempts within ten minutes.",
+    "Sessions expire after thirty minutes of inactivity.",
+]
+
+
+def _client(tmp_path, ttl_seconds=60.0):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        lines = [
+            {"message": {"content": f"answer {len(calls)}"}, "done": False},
+            {"done": True, "prompt_eval_count": 5, "eval_count": 2},
+        ]
+        return httpx.Response(200, content="\n".join(json.dumps(line) for line in lines).encode())
+
+    cache = LLMResponseCache(str(tmp_path), max_bytes=1_000_000, ttl_seconds=ttl_seconds)
+    semantic = SemanticResponseCache(cache=cache, threshold=0.9, max_entries=10)
+    client = LLMClient(
+        clients=HTTPClientRegistry(transport=httpx.MockTransport(handler)),
+        cache=cache,
+        semantic_cache=semantic
+    )
+    return client, semantic, calls
+
+
+def _request(chunks, requirement="Generate 3 test cases for the login page.", scope="project-1"):
+    prompt = "Knowledge base:\n" + "\n".join(chunks) + "\n\nRequirement: " + requirement
+    return LLMRequest.from_prompt(
+        "ollama", "llama3", prompt, base_url="http://ollama.test", temperature=0, cache_scope=scope
+    )
+
+
+def _complete(client, request):
+    return asyncio.run(client.complete(request))
+
+
+def test_near_identical_prompt_is_served_from_cache(tmp_path):
+    """Reordered KB chunks and a small wording change reuse the cached response."""
+    client, semantic, calls = _client(tmp_path)
+    first = _complete(client, _request(KB_CHUNKS))
+    second = _complete(client, _request(KB_CHUNKS[::-1], "Generate 3 test cases for the  login page please."))
+
+    assert len(calls) == 1
+    assert second.cached and second.text == first.text
+    assert 0.9 <= second.cache_similarity < 1.0
+    assert semantic.stats()["hits"] == 1
+    assert client.cache.stats()["hits"] == 0 and client.cache.stats()["misses"] == 2
+
+
+def test_different_numbers_never_match(tmp_path):
+    """Prompts that differ only in a number fall back to a real call."""
+    client, semantic, calls = _client(tmp_path)
+    _complete(client, _request(KB_CHUNKS, "Generate 3 test cases for the login page."))
+    response = _complete(client, _request(KB_CHUNKS, "Generate 10 test cases for the login page."))
+
+    assert len(calls) == 2 and not response.cached
+    assert semantic.stats()["number_mismatches"] == 1
+    assert prompt_numbers("3 cases, 10 steps") == ("10", "3")
+
+
+def test_matching_is_scoped(tmp_path):
+    """Other scopes, unscoped requests and unrelated prompts only use exact matching."""
+    client, semantic, calls = _client(tmp_path)
+    _complete(client, _request(KB_CHUNKS))
+    _complete(client, _request(KB_CHUNKS[::-1], scope="project-2"))
+    _complete(client, _request(KB_CHUNKS[1:] + KB_CHUNKS[:1], scope=None))
+    _complete(client, _request(["Invoices are emailed monthly."], "Generate 3 test cases for billing exports."))
+    assert len(calls) == 4
+
+    _complete(client, _request(KB_CHUNKS, scope=None))
+    assert len(calls) == 4  # Identical prompt: exact match regardless of scope
+    assert semantic.stats()["scopes"] == 2
+
+
+def test_expired_responses_are_dropped_from_the_index(tmp_path):
+    """A similar prompt whose response expired from the response cache is a miss."""
+    client, semantic, calls = _client(tmp_path, ttl_seconds=-1)
+    _complete(client, _request(KB_CHUNKS))
+    response = _complete(client, _request(KB_CHUNKS[::-1]))
+
+    assert len(calls) == 2 and not response.cached
+    assert semantic.stats()["misses"] == 2 and semantic.stats()["entries"] == 1
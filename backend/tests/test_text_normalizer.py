@@ -0,0 +1,76 @@
+"""
+Tests for PDF header/footer and boilerplate stripping.
+"""
+from app.services.parsers.text_normalizer import normalization_stats, strip_repeated_lines
+
+
+CHAPTERS = ["Invoices", "Payments", "Refunds"]
+
+
+def _guide_pages(count: int = 12):
+    return [
+        "Acme Billing User Guide  |  Version 4.2\n"
+        f"Chapter {1 + i // 4}: {CHAPTERS[i // 4 % 3]}\n\n\n"
+        f"Step {i}: open the invoice screen and check that   the plan price is shown.\n"
+        f"The account {i} total must match the   ledger balance.\n"
+        "© 2024 Acme Corp. All rights reserved.\n"
+        f"Page {i + 1} of {count}"
+        for i in range(count)
+    ]
+
+
+def test_repeated_headers_and_footers_removed():
+    """Running headers, copyright line and page numbers are dropped; body text stays."""
+    pages, stats = strip_repeated_lines(_guide_pages())
+
+    joined = "\n".join(pages)
+    assert "User Guide" not in joined
+    assert "Chapter" not in joined
+    assert "All rights reserved" not in joined
+    assert "Page 3 of 12" not in joined
+    assert "Step 2: open the invoice screen and check that the plan price is shown." in pages[2]
+    assert "The account 2 total must match the ledger balance." in pages[2]
+    assert stats["boilerplate_lines_removed"] == 48
+
+
+def test_lines_below_page_threshold_kept():
+    """A heading shared by only a few pages of a long document is not boilerplate."""
+    pages, _ = strip_repeated_lines(_guide_pages(12), min_page_ratio=0.5)
+
+    assert pages[0].startswith("Chapter 1: Invoices")
+
+
+def test_short_documents_only_lose_page_numbers():
+    """With fewer than min_pages pages nothing repeats often enough to strip."""
+    pages, stats = strip_repeated_lines(_guide_pages(2))
+
+    assert pages[0].startswith("Acme Billing User Guide | Version 4.2")
+    assert "Page 1 of 2" not in pages[0]
+    assert stats["repeated_patterns"] == 0
+
+
+def test_numbers_inside_page_are_kept():
+    """Only a page's first or last line can be a page number; a value line near the edge stays."""
+    pages, stats = strip_repeated_lines(["Totals\n42\nUnits shipped\n7"])
+
+    assert pages == ["Totals\n42\nUnits shipped"]
+    assert stats["boilerplate_lines_removed"] == 1
+
+
+def test_whitespace_collapsed():
+    """Runs of spaces and blank lines are collapsed."""
+    pages, _ = strip_repeated_lines(["First   line\n\n\n\nSecond\tline  \n\n"])
+
+    assert pages == ["First line\n\nSecond line"]
+
+
+def test_savings_recorded():
+    """Stats report byte and token savings against the raw text."""
+    raw = "\n".join(_guide_pages())
+    pages, strip_stats = strip_repeated_lines(_guide_pages())
+
+    stats = normalization_stats(raw, "\n".join(pages), **strip_stats)
+
+    assert stats["bytes_saved"] == stats["original_bytes"] - stats["normalized_bytes"] > 0
+    assert stats["token_savings_pct"] > 10
+    assert stats["boilerplate_lines_removed"] == 48
@@ -0,0 +1,117 @@
+"""
+Tests for the token estimator, context-window registry and context-window guard.
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from app.services.http_clients import HTTPClientRegistry
+from app.services.llm import ContextWindowExceededError, ContextWindowGuard, LLMClient, LLMRequest
+from app.services.llm.context_guard import TRUNCATION_MARKER
+from app.services.tokens import ContextWindowRegistry, TokenEstimator, estimate_tokens, normalize_model_name
+
+
+def _guard(window: int, overflow: str = "reject", min_completion_tokens: int = 16) -> ContextWindowGuard:
+    return ContextWindowGuard(
+        estimator=TokenEstimator(tokenizer="approx"),
+        windows=ContextWindowRegistry(overrides={}, default=window),
+        overflow=overflow,
+        min_completion_tokens=min_completion_tokens
+    )
+
+
+def test_estimate_defaults_to_four_chars_per_token():
+    """Without a model the estimate matches the old ceil(len / 4) rule."""
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abc") == 1
+    assert estimate_tokens("a" * 400) == 100
+
+
+def test_estimate_uses_family_ratio_and_counts_cjk():
+    """Model families have their own ratio; CJK characters are one token each."""
+    estimator = TokenEstimator(tokenizer="approx")
+    text = "a" * 360
+    assert estimator.count(text, "llama2:7b") == 100
+    assert estimator.count(text, "unknown-model") == 90
+    assert estimator.count("测试用例", "llama3") == 4
+    assert estimator.count_messages([{"role": "user", "content": "a" * 40}]) == 3 + 4 + 10
+
+
+def test_truncate_returns_longest_fitting_prefix():
+    """Truncation keeps the longest prefix within the token budget."""
+    estimator = TokenEstimator(tokenizer="approx")
+    assert estimator.truncate("a" * 100, 10) == "a" * 40
+    assert estimator.truncate("short", 10) == "short"
+    assert estimator.truncate("a" * 100, 0) == ""
+
+
+def test_context_window_lookup_order():
+    """Overrides beat learned windows, which beat the family table and the default."""
+    assert normalize_model_name("meta-llama/Llama-3.1-8B-Instruct") == "llama3.18binstruct"
+    assert normalize_model_name("llama3.1:8b") == "llama3.1"
+
+    windows = ContextWindowRegistry(overrides={"gpt-4o": 1000}, default=4096)
+    assert windows.get("openrouter", "gpt-4o") == 1000
+    assert windows.get("ollama", "llama3.1:8b") == 131072
+    assert windows.get("ollama", "llama3:8b") == 8192
+    assert windows.get("ollama", "mystery") == 4096
+
+    windows.learn("openrouter", "mystery", 64000)
+    assert windows.get("openrouter", "mystery") == 64000
+    assert windows.get("ollama", "mystery") == 4096
+
+
+def test_guard_passes_requests_that_fit():
+    """A request within the window is returned unchanged."""
+    request = LLMRequest.from_prompt("ollama", "m", "a" * 40, max_tokens=100)
+    assert _guard(1000).fit(request) is request
+
+
+def test_guard_rejects_oversized_prompt():
+    """With the reject policy an oversized request raises with the token numbers."""
+    guard = _guard(100)
+    request = LLMRequest.from_prompt("ollama", "m", "a" * 400, max_tokens=50)
+    with pytest.raises(ContextWindowExceededError) as exc_info:
+        guard.fit(request)
+    error = exc_info.value
+    assert error.context_window == 100 and error.prompt_tokens == 107 and error.max_tokens == 50
+    assert not error.retryable
+    assert guard.stats()["rejected"] == 1
+
+
+def test_guard_trims_max_tokens_first():
+    """When the prompt fits, trimming only lowers max_tokens."""
+    request = LLMRequest.from_prompt("ollama", "m", "a" * 200, max_tokens=500)
+    trimmed = _guard(100, overflow="trim").fit(request)
+    assert trimmed.max_tokens == 100 - 57
+    assert trimmed.messages == request.messages
+
+
+def test_guard_truncates_longest_message():
+    """When the prompt itself is too long, the longest non-system message is cut."""
+    guard = _guard(200, overflow="trim")
+    request = LLMRequest.from_prompt("ollama", "m", "a" * 2000, system="Be brief", max_tokens=100)
+    trimmed = guard.fit(request)
+
+    assert trimmed.messages[0] == {"role": "system", "content": "Be brief"}
+    assert trimmed.messages[1]["content"].endswith(TRUNCATION_MARKER)
+    assert 16 <= trimmed.max_tokens <= 100
+    assert guard.prompt_tokens(trimmed) + trimmed.max_tokens <= 200
+    assert request.messages[1]["content"] == "a" * 2000
+
+
+def test_client_rejects_before_sending():
+    """The client raises on an oversized prompt without calling the provider."""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json={})
+
+    client = LLMClient(clients=HTTPClientRegistry(transport=httpx.MockTransport(handler)), guard=_guard(100))
+    request = LLMRequest.from_prompt("ollama", "m", "a" * 400, base_url="http://ollama.test", max_tokens=50)
+
+    with pytest.raises(ContextWindowExceededError):
+        asyncio.run(client.complete(request))
+    assert calls == []
@@ -0,0 +1,101 @@
+"""
+Tests for KB chunking and vector indexes.
+"""
+import numpy as np
+
+from app.services.kb.chunker import chunk_text
+from app.services.kb.embeddings import HashingEmbedder
+from app.services.kb.vector_index import ExactIndex, HNSWIndex, create_index
+
+
+def _random_vectors(n, dim=32, seed=7):
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((n, dim)).astype(np.float32)
+
+
+def test_exact_index_returns_nearest_first():
+    """Exact index ranks the identical vector first."""
+    vectors = _random_vectors(50)
+    index = ExactIndex(dim=32)
+    index.add_batch(list(range(50)), vectors)
+
+    results = index.search(vectors[10], k=3)
+    assert results[0][0] == 10
+    assert abs(results[0][1] - 1.0) < 1e-5
+    assert len(results) == 3
+
+
+def test_hnsw_recall_against_exact():
+    """HNSW recall@10 stays high relative to brute force."""
+    vectors = _random_vectors(600)
+    queries = _random_vectors(30, seed=11)
+    exact = ExactIndex(dim=32)
+    hnsw = HNSWIndex(dim=32, M=12, ef_construction=80, ef_search=64, seed=1)
+    exact.add_batch(list(range(600)), vectors)
+    hnsw.add_batch(list(range(600)), vectors)
+
+    hits = 0
+    for query in queries:
+        truth = {label for label, _ in exact.search(query, k=10)}
+        found = {label for label, _ in hnsw.search(query, k=10)}
+        hits += len(truth & found)
+    assert hits / (10 * len(queries)) >= 0.9
+
+
+def test_hnsw_remove_and_readd():
+    """Removed labels are never returned; re-adding makes them searchable again."""
+    vectors = _random_vectors(200)
+    index = HNSWIndex(dim=32, M=8, seed=3)
+    index.add_batch(list(range(200)), vectors)
+
+    assert index.remove(5)
+    assert 5 not in index
+    assert all(label != 5 for label, _ in index.search(vectors[5], k=10))
+
+    index.add(5, vectors[5])
+    assert index.search(vectors[5], k=1)[0][0] == 5
+    assert len(index) == 200
+
+
+def test_hnsw_compacts_after_many_removals():
+    """Deleting most of the graph triggers a rebuild without losing live labels."""
+    vectors = _random_vectors(100)
+    index = HNSWIndex(dim=32, M=8, seed=5)
+    index.add_batch(list(range(100)), vectors)
+    for label in range(60):
+        index.remove(label)
+
+    assert len(index) == 40
+    assert index.stats()["deleted"] < 60
+    assert index.search(vectors[80], k=1)[0][0] == 80
+
+
+def test_create_index_rejects_unknown_type():
+    """Unknown index types raise ValueError."""
+    try:
+        create_index("ivf", dim=8)
+        assert False, "Expected ValueError"
+    except ValueError:
+        pass
+
+
+def test_chunk_text_tracks_pages():
+    """Chunks never cross PDF page markers and carry page numbers."""
+    text = "--- Page 1 ---\n" + "alpha " * 300 + "\n\n--- Page 2 ---\n" + "beta " * 50
+    chunks = chunk_text("doc", text, chunk_size=500, overlap=50)
+
+    assert {chunk.page for chunk in chunks} == {1, 2}
+    assert all("beta" not in chunk.text for chunk in chunks if chunk.page == 1)
+    assert chunks[0].chunk_id == "doc:0"
+    assert text[chunks[0].start:chunks[0].end] == chunks[0].text
+
+
+def test_hashing_embedder_similarity():
+    """Texts sharing vocabulary embed closer than unrelated texts."""
+    embedder = HashingEmbedder(dim=256)
+    a, b, c = embedder.embed([
+        "Verify Net Plan Price on subscription dashboard",
+        "Net Plan Price shown on the subscription dashboard",
+        "Reset the router firmware"
+    ])
+    assert float(a @ b) > float(a @ c)